@@ -5,3 +5,6 @@ class GatewayConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.gateway'
     verbose_name = 'Gateway'
+
+    def ready(self):
+        from . import signals  # noqa: F401
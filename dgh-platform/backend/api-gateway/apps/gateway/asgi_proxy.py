@@ -0,0 +1,236 @@
+# api-gateway/apps/gateway/asgi_proxy.py
+"""
+Proxy ASGI en streaming vers les microservices.
+
+Servi par config/asgi.py devant l'application Django : les requêtes que
+ServiceRoutingMiddleware proxifierait (ServiceRouter.route_request) sont
+transmises directement, sans passer par une vue ni bloquer un thread.
+Les corps de requête et de réponse sont relayés octet par octet, au fil
+de l'eau (JSON, audio, CSV...), sans décodage ni ré-encodage ; un seul
+worker multiplexe ainsi autant d'appels en cours que le pool du service
+le permet (settings.SERVICE_CLIENTS).
+
+Les réponses proxifiées reçoivent les en-têtes que les middlewares placés
+avant ServiceRoutingMiddleware leur auraient ajoutés (CORS, sécurité,
+X-Frame-Options), calculés par ces mêmes middlewares (HEADER_MIDDLEWARE).
+Les requêtes qu'ils traitent eux-mêmes (preflight CORS, redirection HTTPS),
+les autres requêtes, les lectures des routes en cache (response_cache) et
+tout le trafic WSGI restent servis par Django.
+"""
+import io
+import time
+import uuid
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+import logging
+
+from .middleware import identity_headers
+from .routers import ServiceRouter
+from . import response_cache, service_clients
+
+logger = logging.getLogger(__name__)
+
+# En-têtes propres à une connexion (RFC 9110 §7.6.1), jamais relayés
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'transfer-encoding', 'upgrade', 'host',
+}
+
+# En-têtes de réponse posés par le serveur ASGI lui-même
+SERVER_HEADERS = {'date', 'server'}
+
+# En-têtes d'identité posés par la gateway, jamais acceptés du client
+IDENTITY_HEADERS = {'x-user-id', 'x-user-type'}
+
+# Middlewares de settings.MIDDLEWARE (avant ServiceRoutingMiddleware) dont les
+# en-têtes de réponse s'appliquent aussi aux réponses proxifiées
+HEADER_MIDDLEWARE = (
+    'django.middleware.security.SecurityMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+)
+
+
+class StreamingProxy:
+    """Application ASGI : proxy streaming pour les routes des microservices, Django sinon"""
+
+    def __init__(self, django_application):
+        self.django_application = django_application
+        self.header_middleware = {
+            path: import_string(path)(_not_called)
+            for path in HEADER_MIDDLEWARE if path in settings.MIDDLEWARE
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+
+        if scope['type'] == 'http':
+            service_info = ServiceRouter.route_request(scope['path'])
+            # Lectures des routes en cache : ResponseCacheMiddleware (Django) s'en charge
+            cached_read = scope['method'] in response_cache.SAFE_METHODS and response_cache.policy_for(scope['path'])
+            if service_info and not cached_read:
+                # Corps jamais lu : seuls méthode, chemin et en-têtes servent aux middlewares
+                request = ASGIRequest(scope, io.BytesIO())
+                if not self.answered_by_django(request):
+                    return await self.proxy(scope, receive, send, request, *service_info)
+
+        return await self.django_application(scope, receive, send)
+
+    def answered_by_django(self, request):
+        """Preflight CORS (OPTIONS) ou redirection HTTPS : réponse des middlewares Django"""
+        if request.method == 'OPTIONS':
+            return True
+        security = self.header_middleware.get('django.middleware.security.SecurityMiddleware')
+        return bool(security and security.process_request(request))
+
+    def gateway_headers(self, request, upstream_headers):
+        """
+        En-têtes CORS / sécurité des middlewares Django pour une réponse
+        proxifiée ; ils remplacent ceux du service (dont tous ses en-têtes
+        CORS), Vary est fusionné.
+        """
+        response = HttpResponse()
+        del response['Content-Type']
+        if 'vary' in upstream_headers:
+            response['Vary'] = upstream_headers['vary']
+        for middleware in self.header_middleware.values():
+            if hasattr(middleware, 'add_response_headers'):
+                middleware.add_response_headers(request, response)
+            else:
+                middleware.process_response(request, response)
+        return [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in response.items()]
+
+    async def lifespan(self, receive, send):
+        """Démarrage / arrêt du worker : fermeture des pools de la boucle"""
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await service_clients.aclose_clients()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def proxy(self, scope, receive, send, request, service_key, service_url):
+        start_time = time.time()
+        request_id = str(uuid.uuid4())
+        # Même traces que RequestTracingMiddleware, que le proxy court-circuite
+        logger.info(f"Request started: {request.method} {request.path} [ID: {request_id}]")
+        headers = [
+            (name.decode('latin-1'), value.decode('latin-1'))
+            for name, value in scope['headers']
+            if name.decode('latin-1').lower() not in HOP_BY_HOP_HEADERS | IDENTITY_HEADERS
+        ]
+        authorization = next((value for name, value in headers if name.lower() == 'authorization'), '')
+
+        # Authentification JWT (accès base de données, hors boucle)
+        headers += list((await sync_to_async(_resolve_identity, thread_sensitive=False)(authorization)).items())
+        if scope.get('client'):
+            headers.append(('X-Forwarded-For', scope['client'][0]))
+        headers.append(('X-Request-ID', request_id))
+
+        url = f"{service_url}{(scope.get('raw_path') or scope['path'].encode()).decode('latin-1')}"
+        if scope['query_string']:
+            url = f"{url}?{scope['query_string'].decode('latin-1')}"
+
+        client = service_clients.get_async_client(service_key)
+        has_body = any(name.lower() in (b'content-length', b'transfer-encoding') for name, _ in scope['headers'])
+        upstream_request = client.build_request(
+            method=scope['method'],
+            url=url,
+            headers=headers,
+            content=_request_body(receive) if has_body else None,
+        )
+
+        try:
+            response = await client.send(upstream_request, stream=True)
+        except Exception as e:
+            logger.error(f"Error routing to {service_key}: {str(e)}")
+            await _send_error(send, request_id, self.gateway_headers(request, {}))
+            return
+
+        try:
+            gateway_headers = self.gateway_headers(request, response.headers)
+            replaced = {name for name, _ in gateway_headers}
+            response_headers = [
+                (name, value) for name, value in response.headers.raw
+                if name.decode('latin-1').lower() not in HOP_BY_HOP_HEADERS | SERVER_HEADERS
+                and name.lower() not in replaced
+                # Politique CORS de la gateway uniquement
+                and not name.lower().startswith(b'access-control-')
+            ]
+            response_headers += gateway_headers + [
+                (b'x-request-id', request_id.encode()),
+                (b'x-response-time', f"{time.time() - start_time:.3f}s".encode()),
+            ]
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': response_headers,
+            })
+            async for chunk in response.aiter_raw():
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b'', 'more_body': False})
+        except Exception as e:
+            # En-têtes déjà partis : on ne peut qu'interrompre la réponse
+            logger.error(f"Streaming from {service_key} interrupted: {str(e)}")
+        finally:
+            await response.aclose()
+
+        # Écriture réussie : invalidation des routes en cache concernées
+        if response_cache.routes_invalidated_by(scope['path']):
+            await sync_to_async(response_cache.invalidate_for_write, thread_sensitive=False)(
+                scope['method'], scope['path'], response.status_code
+            )
+
+        logger.info(
+            f"Proxied: {scope['method']} {scope['path']} -> {service_key} "
+            f"[ID: {request_id}] [Status: {response.status_code}] "
+            f"[Duration: {time.time() - start_time:.3f}s]"
+        )
+
+
+def _not_called(request):
+    """get_response des middlewares de HEADER_MIDDLEWARE (seuls leurs hooks sont appelés)"""
+    raise NotImplementedError
+
+
+def _resolve_identity(authorization):
+    """identity_headers() dans un thread du pool, connexion DB rendue ensuite"""
+    try:
+        return identity_headers(authorization)
+    finally:
+        close_old_connections()
+
+
+async def _request_body(receive):
+    """Corps de la requête client, relayé au fil des messages ASGI"""
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            raise httpx.ReadError('Client disconnected')
+        if message.get('body'):
+            yield message['body']
+        if not message.get('more_body', False):
+            return
+
+
+async def _send_error(send, request_id, gateway_headers):
+    body = b'{"error": "Service temporarily unavailable"}'
+    await send({
+        'type': 'http.response.start',
+        'status': 503,
+        'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode()),
+            (b'x-request-id', request_id.encode()),
+        ] + gateway_headers,
+    })
+    await send({'type': 'http.response.body', 'body': body})
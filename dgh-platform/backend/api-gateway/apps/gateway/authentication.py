@@ -0,0 +1,92 @@
+# api-gateway/apps/gateway/authentication.py
+"""
+Authentification JWT avec cache d'identité.
+
+JWTAuthentication recharge le User à chaque requête, puis le middleware
+relit son profil Patient/Professional pour l'ID métier. Ici l'identité
+(ID user, type, ID métier et drapeaux du compte, sans donnée personnelle)
+est résolue une fois par token puis servie par
+cache_utils.get_cached_identity : aucune requête SQL pour une requête
+authentifiée tant que l'entrée est en cache, vues proxy comprises (elles
+lisent l'ID métier via get_profile_id).
+"""
+import uuid
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from .cache_utils import get_cached_identity
+
+# Drapeaux du compte repris dans l'identité en cache
+IDENTITY_FLAGS = ('is_active', 'is_staff', 'is_superuser')
+
+# Modèle de profil -> (type d'utilisateur, champ de l'ID métier)
+PROFILE_FIELDS = {
+    'users.Patient': ('patient', 'patient_id'),
+    'users.Professional': ('professional', 'professional_id'),
+}
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication dont l'utilisateur est reconstruit depuis le cache d'identité"""
+
+    def get_user(self, validated_token):
+        identity = get_cached_identity(validated_token, lambda: self.load_identity(validated_token))
+        return identity_user(identity)
+
+    def load_identity(self, validated_token):
+        """IDs et drapeaux du compte (vérifications de JWTAuthentication incluses)"""
+        from apps.users.models import Patient, Professional
+
+        user = super().get_user(validated_token)
+        specific_id = None
+        if user.user_type == 'patient':
+            specific_id = Patient.objects.filter(user=user).values_list('patient_id', flat=True).first()
+        elif user.user_type == 'professional':
+            specific_id = Professional.objects.filter(user=user).values_list('professional_id', flat=True).first()
+
+        identity = {
+            'user_id': str(user.pk),
+            'user_type': user.user_type,
+            # admin, ou profil manquant : ID user direct
+            'specific_id': str(specific_id or user.pk),
+            'has_profile': specific_id is not None,
+        }
+        identity.update((flag, getattr(user, flag)) for flag in IDENTITY_FLAGS)
+        return identity
+
+
+def identity_user(identity):
+    """
+    User propre à la requête, construit depuis l'identité en cache : seuls
+    l'ID, le type et les drapeaux sont renseignés (ne jamais l'enregistrer).
+    """
+    from apps.users.models import User
+
+    user = User(
+        id=uuid.UUID(identity['user_id']),
+        user_type=identity['user_type'],
+        **{flag: identity[flag] for flag in IDENTITY_FLAGS},
+    )
+    user._state.adding = False
+    user.gateway_identity = dict(identity)
+    return user
+
+
+def get_profile_id(user, model):
+    """
+    ID métier (patient_id ou professional_id) de l'utilisateur authentifié,
+    lu dans l'identité en cache ; lève model.DoesNotExist si l'utilisateur
+    n'a pas de profil ``model`` (Patient ou Professional).
+    """
+    user_type, id_field = PROFILE_FIELDS[model._meta.label]
+    identity = getattr(user, 'gateway_identity', None)
+    if identity is None or 'has_profile' not in identity:
+        # Utilisateur hors cache d'identité (ou entrée antérieure au drapeau)
+        specific_id = model.objects.filter(user_id=user.pk).values_list(id_field, flat=True).first()
+        if specific_id is None:
+            raise model.DoesNotExist(f"{model.__name__} introuvable pour l'utilisateur {user.pk}")
+        return str(specific_id)
+
+    if identity['user_type'] != user_type or not identity['has_profile']:
+        raise model.DoesNotExist(f"{model.__name__} introuvable pour l'utilisateur {user.pk}")
+    return identity['specific_id']
@@ -5,7 +5,10 @@ from django.core.cache import cache
 from django.conf import settings
 import json
 import hashlib
+from collections import OrderedDict
 from functools import wraps
+import threading
+import time
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,15 +47,26 @@ def cache_result(timeout=300, key_prefix=""):
         return wrapper
     return decorator
 
-def invalidate_cache_pattern(pattern):
-    """Invalide tous les caches correspondant à un pattern"""
+def invalidate_cache_pattern(pattern, batch_size=500):
+    """
+    Invalide tous les caches correspondant à un pattern.
+    Parcours incrémental (SCAN) et suppression par lots (UNLINK) : pas de
+    KEYS, qui bloque Redis le temps de parcourir toute la base.
+    """
     try:
         from django_redis import get_redis_connection
         redis_conn = get_redis_connection("default")
-        keys = redis_conn.keys(f"*{pattern}*")
-        if keys:
-            redis_conn.delete(*keys)
-            logger.info(f"Invalidated {len(keys)} cache keys for pattern: {pattern}")
+        deleted = 0
+        batch = []
+        for key in redis_conn.scan_iter(match=f"*{pattern}*", count=batch_size):
+            batch.append(key)
+            if len(batch) >= batch_size:
+                deleted += redis_conn.unlink(*batch)
+                batch = []
+        if batch:
+            deleted += redis_conn.unlink(*batch)
+        if deleted:
+            logger.info(f"Invalidated {deleted} cache keys for pattern: {pattern}")
     except Exception as e:
         logger.error(f"Error invalidating cache: {e}")
 
@@ -75,7 +89,142 @@ def get_cached_departments():
     # Cette fonction sera appelée depuis le feedback-service
     pass
 
-@cache_result(timeout=1800, key_prefix="jwt_decode")
-def get_cached_jwt_decode(token_hash):
-    """Cache les tokens JWT décodés"""
-    pass
\ No newline at end of file
+# ========== CACHE D'IDENTITÉ (JWT -> utilisateur) ==========
+#
+# Identité résolue d'un token d'accès : dict d'IDs (user, ID métier
+# Patient/Professional) et de drapeaux du compte, jamais d'instance de modèle.
+# Clé = claim jti du token (hash du token à défaut).
+# Deux niveaux : LRU en mémoire du processus (LOCAL_TTL court), puis cache
+# Django (Redis) ; durée de vie bornée par l'expiration du token. Invalidation
+# par utilisateur (déconnexion, modification du compte ou du profil) :
+# incrément atomique de sa version (identity_version:<user>), qui périme
+# toutes ses entrées Redis, et purge du LRU du processus courant ; les LRU
+# des autres workers expirent après LOCAL_TTL.
+
+IDENTITY_DEFAULTS = {
+    'TTL': 900,
+    'LOCAL_TTL': 30,
+    'LOCAL_MAX_ENTRIES': 1024,
+}
+
+
+def identity_settings():
+    options = dict(IDENTITY_DEFAULTS)
+    options.update(getattr(settings, 'IDENTITY_CACHE', {}))
+    return options
+
+
+class LocalLRUCache:
+    """LRU en mémoire, thread-safe, avec expiration par entrée"""
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries[key] = (time.time() + timeout, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete_where(self, predicate):
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_local_identities = LocalLRUCache(identity_settings()['LOCAL_MAX_ENTRIES'])
+
+
+def _identity_key(token_key):
+    return f"identity:{token_key}"
+
+
+def _identity_version_key(user_id):
+    return f"identity_version:{user_id}"
+
+
+def identity_token_key(validated_token):
+    """Clé d'un token validé : claim jti, sinon hash du token"""
+    from rest_framework_simplejwt.settings import api_settings
+
+    jti = validated_token.get(api_settings.JTI_CLAIM)
+    if jti:
+        return str(jti)
+    return hashlib.sha256(str(validated_token).encode()).hexdigest()
+
+
+def get_cached_identity(validated_token, load_identity):
+    """
+    Identité d'un token validé : LRU local, puis Redis, sinon ``load_identity()``
+    (dict avec au moins 'user_id') mise en cache jusqu'à l'expiration du token.
+    Une entrée Redis n'est valide que pour la version courante de l'utilisateur.
+    """
+    from rest_framework_simplejwt.settings import api_settings
+
+    options = identity_settings()
+    token_key = identity_token_key(validated_token)
+    ttl = int(min(options['TTL'], validated_token.get('exp', time.time() + options['TTL']) - time.time()))
+
+    identity = _local_identities.get(token_key)
+    if identity is not None:
+        return identity
+
+    # Entrée et version lues en un seul aller-retour
+    identity_key = _identity_key(token_key)
+    version_key = _identity_version_key(validated_token.get(api_settings.USER_ID_CLAIM))
+    try:
+        cached = cache.get_many([identity_key, version_key])
+    except Exception as e:
+        logger.error(f"Error reading identity cache: {e}")
+        cached = {}
+    version = cached.get(version_key, 0)
+    identity = cached.get(identity_key)
+
+    if identity is None or identity.get('version') != version:
+        identity = dict(load_identity(), version=version)
+        if ttl > 0:
+            try:
+                cache.set(identity_key, identity, ttl)
+            except Exception as e:
+                logger.error(f"Error writing identity cache: {e}")
+
+    if ttl > 0:
+        _local_identities.set(token_key, identity, min(options['LOCAL_TTL'], ttl))
+    return identity
+
+
+def invalidate_user_identity(user_id):
+    """Oublie les identités en cache d'un utilisateur (tous ses tokens)"""
+    user_id = str(user_id)
+    _local_identities.delete_where(lambda identity: identity['user_id'] == user_id)
+    version_key = _identity_version_key(user_id)
+    try:
+        try:
+            cache.incr(version_key)
+        except ValueError:
+            # Première invalidation : les entrées existantes portent la version 0.
+            # Sans expiration, sinon un retour à 0 revaliderait ces entrées.
+            if not cache.add(version_key, 1, None):
+                cache.incr(version_key)
+        logger.info(f"Invalidated cached identities for user {user_id}")
+    except Exception as e:
+        logger.error(f"Error invalidating identity cache: {e}")
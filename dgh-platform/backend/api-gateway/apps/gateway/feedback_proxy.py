@@ -9,6 +9,8 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django.conf import settings
 from ..users.models import Patient, Professional
+from .authentication import get_profile_id
+from .service_clients import ServiceCall, gather, get_client
 from .swagger_schemas import (
     create_feedback_decorator, my_feedbacks_decorator, 
     feedback_status_decorator, test_feedback_decorator,
@@ -97,7 +99,7 @@ def create_feedback(request):
     """
     # Vérification que l'utilisateur est un patient
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -106,7 +108,7 @@ def create_feedback(request):
     
     # Préparation des données avec patient_id automatique
     feedback_data = request.data.copy()
-    feedback_data['patient_id'] = str(patient.patient_id)
+    feedback_data['patient_id'] = patient_id
     
     # Validation des champs requis
     required_fields = ['description', 'rating', 'department_id']
@@ -121,7 +123,7 @@ def create_feedback(request):
     # Headers pour le feedback-service
     headers = {
         'Content-Type': 'application/json',
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'X-Request-ID': request.headers.get('X-Request-ID', ''),
         'Authorization': request.headers.get('Authorization', '')
@@ -136,12 +138,12 @@ def create_feedback(request):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{service_url}/api/v1/feedbacks/",  # URL corrigée
-                headers=headers,
-                json=feedback_data
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.post(
+            f"{service_url}/api/v1/feedbacks/",  # URL corrigée
+            headers=headers,
+            json=feedback_data
+        )
         
         if response.status_code == 201:
             return Response(
@@ -181,7 +183,7 @@ def my_feedbacks(request):
     Route: GET /api/v1/patient/feedbacks/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -189,7 +191,7 @@ def my_feedbacks(request):
         )
     
     headers = {
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -197,12 +199,12 @@ def my_feedbacks(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/feedbacks/my_feedbacks/",  # URL corrigée
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/feedbacks/my_feedbacks/",  # URL corrigée
+            headers=headers,
+            params=request.query_params.dict()
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -223,7 +225,7 @@ def feedback_status(request, feedback_id):
     Route: GET /api/v1/patient/feedback/{feedback_id}/status/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -231,7 +233,7 @@ def feedback_status(request, feedback_id):
         )
     
     headers = {
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -239,11 +241,11 @@ def feedback_status(request, feedback_id):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/feedbacks/{feedback_id}/processing_status/",  # URL corrigée
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/feedbacks/{feedback_id}/processing_status/",  # URL corrigée
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -264,7 +266,7 @@ def test_feedback(request):
     Route: POST /api/v1/patient/feedback/test/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -277,13 +279,13 @@ def test_feedback(request):
         'rating': request.data.get('rating', 5),
         'language': request.data.get('language', 'fr'),
         'input_type': request.data.get('input_type', 'text'),
-        'patient_id': str(patient.patient_id),
+        'patient_id': patient_id,
         'department_id': request.data.get('department_id', '87654321-4321-4321-4321-cba987654321')
     }
     
     headers = {
         'Content-Type': 'application/json',
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -291,12 +293,12 @@ def test_feedback(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{service_url}/api/v1/feedbacks/",  # URL corrigée
-                headers=headers,
-                json=test_data
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.post(
+            f"{service_url}/api/v1/feedbacks/",  # URL corrigée
+            headers=headers,
+            json=test_data
+        )
         
         if response.status_code == 201:
             feedback_data = response.json()
@@ -347,9 +349,9 @@ def appointments_view(request):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 logger.error(f"Patient non trouvé pour user {request.user.id}")
                 return Response(
@@ -359,9 +361,9 @@ def appointments_view(request):
                 
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 logger.error(f"Professional non trouvé pour user {request.user.id}")
                 return Response(
@@ -391,12 +393,12 @@ def appointments_view(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/appointments/",
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/appointments/",
+            headers=headers,
+            params=request.query_params.dict()
+        )
         
         # Enrichir la réponse avec les noms des patients
         appointments_data = response.json()
@@ -447,7 +449,7 @@ def appointment_detail_view(request, appointment_id):
 
 
 def _enrich_appointments_with_patient_names(appointments_data):
-    """Enrichit la liste des appointments avec les noms des patients"""
+    """Enrichit la liste des appointments avec les noms des patients (une requête)"""
     try:
         logger.info(f"Début enrichissement pour {len(appointments_data)} appointments")
         
@@ -459,13 +461,12 @@ def _enrich_appointments_with_patient_names(appointments_data):
             logger.warning("Aucun patient_id trouvé dans les appointments")
             return appointments_data
         
-        # Récupérer les informations des patients en une seule requête
-        patients = Patient.objects.filter(patient_id__in=patient_ids).select_related('user')
-        logger.info(f"Trouvé {patients.count()} patients dans la DB")
-        
+        # Récupérer les noms des patients en une seule requête
         patient_names = {
-            str(patient.patient_id): f"{patient.first_name} {patient.last_name}".strip() 
-            for patient in patients
+            str(patient_id): f"{first_name} {last_name}".strip()
+            for patient_id, first_name, last_name in Patient.objects.filter(
+                patient_id__in=patient_ids
+            ).values_list('patient_id', 'first_name', 'last_name')
         }
         logger.info(f"Mapping des noms créé: {len(patient_names)} entrées")
         
@@ -480,10 +481,6 @@ def _enrich_appointments_with_patient_names(appointments_data):
                 )
                 appointment['patient_name'] = patient_name
                 enriched_count += 1
-                
-        # Test forcé pour s'assurer que le code s'exécute
-        if appointments_data and len(appointments_data) > 0:
-            appointments_data[0]['patient_name'] = "TEST - FONCTION EXECUTEE"
         
         logger.info(f"Enrichissement terminé: {enriched_count} appointments enrichis")
         return appointments_data
@@ -506,9 +503,9 @@ def create_appointment_logic(request):
         # Utiliser directement le user_type depuis le modèle User au lieu de hasattr
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -516,9 +513,9 @@ def create_appointment_logic(request):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -570,12 +567,12 @@ def create_appointment_logic(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{service_url}/api/v1/appointments/",
-                headers=headers,
-                json=appointment_data
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.post(
+            f"{service_url}/api/v1/appointments/",
+            headers=headers,
+            json=appointment_data
+        )
         
         return Response(response.json(), status=response.status_code)
                 
@@ -602,9 +599,9 @@ def get_appointment(request, appointment_id):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -612,9 +609,9 @@ def get_appointment(request, appointment_id):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -657,11 +654,11 @@ def get_appointment(request, appointment_id):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/appointments/{appointment_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/appointments/{appointment_id}/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -688,9 +685,9 @@ def update_appointment(request, appointment_id):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -698,9 +695,9 @@ def update_appointment(request, appointment_id):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -745,19 +742,19 @@ def update_appointment(request, appointment_id):
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         method = request.method.lower()
         
-        with httpx.Client(timeout=30.0) as client:
-            if method == 'put':
-                response = client.put(
-                    f"{service_url}/api/v1/appointments/{appointment_id}/",
-                    headers=headers,
-                    json=request.data
-                )
-            else:  # PATCH
-                response = client.patch(
-                    f"{service_url}/api/v1/appointments/{appointment_id}/",
-                    headers=headers,
-                    json=request.data
-                )
+        client = get_client('FEEDBACK_SERVICE')
+        if method == 'put':
+            response = client.put(
+                f"{service_url}/api/v1/appointments/{appointment_id}/",
+                headers=headers,
+                json=request.data
+            )
+        else:  # PATCH
+            response = client.patch(
+                f"{service_url}/api/v1/appointments/{appointment_id}/",
+                headers=headers,
+                json=request.data
+            )
         
         return Response(response.json(), status=response.status_code)
                 
@@ -784,9 +781,9 @@ def delete_appointment(request, appointment_id):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -794,9 +791,9 @@ def delete_appointment(request, appointment_id):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -839,11 +836,11 @@ def delete_appointment(request, appointment_id):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.delete(
-                f"{service_url}/api/v1/appointments/{appointment_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.delete(
+            f"{service_url}/api/v1/appointments/{appointment_id}/",
+            headers=headers
+        )
         
         return Response(status=response.status_code)
             
@@ -870,9 +867,9 @@ def upcoming_appointments(request):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -880,9 +877,9 @@ def upcoming_appointments(request):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -925,11 +922,11 @@ def upcoming_appointments(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/appointments/upcoming/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/appointments/upcoming/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -956,9 +953,9 @@ def today_appointments(request):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -966,9 +963,9 @@ def today_appointments(request):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -1011,11 +1008,11 @@ def today_appointments(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/appointments/today/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/appointments/today/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1044,9 +1041,9 @@ def list_prescriptions(request):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -1054,9 +1051,9 @@ def list_prescriptions(request):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -1099,12 +1096,12 @@ def list_prescriptions(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/prescriptions/",
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/prescriptions/",
+            headers=headers,
+            params=request.query_params.dict()
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1125,9 +1122,9 @@ def create_prescription(request):
     Route: POST /api/v1/prescriptions/
     """
     try:
-        professional = Professional.objects.get(user=request.user)
+        professional_id = get_profile_id(request.user, Professional)
         user_type = 'professional'
-        user_id = str(professional.professional_id)
+        user_id = professional_id
     except Professional.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux professionnels de santé'}, 
@@ -1146,12 +1143,12 @@ def create_prescription(request):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.post(
-                f"{service_url}/api/v1/prescriptions/",
-                headers=headers,
-                json=prescription_data
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.post(
+            f"{service_url}/api/v1/prescriptions/",
+            headers=headers,
+            json=prescription_data
+        )
         
         return Response(response.json(), status=response.status_code)
                 
@@ -1178,9 +1175,9 @@ def get_prescription(request, prescription_id):
         # Utiliser directement le user_type depuis le modèle User
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -1188,9 +1185,9 @@ def get_prescription(request, prescription_id):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -1233,11 +1230,11 @@ def get_prescription(request, prescription_id):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/prescriptions/{prescription_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/prescriptions/{prescription_id}/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1258,9 +1255,9 @@ def update_prescription(request, prescription_id):
     Route: PUT/PATCH /api/v1/prescriptions/{prescription_id}/
     """
     try:
-        professional = Professional.objects.get(user=request.user)
+        professional_id = get_profile_id(request.user, Professional)
         user_type = 'professional'
-        user_id = str(professional.professional_id)
+        user_id = professional_id
     except Professional.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux professionnels de santé'}, 
@@ -1278,19 +1275,19 @@ def update_prescription(request, prescription_id):
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         method = request.method.lower()
         
-        with httpx.Client(timeout=30.0) as client:
-            if method == 'put':
-                response = client.put(
-                    f"{service_url}/api/v1/prescriptions/{prescription_id}/",
-                    headers=headers,
-                    json=request.data
-                )
-            else:  # PATCH
-                response = client.patch(
-                    f"{service_url}/api/v1/prescriptions/{prescription_id}/",
-                    headers=headers,
-                    json=request.data
-                )
+        client = get_client('FEEDBACK_SERVICE')
+        if method == 'put':
+            response = client.put(
+                f"{service_url}/api/v1/prescriptions/{prescription_id}/",
+                headers=headers,
+                json=request.data
+            )
+        else:  # PATCH
+            response = client.patch(
+                f"{service_url}/api/v1/prescriptions/{prescription_id}/",
+                headers=headers,
+                json=request.data
+            )
         
         return Response(response.json(), status=response.status_code)
                 
@@ -1311,9 +1308,9 @@ def delete_prescription(request, prescription_id):
     Route: DELETE /api/v1/prescriptions/{prescription_id}/
     """
     try:
-        professional = Professional.objects.get(user=request.user)
+        professional_id = get_profile_id(request.user, Professional)
         user_type = 'professional'
-        user_id = str(professional.professional_id)
+        user_id = professional_id
     except Professional.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux professionnels de santé'}, 
@@ -1329,11 +1326,11 @@ def delete_prescription(request, prescription_id):
     try:
         service_url = settings.MICROSERVICES.get('FEEDBACK_SERVICE')
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.delete(
-                f"{service_url}/api/v1/prescriptions/{prescription_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.delete(
+            f"{service_url}/api/v1/prescriptions/{prescription_id}/",
+            headers=headers
+        )
         
         return Response(status=response.status_code)
             
@@ -1405,12 +1402,12 @@ def list_medications(request):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/medications/",
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/medications/",
+            headers=headers,
+            params=request.query_params.dict()
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1442,11 +1439,11 @@ def get_medication(request, medication_id):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/medications/{medication_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/medications/{medication_id}/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1469,7 +1466,7 @@ def list_patient_reminders(request):
     Route: GET /api/v1/patient/reminders/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -1477,7 +1474,7 @@ def list_patient_reminders(request):
         )
     
     headers = {
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -1490,12 +1487,12 @@ def list_patient_reminders(request):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/reminders/",
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/reminders/",
+            headers=headers,
+            params=request.query_params.dict()
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1516,7 +1513,7 @@ def get_patient_reminder(request, reminder_id):
     Route: GET /api/v1/patient/reminders/{reminder_id}/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -1524,7 +1521,7 @@ def get_patient_reminder(request, reminder_id):
         )
     
     headers = {
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -1537,11 +1534,11 @@ def get_patient_reminder(request, reminder_id):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/reminders/{reminder_id}/",
-                headers=headers
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.get(
+            f"{service_url}/api/v1/reminders/{reminder_id}/",
+            headers=headers
+        )
         
         return Response(response.json(), status=response.status_code)
             
@@ -1562,7 +1559,7 @@ def update_patient_reminder(request, reminder_id):
     Route: PATCH /api/v1/patient/reminders/{reminder_id}/
     """
     try:
-        patient = Patient.objects.get(user=request.user)
+        patient_id = get_profile_id(request.user, Patient)
     except Patient.DoesNotExist:
         return Response(
             {'error': 'Accès réservé aux patients uniquement'}, 
@@ -1579,7 +1576,7 @@ def update_patient_reminder(request, reminder_id):
     
     headers = {
         'Content-Type': 'application/json',
-        'X-User-ID': str(patient.patient_id),
+        'X-User-ID': patient_id,
         'X-User-Type': 'patient',
         'Authorization': request.headers.get('Authorization', '')
     }
@@ -1599,12 +1596,12 @@ def update_patient_reminder(request, reminder_id):
             'patient_action_time': timezone.now().isoformat()
         }
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.patch(
-                f"{service_url}/api/v1/reminders/{reminder_id}/patient_action/",
-                headers=headers,
-                json=update_data
-            )
+        client = get_client('FEEDBACK_SERVICE')
+        response = client.patch(
+            f"{service_url}/api/v1/reminders/{reminder_id}/patient_action/",
+            headers=headers,
+            json=update_data
+        )
         
         if response.status_code == 200:
             return Response({
@@ -1739,12 +1736,24 @@ def list_patients(request):
 
 # ========== DASHBOARD METRICS ENDPOINT ==========
 
+# Sections ajoutables aux métriques via ?include= (listes de rendez-vous du feedback-service)
+DASHBOARD_SECTIONS = {
+    'today': '/api/v1/appointments/today/',
+    'upcoming': '/api/v1/appointments/upcoming/',
+}
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def dashboard_metrics(request):
     """
     Proxy pour récupérer les métriques du dashboard professionnel
     Route: GET /api/v1/dashboard/metrics/
+    
+    Paramètre optionnel:
+    - include: sections à joindre, séparées par des virgules (today, upcoming),
+      récupérées en parallèle des métriques et enrichies des noms des patients
+      (clés today_appointments / upcoming_appointments)
     """
     user_type = None
     user_id = None
@@ -1753,9 +1762,9 @@ def dashboard_metrics(request):
         # Détermination du type d'utilisateur
         if request.user.user_type == 'patient':
             try:
-                patient = Patient.objects.get(user=request.user)
+                patient_id = get_profile_id(request.user, Patient)
                 user_type = 'patient'
-                user_id = str(patient.patient_id)
+                user_id = patient_id
             except Patient.DoesNotExist:
                 return Response(
                     {'error': 'Profil patient introuvable'}, 
@@ -1763,9 +1772,9 @@ def dashboard_metrics(request):
                 )
         elif request.user.user_type == 'professional':
             try:
-                professional = Professional.objects.get(user=request.user)
+                professional_id = get_profile_id(request.user, Professional)
                 user_type = 'professional'
-                user_id = str(professional.professional_id)
+                user_id = professional_id
             except Professional.DoesNotExist:
                 return Response(
                     {'error': 'Profil professionnel introuvable'}, 
@@ -1802,18 +1811,52 @@ def dashboard_metrics(request):
                 status=status.HTTP_503_SERVICE_UNAVAILABLE
             )
         
-        with httpx.Client(timeout=30.0) as client:
-            response = client.get(
-                f"{service_url}/api/v1/dashboard/metrics/",
-                headers=headers,
-                params=request.query_params.dict()
-            )
+        # Sections optionnelles (?include=today,upcoming), récupérées en parallèle des métriques
+        include = [
+            section for section in request.query_params.get('include', '').split(',')
+            if section in DASHBOARD_SECTIONS
+        ]
+        params = request.query_params.dict()
+        params.pop('include', None)
+        
+        response, *section_responses = gather(
+            ServiceCall('FEEDBACK_SERVICE', 'GET', f"{service_url}/api/v1/dashboard/metrics/",
+                        {'headers': headers, 'params': params}),
+            *[
+                ServiceCall('FEEDBACK_SERVICE', 'GET', f"{service_url}{DASHBOARD_SECTIONS[section]}",
+                            {'headers': headers})
+                for section in include
+            ]
+        )
+        if isinstance(response, Exception):
+            raise response
+        
+        metrics = response.json()
+        if response.status_code != 200 or not include:
+            return Response(metrics, status=response.status_code)
+        
+        # Une section en échec n'empêche pas de retourner les métriques
+        errors = {}
+        appointments = []
+        for section, section_response in zip(include, section_responses):
+            if isinstance(section_response, Exception) or section_response.status_code != 200:
+                logger.error(f"Section dashboard '{section}' indisponible: {section_response}")
+                errors[section] = 'Section temporairement indisponible'
+                metrics[f"{section}_appointments"] = None
+            else:
+                metrics[f"{section}_appointments"] = section_response.json()
+                appointments += metrics[f"{section}_appointments"]
         
-        return Response(response.json(), status=response.status_code)
+        # Noms des patients de toutes les sections en une requête
+        _enrich_appointments_with_patient_names(appointments)
+        if errors:
+            metrics.setdefault('metadata', {})['errors'] = errors
+        
+        return Response(metrics, status=response.status_code)
             
     except Exception as e:
         logger.error(f"Erreur lors de la récupération des métriques dashboard: {str(e)}")
         return Response(
             {'error': 'Erreur lors de la récupération des métriques dashboard'}, 
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
-        )
\ No newline at end of file
+        )
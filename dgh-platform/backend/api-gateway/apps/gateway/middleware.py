@@ -2,31 +2,125 @@
 import uuid
 import time
 import json
-from django.http import JsonResponse
+from urllib.parse import urlencode
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse
 from django.utils.deprecation import MiddlewareMixin
 from .routers import ServiceRouter
-import asyncio
+from . import response_cache, service_clients
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class ServiceRoutingMiddleware(MiddlewareMixin):
-    """Middleware pour router les requêtes vers les microservices"""
+def authenticate_jwt(authorization):
+    """Authentifie l'utilisateur d'un header Authorization (JWT, identité en cache)"""
+    from django.contrib.auth.models import AnonymousUser
+
+    try:
+        from rest_framework import HTTP_HEADER_ENCODING
+        from .authentication import CachedJWTAuthentication
+
+        if not authorization:
+            return AnonymousUser()
+        auth = CachedJWTAuthentication()
+        raw_token = auth.get_raw_token(authorization.encode(HTTP_HEADER_ENCODING))
+        if raw_token is None:
+            return AnonymousUser()
+        return auth.get_user(auth.get_validated_token(raw_token))
+
+    except Exception as e:
+        logger.error(f"JWT Authentication error: {e}")
+        return AnonymousUser()
+
+
+def identity_headers(authorization):
+    """Headers X-User-ID / X-User-Type transmis aux microservices (vide si anonyme)"""
+    user = authenticate_jwt(authorization)
+    if not (user and user.is_authenticated):
+        return {}
+
+    # ID métier selon le type d'utilisateur (patient_id, professional_id, sinon user.id)
+    identity = user.gateway_identity
+    logger.info(f"Middleware adding headers: X-User-Type={identity['user_type']}, X-User-ID={identity['specific_id']}")
+    return {'X-User-ID': identity['specific_id'], 'X-User-Type': identity['user_type']}
+
+
+class ResponseCacheMiddleware(MiddlewareMixin):
+    """Cache des réponses GET des routes configurées, avec ETag / 304 (voir response_cache)"""
 
     def process_request(self, request):
-        # Skip pour les routes internes
-        if request.path.startswith('/admin/') or \
-                request.path.startswith('/api/v1/auth/') or \
-                request.path.startswith('/swagger/'):
+        request.response_cache = None
+        if request.method not in response_cache.SAFE_METHODS:
+            return None
+        match = response_cache.policy_for(request.path)
+        if not match:
             return None
-            
-        # Skip pour les routes que nous gérons avec nos vues proxy enrichies
-        if request.path.startswith('/api/v1/appointments'):
+
+        route, policy = match
+        scope_id = self._scope_id(request, policy)
+        if scope_id is None:
+            return None  # Pas d'identité : la vue répond (401, token système...)
+
+        query = urlencode(sorted(request.GET.lists()), doseq=True)
+        entry, generation = response_cache.lookup(route, scope_id, request.path, query)
+        request.response_cache = (route, policy, scope_id, query, generation)
+        if entry is None:
             return None
 
-        # Déterminer le service cible
-        service_info = ServiceRouter.get_service_for_path(request.path)
+        if response_cache.etag_matches(request.headers.get('If-None-Match'), entry['etag']):
+            response = HttpResponseNotModified()
+        else:
+            response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+        self._set_cache_headers(response, policy, entry['etag'])
+        response['X-Cache'] = 'HIT'
+        return response
+
+    def process_response(self, request, response):
+        response_cache.invalidate_for_write(request.method, request.path, response.status_code)
+
+        cached = getattr(request, 'response_cache', None)
+        if not cached or response.has_header('X-Cache') or request.method != 'GET':
+            return response
+        if response.status_code != 200 or response.streaming or response.cookies:
+            return response
+
+        route, policy, scope_id, query, generation = cached
+        etag = response_cache.compute_etag(response.content)
+        response_cache.store(
+            route, policy, scope_id, request.path, query, generation,
+            response.status_code, response.content, response.get('Content-Type'), etag
+        )
+        if response_cache.etag_matches(request.headers.get('If-None-Match'), etag):
+            response = HttpResponseNotModified()
+        self._set_cache_headers(response, policy, etag)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def _scope_id(self, request, policy):
+        """Portée de l'entrée : 'public', 'authenticated' ou l'ID de l'utilisateur"""
+        if policy['SCOPE'] == 'public':
+            return 'public'
+        user = authenticate_jwt(request.META.get('HTTP_AUTHORIZATION', ''))
+        if not user.is_authenticated:
+            return None
+        if policy['SCOPE'] == 'authenticated':
+            return 'authenticated'
+        return user.gateway_identity['user_id']
+
+    def _set_cache_headers(self, response, policy, etag):
+        # no-cache : le client revalide à chaque fois (304 si l'ETag n'a pas changé)
+        response['ETag'] = etag
+        response['Cache-Control'] = 'public, no-cache' if policy['SCOPE'] == 'public' else 'private, no-cache'
+        if policy['SCOPE'] != 'public':
+            response['Vary'] = 'Authorization'
+
+
+class ServiceRoutingMiddleware(MiddlewareMixin):
+    """Middleware pour router les requêtes vers les microservices"""
+
+    def process_request(self, request):
+        # Skip pour les routes internes et celles gérées par nos vues proxy enrichies
+        service_info = ServiceRouter.route_request(request.path)
         if not service_info:
             return None  # Laisser Django gérer
 
@@ -45,11 +139,8 @@ class ServiceRoutingMiddleware(MiddlewareMixin):
                 json_data = None
                 data = request.body if request.body else None
 
-            # Appel asynchrone
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-
-            response = loop.run_until_complete(
+            # Appel asynchrone sur la boucle du worker (pool de connexions partagé)
+            response = service_clients.run(
                 ServiceRouter.forward_request(
                     service_url=service_url,
                     method=request.method,
@@ -57,19 +148,20 @@ class ServiceRoutingMiddleware(MiddlewareMixin):
                     headers=headers,
                     params=dict(request.GET),
                     json_data=json_data,
-                    data=data
+                    data=data,
+                    service_key=service_key
                 )
             )
 
-            # Construire la réponse Django
-            django_response = JsonResponse(
-                response.json() if response.headers.get('content-type', '').startswith('application/json') else {},
+            # Construire la réponse Django (corps transmis tel quel, JSON ou non)
+            django_response = HttpResponse(
+                response.content,
                 status=response.status_code,
-                safe=False
+                content_type=response.headers.get('content-type')
             )
 
             # Copier certains headers
-            for header in ['content-type', 'cache-control']:
+            for header in ['cache-control', 'content-disposition']:
                 if header in response.headers:
                     django_response[header] = response.headers[header]
 
@@ -94,53 +186,9 @@ class ServiceRoutingMiddleware(MiddlewareMixin):
                 headers[key.replace('_', '-').title()] = value
 
         # Ajouter l'authentification JWT
-        user = self._authenticate_jwt(request)
-        if user and user.is_authenticated:
-            # Récupérer le bon ID selon le type d'utilisateur
-            user_id = self._get_user_specific_id(user)
-            headers['X-User-ID'] = str(user_id)
-            headers['X-User-Type'] = user.user_type
-            logger.info(f"Middleware adding headers: X-User-Type={user.user_type}, X-User-ID={user_id}")
+        headers.update(identity_headers(request.META.get('HTTP_AUTHORIZATION', '')))
 
         return headers
-    
-    def _authenticate_jwt(self, request):
-        """Authentifie l'utilisateur via JWT token"""
-        try:
-            from rest_framework_simplejwt.authentication import JWTAuthentication
-            from django.contrib.auth.models import AnonymousUser
-            
-            auth = JWTAuthentication()
-            result = auth.authenticate(request)
-            
-            if result:
-                user, token = result
-                return user
-            return AnonymousUser()
-            
-        except Exception as e:
-            logger.error(f"JWT Authentication error: {e}")
-            from django.contrib.auth.models import AnonymousUser
-            return AnonymousUser()
-    
-    def _get_user_specific_id(self, user):
-        """Récupère le bon ID selon le type d'utilisateur"""
-        try:
-            if user.user_type == 'patient':
-                from apps.users.models import Patient
-                patient = Patient.objects.get(user=user)
-                return patient.patient_id
-            elif user.user_type == 'professional':
-                from apps.users.models import Professional
-                professional = Professional.objects.get(user=user)
-                return professional.professional_id
-            elif user.user_type == 'admin':
-                return user.id  # Pour admin, utiliser l'ID user direct
-            else:
-                return user.id  # Fallback
-        except Exception as e:
-            logger.error(f"Error getting user specific ID: {e}")
-            return user.id  # Fallback vers user.id
 
 
 class RequestTracingMiddleware(MiddlewareMixin):
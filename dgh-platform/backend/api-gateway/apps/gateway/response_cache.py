@@ -0,0 +1,126 @@
+# api-gateway/apps/gateway/response_cache.py
+"""
+Cache des réponses GET des routes en lecture fréquente (départements,
+médicaments, rendez-vous du jour / à venir, profils patients).
+
+Politique par route dans settings.RESPONSE_CACHE['ROUTES'] :
+- PATH : regex du chemin ;
+- TTL : durée de vie (secondes) ;
+- SCOPE : 'public' (partagé, sans authentification), 'authenticated'
+  (partagé entre utilisateurs authentifiés) ou 'user' (une entrée par
+  utilisateur) ;
+- INVALIDATED_BY : regex des chemins dont une écriture réussie (POST, PUT,
+  PATCH, DELETE) passant par la gateway invalide la route.
+
+Chaque réponse en cache porte un ETag (hash du corps) : un ``If-None-Match``
+correspondant reçoit un 304 sans corps. L'invalidation d'une route
+incrémente sa génération (une écriture Redis) au lieu de rechercher ses clés
+par motif ; les entrées d'une génération périmée sont ignorées puis expirent.
+"""
+import hashlib
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+import logging
+
+logger = logging.getLogger(__name__)
+
+SAFE_METHODS = ('GET', 'HEAD')
+
+
+def cache_settings():
+    return getattr(settings, 'RESPONSE_CACHE', {})
+
+
+def policy_for(path):
+    """(nom, politique) de la route en cache correspondant au chemin, sinon None"""
+    if not cache_settings().get('ENABLED', False):
+        return None
+    for route, policy in cache_settings().get('ROUTES', {}).items():
+        if re.match(policy['PATH'], path):
+            return route, policy
+    return None
+
+
+def routes_invalidated_by(path):
+    """Routes dont le cache est invalidé par une écriture sur ``path``"""
+    return [
+        route for route, policy in cache_settings().get('ROUTES', {}).items()
+        if any(re.match(pattern, path) for pattern in policy.get('INVALIDATED_BY', []))
+    ]
+
+
+def _generation_key(route):
+    return f"gw_response_gen:{route}"
+
+
+def _entry_key(route, scope_id, path, query):
+    digest = hashlib.md5(f"{path}?{query}".encode()).hexdigest()
+    return f"gw_response:{route}:{scope_id}:{digest}"
+
+
+def compute_etag(content):
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def etag_matches(if_none_match, etag):
+    """``If-None-Match`` (liste, '*', ETags faibles W/) couvre-t-il ``etag`` ?"""
+    if not if_none_match or not etag:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    return '*' in candidates or etag in [candidate.removeprefix('W/') for candidate in candidates]
+
+
+def lookup(route, scope_id, path, query):
+    """
+    (entrée, génération courante) en une lecture ; l'entrée, dict(status,
+    content, content_type, etag), vaut None si absente ou d'une génération
+    périmée. La génération est à repasser à store() : une invalidation
+    survenue pendant le calcul de la réponse la rend aussitôt périmée.
+    """
+    entry_key = _entry_key(route, scope_id, path, query)
+    try:
+        values = cache.get_many([_generation_key(route), entry_key])
+    except Exception as e:
+        logger.error(f"Error reading response cache: {e}")
+        return None, None
+    generation = values.get(_generation_key(route), 0)
+    entry = values.get(entry_key)
+    if entry and entry['generation'] == generation:
+        return entry, generation
+    return None, generation
+
+
+def store(route, policy, scope_id, path, query, generation, status, content, content_type, etag):
+    if generation is None:
+        return
+    try:
+        cache.set(_entry_key(route, scope_id, path, query), {
+            'generation': generation,
+            'status': status,
+            'content': content,
+            'content_type': content_type,
+            'etag': etag,
+        }, policy['TTL'])
+    except Exception as e:
+        logger.error(f"Error writing response cache: {e}")
+
+
+def invalidate_route(route):
+    """Invalide toutes les entrées d'une route (tous utilisateurs), en O(1)"""
+    try:
+        key = _generation_key(route)
+        cache.add(key, 0, None)
+        cache.incr(key)
+        logger.info(f"Response cache invalidated for route: {route}")
+    except Exception as e:
+        logger.error(f"Error invalidating response cache: {e}")
+
+
+def invalidate_for_write(method, path, status):
+    """Invalidation événementielle après une écriture réussie via la gateway"""
+    if method in SAFE_METHODS or method == 'OPTIONS' or not 200 <= status < 300:
+        return
+    for route in routes_invalidated_by(path):
+        invalidate_route(route)
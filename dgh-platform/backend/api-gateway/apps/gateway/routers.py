@@ -3,6 +3,7 @@ from typing import Dict, Optional, Tuple
 import httpx
 from django.conf import settings
 from django.core.cache import cache
+from .service_clients import get_async_client, service_key_for_url
 import logging
 
 logger = logging.getLogger(__name__)
@@ -23,6 +24,21 @@ class ServiceRouter:
         '/api/v1/blood-bank': 'ANALYTICS_SERVICE',
     }
 
+    # Routes traitées par Django lui-même (auth, admin, docs, vues proxy enrichies)
+    LOCAL_PREFIXES = (
+        '/admin/',
+        '/api/v1/auth/',
+        '/swagger/',
+        '/api/v1/appointments',
+    )
+
+    @classmethod
+    def route_request(cls, path: str) -> Optional[Tuple[str, str]]:
+        """Service cible d'une requête à proxifier (None si Django la traite)"""
+        if path.startswith(cls.LOCAL_PREFIXES):
+            return None
+        return cls.get_service_for_path(path)
+
     @classmethod
     def get_service_for_path(cls, path: str) -> Optional[Tuple[str, str]]:
         """Détermine quel service doit traiter cette route"""
@@ -42,9 +58,10 @@ class ServiceRouter:
             headers: Dict,
             params: Optional[Dict] = None,
             json_data: Optional[Dict] = None,
-            data: Optional[bytes] = None
+            data: Optional[bytes] = None,
+            service_key: Optional[str] = None
     ):
-        """Forward la requête au microservice approprié"""
+        """Forward la requête au microservice approprié (pool de connexions partagé)"""
         # Nettoyer les headers
         forwarded_headers = cls._clean_headers(headers)
 
@@ -52,23 +69,23 @@ class ServiceRouter:
         forwarded_headers['X-Forwarded-For'] = headers.get('REMOTE_ADDR', '')
         forwarded_headers['X-Request-ID'] = headers.get('X-Request-ID', '')
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            try:
-                response = await client.request(
-                    method=method,
-                    url=f"{service_url}{path}",
-                    headers=forwarded_headers,
-                    params=params,
-                    json=json_data,
-                    content=data
-                )
-                return response
-            except httpx.TimeoutException:
-                logger.error(f"Timeout calling {service_url}{path}")
-                raise
-            except Exception as e:
-                logger.error(f"Error calling {service_url}{path}: {str(e)}")
-                raise
+        client = get_async_client(service_key or service_key_for_url(service_url))
+        try:
+            response = await client.request(
+                method=method,
+                url=f"{service_url}{path}",
+                headers=forwarded_headers,
+                params=params,
+                json=json_data,
+                content=data
+            )
+            return response
+        except httpx.TimeoutException:
+            logger.error(f"Timeout calling {service_url}{path}")
+            raise
+        except Exception as e:
+            logger.error(f"Error calling {service_url}{path}: {str(e)}")
+            raise
 
     @staticmethod
     def _clean_headers(headers: Dict) -> Dict:
@@ -0,0 +1,323 @@
+# api-gateway/apps/gateway/service_clients.py
+"""
+Clients HTTP partagés vers les microservices.
+
+Un client httpx par service et par processus (worker) : les connexions
+restent ouvertes (keep-alive) d'une requête à l'autre au lieu d'un
+handshake TCP/TLS par appel. Limites de pool et timeouts par service
+viennent de settings.SERVICE_CLIENTS ('DEFAULT' + surcharges par clé de
+settings.MICROSERVICES). HTTP/2 est activé si demandé et si le paquet
+``h2`` est installé (il ne s'applique qu'aux services en https).
+
+- get_client(service_key) : client synchrone (vues proxy) ;
+- get_async_client(service_key) : client asynchrone de la boucle courante ;
+- run(coro) : exécute une coroutine sur la boucle d'arrière-plan du worker,
+  pour appeler le client asynchrone depuis du code synchrone (middleware)
+  sans créer une boucle par requête ;
+- gather(*calls) : plusieurs appels (ServiceCall) en parallèle depuis une vue
+  synchrone, pour les endpoints composites ;
+- pool_stats() : utilisation des pools (connexions actives/inactives,
+  requêtes en cours, erreurs, latence moyenne).
+"""
+import asyncio
+import atexit
+import os
+import threading
+import time
+from typing import NamedTuple, Optional
+
+import httpx
+from django.conf import settings
+import logging
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POOL_SETTINGS = {
+    'MAX_CONNECTIONS': 100,
+    'MAX_KEEPALIVE_CONNECTIONS': 20,
+    'KEEPALIVE_EXPIRY': 30.0,
+    'CONNECT_TIMEOUT': 5.0,
+    'READ_TIMEOUT': 30.0,
+    'WRITE_TIMEOUT': 30.0,
+    'POOL_TIMEOUT': 5.0,
+    'HTTP2': False,
+}
+
+_lock = threading.Lock()
+_pid = None
+_sync_clients = {}
+_async_clients = {}  # {boucle: {service_key: client}}
+_metrics = {}
+_loop = None
+
+
+def pool_settings(service_key):
+    """Paramètres du pool d'un service ('DEFAULT' complété par ses surcharges)"""
+    configured = getattr(settings, 'SERVICE_CLIENTS', {})
+    options = dict(DEFAULT_POOL_SETTINGS)
+    options.update(configured.get('DEFAULT', {}))
+    options.update(configured.get(service_key, {}))
+    return options
+
+
+def service_key_for_url(service_url):
+    """Clé settings.MICROSERVICES correspondant à une URL de service"""
+    for service_key, url in settings.MICROSERVICES.items():
+        if url == service_url:
+            return service_key
+    return 'DEFAULT'
+
+
+def _client_options(service_key):
+    options = pool_settings(service_key)
+    if options['HTTP2'] and not HTTP2_AVAILABLE:
+        logger.warning(f"HTTP/2 requested for {service_key} but 'h2' is not installed, using HTTP/1.1")
+    limits = httpx.Limits(
+        max_connections=options['MAX_CONNECTIONS'],
+        max_keepalive_connections=options['MAX_KEEPALIVE_CONNECTIONS'],
+        keepalive_expiry=options['KEEPALIVE_EXPIRY'],
+    )
+    timeout = httpx.Timeout(
+        connect=options['CONNECT_TIMEOUT'],
+        read=options['READ_TIMEOUT'],
+        write=options['WRITE_TIMEOUT'],
+        pool=options['POOL_TIMEOUT'],
+    )
+    return limits, timeout, bool(options['HTTP2'] and HTTP2_AVAILABLE)
+
+
+class PoolMetrics:
+    """Compteurs d'un pool : requêtes, erreurs, requêtes en cours, latence"""
+
+    def __init__(self, max_connections):
+        self.max_connections = max_connections
+        self.requests = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.total_time = 0.0
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return time.perf_counter()
+
+    def finish(self, started, failed=False):
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.in_flight -= 1
+            self.total_time += elapsed
+            if failed:
+                self.errors += 1
+
+    def as_dict(self):
+        return {
+            'max_connections': self.max_connections,
+            'requests': self.requests,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'peak_in_flight': self.peak_in_flight,
+            'avg_latency_ms': round(self.total_time / self.requests * 1000, 2) if self.requests else None,
+        }
+
+
+class _InstrumentedTransport(httpx.HTTPTransport):
+    """Transport synchrone qui alimente les PoolMetrics (jusqu'aux en-têtes de réponse)"""
+
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    def handle_request(self, request):
+        started = self.metrics.start()
+        failed = True
+        try:
+            response = super().handle_request(request)
+            failed = False
+            return response
+        finally:
+            self.metrics.finish(started, failed)
+
+
+class _AsyncInstrumentedTransport(httpx.AsyncHTTPTransport):
+    """Équivalent asynchrone de _InstrumentedTransport"""
+
+    def __init__(self, metrics, **kwargs):
+        super().__init__(**kwargs)
+        self.metrics = metrics
+
+    async def handle_async_request(self, request):
+        started = self.metrics.start()
+        failed = True
+        try:
+            response = await super().handle_async_request(request)
+            failed = False
+            return response
+        finally:
+            self.metrics.finish(started, failed)
+
+
+def _check_pid():
+    """Après un fork (gunicorn --preload), repartir de pools vides"""
+    global _pid, _loop
+    if _pid != os.getpid():
+        _pid = os.getpid()
+        _sync_clients.clear()
+        _async_clients.clear()
+        _metrics.clear()
+        _loop = None
+
+
+def _metrics_for(service_key, mode, max_connections):
+    key = (service_key, mode)
+    if key not in _metrics:
+        _metrics[key] = PoolMetrics(max_connections)
+    return _metrics[key]
+
+
+def get_client(service_key):
+    """Client synchrone partagé du service (ne pas le fermer)"""
+    client = _sync_clients.get(service_key)
+    if client is not None and _pid == os.getpid():
+        return client
+
+    with _lock:
+        _check_pid()
+        client = _sync_clients.get(service_key)
+        if client is None:
+            limits, timeout, http2 = _client_options(service_key)
+            metrics = _metrics_for(service_key, 'sync', limits.max_connections)
+            client = httpx.Client(
+                timeout=timeout,
+                transport=_InstrumentedTransport(metrics, limits=limits, http2=http2),
+            )
+            _sync_clients[service_key] = client
+            logger.info(f"HTTP pool created for {service_key} (sync, max {limits.max_connections}, http2={http2})")
+        return client
+
+
+def get_async_client(service_key):
+    """Client asynchrone partagé du service pour la boucle d'événements courante"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        _check_pid()
+        # Les clients d'une boucle fermée ne sont plus utilisables
+        for closed_loop in [other for other in _async_clients if other.is_closed()]:
+            del _async_clients[closed_loop]
+
+        clients = _async_clients.setdefault(loop, {})
+        client = clients.get(service_key)
+        if client is None:
+            limits, timeout, http2 = _client_options(service_key)
+            metrics = _metrics_for(service_key, 'async', limits.max_connections)
+            client = httpx.AsyncClient(
+                timeout=timeout,
+                transport=_AsyncInstrumentedTransport(metrics, limits=limits, http2=http2),
+            )
+            clients[service_key] = client
+            logger.info(f"HTTP pool created for {service_key} (async, max {limits.max_connections}, http2={http2})")
+        return client
+
+
+def _background_loop():
+    """Boucle d'événements du worker, dans un thread démon (créée à la demande)"""
+    global _loop
+    with _lock:
+        _check_pid()
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, name='gateway-http-loop', daemon=True).start()
+        return _loop
+
+
+def run(coro):
+    """Exécute ``coro`` sur la boucle d'arrière-plan et retourne son résultat (bloquant)"""
+    return asyncio.run_coroutine_threadsafe(coro, _background_loop()).result()
+
+
+class ServiceCall(NamedTuple):
+    """Appel à un microservice pour gather() ; ``options`` = kwargs de httpx (headers, params, json...)"""
+    service_key: str
+    method: str
+    url: str
+    options: Optional[dict] = None
+
+
+async def _gather(calls):
+    return await asyncio.gather(
+        *[
+            get_async_client(call.service_key).request(call.method, call.url, **(call.options or {}))
+            for call in calls
+        ],
+        return_exceptions=True
+    )
+
+
+def gather(*calls):
+    """
+    Exécute les ServiceCall en parallèle sur la boucle du worker : la latence
+    est celle de l'appel le plus lent, non la somme. Retourne, dans l'ordre
+    des appels, la réponse httpx ou l'exception levée (échec partiel possible).
+    """
+    if not calls:
+        return []
+    return run(_gather(calls))
+
+
+def _connection_counts(client):
+    """Connexions du pool httpcore d'un client : (ouvertes, actives)"""
+    pool = getattr(client._transport, '_pool', None)
+    connections = [connection for connection in getattr(pool, 'connections', []) if not connection.is_closed()]
+    active = sum(1 for connection in connections if not connection.is_idle())
+    return len(connections), active
+
+
+def pool_stats():
+    """Utilisation des pools par service et par mode (sync/async)"""
+    stats = {}
+    with _lock:
+        clients = [('sync', key, client) for key, client in _sync_clients.items()]
+        for loop_clients in _async_clients.values():
+            clients += [('async', key, client) for key, client in loop_clients.items()]
+        metrics = dict(_metrics)
+
+    for (service_key, mode), pool_metrics in metrics.items():
+        entry = pool_metrics.as_dict()
+        entry['connections'] = entry['active'] = 0
+        for client_mode, key, client in clients:
+            if (key, client_mode) == (service_key, mode):
+                opened, active = _connection_counts(client)
+                entry['connections'] += opened
+                entry['active'] += active
+        entry['idle'] = entry['connections'] - entry['active']
+        entry['utilization'] = round(entry['active'] / entry['max_connections'], 3)
+        stats.setdefault(service_key, {})[mode] = entry
+    return stats
+
+
+async def aclose_clients():
+    """Ferme les clients asynchrones de la boucle courante (arrêt d'un worker ASGI)"""
+    loop = asyncio.get_running_loop()
+    with _lock:
+        clients = _async_clients.pop(loop, {})
+    for client in clients.values():
+        await client.aclose()
+
+
+@atexit.register
+def close_clients():
+    """Ferme les connexions synchrones à l'arrêt du worker"""
+    for client in list(_sync_clients.values()):
+        try:
+            client.close()
+        except Exception:
+            pass
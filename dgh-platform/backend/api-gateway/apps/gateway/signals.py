@@ -0,0 +1,33 @@
+# api-gateway/apps/gateway/signals.py
+"""
+Invalidation du cache d'identité JWT quand un compte ou un profil change
+(type, activation, mot de passe, profil Patient/Professional créé ou supprimé),
+et des profils patients en cache (response_cache, route 'patient_profile').
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.users.models import Patient, Professional, User
+from .cache_utils import invalidate_user_identity
+from .response_cache import invalidate_route
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_identity_on_user_change(sender, instance, **kwargs):
+    # La connexion met à jour last_login : l'identité ne change pas
+    if kwargs.get('update_fields') == frozenset({'last_login'}):
+        return
+    invalidate_user_identity(instance.pk)
+    if instance.user_type == 'patient':
+        invalidate_route('patient_profile')
+
+
+@receiver(post_save, sender=Patient)
+@receiver(post_delete, sender=Patient)
+@receiver(post_save, sender=Professional)
+@receiver(post_delete, sender=Professional)
+def invalidate_user_identity_on_profile_change(sender, instance, **kwargs):
+    invalidate_user_identity(instance.user_id)
+    if sender is Patient:
+        invalidate_route('patient_profile')
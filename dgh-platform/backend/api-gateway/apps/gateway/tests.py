@@ -1,3 +1,339 @@
-from django.test import TestCase
+# api-gateway/apps/gateway/tests.py
+import asyncio
+import datetime
+import uuid
+from unittest import mock
 
-# Create your tests here.
+import httpx
+from django.contrib.auth.models import update_last_login
+from django.core.asgi import get_asgi_application
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from apps.gateway import cache_utils, feedback_proxy, response_cache, service_clients
+from apps.gateway.asgi_proxy import StreamingProxy
+from apps.gateway.middleware import ResponseCacheMiddleware, identity_headers
+from apps.users.models import Patient, User
+
+LOCMEM_CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+ORIGIN = 'http://localhost:3000'
+
+
+async def call_asgi(application, method, path, headers=(), body=b''):
+    """Appel ASGI direct : (statut, en-têtes en minuscules, corps)"""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'raw_path': path.encode(),
+        'query_string': b'', 'root_path': '', 'server': ('testserver', 80), 'client': ('127.0.0.1', 50000),
+        'headers': [(b'host', b'testserver')] + [(name.encode(), value.encode()) for name, value in headers],
+    }
+    messages = [{'type': 'http.request', 'body': body, 'more_body': False}]
+    sent = []
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        # Pas de déconnexion du client pendant l'appel
+        await asyncio.Event().wait()
+
+    async def send(message):
+        sent.append(message)
+
+    await application(scope, receive, send)
+    start = next(message for message in sent if message['type'] == 'http.response.start')
+    headers = {name.decode().lower(): value.decode() for name, value in start['headers']}
+    return start['status'], headers, b''.join(message.get('body', b'') for message in sent[1:])
+
+
+@override_settings(CACHES=LOCMEM_CACHES, CORS_ALLOWED_ORIGINS=[ORIGIN])
+class StreamingProxyCorsTests(TestCase):
+    def setUp(self):
+        self.upstream_calls = []
+
+        def handler(request):
+            self.upstream_calls.append(request)
+            return httpx.Response(
+                200, stream=httpx.ByteStream(b'{"ok": true}'),
+                headers={'Content-Type': 'application/json', 'Access-Control-Allow-Origin': '*'},
+            )
+
+        patcher = mock.patch.object(
+            service_clients, 'get_async_client',
+            side_effect=lambda service_key: httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.application = StreamingProxy(get_asgi_application())
+
+    async def test_proxied_get_has_cors_headers(self):
+        status, headers, body = await call_asgi(
+            self.application, 'GET', '/api/v1/feedback/', headers=[('origin', ORIGIN)],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body, b'{"ok": true}')
+        self.assertEqual(len(self.upstream_calls), 1)
+        # En-têtes CORS de la gateway, pas ceux du service
+        self.assertEqual(headers['access-control-allow-origin'], ORIGIN)
+        self.assertEqual(headers['access-control-allow-credentials'], 'true')
+        self.assertIn('x-frame-options', headers)
+
+    async def test_preflight_answered_by_gateway(self):
+        status, headers, _ = await call_asgi(
+            self.application, 'OPTIONS', '/api/v1/feedback/',
+            headers=[('origin', ORIGIN), ('access-control-request-method', 'POST')],
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(self.upstream_calls, [])
+        self.assertEqual(headers['access-control-allow-origin'], ORIGIN)
+        self.assertEqual(headers['access-control-allow-credentials'], 'true')
+        self.assertIn('POST', headers['access-control-allow-methods'])
+
+    async def test_unknown_origin_gets_no_cors_headers(self):
+        _, headers, _ = await call_asgi(
+            self.application, 'GET', '/api/v1/feedback/', headers=[('origin', 'http://evil.example')],
+        )
+
+        self.assertNotIn('access-control-allow-origin', headers)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class IdentityCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_utils._local_identities.clear()
+        self.user = User.objects.create_user(
+            username='patient', password='secret', phone_number='+237600000001', user_type='patient',
+        )
+        self.patient = Patient.objects.create(
+            user=self.user, first_name='Awa', last_name='Ngo', date_of_birth=datetime.date(1990, 1, 1), gender='F',
+        )
+        self.token = AccessToken.for_user(self.user)
+
+    def identity_headers(self, token=None):
+        return identity_headers(f'Bearer {token or self.token}')
+
+    def queries_for_identity(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.identity_headers()
+        return len(queries)
+
+    def test_second_request_runs_no_queries(self):
+        expected = {'X-User-ID': str(self.patient.patient_id), 'X-User-Type': 'patient'}
+        self.assertEqual(self.identity_headers(), expected)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.identity_headers(), expected)
+        # LRU du processus vidé : l'entrée du cache Django suffit
+        cache_utils._local_identities.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.identity_headers(), expected)
+
+    def test_cache_holds_ids_and_flags_only(self):
+        self.identity_headers()
+
+        entry = cache.get(f"identity:{self.token['jti']}")
+        self.assertEqual(set(entry), {
+            'user_id', 'user_type', 'specific_id', 'has_profile', 'is_active', 'is_staff', 'is_superuser', 'version',
+        })
+        for value in entry.values():
+            self.assertIsInstance(value, (str, bool, int))
+
+    def get_my_feedbacks(self, token):
+        request = RequestFactory().get('/api/v1/patient/feedbacks/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return feedback_proxy.my_feedbacks(request)
+
+    @mock.patch('apps.gateway.feedback_proxy.get_client')
+    def test_proxy_views_read_profile_from_identity(self, get_client):
+        get_client.return_value.get.return_value = httpx.Response(200, json=[])
+        self.get_my_feedbacks(self.token)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_my_feedbacks(self.token).status_code, 200)
+        self.assertEqual(get_client.return_value.get.call_args.kwargs['headers']['X-User-ID'], str(self.patient.patient_id))
+
+        # Patient sans profil : 403, sans requête SQL une fois l'identité en cache
+        orphan = User.objects.create_user(
+            username='orphan', password='secret', phone_number='+237600000002', user_type='patient',
+        )
+        token = AccessToken.for_user(orphan)
+        self.assertEqual(self.get_my_feedbacks(token).status_code, 403)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_my_feedbacks(token).status_code, 403)
+
+    def test_each_request_gets_its_own_user(self):
+        from apps.gateway.authentication import CachedJWTAuthentication
+
+        auth = CachedJWTAuthentication()
+        first, second = auth.get_user(self.token), auth.get_user(self.token)
+        self.assertIsNot(first, second)
+        self.assertEqual(first.pk, self.user.pk)
+        self.assertEqual(first.user_type, 'patient')
+
+    def test_ttl_capped_by_token_expiry(self):
+        self.token.set_exp(lifetime=datetime.timedelta(seconds=60))
+
+        with mock.patch.object(cache_utils.cache, 'set', wraps=cache_utils.cache.set) as cache_set:
+            self.identity_headers(self.token)
+
+        (key, _, ttl), _ = cache_set.call_args
+        self.assertEqual(key, f"identity:{self.token['jti']}")
+        self.assertLessEqual(ttl, 60)
+
+    def test_logout_invalidates_identity(self):
+        self.identity_headers()
+
+        response = self.client.post(
+            '/api/v1/auth/logout/', {'refresh': str(RefreshToken.for_user(self.user))}, content_type='application/json',
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(self.queries_for_identity(), 0)
+
+    def test_user_save_invalidates_identity(self):
+        self.identity_headers()
+
+        self.user.is_active = False
+        self.user.save()
+
+        self.assertEqual(self.identity_headers(), {})
+
+    def test_patient_save_invalidates_identity(self):
+        self.identity_headers()
+
+        self.patient.patient_id = uuid.uuid4()
+        self.patient.save()
+
+        self.assertEqual(self.identity_headers()['X-User-ID'], str(self.patient.patient_id))
+
+    def test_last_login_save_keeps_identity(self):
+        self.identity_headers()
+
+        update_last_login(None, self.user)
+
+        self.assertEqual(self.queries_for_identity(), 0)
+
+
+class EtagMatchesTests(SimpleTestCase):
+    def test_matches(self):
+        self.assertTrue(response_cache.etag_matches('"a"', '"a"'))
+        self.assertTrue(response_cache.etag_matches('"x", "a"', '"a"'))
+        self.assertTrue(response_cache.etag_matches('*', '"a"'))
+        self.assertTrue(response_cache.etag_matches('W/"a"', '"a"'))
+        self.assertTrue(response_cache.etag_matches('"x",W/"a"', '"a"'))
+
+    def test_no_match(self):
+        self.assertFalse(response_cache.etag_matches('"x"', '"a"'))
+        self.assertFalse(response_cache.etag_matches('', '"a"'))
+        self.assertFalse(response_cache.etag_matches(None, '"a"'))
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ResponseCacheMiddlewareTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        cache_utils._local_identities.clear()
+        self.factory = RequestFactory()
+        self.view_calls = 0
+        self.response_factory = self.json_response
+        self.middleware = ResponseCacheMiddleware(self.view)
+
+    def view(self, request):
+        self.view_calls += 1
+        return self.response_factory(request)
+
+    def json_response(self, request):
+        return HttpResponse(f'{{"call": {self.view_calls}}}', content_type='application/json')
+
+    def get(self, path, token=None, **headers):
+        if token:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+        return self.middleware(self.factory.get(path, **headers))
+
+    def write(self, path, status, method='post', token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Bearer {token}'} if token else {}
+        with mock.patch.object(self, 'response_factory', lambda request: HttpResponse(status=status)):
+            return self.middleware(getattr(self.factory, method)(path, **headers))
+
+    def token_for(self, username, phone_number):
+        user = User.objects.create_user(
+            username=username, password='secret', phone_number=phone_number, user_type='professional',
+        )
+        return AccessToken.for_user(user)
+
+    def test_hit_after_miss(self):
+        first = self.get('/api/v1/departments/')
+        second = self.get('/api/v1/departments/')
+
+        self.assertEqual((first['X-Cache'], second['X-Cache']), ('MISS', 'HIT'))
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+        self.assertEqual(self.view_calls, 1)
+
+    def test_not_modified_on_miss_and_hit(self):
+        etag = response_cache.compute_etag(b'{"call": 1}')
+
+        miss = self.get('/api/v1/departments/', HTTP_IF_NONE_MATCH=etag)
+        hit = self.get('/api/v1/departments/', HTTP_IF_NONE_MATCH=f'W/{etag}')
+
+        self.assertEqual((miss.status_code, miss['X-Cache']), (304, 'MISS'))
+        self.assertEqual((hit.status_code, hit['X-Cache']), (304, 'HIT'))
+        self.assertEqual(hit.content, b'')
+        self.assertEqual(self.view_calls, 1)
+
+    def test_user_scope_not_shared(self):
+        alice = self.token_for('alice', '+237600000011')
+        bob = self.token_for('bob', '+237600000012')
+
+        alice_response = self.get('/api/v1/appointments/upcoming/', token=alice)
+        bob_response = self.get('/api/v1/appointments/upcoming/', token=bob)
+        alice_again = self.get('/api/v1/appointments/upcoming/', token=alice)
+
+        self.assertEqual(bob_response['X-Cache'], 'MISS')
+        self.assertNotEqual(bob_response.content, alice_response.content)
+        self.assertEqual((alice_again['X-Cache'], alice_again.content), ('HIT', alice_response.content))
+        self.assertEqual(self.view_calls, 2)
+        # Sans token : pas de lecture du cache, la vue répond
+        self.get('/api/v1/appointments/upcoming/')
+        self.assertEqual(self.view_calls, 3)
+
+    def test_successful_write_invalidates_route(self):
+        token = self.token_for('alice', '+237600000011')
+        self.get('/api/v1/appointments/upcoming/', token=token)
+
+        self.write('/api/v1/appointments/', 400, token=token)
+        self.assertEqual(self.get('/api/v1/appointments/upcoming/', token=token)['X-Cache'], 'HIT')
+
+        self.write('/api/v1/appointments/', 201, token=token)
+        self.assertEqual(self.get('/api/v1/appointments/upcoming/', token=token)['X-Cache'], 'MISS')
+
+    def test_departments_write_invalidates_route(self):
+        self.get('/api/v1/departments/')
+
+        self.write('/api/v1/departments/1/', 200, method='patch')
+
+        self.assertEqual(self.get('/api/v1/departments/')['X-Cache'], 'MISS')
+
+    def test_non_200_not_cached(self):
+        self.response_factory = lambda request: HttpResponse(status=502)
+
+        first = self.get('/api/v1/departments/')
+        second = self.get('/api/v1/departments/')
+
+        self.assertFalse(first.has_header('X-Cache') or second.has_header('X-Cache'))
+        self.assertEqual(self.view_calls, 2)
+
+    def test_streaming_not_cached(self):
+        self.response_factory = lambda request: StreamingHttpResponse(iter([b'{}']))
+
+        self.get('/api/v1/departments/')
+        response = self.get('/api/v1/departments/')
+
+        self.assertTrue(response.streaming)
+        self.assertFalse(response.has_header('X-Cache'))
+        self.assertEqual(self.view_calls, 2)
@@ -30,9 +30,9 @@ urlpatterns = [
     
     # Routes appointments (REST standard)
     path('api/v1/appointments/', appointments_view, name='appointments'),  # GET pour lister, POST pour créer
-    path('api/v1/appointments/<str:appointment_id>/', appointment_detail_view, name='appointment-detail'),  # GET pour récupérer, PUT/PATCH pour modifier, DELETE pour supprimer  
     path('api/v1/appointments/upcoming/', upcoming_appointments, name='upcoming-appointments'),
     path('api/v1/appointments/today/', today_appointments, name='today-appointments'),
+    path('api/v1/appointments/<str:appointment_id>/', appointment_detail_view, name='appointment-detail'),  # GET pour récupérer, PUT/PATCH pour modifier, DELETE pour supprimer  
     
     # Routes prescriptions (REST standard)
     path('api/v1/prescriptions/', prescriptions_view, name='prescriptions'),  # GET pour lister, POST pour créer
@@ -5,8 +5,7 @@ from rest_framework.response import Response
 from django.conf import settings
 from django.core.cache import cache
 from ..users.models import Patient
-import httpx
-import asyncio
+from . import service_clients
 from datetime import datetime
 from .swagger_schemas import departments_list_decorator
 
@@ -32,7 +31,7 @@ def health_check(request):
 @permission_classes([AllowAny])
 def service_status(request):
     """Vérification du statut des microservices"""
-    services_health = asyncio.run(check_all_services())
+    services_health = service_clients.run(check_all_services())
 
     all_healthy = all(s['status'] == 'healthy' for s in services_health.values())
     status_code = 200 if all_healthy else 503
@@ -40,6 +39,7 @@ def service_status(request):
     return Response({
         'services': services_health,
         'overall_status': 'healthy' if all_healthy else 'degraded',
+        'connection_pools': service_clients.pool_stats(),
         'timestamp': datetime.now().isoformat()
     }, status=status_code)
 
@@ -70,21 +70,21 @@ async def check_all_services():
     """Vérifie le statut de tous les microservices"""
     services = {}
 
-    async with httpx.AsyncClient(timeout=5.0) as client:
-        for service_name, service_url in settings.MICROSERVICES.items():
-            try:
-                response = await client.get(f"{service_url}/health/")
-                services[service_name] = {
-                    'status': 'healthy' if response.status_code == 200 else 'unhealthy',
-                    'response_time': response.elapsed.total_seconds(),
-                    'status_code': response.status_code
-                }
-            except Exception as e:
-                services[service_name] = {
-                    'status': 'unhealthy',
-                    'error': str(e),
-                    'response_time': None
-                }
+    for service_name, service_url in settings.MICROSERVICES.items():
+        try:
+            client = service_clients.get_async_client(service_name)
+            response = await client.get(f"{service_url}/health/", timeout=5.0)
+            services[service_name] = {
+                'status': 'healthy' if response.status_code == 200 else 'unhealthy',
+                'response_time': response.elapsed.total_seconds(),
+                'status_code': response.status_code
+            }
+        except Exception as e:
+            services[service_name] = {
+                'status': 'unhealthy',
+                'error': str(e),
+                'response_time': None
+            }
 
     return services
 
@@ -114,10 +114,7 @@ def list_departments(request):
             params['search'] = search
         
         # Appel au service de feedback
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        
-        response = loop.run_until_complete(
+        response = service_clients.run(
             call_feedback_service(url, params)
         )
         
@@ -138,9 +135,9 @@ def list_departments(request):
 
 async def call_feedback_service(url, params=None):
     """Helper pour appeler le feedback service"""
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        response = await client.get(url, params=params)
-        return response
+    client = service_clients.get_async_client('FEEDBACK_SERVICE')
+    response = await client.get(url, params=params, timeout=10.0)
+    return response
 
 
 @api_view(['GET'])
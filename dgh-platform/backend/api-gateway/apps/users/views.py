@@ -3,6 +3,7 @@ from rest_framework import status, generics
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from rest_framework_simplejwt.settings import api_settings
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.db import transaction
@@ -11,6 +12,7 @@ from .serializers import (
     UserSerializer, PatientSerializer, ProfessionalSerializer,
     LoginSerializer, RegisterPatientSerializer, RegisterProfessionalSerializer, LogoutSerializer
 )
+from apps.gateway.cache_utils import invalidate_user_identity
 import logging
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -204,6 +206,9 @@ def logout_view(request):
         
         token = RefreshToken(refresh_token)
         token.blacklist()
+
+        # Identité en cache de l'utilisateur (gateway) oubliée
+        invalidate_user_identity(token[api_settings.USER_ID_CLAIM])
         return Response({"detail": "Successfully logged out"})
     except Exception as e:
         logger.error(f"Logout error: {str(e)}")
@@ -259,7 +264,7 @@ def list_patients(request):
         patients = Patient.objects.select_related('user').all().order_by('-user__created_at')
         serializer = PatientSerializer(patients, many=True)
         
-        logger.info(f"Patient list requested by user {request.user.username}")
+        logger.info(f"Patient list requested by user {request.user.id}")
         
         return Response({
             'count': patients.count(),
@@ -3,6 +3,9 @@ ASGI config for config project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Les routes des microservices sont servies par le proxy streaming
+(apps.gateway.asgi_proxy), le reste par Django.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -13,4 +16,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.gateway.asgi_proxy import StreamingProxy  # noqa: E402 (après le setup Django)
+
+application = StreamingProxy(django_application)
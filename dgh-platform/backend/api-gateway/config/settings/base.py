@@ -73,6 +73,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.gateway.middleware.ResponseCacheMiddleware',
     'apps.gateway.middleware.ServiceRoutingMiddleware',
     'apps.gateway.middleware.RequestTracingMiddleware',
 ]
@@ -80,7 +81,7 @@ MIDDLEWARE = [
 # REST Framework
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'apps.gateway.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -119,6 +120,48 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Cache d'identité JWT (apps/gateway/cache_utils.py) : durées en secondes,
+# toujours bornées par l'expiration du token
+IDENTITY_CACHE = {
+    'TTL': config('IDENTITY_CACHE_TTL', default=900, cast=int),
+    'LOCAL_TTL': config('IDENTITY_CACHE_LOCAL_TTL', default=30, cast=int),
+    'LOCAL_MAX_ENTRIES': 1024,
+}
+
+# Cache des réponses GET de la gateway (apps/gateway/response_cache.py)
+# SCOPE : 'public', 'authenticated' ou 'user' ; INVALIDATED_BY : chemins dont
+# une écriture réussie via la gateway invalide la route. Les écritures faites
+# directement sur un service ne sont visibles qu'à l'expiration (TTL).
+RESPONSE_CACHE = {
+    'ENABLED': config('RESPONSE_CACHE_ENABLED', default=True, cast=bool),
+    'ROUTES': {
+        'departments': {
+            'PATH': r'^/api/v1/departments/$',
+            'TTL': 300,
+            'SCOPE': 'public',
+            'INVALIDATED_BY': [r'^/api/v1/departments/'],
+        },
+        'medications': {
+            'PATH': r'^/api/v1/medications/',
+            # Lecture seule via la gateway : modifiées dans le service
+            'TTL': 300,
+            'SCOPE': 'public',
+            'INVALIDATED_BY': [r'^/api/v1/medications/'],
+        },
+        'appointments': {
+            'PATH': r'^/api/v1/appointments/(upcoming|today)/$',
+            'TTL': 60,
+            'SCOPE': 'user',
+            'INVALIDATED_BY': [r'^/api/v1/appointments/'],
+        },
+        'patient_profile': {
+            'PATH': r'^/api/v1/patient/[^/]+/profile/$',
+            'TTL': 300,
+            'SCOPE': 'authenticated',
+        },
+    },
+}
+
 # Microservices URLs
 MICROSERVICES = {
     'FEEDBACK_SERVICE': config('FEEDBACK_SERVICE_URL', 'http://localhost:8001'),
@@ -126,6 +169,22 @@ MICROSERVICES = {
     # 'ANALYTICS_SERVICE': config('ANALYTICS_SERVICE_URL', 'http://localhost:8003'),
 }
 
+# Pools de connexions HTTP vers les microservices (apps/gateway/service_clients.py)
+# 'DEFAULT' s'applique à tous les services, surchargeable par clé de MICROSERVICES
+SERVICE_CLIENTS = {
+    'DEFAULT': {
+        'MAX_CONNECTIONS': config('SERVICE_POOL_MAX_CONNECTIONS', default=100, cast=int),
+        'MAX_KEEPALIVE_CONNECTIONS': config('SERVICE_POOL_MAX_KEEPALIVE', default=20, cast=int),
+        'KEEPALIVE_EXPIRY': config('SERVICE_POOL_KEEPALIVE_EXPIRY', default=30.0, cast=float),
+        'CONNECT_TIMEOUT': 5.0,
+        'READ_TIMEOUT': 30.0,
+        'WRITE_TIMEOUT': 30.0,
+        'POOL_TIMEOUT': 5.0,
+        'HTTP2': config('SERVICE_HTTP2', default=False, cast=bool),  # nécessite le paquet h2
+    },
+    'FEEDBACK_SERVICE': {},
+}
+
 # CORS
 CORS_ALLOWED_ORIGINS = config('CORS_ORIGINS', default= '', cast=lambda v: [s.strip() for s in v.split(',')])
 CORS_ALLOW_CREDENTIALS = True
@@ -25,6 +25,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.gateway.middleware.ResponseCacheMiddleware',
     'apps.gateway.middleware.ServiceRoutingMiddleware',
     'apps.gateway.middleware.RequestTracingMiddleware',
 ]
@@ -0,0 +1,340 @@
+# app/alerts.py
+"""
+Moteur d'alertes du dashboard.
+
+Chaque classe d'alerte (stock faible, expiration proche, demandes urgentes)
+est évaluée par des requêtes groupées, indépendamment du nombre d'unités :
+
+- stock faible : un comptage groupé par groupe sanguin ;
+- expiration : un comptage groupé par groupe sanguin, résumé en une alerte
+  par groupe (le détail unité par unité est paginé par curseur) ;
+- demandes urgentes : un comptage groupé et les DETAIL_LIMIT plus anciennes,
+  le reste étant résumé (détail paginé par curseur).
+
+Les instantanés sont poussés dans le cache à chaque écriture (signaux
+post_save / post_delete, après commit) : les lectures du dashboard ne
+recalculent rien. Les écritures en masse, qui ne déclenchent pas de signaux,
+doivent appeler refresh_alerts() ; SNAPSHOT_TIMEOUT borne sinon la durée
+pendant laquelle un instantané peut être en retard.
+"""
+
+import base64
+import json
+import logging
+import threading
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Min, Q, Sum
+from django.utils import timezone
+
+from .models import BloodRequest, BloodUnit
+from .utils.cache_utils import cache_key_builder, get_or_compute, refresh_cached
+
+logger = logging.getLogger(__name__)
+
+BLOOD_TYPES = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+LOW_STOCK = 'low_stock'
+EXPIRING = 'expiring'
+URGENT_REQUEST = 'urgent_request'
+
+# Champs dont dépend chaque classe d'alerte, par modèle source
+ALERT_SOURCES = {
+    BloodUnit: {
+        LOW_STOCK: {'status', 'blood_type'},
+        EXPIRING: {'status', 'blood_type', 'date_expiration'},
+    },
+    BloodRequest: {
+        URGENT_REQUEST: {'status', 'priority', 'blood_type', 'quantity', 'department', 'department_id'},
+    },
+}
+
+_pending = threading.local()
+
+
+def _alerts_config():
+    return getattr(settings, 'BLOOD_BANK_SETTINGS', {}).get('ALERTS', {})
+
+
+def _snapshot_key(alert_class):
+    # L'horizon d'expiration dépend du jour : un instantané par jour
+    if alert_class == EXPIRING:
+        return cache_key_builder('alerts_', alert_class, ':', timezone.now().date().isoformat())
+    return cache_key_builder('alerts_', alert_class)
+
+
+# ==================== ÉVALUATION (requêtes groupées) ====================
+
+def _evaluate_low_stock():
+    counts = dict(
+        BloodUnit.objects.filter(status='Available')
+        .values_list('blood_type')
+        .annotate(count=Count('unit_id'))
+    )
+    return {'counts': {blood_type: counts.get(blood_type, 0) for blood_type in BLOOD_TYPES}}
+
+
+def _evaluate_expiring():
+    config = _alerts_config()
+    today = timezone.now().date()
+    rows = (
+        BloodUnit.objects.filter(
+            status='Available',
+            date_expiration__lte=today + timedelta(days=config.get('EXPIRING_DAYS', 3))
+        )
+        .values('blood_type')
+        .annotate(
+            total=Count('unit_id'),
+            critical=Count('unit_id', filter=Q(
+                date_expiration__lte=today + timedelta(days=config.get('EXPIRING_CRITICAL_DAYS', 1))
+            )),
+            first_expiration=Min('date_expiration')
+        )
+    )
+    return {'by_blood_type': {
+        row['blood_type']: {
+            'total': row['total'],
+            'critical': row['critical'],
+            'first_expiration': row['first_expiration'].isoformat()
+        }
+        for row in rows
+    }}
+
+
+def _urgent_requests():
+    return BloodRequest.objects.filter(status='Pending', priority='Urgent')
+
+
+def _evaluate_urgent():
+    totals = _urgent_requests().aggregate(total=Count('request_id'), units=Sum('quantity'))
+    items = list(
+        _urgent_requests()
+        .order_by('request_date', 'request_id')
+        .values('request_id', 'blood_type', 'quantity', 'request_date', 'department__name')
+        [:_alerts_config().get('DETAIL_LIMIT', 20)]
+    )
+    for item in items:
+        item['request_date'] = item['request_date'].isoformat()
+    return {'total': totals['total'], 'units': totals['units'] or 0, 'items': items}
+
+
+EVALUATORS = {
+    LOW_STOCK: _evaluate_low_stock,
+    EXPIRING: _evaluate_expiring,
+    URGENT_REQUEST: _evaluate_urgent,
+}
+
+
+def get_snapshot(alert_class):
+    return get_or_compute(
+        _snapshot_key(alert_class),
+        EVALUATORS[alert_class],
+        timeout=_alerts_config().get('SNAPSHOT_TIMEOUT', 900),
+        stats_name=f'alerts_{alert_class}'
+    )
+
+
+def refresh_alerts(alert_classes=None):
+    """Réévalue et pousse les instantanés des classes indiquées (toutes par défaut)"""
+    timeout = _alerts_config().get('SNAPSHOT_TIMEOUT', 900)
+    for alert_class in alert_classes or EVALUATORS:
+        try:
+            refresh_cached(_snapshot_key(alert_class), EVALUATORS[alert_class], timeout)
+        except Exception as e:
+            logger.warning(f"Alert refresh failed for {alert_class}: {e}")
+
+
+# ==================== MISE EN FORME ====================
+
+def _low_stock_alerts(snapshot):
+    config = _alerts_config()
+    alerts = []
+    for blood_type, stock_count in snapshot['counts'].items():
+        if stock_count < config.get('LOW_STOCK_UNITS', 5):
+            alerts.append({
+                'id': f'low_stock_{blood_type}',
+                'type': LOW_STOCK,
+                'severity': 'critical' if stock_count < config.get('CRITICAL_STOCK_UNITS', 2) else 'warning',
+                'message': f'Stock critique pour {blood_type}: {stock_count} unités',
+                'blood_type': blood_type,
+                'count': stock_count
+            })
+    return alerts
+
+
+def _expiring_alerts(snapshot):
+    days = _alerts_config().get('EXPIRING_DAYS', 3)
+    return [
+        {
+            'id': f'expiring_{blood_type}',
+            'type': EXPIRING,
+            'severity': 'critical' if group['critical'] else 'warning',
+            'message': f"{group['total']} unité(s) {blood_type} expirent sous {days} jour(s)",
+            'blood_type': blood_type,
+            'count': group['total'],
+            'critical_count': group['critical'],
+            'first_expiration': group['first_expiration']
+        }
+        for blood_type, group in sorted(snapshot['by_blood_type'].items())
+    ]
+
+
+def _urgent_alert(item):
+    return {
+        'id': f"urgent_{item['request_id']}",
+        'type': URGENT_REQUEST,
+        'severity': 'critical',
+        'message': f"Demande urgente {item['request_id']} non satisfaite",
+        'request_id': item['request_id'],
+        'blood_type': item['blood_type'],
+        'department': item['department__name'],
+        'quantity': item['quantity']
+    }
+
+
+def _urgent_alerts(snapshot):
+    alerts = [_urgent_alert(item) for item in snapshot['items']]
+    remaining = snapshot['total'] - len(snapshot['items'])
+    if remaining > 0:
+        alerts.append({
+            'id': 'urgent_more',
+            'type': URGENT_REQUEST,
+            'severity': 'critical',
+            'message': f'{remaining} autre(s) demande(s) urgente(s) non satisfaite(s)',
+            'count': remaining
+        })
+    return alerts
+
+
+def get_alerts():
+    """Synthèse de toutes les alertes à partir des instantanés"""
+    low_stock = get_snapshot(LOW_STOCK)
+    expiring = get_snapshot(EXPIRING)
+    urgent = get_snapshot(URGENT_REQUEST)
+
+    alerts = _low_stock_alerts(low_stock) + _expiring_alerts(expiring) + _urgent_alerts(urgent)
+    return {
+        'alerts': alerts,
+        'count': len(alerts),
+        'totals': {
+            'low_stock_blood_types': sum(1 for alert in alerts if alert['type'] == LOW_STOCK),
+            'expiring_units': sum(group['total'] for group in expiring['by_blood_type'].values()),
+            'urgent_requests': urgent['total'],
+            'urgent_units': urgent['units']
+        },
+        'last_updated': timezone.now().isoformat()
+    }
+
+
+# ==================== DÉTAIL PAGINÉ ====================
+
+def _encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        sort_date, pk = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return date.fromisoformat(sort_date), str(pk)
+    except (ValueError, TypeError):
+        raise ValueError('Curseur invalide')
+
+
+def alert_details(alert_type, cursor=None, limit=None, blood_type=None):
+    """
+    Détail par unité (expiring) ou par demande (urgent_request), trié par
+    date puis identifiant ; pagination par curseur (keyset), sans OFFSET.
+    """
+    config = _alerts_config()
+    limit = max(1, min(int(limit or config.get('PAGE_SIZE', 50)), config.get('MAX_PAGE_SIZE', 500)))
+
+    if alert_type == EXPIRING:
+        today = timezone.now().date()
+        queryset = BloodUnit.objects.filter(
+            status='Available',
+            date_expiration__lte=today + timedelta(days=config.get('EXPIRING_DAYS', 3))
+        )
+        if blood_type:
+            queryset = queryset.filter(blood_type=blood_type)
+        date_field, pk_field = 'date_expiration', 'unit_id'
+        fields = ('unit_id', 'date_expiration', 'blood_type')
+    elif alert_type == URGENT_REQUEST:
+        queryset = _urgent_requests()
+        if blood_type:
+            queryset = queryset.filter(blood_type=blood_type)
+        date_field, pk_field = 'request_date', 'request_id'
+        fields = ('request_id', 'blood_type', 'quantity', 'request_date', 'department__name')
+    else:
+        raise ValueError(f"Type d'alerte sans détail: {alert_type}")
+
+    if cursor:
+        last_date, last_pk = _decode_cursor(cursor)
+        queryset = queryset.filter(
+            Q(**{f'{date_field}__gt': last_date}) |
+            Q(**{date_field: last_date, f'{pk_field}__gt': last_pk})
+        )
+
+    rows = list(queryset.order_by(date_field, pk_field).values(*fields)[:limit + 1])
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if alert_type == EXPIRING:
+        critical_days = config.get('EXPIRING_CRITICAL_DAYS', 1)
+        results = []
+        for row in rows:
+            days_left = (row['date_expiration'] - today).days
+            results.append({
+                'id': f"expiring_{row['unit_id']}",
+                'type': EXPIRING,
+                'severity': 'critical' if days_left <= critical_days else 'warning',
+                'message': f"Unité {row['unit_id']} expire dans {days_left} jour(s)",
+                'unit_id': row['unit_id'],
+                'blood_type': row['blood_type'],
+                'days_left': days_left
+            })
+    else:
+        results = [_urgent_alert(row) for row in rows]
+
+    next_cursor = None
+    if has_more:
+        last = rows[-1]
+        next_cursor = _encode_cursor([last[date_field].isoformat(), last[pk_field]])
+
+    return {'type': alert_type, 'results': results, 'next_cursor': next_cursor, 'limit': limit}
+
+
+# ==================== MISE À JOUR SUR ÉCRITURE ====================
+
+def _affected_classes(model, update_fields=None):
+    sources = ALERT_SOURCES.get(model, {})
+    if update_fields is None:
+        return set(sources)
+    return {alert_class for alert_class, fields in sources.items() if fields & set(update_fields)}
+
+
+def _flush_pending():
+    alert_classes = getattr(_pending, 'classes', None)
+    _pending.classes = set()
+    if alert_classes:
+        refresh_alerts(alert_classes)
+
+
+def schedule_refresh(instance, update_fields=None):
+    """
+    post_save / post_delete : réévalue les classes d'alerte concernées après
+    le commit. Les écritures d'une même transaction sont regroupées en une
+    seule réévaluation.
+    """
+    if not _alerts_config().get('PUSH_ON_WRITE', True):
+        return
+    alert_classes = _affected_classes(type(instance), update_fields)
+    if not alert_classes:
+        return
+    if getattr(_pending, 'classes', None) is None:
+        _pending.classes = set()
+    _pending.classes.update(alert_classes)
+    # Appelé immédiatement hors transaction ; sinon au commit (ignoré si rollback,
+    # les classes restent en attente jusqu'au prochain flush)
+    transaction.on_commit(_flush_pending)
@@ -6,6 +6,7 @@ from sklearn.linear_model import LinearRegression, Ridge, Lasso
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.metrics import mean_absolute_error, mean_squared_error, mean_absolute_percentage_error
 from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+from sklearn.base import clone
 import joblib
 from datetime import datetime, timedelta
 import warnings
@@ -69,6 +70,13 @@ except ImportError:
         MODELS_AVAILABLE = False
         logger.warning("⚠️ Django models not available - using synthetic data fallback")
 
+from .forecasting import rolling_features as rolling
+from .forecasting.arima_engine import ArimaEngine
+from .forecasting.batch_forecast import BatchForecastEngine
+from .forecasting.history_panel import get_demand_panel
+from .forecasting.model_registry import ModelRegistry
+from .forecasting.training_jobs import evaluate_fold, fit_final, summarize_cv_scores
+
 logger = logging.getLogger(__name__)
 
 
@@ -120,6 +128,8 @@ class EnhancedBloodDemandForecaster:
         self.trained_models = {}
         self.model_performance = {}
         self.feature_importance = {}
+        self.registry = ModelRegistry()
+        self.arima_engine = ArimaEngine(self.registry)
 
         # Configuration améliorée des groupes sanguins avec plus de détails
         self.blood_type_config = {
@@ -224,90 +234,15 @@ class EnhancedBloodDemandForecaster:
 
             logger.info(f"📊 Récupération données améliorées pour {blood_type} ({start_date} à {end_date})")
 
-            # Stratégie multi-sources pour maximiser les données
-            all_data = []
-
-            # Source 1: BloodConsumption (consommation réelle)
-            try:
-                consumption_data = BloodConsumption.objects.filter(
-                    unit__donor__blood_type=blood_type,
-                    date__range=[start_date, end_date]
-                ).extra(
-                    select={'day': 'DATE(date)'}
-                ).values('day').annotate(
-                    total_demand=Sum('volume'),
-                    count_units=Count('unit_id')
-                ).order_by('day')
-
-                for record in consumption_data:
-                    demand = record.get('total_demand', 0) or 0
-                    if demand > 100:  # Convertir ml en unités
-                        demand = max(1, int(demand / 450))
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(demand)),
-                        'source': 'consumption'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodConsumption query failed: {e}")
-
-            # Source 2: BloodRequest (demandes approuvées)
-            try:
-                request_data = BloodRequest.objects.filter(
-                    blood_type=blood_type,
-                    request_date__range=[start_date, end_date],
-                    status__in=['Fulfilled', 'Approved', 'Delivered']
-                ).extra(
-                    select={'day': 'DATE(request_date)'}
-                ).values('day').annotate(
-                    total_demand=Sum('quantity'),
-                    urgent_count=Count('request_id', filter=Q(priority='Urgent'))
-                ).order_by('day')
-
-                for record in request_data:
-                    demand = record.get('total_demand', 0) or 0
-                    urgent = record.get('urgent_count', 0) or 0
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(demand)),
-                        'urgent_requests': urgent,
-                        'source': 'requests'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodRequest query failed: {e}")
+            # Panel multi-sources partagé par tous les groupes sanguins
+            panel = get_demand_panel(days_back, end_date)
 
-            # Source 3: BloodUnit status changes (sorties de stock)
-            try:
-                unit_data = BloodUnit.objects.filter(
-                    donor__blood_type=blood_type,
-                    status='Used',
-                    collection_date__range=[start_date, end_date]
-                ).extra(
-                    select={'day': 'DATE(collection_date)'}
-                ).values('day').annotate(
-                    total_units=Count('unit_id'),
-                    total_volume=Sum('volume_ml')
-                ).order_by('day')
-
-                for record in unit_data:
-                    units = record.get('total_units', 0) or 0
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(units)),
-                        'source': 'units'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodUnit query failed: {e}")
-
-            if not all_data:
+            if not panel.has_data(blood_type):
                 logger.warning(f"❌ Aucune donnée réelle pour {blood_type}")
                 return self.generate_enhanced_synthetic_data(blood_type, days_back)
 
             # Consolider et nettoyer les données
-            df = self._consolidate_multi_source_data(all_data, start_date, end_date, blood_type)
+            df = self._consolidate_multi_source_data(panel, blood_type)
 
             if df is None or len(df) < 30:
                 logger.warning(f"⚠️ Données insuffisantes: {len(df) if df is not None else 0} jours")
@@ -320,60 +255,13 @@ class EnhancedBloodDemandForecaster:
             logger.error(f"❌ Erreur récupération données: {e}")
             return self.generate_enhanced_synthetic_data(blood_type, days_back)
 
-    def _consolidate_multi_source_data(self, all_data, start_date, end_date, blood_type):
+    def _consolidate_multi_source_data(self, panel, blood_type):
         """
         🔄 CONSOLIDATION DES DONNÉES MULTI-SOURCES
         """
         try:
-            if not all_data:
-                return None
-
-            # Créer DataFrame avec toutes les sources
-            df = pd.DataFrame(all_data)
-            df['date'] = pd.to_datetime(df['date'])
-
-            # Grouper par date et prendre la moyenne pondérée
-            daily_data = []
-
-            for date in pd.date_range(start_date, end_date, freq='D'):
-                day_records = df[df['date'].dt.date == date.date()]
-
-                if len(day_records) > 0:
-                    # Moyenne pondérée selon la source
-                    weights = {'consumption': 0.5, 'requests': 0.3, 'units': 0.2}
-                    total_demand = 0
-                    total_weight = 0
-                    urgent_count = 0
-
-                    for _, record in day_records.iterrows():
-                        source = record.get('source', 'unknown')
-                        weight = weights.get(source, 0.1)
-                        demand = record.get('demand', 0)
-
-                        total_demand += demand * weight
-                        total_weight += weight
-                        urgent_count += record.get('urgent_requests', 0)
-
-                    final_demand = int(total_demand / max(total_weight, 0.1)) if total_weight > 0 else 0
-
-                    daily_data.append({
-                        'date': date,
-                        'demand': max(0, final_demand),
-                        'urgent_requests': urgent_count,
-                        'data_sources': len(day_records)
-                    })
-                else:
-                    # Pas de données pour ce jour - interpolation intelligente
-                    daily_data.append({
-                        'date': date,
-                        'demand': 0,  # Sera interpolé plus tard
-                        'urgent_requests': 0,
-                        'data_sources': 0
-                    })
-
-            # Créer le DataFrame final
-            result_df = pd.DataFrame(daily_data)
-            result_df = result_df.set_index('date')
+            # Moyenne pondérée des sources présentes chaque jour (0 si aucune)
+            result_df = panel.daily_demand(blood_type)
 
             # Interpolation intelligente des valeurs manquantes
             result_df = self._smart_interpolation(result_df, blood_type)
@@ -627,43 +515,42 @@ class EnhancedBloodDemandForecaster:
             df['is_month_start'] = (df['day_of_month'] <= 3).astype(int)
             df['is_month_end'] = (df['day_of_month'] >= 28).astype(int)
 
+            # Les statistiques glissantes ne portent que sur les jours précédents :
+            # la demande du jour est la cible et reste inconnue au moment de prédire
+            demand = df['demand'].values.astype(float)
+            past_demand = rolling.shift(demand, 1)
+
             # Moyennes mobiles multiples
             for window in [3, 7, 14, 30]:
                 if len(df) >= window:
-                    df[f'demand_ma_{window}'] = df['demand'].rolling(
-                        window=window, min_periods=max(1, window // 2)
-                    ).mean()
-                    df[f'demand_std_{window}'] = df['demand'].rolling(
-                        window=window, min_periods=max(1, window // 2)
-                    ).std()
+                    df[f'demand_ma_{window}'], df[f'demand_std_{window}'] = rolling.rolling_mean_std(
+                        past_demand, window, min_periods=max(1, window // 2)
+                    )
                 else:
                     df[f'demand_ma_{window}'] = df['demand'].mean()
                     df[f'demand_std_{window}'] = df['demand'].std()
 
             # Moyennes mobiles exponentielles
             for alpha in [0.1, 0.3, 0.5]:
-                df[f'demand_ema_{int(alpha * 10)}'] = df['demand'].ewm(alpha=alpha).mean()
+                df[f'demand_ema_{int(alpha * 10)}'] = rolling.ewm_mean(past_demand, alpha)
 
             # Lags essentiels
             for lag in [1, 2, 3, 7, 14]:
                 if len(df) > lag:
-                    df[f'demand_lag_{lag}'] = df['demand'].shift(lag)
+                    df[f'demand_lag_{lag}'] = rolling.shift(demand, lag)
                 else:
                     df[f'demand_lag_{lag}'] = df['demand'].mean()
 
             # Différences pour capturer les changements
-            df['demand_diff_1'] = df['demand'].diff()
-            df['demand_diff_7'] = df['demand'].diff(7) if len(df) > 7 else 0
-            df['demand_pct_change'] = df['demand'].pct_change()
+            df['demand_diff_1'] = rolling.diff(past_demand)
+            df['demand_diff_7'] = rolling.diff(past_demand, 7) if len(df) > 7 else 0
+            df['demand_pct_change'] = rolling.pct_change(past_demand)
 
-            # Tendances à différentes échelles
+            # Tendances à différentes échelles (pente OLS glissante)
             for window in [7, 14, 30]:
                 if len(df) >= window:
-                    df[f'demand_trend_{window}'] = df['demand'].rolling(
-                        window=window, min_periods=max(3, window // 3)
-                    ).apply(
-                        lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 2 else 0,
-                        raw=False
+                    df[f'demand_trend_{window}'] = rolling.rolling_slope(
+                        past_demand, window, min_periods=max(3, window // 3)
                     )
                 else:
                     df[f'demand_trend_{window}'] = 0
@@ -671,9 +558,9 @@ class EnhancedBloodDemandForecaster:
             # Volatilité et variabilité
             for window in [7, 14]:
                 if len(df) >= window:
-                    df[f'demand_volatility_{window}'] = df['demand'].rolling(
-                        window=window, min_periods=max(2, window // 3)
-                    ).std()
+                    _, df[f'demand_volatility_{window}'] = rolling.rolling_mean_std(
+                        past_demand, window, min_periods=max(2, window // 3)
+                    )
                     df[f'demand_cv_{window}'] = (
                             df[f'demand_std_{window}'] / df[f'demand_ma_{window}']
                     ).fillna(0)
@@ -689,12 +576,13 @@ class EnhancedBloodDemandForecaster:
             df['sin_day_of_year'] = np.sin(2 * np.pi * df['day_of_year'] / 365)
             df['cos_day_of_year'] = np.cos(2 * np.pi * df['day_of_year'] / 365)
 
-            # Features de quantiles et percentiles
+            # Features de quantiles et percentiles (toutes les fenêtres en un passage)
             for window in [14, 30]:
                 if len(df) >= window:
-                    df[f'demand_q25_{window}'] = df['demand'].rolling(window=window).quantile(0.25)
-                    df[f'demand_q75_{window}'] = df['demand'].rolling(window=window).quantile(0.75)
-                    df[f'demand_median_{window}'] = df['demand'].rolling(window=window).median()
+                    q25, median, q75 = rolling.rolling_quantiles(past_demand, window, [0.25, 0.5, 0.75])
+                    df[f'demand_q25_{window}'] = q25
+                    df[f'demand_q75_{window}'] = q75
+                    df[f'demand_median_{window}'] = median
                 else:
                     df[f'demand_q25_{window}'] = df['demand'].quantile(0.25)
                     df[f'demand_q75_{window}'] = df['demand'].quantile(0.75)
@@ -742,7 +630,7 @@ class EnhancedBloodDemandForecaster:
         try:
             # Stock actuel détaillé
             current_stock = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available'
             ).aggregate(
                 total_units=Count('unit_id'),
@@ -767,7 +655,7 @@ class EnhancedBloodDemandForecaster:
             # Consommation récente détaillée
             try:
                 recent_consumption = BloodConsumption.objects.filter(
-                    unit__donor__blood_type=blood_type,
+                    blood_type=blood_type,
                     date__gte=datetime.now() - timedelta(days=30)
                 ).aggregate(
                     total_consumed=Count('unit_id'),
@@ -787,7 +675,7 @@ class EnhancedBloodDemandForecaster:
 
             # Stock des types compatibles
             compatible_stock = BloodUnit.objects.filter(
-                donor__blood_type__in=compatible_types,
+                blood_type__in=compatible_types,
                 status='Available'
             ).aggregate(
                 total_compatible=Count('unit_id')
@@ -861,84 +749,157 @@ class EnhancedBloodDemandForecaster:
             'stock_pressure': multiplier['pressure']
         }
 
-    def train_enhanced_models(self, blood_type, method='auto'):
+    def train_enhanced_models(self, blood_type, method='auto', force_retrain=False):
         """
         🎯 ENTRAÎNEMENT DE MODÈLES AMÉLIORÉS AVEC VALIDATION CROISÉE
+        Les modèles publiés dans le registre sont réutilisés tels quels ; l'entraînement
+        n'a lieu que si aucun modèle n'existe encore ou si force_retrain est demandé.
         """
         self.start_time = time.time()
 
-        # Cache intelligent avec invalidation
-        cache_key = f'enhanced_model_{blood_type}_{method}_{datetime.now().date()}'
-        cached_result = cache.get(cache_key)
-        if cached_result and cached_result.get('version') == '2.0':
-            logger.info(f"✅ Modèle enhanced en cache pour {blood_type}")
-            self.model_performance[blood_type] = cached_result['performance']
-            self.trained_models.update(cached_result['models'])
-            self.feature_importance[blood_type] = cached_result.get('feature_importance', {})
-            return cached_result['performance'], cached_result['best_method']
+        if not force_retrain:
+            registered = self.load_registered_models(blood_type)
+            if registered:
+                return registered
 
         try:
-            # Récupérer données historiques enrichies
-            historical_data = self.get_enhanced_historical_data(blood_type, days_back=500)
-            if historical_data is None or len(historical_data) < 30:
-                logger.warning(f"⚠️ Données insuffisantes pour {blood_type}")
+            training_data = self.prepare_training_data(blood_type)
+            if training_data is None:
                 return self._create_enhanced_fallback_model(blood_type)
 
-            # Données contextuelles enrichies
-            contextual_data = self.get_enhanced_contextual_data(blood_type)
+            historical_data, X, y, feature_cols = training_data
 
-            logger.info(f"🔬 Entraînement modèles améliorés pour {blood_type} avec {len(historical_data)} jours")
+            # Validation croisée temporelle
+            results = self._cross_validate_models(X, y, blood_type, method)
 
-            # Création des features avancées
-            df_features = self.create_advanced_features(historical_data, contextual_data)
-            if df_features is None:
+            if not results:
                 return self._create_enhanced_fallback_model(blood_type)
 
-            # Nettoyage et préparation
-            df_features = df_features.dropna()
-            if len(df_features) < 20:
-                logger.warning(f"⚠️ Données après nettoyage: {len(df_features)}")
-                return self._create_enhanced_fallback_model(blood_type)
+            return self.complete_training(blood_type, historical_data, X, y, feature_cols, results)
 
-            # Sélection intelligente des features
-            feature_cols = self._select_best_features(df_features, blood_type)
-            X = df_features[feature_cols]
-            y = df_features['demand']
+        except Exception as e:
+            logger.error(f"❌ Erreur entraînement amélioré: {e}")
+            return self._create_enhanced_fallback_model(blood_type)
 
-            # Validation croisée temporelle
-            results = self._cross_validate_models(X, y, blood_type, method)
+    def prepare_training_data(self, blood_type):
+        """
+        📐 PRÉPARATION DES DONNÉES D'ENTRAÎNEMENT
+        Retourne (historique, X, y, features) ou None si les données sont insuffisantes.
+        """
+        # Récupérer données historiques enrichies
+        historical_data = self.get_enhanced_historical_data(blood_type, days_back=500)
+        if historical_data is None or len(historical_data) < 30:
+            logger.warning(f"⚠️ Données insuffisantes pour {blood_type}")
+            return None
 
-            if not results:
-                return self._create_enhanced_fallback_model(blood_type)
+        # Données contextuelles enrichies
+        contextual_data = self.get_enhanced_contextual_data(blood_type)
+
+        logger.info(f"🔬 Entraînement modèles améliorés pour {blood_type} avec {len(historical_data)} jours")
 
-            # Sélection du meilleur modèle
-            best_method = min(results.items(), key=lambda x: x[1].get('mape', float('inf')))[0]
+        # Création des features avancées
+        df_features = self.create_advanced_features(historical_data, contextual_data)
+        if df_features is None:
+            return None
 
-            # Entraîner le modèle final sur toutes les données
-            final_results = self._train_final_models(X, y, blood_type, results, feature_cols)
+        # Nettoyage et préparation
+        df_features = df_features.dropna()
+        if len(df_features) < 20:
+            logger.warning(f"⚠️ Données après nettoyage: {len(df_features)}")
+            return None
 
-            # Cache des résultats
-            cache_data = {
-                'version': '2.0',
-                'performance': final_results,
-                'models': {k: v for k, v in self.trained_models.items() if blood_type in k},
-                'best_method': best_method,
-                'feature_importance': self.feature_importance.get(blood_type, {}),
-                'data_points': len(historical_data),
-                'contextual_data': contextual_data,
-                'features_used': feature_cols
+        # Sélection intelligente des features
+        feature_cols = self._select_best_features(df_features, blood_type)
+        return historical_data, df_features[feature_cols], df_features['demand'], feature_cols
+
+    def complete_training(self, blood_type, historical_data, X, y, feature_cols, cv_results, fitted=None):
+        """
+        🏁 FIN D'ENTRAÎNEMENT : sélection, modèles finaux et publication
+        ``fitted`` contient les modèles finaux déjà entraînés par le planificateur parallèle.
+        """
+        # Sélection du meilleur modèle
+        best_method = min(cv_results.items(), key=lambda x: x[1].get('mape', float('inf')))[0]
+
+        # Entraîner le modèle final sur toutes les données
+        final_results = self._train_final_models(X, y, blood_type, cv_results, feature_cols, fitted)
+        if not final_results:
+            return self._create_enhanced_fallback_model(blood_type)
+        if best_method not in final_results:
+            best_method = min(final_results.items(), key=lambda x: x[1].get('mape', float('inf')))[0]
+
+        # Publication dans le registre pour les requêtes et workers suivants
+        self.register_trained_models(blood_type, final_results, best_method, historical_data)
+
+        self.model_performance[blood_type] = final_results
+        logger.info(f"✅ Modèles améliorés entraînés: {best_method} "
+                    f"(MAPE: {final_results[best_method].get('mape', 0):.2f}%)")
+
+        return final_results, best_method
+
+    def load_registered_models(self, blood_type):
+        """
+        📦 CHARGEMENT DES MODÈLES PUBLIÉS DANS LE REGISTRE
+        """
+        try:
+            registered = self.registry.load_blood_type(blood_type)
+        except Exception as e:
+            logger.warning(f"⚠️ Registre de modèles indisponible pour {blood_type}: {e}")
+            return None
+
+        if not registered:
+            return None
+
+        performance, best_method, trained_models = registered
+        self.trained_models.update(trained_models)
+        self.model_performance[blood_type] = performance
+
+        importances = {}
+        for method_name in performance:
+            model_data = trained_models[f'{method_name}_{blood_type}']
+            if hasattr(model_data['model'], 'feature_importances_'):
+                importances[method_name] = dict(
+                    zip(model_data['features'], model_data['model'].feature_importances_)
+                )
+        self.feature_importance[blood_type] = importances
+
+        logger.info(f"✅ Modèles du registre chargés pour {blood_type} (meilleur: {best_method})")
+        return performance, best_method
+
+    def register_trained_models(self, blood_type, final_results, best_method, historical_data):
+        """
+        💾 PUBLICATION DES MODÈLES ENTRAÎNÉS DANS LE REGISTRE
+        """
+        try:
+            training_window = {
+                'start': pd.Timestamp(historical_data.index.min()).date().isoformat(),
+                'end': pd.Timestamp(historical_data.index.max()).date().isoformat(),
+                'days': len(historical_data)
             }
-            cache.set(cache_key, cache_data, 7200)  # Cache 2 heures
 
-            self.model_performance[blood_type] = final_results
-            logger.info(f"✅ Modèles améliorés entraînés: {best_method} "
-                        f"(MAPE: {final_results[best_method].get('mape', 0):.2f}%)")
+            versions = {}
+            for method_name, performance in final_results.items():
+                model_data = self.trained_models.get(f'{method_name}_{blood_type}')
+                if not model_data:
+                    continue
+                versions[method_name] = self.registry.save_model(
+                    blood_type, method_name,
+                    model=model_data['model'],
+                    scaler=model_data['scaler'],
+                    features=model_data['features'],
+                    performance=performance,
+                    training_window=training_window
+                )
 
-            return final_results, best_method
+            if versions:
+                published_best = best_method if best_method in versions else next(iter(versions))
+                self.registry.publish(
+                    blood_type, published_best, versions,
+                    {name: final_results[name] for name in versions}
+                )
 
         except Exception as e:
-            logger.error(f"❌ Erreur entraînement amélioré: {e}")
-            return self._create_enhanced_fallback_model(blood_type)
+            # Le registre ne doit jamais empêcher une prévision
+            logger.error(f"❌ Erreur publication registre pour {blood_type}: {e}")
 
     def _select_best_features(self, df, blood_type):
         """
@@ -985,77 +946,41 @@ class EnhancedBloodDemandForecaster:
             basic_features = ['day_of_week', 'month', 'demand_ma_7', 'demand_lag_1']
             return [f for f in basic_features if f in df.columns]
 
+    def models_to_test(self, method='auto'):
+        """Modèles candidats pour une méthode, dans un ordre stable"""
+        candidates = ['random_forest', 'gradient_boosting', 'linear_regression']
+        if XGBOOST_AVAILABLE:
+            candidates.append('xgboost')
+        return {name: self.models[name] for name in candidates if method in ('auto', name)}
+
+    @staticmethod
+    def cv_splits(X):
+        """Découpage temporel de la validation croisée"""
+        n_splits = min(3, max(2, len(X) // 50))
+        return list(TimeSeriesSplit(n_splits=n_splits).split(X))
+
     def _cross_validate_models(self, X, y, blood_type, method='auto'):
         """
         🔄 VALIDATION CROISÉE TEMPORELLE POUR ÉVALUER LES MODÈLES
         """
         try:
             results = {}
-
-            # Configuration de la validation croisée temporelle
-            n_splits = min(3, max(2, len(X) // 50))
-            tscv = TimeSeriesSplit(n_splits=n_splits)
-
-            # Liste des modèles à tester
-            models_to_test = {}
-
-            if method == 'auto' or method == 'random_forest':
-                models_to_test['random_forest'] = self.models['random_forest']
-
-            if method == 'auto' or method == 'gradient_boosting':
-                models_to_test['gradient_boosting'] = self.models['gradient_boosting']
-
-            if method == 'auto' or method == 'linear_regression':
-                models_to_test['linear_regression'] = self.models['linear_regression']
-
-            if (method == 'auto' or method == 'xgboost') and XGBOOST_AVAILABLE:
-                models_to_test['xgboost'] = self.models['xgboost']
+            splits = self.cv_splits(X)
 
             # Validation croisée pour chaque modèle
-            for model_name, model in models_to_test.items():
+            for model_name, model in self.models_to_test(method).items():
                 try:
-                    cv_scores = []
-
-                    for train_idx, val_idx in tscv.split(X):
-                        X_train_cv, X_val_cv = X.iloc[train_idx], X.iloc[val_idx]
-                        y_train_cv, y_val_cv = y.iloc[train_idx], y.iloc[val_idx]
-
-                        # Normalisation si nécessaire
-                        if model_name in ['linear_regression', 'lasso_regression']:
-                            scaler = StandardScaler()
-                            X_train_cv = scaler.fit_transform(X_train_cv)
-                            X_val_cv = scaler.transform(X_val_cv)
-
-                        # Entraînement
-                        model.fit(X_train_cv, y_train_cv)
-
-                        # Prédiction
-                        y_pred = model.predict(X_val_cv)
-                        y_pred = np.maximum(0, y_pred)  # Pas de demandes négatives
-
-                        # Métriques
-                        mae = mean_absolute_error(y_val_cv, y_pred)
-                        rmse = np.sqrt(mean_squared_error(y_val_cv, y_pred))
-                        mape = mean_absolute_percentage_error(y_val_cv, y_pred) * 100
-
-                        cv_scores.append({'mae': mae, 'rmse': rmse, 'mape': mape})
-
-                    # Moyennes des scores CV
-                    avg_mae = np.mean([s['mae'] for s in cv_scores])
-                    avg_rmse = np.mean([s['rmse'] for s in cv_scores])
-                    avg_mape = np.mean([s['mape'] for s in cv_scores])
-                    std_mape = np.std([s['mape'] for s in cv_scores])
-
-                    results[model_name] = {
-                        'mae': float(avg_mae),
-                        'rmse': float(avg_rmse),
-                        'mape': float(min(avg_mape, 45.0)),  # Cap à 45%
-                        'mape_std': float(std_mape),
-                        'cv_folds': len(cv_scores),
-                        'stability_score': float(1.0 - (std_mape / max(avg_mape, 1.0)))
-                    }
-
-                    logger.info(f"✅ {model_name}: MAPE {avg_mape:.2f}% ± {std_mape:.2f}%")
+                    cv_scores = [
+                        evaluate_fold(
+                            model_name, model,
+                            X.iloc[train_idx], y.iloc[train_idx], X.iloc[val_idx], y.iloc[val_idx]
+                        )
+                        for train_idx, val_idx in splits
+                    ]
+                    results[model_name] = summarize_cv_scores(cv_scores)
+
+                    logger.info(f"✅ {model_name}: MAPE {results[model_name]['mape']:.2f}% "
+                                f"± {results[model_name]['mape_std']:.2f}%")
 
                 except Exception as e:
                     logger.warning(f"⚠️ Erreur validation {model_name}: {e}")
@@ -1067,42 +992,29 @@ class EnhancedBloodDemandForecaster:
             logger.error(f"❌ Erreur validation croisée: {e}")
             return {}
 
-    def _train_final_models(self, X, y, blood_type, cv_results, feature_cols):
+    def _train_final_models(self, X, y, blood_type, cv_results, feature_cols, fitted=None):
         """
         🎯 ENTRAÎNEMENT FINAL DES MODÈLES SUR TOUTES LES DONNÉES
         """
         try:
             final_results = {}
+            fitted = fitted or {}
 
             for model_name, cv_score in cv_results.items():
                 try:
-                    model = self.models[model_name]
-
-                    # Normalisation si nécessaire
-                    if model_name in ['linear_regression', 'lasso_regression']:
-                        scaler = StandardScaler()
-                        X_scaled = scaler.fit_transform(X)
-                        model.fit(X_scaled, y)
-
-                        # Stocker le modèle avec le scaler
-                        self.trained_models[f'{model_name}_{blood_type}'] = {
-                            'model': model,
-                            'scaler': scaler,
-                            'features': feature_cols,
-                            'trained_date': datetime.now(),
-                            'training_samples': len(X)
-                        }
+                    if model_name in fitted:
+                        model, scaler = fitted[model_name]
                     else:
-                        model.fit(X, y)
-
-                        # Stocker le modèle
-                        self.trained_models[f'{model_name}_{blood_type}'] = {
-                            'model': model,
-                            'scaler': None,
-                            'features': feature_cols,
-                            'trained_date': datetime.now(),
-                            'training_samples': len(X)
-                        }
+                        # Copie non entraînée : chaque groupe sanguin garde son propre modèle
+                        model, scaler = fit_final(model_name, self.models[model_name], X, y)
+
+                    self.trained_models[f'{model_name}_{blood_type}'] = {
+                        'model': model,
+                        'scaler': scaler,
+                        'features': feature_cols,
+                        'trained_date': datetime.now(),
+                        'training_samples': len(X)
+                    }
 
                     # Calculer l'importance des features si possible
                     if hasattr(model, 'feature_importances_'):
@@ -1166,12 +1078,12 @@ class EnhancedBloodDemandForecaster:
             logger.error(f"❌ Erreur création fallback amélioré: {e}")
             return {}, 'error'
 
-    def predict_enhanced(self, blood_type, days_ahead=7, method='auto'):
+    def predict_enhanced(self, blood_type, days_ahead=7, method='auto', force_retrain=False):
         """
         🔮 PRÉDICTION AMÉLIORÉE AVEC GESTION D'INCERTITUDE
         """
         cache_key = f'enhanced_prediction_{blood_type}_{days_ahead}_{method}_{datetime.now().date()}'
-        cached = cache.get(cache_key)
+        cached = None if force_retrain else cache.get(cache_key)
         if cached and cached.get('version') == '2.0':
             logger.info(f"✅ Prédiction améliorée en cache pour {blood_type}")
             return cached
@@ -1179,8 +1091,8 @@ class EnhancedBloodDemandForecaster:
         self.start_time = time.time()
 
         try:
-            # Entraîner les modèles améliorés
-            performance, best_method = self.train_enhanced_models(blood_type, method)
+            # Modèles du registre (entraînement uniquement si absents ou force_retrain)
+            performance, best_method = self.train_enhanced_models(blood_type, method, force_retrain)
 
             if not performance:
                 logger.error(f"❌ Impossible d'entraîner les modèles pour {blood_type}")
@@ -1304,85 +1216,51 @@ class EnhancedBloodDemandForecaster:
             if df_with_features is None:
                 return self.predict_enhanced_fallback(blood_type, days_ahead)
 
-            predictions = []
-            last_known_values = df_with_features['demand'].tail(30).values
-            prediction_uncertainty = []
-
-            for i in range(days_ahead):
-                future_date = datetime.now() + timedelta(days=i + 1)
-
-                # Construction des features futures améliorées
-                future_features = self.build_enhanced_future_features(
-                    future_date, df_with_features, last_known_values, i, contextual_data
-                )
-
-                if len(future_features) != len(feature_cols):
-                    logger.warning(f"⚠️ Mismatch features: {len(future_features)} vs {len(feature_cols)}")
-                    fallback_pred = self.predict_enhanced_fallback(blood_type, 1)
-                    if fallback_pred:
-                        pred = fallback_pred[0]['predicted_demand']
-                        confidence = fallback_pred[0]['confidence']
-                        uncertainty = fallback_pred[0].get('uncertainty', 0.3)
-                    else:
-                        config = self.blood_type_config.get(blood_type, {})
-                        pred = config.get('base_demand', 5)
-                        confidence = 0.5
-                        uncertainty = 0.4
-                else:
-                    # Prédiction ML avec incertitude
-                    feature_array = np.array(future_features).reshape(1, -1)
-
-                    if scaler:
-                        feature_array = scaler.transform(feature_array)
-
-                    pred = model.predict(feature_array)[0]
-                    pred = max(0, int(pred))
-
-                    # Calcul d'incertitude basé sur l'historique et la performance du modèle
-                    model_performance = self.model_performance.get(blood_type, {}).get(method, {})
-                    base_mape = model_performance.get('mape', 30.0)
-                    stability = model_performance.get('stability_score', 0.5)
-
-                    # Incertitude basée sur la variance récente
-                    if len(last_known_values) >= 14:
-                        recent_std = np.std(last_known_values[-14:])
-                        recent_mean = np.mean(last_known_values[-14:])
-                        cv = recent_std / max(recent_mean, 1)
-                    else:
-                        cv = 0.3
-
-                    # Calcul de confiance multi-facteurs
-                    base_confidence = max(0.3, min(0.95, 1.0 - (base_mape / 100)))
-                    stability_factor = stability
-                    temporal_decay = 0.98 ** i
-                    volatility_penalty = 1.0 - min(0.3, cv)
+            # Prévision de tout l'horizon en un lot (features calculées par nom)
+            engine = BatchForecastEngine(model, feature_cols, scaler)
+            start_date = datetime.now() + timedelta(days=1)
+            predicted, series = engine.forecast(df_with_features, start_date, days_ahead)
+
+            # Incertitude basée sur la performance du modèle
+            model_performance = self.model_performance.get(blood_type, {}).get(method, {})
+            base_mape = model_performance.get('mape', 30.0)
+            stability_factor = model_performance.get('stability_score', 0.5)
+            base_confidence = max(0.3, min(0.95, 1.0 - (base_mape / 100)))
+
+            # Variabilité des 14 dernières valeurs connues avant chaque jour prédit
+            history_len = len(series) - days_ahead
+            if history_len >= 14:
+                windows = np.lib.stride_tricks.sliding_window_view(series[:-1], 14)[history_len - 14:]
+                cv = windows.std(axis=1) / np.maximum(windows.mean(axis=1), 1)
+            else:
+                cv = np.full(days_ahead, 0.3)
 
-                    confidence = base_confidence * stability_factor * temporal_decay * volatility_penalty
+            # Calcul de confiance multi-facteurs
+            temporal_decay = 0.98 ** np.arange(days_ahead)
+            volatility_penalty = 1.0 - np.minimum(0.3, cv)
+            confidence = base_confidence * stability_factor * temporal_decay * volatility_penalty
 
-                    # Incertitude (1 - confidence mais avec limites)
-                    uncertainty = max(0.1, min(0.6, 1.0 - confidence))
+            # Incertitude (1 - confidence mais avec limites)
+            uncertainty = np.clip(1.0 - confidence, 0.1, 0.6)
 
+            predictions = []
+            for i in range(days_ahead):
+                future_date = start_date + timedelta(days=i)
                 predictions.append({
                     'date': future_date.strftime('%Y-%m-%d'),
-                    'predicted_demand': pred,
-                    'confidence': round(confidence, 3),
-                    'uncertainty': round(uncertainty, 3),
+                    'predicted_demand': int(predicted[i]),
+                    'confidence': round(float(confidence[i]), 3),
+                    'uncertainty': round(float(uncertainty[i]), 3),
                     'method_details': {
                         'model_used': method,
                         'features_count': len(feature_cols),
                         'base_confidence': round(base_confidence, 3),
                         'stability_factor': round(stability_factor, 3),
-                        'temporal_decay': round(temporal_decay, 3),
-                        'volatility_penalty': round(volatility_penalty, 3)
+                        'temporal_decay': round(float(temporal_decay[i]), 3),
+                        'volatility_penalty': round(float(volatility_penalty[i]), 3)
                     }
                 })
 
-                # Mettre à jour les valeurs connues pour la prédiction suivante
-                if len(last_known_values) >= 30:
-                    last_known_values = np.append(last_known_values[1:], pred)
-                else:
-                    last_known_values = np.append(last_known_values, pred)
-
             return predictions
 
         except Exception as e:
@@ -1399,50 +1277,22 @@ class EnhancedBloodDemandForecaster:
             if historical_data is None or len(historical_data) < 30:
                 return self.predict_enhanced_fallback(blood_type, days_ahead)
 
-            ts_data = historical_data['demand'].values
-
-            # Test de stationnarité
-            adf_result = adfuller(ts_data)
-            is_stationary = adf_result[1] < 0.05
-
-            # Différenciation si nécessaire
-            if not is_stationary:
-                ts_data = np.diff(ts_data)
-                d = 1
-            else:
-                d = 0
-
-            # Sélection automatique des paramètres ARIMA
-            best_aic = float('inf')
-            best_params = (1, d, 1)
-
-            for p in range(0, min(4, len(ts_data) // 10)):
-                for q in range(0, min(4, len(ts_data) // 10)):
-                    try:
-                        model = ARIMA(historical_data['demand'], order=(p, d, q))
-                        fitted = model.fit()
-                        if fitted.aic < best_aic:
-                            best_aic = fitted.aic
-                            best_params = (p, d, q)
-                    except:
-                        continue
-
-            # Entraîner le modèle final
-            model = ARIMA(historical_data['demand'], order=best_params)
-            fitted = model.fit()
-
-            # Générer les prédictions
-            forecast = fitted.forecast(steps=days_ahead)
-            conf_int = fitted.get_forecast(steps=days_ahead).conf_int()
+            # Ordre et paramètres enregistrés (sélection planifiée), prévision + intervalles en un appel
+            forecast = self.arima_engine.forecast(
+                blood_type,
+                historical_data['demand'].values,
+                pd.Timestamp(historical_data.index.max()).date(),
+                steps=days_ahead
+            )
 
             predictions = []
             for i in range(days_ahead):
                 future_date = datetime.now() + timedelta(days=i + 1)
-                pred = max(1, int(forecast.iloc[i]))
+                pred = max(1, int(forecast['mean'][i]))
 
                 # Confidence basée sur l'intervalle de confiance
-                lower_bound = conf_int.iloc[i, 0]
-                upper_bound = conf_int.iloc[i, 1]
+                lower_bound = forecast['lower'][i]
+                upper_bound = forecast['upper'][i]
                 interval_width = upper_bound - lower_bound
                 confidence = max(0.3, min(0.9, 1.0 - (interval_width / max(pred, 1)) / 2))
 
@@ -1452,8 +1302,8 @@ class EnhancedBloodDemandForecaster:
                     'confidence': round(confidence, 3),
                     'uncertainty': round(1.0 - confidence, 3),
                     'method_details': {
-                        'arima_order': best_params,
-                        'aic': round(fitted.aic, 2),
+                        'arima_order': forecast['order'],
+                        'aic': round(forecast['aic'], 2),
                         'lower_bound': max(0, int(lower_bound)),
                         'upper_bound': int(upper_bound)
                     }
@@ -1644,164 +1494,6 @@ class EnhancedBloodDemandForecaster:
             logger.error(f"❌ Erreur Prophet: {e}")
             return self.predict_enhanced_fallback(blood_type, days_ahead)
 
-    def build_enhanced_future_features(self, future_date, historical_df, last_values, day_offset, contextual_data):
-        """
-        🏗️ CONSTRUCTION DE FEATURES FUTURES AMÉLIORÉES
-        """
-        try:
-            features = []
-
-            # Features temporelles de base
-            features.extend([
-                future_date.weekday(),  # day_of_week
-                future_date.month,  # month
-                future_date.day,  # day_of_month
-                future_date.quarter,  # quarter
-                future_date.isocalendar()[1],  # week_of_year
-                future_date.timetuple().tm_yday,  # day_of_year
-                1 if future_date.weekday() in [5, 6] else 0,  # is_weekend
-                1 if future_date.weekday() == 0 else 0,  # is_monday
-                1 if future_date.weekday() == 4 else 0,  # is_friday
-                1 if future_date.day <= 3 else 0,  # is_month_start
-                1 if future_date.day >= 28 else 0,  # is_month_end
-            ])
-
-            # Moyennes mobiles basées sur les dernières valeurs
-            mean_demand = historical_df['demand'].mean()
-
-            # Moyennes mobiles multiples
-            for window in [3, 7, 14, 30]:
-                if len(last_values) >= window:
-                    features.append(np.mean(last_values[-window:]))
-                else:
-                    features.append(mean_demand)
-
-            # Écarts-types des fenêtres
-            for window in [3, 7, 14, 30]:
-                if len(last_values) >= window:
-                    features.append(np.std(last_values[-window:]))
-                else:
-                    features.append(historical_df['demand'].std())
-
-            # Moyennes mobiles exponentielles
-            for alpha in [0.1, 0.3, 0.5]:
-                if len(last_values) >= 5:
-                    ema = last_values[-1]  # Valeur initiale
-                    for val in last_values[-5:]:
-                        ema = alpha * val + (1 - alpha) * ema
-                    features.append(ema)
-                else:
-                    features.append(mean_demand)
-
-            # Lags
-            for lag in [1, 2, 3, 7, 14]:
-                if len(last_values) >= lag:
-                    features.append(last_values[-lag])
-                else:
-                    features.append(mean_demand)
-
-            # Différences et changements
-            if len(last_values) >= 2:
-                features.append(last_values[-1] - last_values[-2])  # diff_1
-            else:
-                features.append(0)
-
-            if len(last_values) >= 8:
-                features.append(last_values[-1] - last_values[-8])  # diff_7
-            else:
-                features.append(0)
-
-            if len(last_values) >= 2 and last_values[-2] != 0:
-                features.append((last_values[-1] - last_values[-2]) / last_values[-2])  # pct_change
-            else:
-                features.append(0)
-
-            # Tendances à différentes échelles
-            for window in [7, 14, 30]:
-                if len(last_values) >= window:
-                    try:
-                        trend = np.polyfit(range(window), last_values[-window:], 1)[0]
-                        features.append(trend)
-                    except:
-                        features.append(0)
-                else:
-                    features.append(0)
-
-            # Volatilité
-            for window in [7, 14]:
-                if len(last_values) >= window:
-                    features.append(np.std(last_values[-window:]))
-                else:
-                    features.append(historical_df['demand'].std())
-
-            # Coefficients de variation
-            for window in [7, 14]:
-                if len(last_values) >= window:
-                    std_val = np.std(last_values[-window:])
-                    mean_val = np.mean(last_values[-window:])
-                    cv = std_val / max(mean_val, 1)
-                    features.append(cv)
-                else:
-                    features.append(0.3)
-
-            # Features cycliques
-            features.extend([
-                np.sin(2 * np.pi * future_date.weekday() / 7),
-                np.cos(2 * np.pi * future_date.weekday() / 7),
-                np.sin(2 * np.pi * future_date.month / 12),
-                np.cos(2 * np.pi * future_date.month / 12),
-                np.sin(2 * np.pi * future_date.timetuple().tm_yday / 365),
-                np.cos(2 * np.pi * future_date.timetuple().tm_yday / 365),
-            ])
-
-            # Quantiles
-            for window in [14, 30]:
-                if len(last_values) >= window:
-                    features.extend([
-                        np.percentile(last_values[-window:], 25),
-                        np.percentile(last_values[-window:], 75),
-                        np.median(last_values[-window:])
-                    ])
-                else:
-                    q25, q75, median = np.percentile(last_values, [25, 75, 50]) if len(
-                        last_values) > 0 else [mean_demand] * 3
-                    features.extend([q25, q75, median])
-
-            # Features d'interaction
-            if len(last_values) >= 7:
-                ma_7 = np.mean(last_values[-7:])
-                features.append(ma_7 * (1 - (1 if future_date.weekday() in [5, 6] else 0)))  # weekday interaction
-            else:
-                features.append(mean_demand * 0.8)
-
-            if len(last_values) >= 14:
-                ma_14 = np.mean(last_values[-14:])
-                features.append(ma_14 * np.sin(2 * np.pi * future_date.month / 12))  # seasonal interaction
-            else:
-                features.append(mean_demand * 0.1)
-
-            # Features contextuelles enrichies
-            if contextual_data:
-                avg_demand = np.mean(last_values) if len(last_values) > 0 else mean_demand
-                recent_demand = np.mean(last_values[-7:]) if len(last_values) >= 7 else avg_demand
-
-                features.extend([
-                    contextual_data.get('current_stock', 0) / max(1, avg_demand),  # stock_ratio
-                    contextual_data.get('current_stock', 0) / max(1, recent_demand),  # stock_days_remaining
-                    contextual_data.get('recent_daily_avg', 0) / max(1, avg_demand),  # recent_trend_factor
-                    contextual_data.get('urgent_requests', 0) / max(1, recent_demand),  # urgent_pressure
-                    contextual_data.get('recent_consumption', 0) / max(1, recent_demand)  # consumption_ratio
-                ])
-            else:
-                features.extend([3.0, 7.0, 1.0, 0.1, 1.0])
-
-            return features
-
-        except Exception as e:
-            logger.error(f"❌ Erreur construction features améliorées: {e}")
-            # Retourner des features par défaut
-            return [0] * 50  # Ajustez selon le nombre de features attendues
-
     def predict_enhanced_fallback(self, blood_type, days_ahead):
         """
         🚨 PRÉDICTION DE SECOURS AMÉLIORÉE
@@ -2486,13 +2178,12 @@ def generate_enhanced_forecast_api(blood_type, days_ahead=7, method='auto', forc
                 'requested_days': days_ahead
             }
 
-        # Nettoyer le cache si demandé
+        # Ré-entraîner et republier les modèles si demandé
         if force_retrain:
-            forecaster.clear_enhanced_cache(blood_type)
-            logger.info(f"🧹 Enhanced cache cleared for {blood_type}")
+            logger.info(f"🧹 Enhanced retraining requested for {blood_type}")
 
         # Générer la prédiction améliorée
-        result = forecaster.predict_enhanced(blood_type, days_ahead, method)
+        result = forecaster.predict_enhanced(blood_type, days_ahead, method, force_retrain)
 
         if not result:
             logger.error(f"❌ No enhanced result generated for {blood_type}")
@@ -2841,6 +2532,12 @@ def health_check_enhanced():
             status['performance'] = {'error': str(e)}
             status['status'] = 'degraded_enhanced'
 
+        # Modèles publiés dans le registre
+        try:
+            status['model_registry'] = ModelRegistry().describe()
+        except Exception as e:
+            status['model_registry'] = {'error': str(e)}
+
         return status
 
     except Exception as e:
@@ -3275,7 +2972,7 @@ def get_enhanced_system_stats():
                         if model_name == 'blood_units' and count > 0:
                             blood_type_distribution = {}
                             for bt in forecaster.blood_type_config.keys():
-                                bt_count = BloodUnit.objects.filter(donor__blood_type=bt).count()
+                                bt_count = BloodUnit.objects.filter(blood_type=bt).count()
                                 if bt_count > 0:
                                     blood_type_distribution[bt] = bt_count
                             db_stats['blood_type_distribution'] = blood_type_distribution
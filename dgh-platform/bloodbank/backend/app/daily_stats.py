@@ -0,0 +1,301 @@
+# app/daily_stats.py
+"""
+Maintenance incrémentale de la table DailyDemandStat.
+
+Chaque enregistrement (unité, demande, transfusion) contribue à une ligne
+(date, groupe sanguin). À chaque écriture, on applique la différence entre
+la contribution déjà comptée et la nouvelle, ce qui gère aussi bien les
+créations que les changements de statut et les suppressions.
+
+Les écritures en masse (bulk_create, update) ne déclenchent pas de signaux :
+elles doivent être suivies de rebuild_daily_stats() sur la période concernée.
+
+La table n'est lue et maintenue qu'après une reconstruction complète, qui
+crée le marqueur DailyStatsState : avant, quelques écritures isolées n'en
+feraient pas un historique exploitable.
+"""
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.utils import timezone
+
+from .models import BloodConsumption, BloodRequest, BloodUnit, DailyDemandStat, DailyStatsState
+from .utils.cache_utils import cache_key_builder, safe_cache_get, safe_cache_set
+
+logger = logging.getLogger(__name__)
+
+APPROVED_STATUSES = ('Fulfilled', 'Approved', 'Delivered')
+
+# Marqueur DailyStatsState présent ou non : mémorisé dans le cache plutôt
+# qu'un exists() par requête
+READY_KEY = cache_key_builder('daily_stats:ready')
+# Table pas encore initialisée : revérifiée périodiquement par les lectures
+# (backfill lancé ailleurs)
+NOT_READY_TIMEOUT = 300
+
+# Champs dont dépend la contribution de chaque modèle
+TRACKED_FIELDS = {
+    BloodUnit: {'donor', 'donor_id', 'blood_type', 'collection_date', 'status'},
+    BloodRequest: {'blood_type', 'request_date', 'quantity', 'priority', 'status'},
+    BloodConsumption: {'unit', 'unit_id', 'blood_type', 'date', 'volume'},
+}
+
+_CONTRIBUTION_ATTR = '_daily_stat_contribution'
+
+
+def _as_date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, str):
+        return date.fromisoformat(value[:10])
+    return value
+
+
+# ==================== CONTRIBUTIONS ====================
+
+def _unit_contribution(collection_date, blood_type, status):
+    return {(_as_date(collection_date), blood_type): {
+        'collected_units': 1,
+        'used_units': int(status == 'Used'),
+        'expired_units': int(status == 'Expired'),
+    }}
+
+
+def _request_contribution(request_date, blood_type, quantity, priority, status):
+    quantity = quantity or 0
+    return {(_as_date(request_date), blood_type): {
+        'requests_count': 1,
+        'requested_units': quantity,
+        'urgent_requests': int(priority == 'Urgent'),
+        'urgent_approved_requests': int(priority == 'Urgent' and status in APPROVED_STATUSES),
+        'approved_units': quantity if status in APPROVED_STATUSES else 0,
+    }}
+
+
+def _consumption_contribution(consumption_date, blood_type, volume):
+    return {(_as_date(consumption_date), blood_type): {
+        'consumed_units': 1,
+        'consumed_volume': volume or 0,
+    }}
+
+
+def contribution(instance):
+    """Contribution actuelle d'une instance (selon ses valeurs en mémoire)"""
+    if isinstance(instance, BloodUnit):
+        return _unit_contribution(instance.collection_date, instance.blood_type, instance.status)
+    if isinstance(instance, BloodRequest):
+        return _request_contribution(
+            instance.request_date, instance.blood_type, instance.quantity, instance.priority, instance.status
+        )
+    if isinstance(instance, BloodConsumption):
+        return _consumption_contribution(instance.date, instance.blood_type, instance.volume)
+    return {}
+
+
+def _stored_contribution(instance):
+    """Contribution de la ligne actuellement en base (une requête par clé primaire)"""
+    model = type(instance)
+    if model is BloodUnit:
+        row = model.objects.filter(pk=instance.pk).values_list(
+            'collection_date', 'blood_type', 'status'
+        ).first()
+        return _unit_contribution(*row) if row else {}
+    if model is BloodRequest:
+        row = model.objects.filter(pk=instance.pk).values_list(
+            'request_date', 'blood_type', 'quantity', 'priority', 'status'
+        ).first()
+        return _request_contribution(*row) if row else {}
+    if model is BloodConsumption:
+        row = model.objects.filter(pk=instance.pk).values_list(
+            'date', 'blood_type', 'volume'
+        ).first()
+        return _consumption_contribution(*row) if row else {}
+    return {}
+
+
+# ==================== SIGNAUX ====================
+
+def _is_tracked_update(instance, update_fields):
+    if update_fields is None:
+        return True
+    return bool(TRACKED_FIELDS.get(type(instance), set()) & set(update_fields))
+
+
+def remember_state(instance, update_fields=None):
+    """pre_save : retient ce qui est déjà compté pour cette instance"""
+    if hasattr(instance, _CONTRIBUTION_ATTR) or not _is_tracked_update(instance, update_fields):
+        return
+    if not daily_stats_maintained():
+        return
+    try:
+        previous = {} if instance._state.adding else _stored_contribution(instance)
+        setattr(instance, _CONTRIBUTION_ATTR, previous)
+    except Exception as e:
+        logger.warning(f"Daily stats state lookup failed for {instance.pk}: {e}")
+
+
+def apply_change(instance, update_fields=None, deleted=False):
+    """post_save / post_delete : applique la différence de contribution"""
+    if not deleted and not _is_tracked_update(instance, update_fields):
+        return
+    if not daily_stats_maintained():
+        return
+    try:
+        previous = getattr(instance, _CONTRIBUTION_ATTR, None)
+        if previous is None:
+            # Instance jamais vue en pre_save (suppression directe)
+            previous = contribution(instance) if deleted else {}
+        current = {} if deleted else contribution(instance)
+
+        apply_deltas(_difference(current, previous))
+        setattr(instance, _CONTRIBUTION_ATTR, current)
+    except Exception as e:
+        logger.warning(f"Daily stats update failed for {instance.pk}: {e}")
+
+
+def _difference(current, previous):
+    deltas = defaultdict(dict)
+    for key in set(current) | set(previous):
+        new_values = current.get(key, {})
+        old_values = previous.get(key, {})
+        for field in set(new_values) | set(old_values):
+            delta = new_values.get(field, 0) - old_values.get(field, 0)
+            if delta:
+                deltas[key][field] = delta
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Incrémente les compteurs {(date, groupe): {champ: delta}} en base"""
+    for (stat_date, blood_type), fields in deltas.items():
+        if not fields:
+            continue
+        stat, _ = DailyDemandStat.objects.get_or_create(date=stat_date, blood_type=blood_type)
+        DailyDemandStat.objects.filter(pk=stat.pk).update(
+            **{field: F(field) + delta for field, delta in fields.items()}
+        )
+
+
+# ==================== RECONSTRUCTION ====================
+
+def rebuild_daily_stats(start_date=None, end_date=None):
+    """
+    Recalcule les agrégats à partir des tables brutes (une requête groupée
+    par source) et remplace les lignes de la période. Retourne le nombre de
+    lignes écrites.
+    """
+    def in_range(field):
+        lookup = Q()
+        if start_date:
+            lookup &= Q(**{f'{field}__gte': start_date})
+        if end_date:
+            lookup &= Q(**{f'{field}__lte': end_date})
+        return lookup
+
+    rows = defaultdict(dict)
+
+    units = BloodUnit.objects.filter(in_range('collection_date')).values(
+        'collection_date', 'blood_type'
+    ).annotate(
+        collected=Count('unit_id'),
+        used=Count('unit_id', filter=Q(status='Used')),
+        expired=Count('unit_id', filter=Q(status='Expired'))
+    )
+    for item in units:
+        rows[(item['collection_date'], item['blood_type'])].update(
+            collected_units=item['collected'], used_units=item['used'], expired_units=item['expired']
+        )
+
+    requests = BloodRequest.objects.filter(in_range('request_date')).values(
+        'request_date', 'blood_type'
+    ).annotate(
+        count=Count('request_id'),
+        requested=Sum('quantity'),
+        urgent=Count('request_id', filter=Q(priority='Urgent')),
+        urgent_approved=Count('request_id', filter=Q(priority='Urgent', status__in=APPROVED_STATUSES)),
+        approved=Sum('quantity', filter=Q(status__in=APPROVED_STATUSES))
+    )
+    for item in requests:
+        rows[(item['request_date'], item['blood_type'])].update(
+            requests_count=item['count'], requested_units=item['requested'] or 0,
+            urgent_requests=item['urgent'], urgent_approved_requests=item['urgent_approved'],
+            approved_units=item['approved'] or 0
+        )
+
+    consumptions = BloodConsumption.objects.filter(in_range('date')).values(
+        'date', 'blood_type'
+    ).annotate(
+        count=Count('id'),
+        consumed=Sum('volume')
+    )
+    for item in consumptions:
+        rows[(item['date'], item['blood_type'])].update(
+            consumed_units=item['count'], consumed_volume=item['consumed'] or 0
+        )
+
+    stats = [
+        DailyDemandStat(date=stat_date, blood_type=blood_type, **fields)
+        for (stat_date, blood_type), fields in rows.items()
+        if stat_date and blood_type
+    ]
+
+    with transaction.atomic():
+        DailyDemandStat.objects.filter(in_range('date')).delete()
+        DailyDemandStat.objects.bulk_create(stats, batch_size=1000)
+        # Seule une reconstruction complète rend la table exploitable
+        if start_date is None and end_date is None:
+            mark_daily_stats_ready(True)
+
+    logger.info(f"Daily stats rebuilt: {len(stats)} rows")
+    return len(stats)
+
+
+def mark_daily_stats_ready(ready=True):
+    """
+    Pose (reconstruction complète) ou retire le marqueur DailyStatsState ;
+    sans marqueur, la table attend une nouvelle reconstruction complète.
+    """
+    if ready:
+        DailyStatsState.objects.update_or_create(pk=1, defaults={'backfilled_at': timezone.now()})
+    else:
+        DailyStatsState.objects.all().delete()
+    _remember_ready(ready)
+
+
+def _remember_ready(ready):
+    safe_cache_set(READY_KEY, ready, None if ready else NOT_READY_TIMEOUT)
+
+
+def _marker_exists():
+    try:
+        return DailyStatsState.objects.exists()
+    except Exception:
+        return False
+
+
+def daily_stats_ready():
+    """Vrai si la table d'agrégats a été initialisée (reconstruction complète effectuée)"""
+    ready = safe_cache_get(READY_KEY)
+    if ready is not None:
+        return ready
+    ready = _marker_exists()
+    _remember_ready(ready)
+    return ready
+
+
+def daily_stats_maintained():
+    """
+    Comme daily_stats_ready() pour les écritures : un état « non initialisée »
+    en cache est revérifié en base, pour ne perdre aucune écriture qui suit
+    un backfill lancé par un autre processus.
+    """
+    if safe_cache_get(READY_KEY):
+        return True
+    ready = _marker_exists()
+    if ready:
+        _remember_ready(True)
+    return ready
@@ -0,0 +1,88 @@
+# app/expiry.py
+"""
+Passage planifié des unités périmées au statut 'Expired'.
+
+BloodUnit.save() ne corrige que les unités enregistrées une à une ; les
+unités créées en masse (import, générateur) ou simplement jamais retouchées
+restaient 'Available' après leur date d'expiration. Le balayage les bascule
+toutes en un UPDATE, de sorte que les lectures (stock, alertes, dashboard)
+peuvent se fier au seul statut.
+
+Un UPDATE ne déclenche pas de signaux : agrégats journaliers des dates de
+collecte concernées, alertes et entrées de cache dérivées de l'inventaire
+(espace de noms INVENTORY_CACHE) sont mis à jour après commit.
+"""
+
+import logging
+import time
+
+from django.db import transaction
+from django.db.models import Count, Max, Min
+from django.utils import timezone
+
+from . import alerts, daily_stats
+from .models import BloodUnit
+from .utils.cache_utils import cache_key_builder, invalidate_namespace, safe_cache_get, safe_cache_set
+
+logger = logging.getLogger(__name__)
+
+# Entrées de cache calculées à partir du stock (dashboard, analytics, recommandations)
+INVENTORY_CACHE = 'inventory'
+
+LAST_SWEEP_KEY = cache_key_builder('expiry_sweep:last')
+
+
+def expired_units(today=None):
+    """Unités encore 'Available' dont la date d'expiration est dépassée"""
+    today = today or timezone.now().date()
+    return BloodUnit.objects.filter(status='Available', date_expiration__lt=today)
+
+
+def sweep_expired_units(today=None, dry_run=False):
+    """
+    Bascule en 'Expired' toutes les unités disponibles périmées (un UPDATE).
+    Retourne {'expired', 'by_blood_type', 'dry_run', 'swept_at', 'duration_seconds'}.
+    """
+    start = time.time()
+    today = today or timezone.now().date()
+
+    with transaction.atomic():
+        units = expired_units(today)
+        rows = list(units.values_list('blood_type').annotate(
+            count=Count('unit_id'), first=Min('collection_date'), last=Max('collection_date')
+        ).order_by())
+        by_blood_type = {blood_type: count for blood_type, count, _, _ in rows}
+        expired = 0
+        if rows and not dry_run:
+            expired = units.update(status='Expired')
+            first, last = min(row[2] for row in rows), max(row[3] for row in rows)
+            transaction.on_commit(lambda: _refresh_derived_data(first, last))
+
+    summary = {
+        'expired': expired if not dry_run else sum(by_blood_type.values()),
+        'by_blood_type': by_blood_type,
+        'dry_run': dry_run,
+        'swept_at': timezone.now().isoformat(),
+        'duration_seconds': round(time.time() - start, 3),
+    }
+    if not dry_run:
+        safe_cache_set(LAST_SWEEP_KEY, summary, None)
+    logger.info(f"Expiry sweep: {summary['expired']} unit(s) expired{' (dry run)' if dry_run else ''}")
+    return summary
+
+
+def last_sweep():
+    """Résumé du dernier balayage (None si aucun)"""
+    return safe_cache_get(LAST_SWEEP_KEY)
+
+
+def _refresh_derived_data(first_collection, last_collection):
+    """Agrégats journaliers (unités expirées par date de collecte), alertes et cache"""
+    try:
+        # Table non initialisée : le backfill complet reste à faire (backfill_daily_stats)
+        if daily_stats.daily_stats_maintained():
+            daily_stats.rebuild_daily_stats(first_collection, last_collection)
+    except Exception as e:
+        logger.warning(f"Daily stats rebuild failed after expiry sweep: {e}")
+    alerts.refresh_alerts()
+    invalidate_namespace(INVENTORY_CACHE)
@@ -0,0 +1,305 @@
+# app/exports.py
+"""
+Exports de rapports en flux pour ReportExportAPIView.
+
+Les lignes sont lues par ``values_list().iterator(chunk_size=...)`` — ni
+instances de modèle ni propriétés calculées par ligne, les colonnes dérivées
+(jours avant expiration, âge, nombre de dons) étant calculées à partir des
+valeurs brutes ou d'agrégats SQL — puis écrites au fil de l'eau dans une
+StreamingHttpResponse : la mémoire reste constante quelle que soit la
+taille des tables.
+
+Formats : csv, ndjson, parquet et arrow (flux IPC), ces deux derniers si
+pyarrow est installé. Compression gzip optionnelle, filtres de dates sur
+le champ de date propre à chaque rapport.
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import date
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Count, Max
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+
+from .models import BloodConsumption, BloodUnit, Donor
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
+GENDER_LABELS = dict(Donor.GENDER_CHOICES)
+
+FORMATS = {
+    'csv': {'extension': 'csv', 'content_type': 'text/csv'},
+    'ndjson': {'extension': 'ndjson', 'content_type': 'application/x-ndjson'},
+    'parquet': {'extension': 'parquet', 'content_type': 'application/vnd.apache.parquet'},
+    'arrow': {'extension': 'arrows', 'content_type': 'application/vnd.apache.arrow.stream'},
+}
+COLUMNAR_FORMATS = {'parquet', 'arrow'}
+
+
+def _export_config():
+    return getattr(settings, 'BLOOD_BANK_SETTINGS', {}).get('EXPORTS', {})
+
+
+# ==================== RAPPORTS ====================
+# columns : (en-tête CSV, clé NDJSON/Parquet/Arrow, type)
+# fields : colonnes lues en base ; row : ligne lue -> ligne exportée
+
+def _age(birth_date, today):
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+REPORTS = {
+    'inventory': {
+        'queryset': lambda: BloodUnit.objects.order_by('unit_id'),
+        'date_field': 'collection_date',
+        'columns': [
+            ('Unit ID', 'unit_id', 'string'),
+            ('Blood Type', 'blood_type', 'string'),
+            ('Status', 'status', 'string'),
+            ('Collection Date', 'collection_date', 'date'),
+            ('Expiry Date', 'expiry_date', 'date'),
+            ('Volume (ml)', 'volume_ml', 'int'),
+            ('Hemoglobin (g/dl)', 'hemoglobin_g_dl', 'float'),
+            ('Site', 'site', 'string'),
+            ('Days to Expiry', 'days_to_expiry', 'int'),
+        ],
+        'fields': [
+            'unit_id', 'blood_type', 'status', 'collection_date', 'date_expiration',
+            'volume_ml', 'hemoglobin_g_dl', 'record__site__nom'
+        ],
+        'row': lambda row, today: row + ((row[4] - today).days,),
+    },
+    'consumption': {
+        'queryset': lambda: BloodConsumption.objects.order_by('date', 'id'),
+        'date_field': 'date',
+        'columns': [
+            ('Date', 'date', 'date'),
+            ('Unit ID', 'unit_id', 'string'),
+            ('Blood Type', 'blood_type', 'string'),
+            ('Patient', 'patient', 'string'),
+            ('Department', 'department', 'string'),
+            ('Volume', 'volume', 'float'),
+            ('Request ID', 'request_id', 'string'),
+        ],
+        'fields': [
+            'date', 'unit_id', 'blood_type', 'patient__first_name', 'patient__last_name',
+            'request__department__name', 'volume', 'request_id'
+        ],
+        'row': lambda row, today: row[:3] + (f"{row[3]} {row[4]}",) + row[5:],
+    },
+    'waste': {
+        'queryset': lambda: BloodUnit.objects.filter(status='Expired').order_by('unit_id'),
+        'date_field': 'date_expiration',
+        'columns': [
+            ('Unit ID', 'unit_id', 'string'),
+            ('Blood Type', 'blood_type', 'string'),
+            ('Collection Date', 'collection_date', 'date'),
+            ('Expiry Date', 'expiry_date', 'date'),
+            ('Volume (ml)', 'volume_ml', 'int'),
+            ('Site', 'site', 'string'),
+            ('Days Expired', 'days_expired', 'int'),
+        ],
+        'fields': [
+            'unit_id', 'blood_type', 'collection_date', 'date_expiration', 'volume_ml', 'record__site__nom'
+        ],
+        'row': lambda row, today: row + ((today - row[3]).days,),
+    },
+    'donors': {
+        # Le filtre de dates restreint les dons comptés (et les donneurs exportés)
+        'queryset': lambda: Donor.objects.order_by('donor_id'),
+        'date_field': 'bloodunit__collection_date',
+        'annotate': lambda: {
+            'total_donations': Count('bloodunit'),
+            'last_donation': Max('bloodunit__collection_date'),
+        },
+        'columns': [
+            ('Donor ID', 'donor_id', 'string'),
+            ('Name', 'name', 'string'),
+            ('Age', 'age', 'int'),
+            ('Gender', 'gender', 'string'),
+            ('Blood Type', 'blood_type', 'string'),
+            ('Phone', 'phone', 'string'),
+            ('Total Donations', 'total_donations', 'int'),
+            ('Last Donation', 'last_donation', 'date'),
+        ],
+        'fields': [
+            'donor_id', 'first_name', 'last_name', 'date_of_birth', 'gender',
+            'blood_type', 'phone_number', 'total_donations', 'last_donation'
+        ],
+        'row': lambda row, today: (
+            row[0], f"{row[1]} {row[2]}", _age(row[3], today), GENDER_LABELS.get(row[4], row[4])
+        ) + row[5:],
+    },
+}
+
+
+def report_rows(report_type, date_from=None, date_to=None, chunk_size=None):
+    """Lignes exportées, par listes de ``chunk_size`` (une itération serveur en flux)"""
+    report = REPORTS[report_type]
+    chunk_size = chunk_size or _export_config().get('CHUNK_SIZE', 2000)
+
+    queryset = report['queryset']()
+    bounds = {}
+    if date_from:
+        bounds[f"{report['date_field']}__gte"] = date_from
+    if date_to:
+        bounds[f"{report['date_field']}__lte"] = date_to
+    if bounds:
+        # Un seul filter() : sur une relation multiple (dons d'un donneur), deux
+        # appels créeraient deux jointures et les agrégats compteraient leur produit
+        queryset = queryset.filter(**bounds)
+    if 'annotate' in report:
+        queryset = queryset.annotate(**report['annotate']())
+
+    today = timezone.now().date()
+    transform = report['row']
+    rows = queryset.values_list(*report['fields']).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = [transform(row, today) for row in islice(rows, chunk_size)]
+        if not chunk:
+            return
+        yield chunk
+
+
+# ==================== FORMATS ====================
+
+def _csv_stream(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([label for label, _, _ in columns])
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _ndjson_stream(columns, chunks):
+    keys = [key for _, key, _ in columns]
+    for chunk in chunks:
+        yield ''.join(
+            json.dumps(dict(zip(keys, row)), default=str, ensure_ascii=False) + '\n' for row in chunk
+        ).encode('utf-8')
+
+
+class _ByteSink(io.RawIOBase):
+    """Fichier en écriture seule dont le contenu est vidé après chaque bloc"""
+
+    def __init__(self):
+        self.parts = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self.parts.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self):
+        data = b''.join(self.parts)
+        self.parts = []
+        return data
+
+
+def _arrow_schema(columns):
+    types = {'string': pa.string(), 'date': pa.date32(), 'int': pa.int64(), 'float': pa.float64()}
+    return pa.schema([(key, types[column_type]) for _, key, column_type in columns])
+
+
+def _arrow_batch(schema, chunk):
+    return pa.RecordBatch.from_arrays(
+        [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)],
+        schema=schema
+    )
+
+
+def _columnar_stream(columns, chunks, format_type):
+    schema = _arrow_schema(columns)
+    sink = _ByteSink()
+    if format_type == 'parquet':
+        # Un row group par bloc
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+        write = lambda batch: writer.write_batch(batch)
+    else:
+        writer = pa.ipc.new_stream(sink, schema)
+        write = writer.write_batch
+
+    for chunk in chunks:
+        write(_arrow_batch(schema, chunk))
+        yield sink.drain()
+    writer.close()
+    yield sink.drain()
+
+
+def _gzip_stream(stream):
+    compressor = zlib.compressobj(6, zlib.DEFLATED, zlib.MAX_WBITS | 16)
+    for data in stream:
+        compressed = compressor.compress(data)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def stream_report(report_type, format_type='csv', date_from=None, date_to=None, compress=False):
+    """
+    StreamingHttpResponse du rapport demandé.
+    Lève ValueError pour un rapport, un format ou une période invalides.
+    """
+    if report_type not in REPORTS:
+        raise ValueError('Type de rapport non supporté')
+    if format_type not in FORMATS:
+        raise ValueError(f"Format non supporté (formats: {', '.join(FORMATS)})")
+    if format_type in COLUMNAR_FORMATS and not PYARROW_AVAILABLE:
+        raise ValueError(f"Format {format_type} indisponible (pyarrow non installé)")
+    if date_from and date_to and date_from > date_to:
+        raise ValueError('date_from doit précéder date_to')
+
+    columns = REPORTS[report_type]['columns']
+    chunks = report_rows(report_type, date_from, date_to)
+    if format_type == 'csv':
+        stream = _csv_stream(columns, chunks)
+    elif format_type == 'ndjson':
+        stream = _ndjson_stream(columns, chunks)
+    else:
+        stream = _columnar_stream(columns, chunks, format_type)
+
+    file_format = FORMATS[format_type]
+    filename = f"{report_type}_report_{timezone.now().strftime('%Y%m%d')}.{file_format['extension']}"
+    content_type = file_format['content_type']
+    if compress:
+        stream = _gzip_stream(stream)
+        filename += '.gz'
+        content_type = 'application/gzip'
+
+    response = StreamingHttpResponse(stream, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def parse_export_date(value):
+    """Date ISO (YYYY-MM-DD) d'un paramètre de requête ; ValueError si invalide"""
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Date invalide '{value}' (format YYYY-MM-DD)")
@@ -0,0 +1,275 @@
+# app/forecasting/arima_engine.py
+"""
+Moteur ARIMA avec ordre et paramètres persistés par groupe sanguin.
+
+Auparavant, chaque prévision ARIMA refaisait la recherche de l'ordre (p, q)
+— jusqu'à 16 ``ARIMA(...).fit()`` — puis réentraînait le meilleur modèle et
+appelait ``forecast`` et ``get_forecast`` séparément. Ici :
+
+- la recherche d'ordre n'a lieu que dans un job planifié
+  (``select_arima_orders``, commande ou tâche Celery beat), les ordres
+  candidats étant évalués en parallèle dans un pool de processus ;
+- l'ordre retenu et les paramètres ajustés sont enregistrés dans le registre
+  de modèles (``<groupe>/arima_state.json``) ;
+- à la prévision, les nouveaux jours sont intégrés en filtrant la série avec
+  les paramètres enregistrés (aucune optimisation) ; tous les
+  ``REFIT_INTERVAL_DAYS`` jours, les paramètres sont réajustés en partant des
+  précédents (démarrage à chaud, quelques itérations seulement) ;
+- la prévision et ses intervalles viennent d'un seul ``get_forecast``.
+"""
+
+import logging
+import multiprocessing
+import os
+import threading
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+
+from .training_jobs import init_worker
+
+try:
+    from statsmodels.tsa.arima.model import ARIMA
+    from statsmodels.tsa.stattools import adfuller
+
+    STATSMODELS_AVAILABLE = True
+except ImportError:
+    STATSMODELS_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = 'arima_state'
+
+# Dernier modèle par groupe sanguin : blood_type -> ((dernier jour, nb obs, fitted_at), résultats)
+_results_cache = {}
+_results_lock = threading.Lock()
+
+
+def _engine_config():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {}).get('ARIMA_ENGINE', {})
+
+
+def _order_limits():
+    limits = getattr(settings, 'AI_FORECASTING_CONFIG', {}).get('MODELS', {}).get('ARIMA', {})
+    return limits.get('max_p', 3), limits.get('max_q', 3)
+
+
+# ==================== AJUSTEMENT (sans Django, exécutable dans un worker) ====================
+
+def differencing_order(values):
+    """d = 0 si la série est stationnaire (test ADF) ou constante, sinon 1"""
+    if np.ptp(values) == 0:
+        return 0
+    return 0 if adfuller(values)[1] < 0.05 else 1
+
+
+def candidate_orders(values, d, max_p=3, max_q=3):
+    """Grille (p, d, q) : au plus max_p × max_q, réduite pour les séries courtes"""
+    limit = (len(values) - d) // 10
+    return [
+        (p, d, q)
+        for p in range(min(max_p + 1, limit))
+        for q in range(min(max_q + 1, limit))
+    ]
+
+
+def fit_arima(values, order, start_params=None):
+    """Ajustement ARIMA ; ``start_params`` permet un démarrage à chaud"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ARIMA(values, order=order).fit(start_params=start_params)
+
+
+def filter_arima(values, order, params):
+    """Modèle sur la série complète avec des paramètres fixés (aucune optimisation)"""
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        return ARIMA(values, order=order).filter(np.asarray(params, dtype=float))
+
+
+def evaluate_order(job):
+    """Job de sélection : (clé, ordre, AIC) ; AIC None si l'ajustement échoue"""
+    key, values, order = job
+    try:
+        return key, order, float(fit_arima(values, order).aic)
+    except Exception:
+        return key, order, None
+
+
+# ==================== SÉLECTION PLANIFIÉE ====================
+
+def _run_jobs(jobs, max_workers):
+    if max_workers <= 1 or len(jobs) <= 1:
+        return [evaluate_order(job) for job in jobs]
+
+    from django.db import connections
+
+    # Les connexions ouvertes ne doivent pas être partagées avec les workers
+    connections.close_all()
+    with ProcessPoolExecutor(
+        max_workers=min(max_workers, len(jobs)),
+        mp_context=multiprocessing.get_context('spawn'),
+        initializer=init_worker
+    ) as executor:
+        return list(executor.map(evaluate_order, jobs))
+
+
+def select_orders(series_by_key, max_workers=None):
+    """
+    Meilleur ordre (AIC minimal) pour chaque série, tous les candidats de
+    toutes les séries étant évalués dans le même pool.
+    Retourne {clé: (ordre, aic)} ; à égalité, le premier candidat de la grille l'emporte.
+    """
+    max_p, max_q = _order_limits()
+    if max_workers is None:
+        max_workers = _engine_config().get('SELECTION_WORKERS', 0)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    jobs = []
+    defaults = {}
+    for key, values in series_by_key.items():
+        d = differencing_order(values)
+        defaults[key] = (1, d, 1)
+        for order in candidate_orders(values, d, max_p, max_q):
+            jobs.append((key, values, order))
+
+    best = {key: (order, None) for key, order in defaults.items()}
+    for key, order, aic in _run_jobs(jobs, max_workers):
+        if aic is not None and (best[key][1] is None or aic < best[key][1]):
+            best[key] = (order, aic)
+    return best
+
+
+# ==================== MOTEUR ====================
+
+class ArimaEngine:
+    """Prévisions ARIMA à partir de l'état enregistré dans le registre de modèles"""
+
+    def __init__(self, registry=None):
+        if registry is None:
+            from .model_registry import ModelRegistry
+            registry = ModelRegistry()
+        self.registry = registry
+        self.refit_interval = _engine_config().get('REFIT_INTERVAL_DAYS', 7)
+
+    def get_state(self, blood_type):
+        state = self.registry.load_state(blood_type, STATE_NAME)
+        if not state or 'order' not in state or 'params' not in state:
+            return None
+        return state
+
+    def _save_state(self, blood_type, results, order, last_date, previous=None, selection=None):
+        previous = previous or {}
+        state = {
+            'blood_type': blood_type,
+            'order': list(order),
+            'params': [float(value) for value in np.asarray(results.params)],
+            'aic': float(results.aic),
+            'nobs': int(results.nobs),
+            'fitted_through': last_date.isoformat(),
+            'fitted_at': datetime.now().isoformat(),
+            'selection': selection or previous.get('selection', 'default'),
+            'selected_at': previous.get('selected_at') if selection is None else datetime.now().isoformat()
+        }
+        self.registry.save_state(blood_type, STATE_NAME, state)
+        return state
+
+    def select(self, blood_type, values, last_date, order):
+        """Ajuste et enregistre l'ordre retenu par la sélection planifiée"""
+        results = fit_arima(values, order)
+        state = self._save_state(blood_type, results, order, last_date, selection='aic_grid')
+        with _results_lock:
+            _results_cache[blood_type] = ((last_date, len(values), state['fitted_at']), results)
+        return results
+
+    def results_for(self, blood_type, values, last_date):
+        """
+        Modèle à jour pour la série, sans recherche d'ordre :
+        filtrage avec les paramètres enregistrés, ou réajustement à chaud
+        si le dernier ajustement date de plus de ``refit_interval`` jours.
+        """
+        state = self.get_state(blood_type)
+        with _results_lock:
+            cached = _results_cache.get(blood_type)
+        if state and cached and cached[0] == (last_date, len(values), state['fitted_at']):
+            return cached[1]
+
+        results = None
+        if state:
+            order = tuple(state['order'])
+            fitted_through = date.fromisoformat(state['fitted_through'])
+            try:
+                if (last_date - fitted_through).days < self.refit_interval:
+                    results = filter_arima(values, order, state['params'])
+                else:
+                    results = fit_arima(values, order, start_params=state['params'])
+                    state = self._save_state(blood_type, results, order, last_date, previous=state)
+                    logger.info(f"🔁 ARIMA {order} réajusté à chaud pour {blood_type}")
+            except Exception as e:
+                logger.warning(f"⚠️ État ARIMA inutilisable pour {blood_type}: {e}")
+                results = None
+
+        if results is None:
+            # Pas encore de sélection planifiée : ordre par défaut, remplacé au prochain passage
+            order = (1, differencing_order(values), 1)
+            results = fit_arima(values, order)
+            state = self._save_state(blood_type, results, order, last_date)
+            logger.info(f"📈 ARIMA {order} par défaut pour {blood_type} (en attente de sélection)")
+
+        with _results_lock:
+            _results_cache[blood_type] = ((last_date, len(values), state['fitted_at']), results)
+        return results
+
+    def forecast(self, blood_type, values, last_date, steps, alpha=0.05):
+        """Prévision ponctuelle et intervalle de confiance en un seul ``get_forecast``"""
+        results = self.results_for(blood_type, np.asarray(values, dtype=float), last_date)
+        prediction = results.get_forecast(steps=steps)
+        conf_int = np.asarray(prediction.conf_int(alpha=alpha))
+
+        return {
+            'mean': np.asarray(prediction.predicted_mean),
+            'lower': conf_int[:, 0],
+            'upper': conf_int[:, 1],
+            'order': tuple(int(value) for value in results.model.order),
+            'aic': float(results.aic)
+        }
+
+
+def select_arima_orders(blood_types=None, max_workers=None, forecaster=None):
+    """
+    Sélection planifiée de l'ordre ARIMA de chaque groupe sanguin.
+    Retourne {groupe: {'order', 'aic'} ou {'error'}}.
+    """
+    from ..blood_demand_forecasting import EnhancedBloodDemandForecaster
+
+    forecaster = forecaster or EnhancedBloodDemandForecaster()
+    history_days = _engine_config().get('HISTORY_DAYS', 180)
+    blood_types = blood_types or list(forecaster.blood_type_config)
+
+    series = {}
+    summary = {}
+    for blood_type in blood_types:
+        historical_data = forecaster.get_enhanced_historical_data(blood_type, days_back=history_days)
+        if historical_data is None or len(historical_data) < 30:
+            summary[blood_type] = {'error': 'Historique insuffisant'}
+            continue
+        series[blood_type] = (
+            historical_data['demand'].values.astype(float),
+            pd.Timestamp(historical_data.index.max()).date()
+        )
+
+    selected = select_orders({bt: values for bt, (values, _) in series.items()}, max_workers)
+
+    engine = ArimaEngine(forecaster.registry)
+    for blood_type, (order, _) in selected.items():
+        values, last_date = series[blood_type]
+        try:
+            results = engine.select(blood_type, values, last_date, order)
+            summary[blood_type] = {'order': order, 'aic': round(float(results.aic), 2)}
+        except Exception as e:
+            summary[blood_type] = {'error': str(e)}
+    return summary
@@ -0,0 +1,275 @@
+# app/forecasting/batch_forecast.py
+"""
+Moteur de prévision multi-horizon vectorisé.
+
+Remplace la reconstruction jour par jour des features futures : les features
+calendaires et contextuelles sont calculées pour tout l'horizon en une seule
+passe NumPy, et seules les features auto-régressives (moyennes mobiles, lags,
+tendances...) sont mises à jour à chaque pas à partir d'un tampon préalloué
+contenant l'historique récent suivi des prédictions.
+
+Les features sont calculées par nom, dans l'ordre exact de ``feature_cols``
+utilisé à l'entraînement (cf. ``create_advanced_features``).
+"""
+
+import copy
+import re
+
+import numpy as np
+import pandas as pd
+
+# Taille maximale des fenêtres utilisées par les features auto-régressives
+MAX_WINDOW = 30
+
+# demand_<type>_<n> : features dépendant des valeurs passées de la demande
+_AUTOREGRESSIVE_FEATURE = re.compile(
+    r'^demand_(ma|std|trend|volatility|cv|q25|q75|median|lag|diff|ema)_(\d+)$'
+)
+_INTERACTION_FEATURES = {
+    'demand_pct_change': ('pct_change', 1),
+    'demand_weekday_interaction': ('weekday_interaction', 7),
+    'demand_seasonal_interaction': ('seasonal_interaction', 14),
+}
+
+
+def calendar_features(dates):
+    """Features calendaires de tout l'horizon, calculées en une passe"""
+    dates = pd.DatetimeIndex(dates)
+    day_of_week = dates.dayofweek.values
+    month = dates.month.values
+    day_of_month = dates.day.values
+    day_of_year = dates.dayofyear.values
+
+    return {
+        'day_of_week': day_of_week,
+        'month': month,
+        'day_of_month': day_of_month,
+        'quarter': dates.quarter.values,
+        'week_of_year': dates.isocalendar().week.values.astype(int),
+        'day_of_year': day_of_year,
+        'is_weekend': np.isin(day_of_week, [5, 6]).astype(int),
+        'is_monday': (day_of_week == 0).astype(int),
+        'is_friday': (day_of_week == 4).astype(int),
+        'is_month_start': (day_of_month <= 3).astype(int),
+        'is_month_end': (day_of_month >= 28).astype(int),
+        'sin_day_of_week': np.sin(2 * np.pi * day_of_week / 7),
+        'cos_day_of_week': np.cos(2 * np.pi * day_of_week / 7),
+        'sin_month': np.sin(2 * np.pi * month / 12),
+        'cos_month': np.cos(2 * np.pi * month / 12),
+        'sin_day_of_year': np.sin(2 * np.pi * day_of_year / 365),
+        'cos_day_of_year': np.cos(2 * np.pi * day_of_year / 365),
+    }
+
+
+def _slope_weights(window):
+    """Poids w tels que pente OLS = w · y pour x = 0..window-1"""
+    x = np.arange(window, dtype=float)
+    x -= x.mean()
+    return x / (x ** 2).sum()
+
+
+class BatchForecastEngine:
+    """
+    Prévision récursive par lot pour un modèle entraîné.
+
+    - les colonnes exogènes (calendrier, contexte) sont remplies pour tout
+      l'horizon d'un coup ;
+    - pour les modèles linéaires, leur contribution est calculée en un seul
+      produit matriciel et chaque pas ne coûte qu'un produit scalaire sur les
+      colonnes auto-régressives ;
+    - pour les autres modèles, un seul appel ``predict`` si aucune feature ne
+      dépend des prédictions précédentes, sinon un appel par pas sur une ligne
+      préallouée.
+
+    Chaque groupe sanguin a son propre modèle entraîné (``{method}_{blood_type}``) :
+    les lignes d'un même pas ne peuvent donc pas être regroupées entre groupes
+    sanguins dans un seul ``predict``, et le pas suivant dépend de la prédiction
+    du précédent. Pour RF/GBM/XGB, le coût par pas est réduit à une ligne
+    préallouée et un prédicteur sans parallélisme (``_single_threaded``).
+    """
+
+    def __init__(self, model, feature_cols, scaler=None):
+        self.model = model
+        self.scaler = scaler
+        self.feature_cols = list(feature_cols)
+
+        # Les noms sont analysés une seule fois : (colonne, type, paramètre)
+        self.exogenous_cols = []
+        self.autoregressive_specs = []
+        for i, name in enumerate(self.feature_cols):
+            spec = self._parse_autoregressive(name)
+            if spec:
+                self.autoregressive_specs.append((i,) + spec)
+            else:
+                self.exogenous_cols.append(i)
+        self.autoregressive_cols = [spec[0] for spec in self.autoregressive_specs]
+
+        self._slope_weights = {}
+        self._linear = self._linear_coefficients()
+        self._predictor = self._single_threaded(model)
+
+    @staticmethod
+    def _parse_autoregressive(name):
+        if name in _INTERACTION_FEATURES:
+            return _INTERACTION_FEATURES[name]
+        match = _AUTOREGRESSIVE_FEATURE.match(name)
+        if match:
+            return match.group(1), int(match.group(2))
+        return None
+
+    def _linear_coefficients(self):
+        coef = getattr(self.model, 'coef_', None)
+        intercept = getattr(self.model, 'intercept_', None)
+        if coef is None or intercept is None or np.ndim(coef) != 1 or len(coef) != len(self.feature_cols):
+            return None
+        return np.asarray(coef, dtype=float), float(intercept)
+
+    @staticmethod
+    def _single_threaded(model):
+        """Copie superficielle sans parallélisme : inutile et coûteux sur une seule ligne"""
+        if getattr(model, 'n_jobs', None) not in (None, 1):
+            model = copy.copy(model)
+            model.n_jobs = 1
+        return model
+
+    # ==================== FEATURES ====================
+
+    def _exogenous_matrix(self, history_df, dates):
+        """Matrice (horizon × features) remplie pour les colonnes exogènes"""
+        matrix = np.zeros((len(dates), len(self.feature_cols)), dtype=float)
+        calendar = calendar_features(dates)
+        last_row = history_df.iloc[-1]
+
+        for i in self.exogenous_cols:
+            name = self.feature_cols[i]
+            if name in calendar:
+                matrix[:, i] = calendar[name]
+            elif name in last_row.index:
+                # Features contextuelles : constantes sur l'historique d'entraînement
+                matrix[:, i] = float(last_row[name])
+        return matrix, calendar
+
+    def _window(self, buffer, end, window):
+        return buffer[max(0, end - window):end]
+
+    def _trend(self, values):
+        n = len(values)
+        if n < 3:
+            return 0.0
+        weights = self._slope_weights.get(n)
+        if weights is None:
+            weights = self._slope_weights[n] = _slope_weights(n)
+        return float(weights @ values)
+
+    def _autoregressive_value(self, kind, n, buffer, end, ema_state, calendar, step):
+        """Valeur d'une feature auto-régressive pour la ligne d'indice ``end`` du tampon"""
+        if kind == 'lag':
+            return buffer[max(0, end - n)]
+        if kind == 'diff':
+            return buffer[end - 1] - buffer[max(0, end - 1 - n)]
+        if kind == 'ema':
+            return ema_state[n]
+        if kind == 'pct_change':
+            previous = buffer[end - 2] if end >= 2 else 0
+            return (buffer[end - 1] - previous) / previous if previous else 0.0
+
+        values = self._window(buffer, end, n)
+        if kind == 'ma':
+            return values.mean()
+        if kind in ('std', 'volatility'):
+            return values.std(ddof=1) if len(values) > 1 else 0.0
+        if kind == 'cv':
+            mean = values.mean()
+            return values.std(ddof=1) / mean if len(values) > 1 and mean else 0.0
+        if kind == 'trend':
+            return self._trend(values)
+        if kind == 'median':
+            return np.median(values)
+        if kind in ('q25', 'q75'):
+            return np.percentile(values, 25 if kind == 'q25' else 75)
+        if kind == 'weekday_interaction':
+            return values.mean() * (1 - calendar['is_weekend'][step])
+        if kind == 'seasonal_interaction':
+            return values.mean() * calendar['sin_month'][step]
+        return 0.0
+
+    @staticmethod
+    def _initial_ema_state(history_df, ema_keys):
+        """
+        Reprend l'état des EMA de l'entraînement (ewm sur les jours précédents)
+        et y intègre la dernière demande connue.
+        """
+        state = {}
+        last_demand = float(history_df['demand'].iloc[-1])
+        for key in ema_keys:
+            alpha = key / 10
+            column = f'demand_ema_{key}'
+            if column in history_df.columns:
+                state[key] = alpha * last_demand + (1 - alpha) * float(history_df[column].iloc[-1])
+            else:
+                state[key] = float(history_df['demand'].ewm(alpha=alpha).mean().iloc[-1])
+        return state
+
+    # ==================== PRÉDICTION ====================
+
+    def _scale(self, values, columns=None):
+        if self.scaler is None:
+            return values
+        mean = self.scaler.mean_ if columns is None else self.scaler.mean_[columns]
+        scale = self.scaler.scale_ if columns is None else self.scaler.scale_[columns]
+        return (values - mean) / scale
+
+    def forecast(self, history_df, start_date, days_ahead):
+        """
+        Prédit ``days_ahead`` jours à partir de ``start_date``.
+        ``history_df`` est la sortie de ``create_advanced_features``.
+        Retourne (prédictions entières >= 0, série historique récente + prédictions).
+        """
+        dates = pd.date_range(pd.Timestamp(start_date).normalize(), periods=days_ahead, freq='D')
+        matrix, calendar = self._exogenous_matrix(history_df, dates)
+
+        history = history_df['demand'].values[-MAX_WINDOW:].astype(float)
+        buffer = np.empty(len(history) + days_ahead, dtype=float)
+        buffer[:len(history)] = history
+        end = len(history)
+
+        predictions = np.zeros(days_ahead, dtype=int)
+
+        # Aucun terme auto-régressif : un seul appel predict pour tout l'horizon
+        if not self.autoregressive_cols:
+            raw = self.model.predict(self._scale(matrix))
+            predictions[:] = np.maximum(0, np.asarray(raw, dtype=float).astype(int))
+            buffer[end:] = predictions
+            return predictions, buffer
+
+        ar_cols = np.array(self.autoregressive_cols)
+        # demand_ema_<k> correspond à ewm(alpha=k/10)
+        ema_keys = {n for _, kind, n in self.autoregressive_specs if kind == 'ema'}
+        ema_state = self._initial_ema_state(history_df, ema_keys)
+
+        if self._linear is not None:
+            coef, intercept = self._linear
+            ex_cols = np.array(self.exogenous_cols, dtype=int)
+            base = np.full(days_ahead, intercept)
+            if len(ex_cols):
+                base += self._scale(matrix[:, ex_cols], ex_cols) @ coef[ex_cols]
+            ar_coef = coef[ar_cols]
+
+        for step in range(days_ahead):
+            for col, kind, n in self.autoregressive_specs:
+                matrix[step, col] = self._autoregressive_value(kind, n, buffer, end, ema_state, calendar, step)
+
+            if self._linear is not None:
+                raw = base[step] + self._scale(matrix[step, ar_cols], ar_cols) @ ar_coef
+            else:
+                raw = self._predictor.predict(self._scale(matrix[step:step + 1]))[0]
+
+            pred = max(0, int(raw))
+            predictions[step] = pred
+            buffer[end] = pred
+            end += 1
+            for key in ema_keys:
+                alpha = key / 10
+                ema_state[key] = alpha * pred + (1 - alpha) * ema_state[key]
+
+        return predictions, buffer
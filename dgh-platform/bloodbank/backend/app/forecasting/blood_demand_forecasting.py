@@ -34,6 +34,9 @@ except ImportError:
     STATSMODELS_AVAILABLE = False
     logger.info("Statsmodels not available, using ML models only")
 
+from .history_panel import get_demand_panel
+from .rolling_features import rolling_slope
+
 
 class RealDataBloodDemandForecaster:
     """
@@ -91,45 +94,20 @@ class RealDataBloodDemandForecaster:
         """
         🗄️ RÉCUPÉRATION DES VRAIES DONNÉES DEPUIS LA DB
         """
-        from inventory.models import BloodInventory, Transaction
-
         try:
             end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days_back)
 
-            logger.info(f"📊 Récupération données DB pour {blood_type} ({start_date} à {end_date})")
+            logger.info(f"📊 Récupération données DB pour {blood_type} ({days_back} jours)")
 
-            # Récupérer les transactions par jour (demande réelle)
-            daily_demand = Transaction.objects.filter(
-                blood_type=blood_type,
-                transaction_type='OUT',  # Sorties = demande
-                date__range=[start_date, end_date]
-            ).extra(
-                select={'day': 'DATE(date)'}
-            ).values('day').annotate(
-                total_demand=Sum('quantity')
-            ).order_by('day')
-
-            if not daily_demand.exists():
+            # Panel de demande partagé par tous les groupes sanguins
+            panel = get_demand_panel(days_back, end_date)
+
+            if not panel.has_data(blood_type):
                 logger.warning(f"❌ Aucune donnée trouvée pour {blood_type}")
                 return None
 
-            # Convertir en DataFrame pandas
-            df_data = []
-            for record in daily_demand:
-                df_data.append({
-                    'date': record['day'],
-                    'demand': record['total_demand'] or 0
-                })
-
-            df = pd.DataFrame(df_data)
-            df['date'] = pd.to_datetime(df['date'])
-            df = df.set_index('date')
-
-            # Remplir les jours manquants avec 0
-            idx = pd.date_range(start_date, end_date, freq='D')
-            df = df.reindex(idx, fill_value=0)
-            df.index.name = 'date'
+            # Demande journalière consolidée, jours manquants à 0
+            df = panel.daily_demand(blood_type)[['demand']]
 
             logger.info(f"✅ Données récupérées: {len(df)} jours, demande moyenne: {df['demand'].mean():.1f}")
 
@@ -220,12 +198,8 @@ class RealDataBloodDemandForecaster:
 
         # Tendances calculées sur vraies données
         if len(df) >= 14:
-            df['demand_trend_7'] = df['demand'].rolling(7, min_periods=3).apply(
-                lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 2 else 0
-            )
-            df['demand_trend_14'] = df['demand'].rolling(14, min_periods=7).apply(
-                lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 2 else 0
-            )
+            df['demand_trend_7'] = rolling_slope(df['demand'].values, 7, min_periods=3)
+            df['demand_trend_14'] = rolling_slope(df['demand'].values, 14, min_periods=7)
 
         # Volatilité récente
         if len(df) >= 7:
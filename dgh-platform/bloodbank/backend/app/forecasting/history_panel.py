@@ -0,0 +1,258 @@
+# app/forecasting/history_panel.py
+"""
+Extraction de l'historique de demande pour tous les groupes sanguins en une passe.
+
+Lecture de la table d'agrégats DailyDemandStat quand elle est initialisée,
+sinon une requête groupée (jour × groupe sanguin) par source de données
+(consommations, demandes, unités utilisées) au lieu de trois requêtes par
+groupe sanguin. Le résultat est un panel NumPy (date × groupe × source)
+partagé via le cache par tous les forecasters.
+"""
+
+import logging
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('consumption', 'requests', 'units')
+
+# Pondération des sources lors de la consolidation journalière
+SOURCE_WEIGHTS = {'consumption': 0.5, 'requests': 0.3, 'units': 0.2}
+
+# Volume moyen d'une poche (ml), pour convertir les volumes consommés en unités
+UNIT_VOLUME_ML = 450
+
+
+def _forecasting_config():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {})
+
+
+def _default_blood_types():
+    return _forecasting_config().get('BLOOD_TYPES', ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-'])
+
+
+class DemandPanel:
+    """
+    Demande journalière par groupe sanguin et par source.
+
+    - ``values``  : float (jours × groupes × sources), 0 si aucune donnée
+    - ``present`` : bool  (jours × groupes × sources), True si la source a des données ce jour-là
+    - ``urgent``  : int   (jours × groupes), demandes urgentes
+    """
+
+    def __init__(self, dates, blood_types):
+        self.dates = pd.DatetimeIndex(dates)
+        self.blood_types = list(blood_types)
+        shape = (len(self.dates), len(self.blood_types), len(SOURCES))
+        self.values = np.zeros(shape, dtype=float)
+        self.present = np.zeros(shape, dtype=bool)
+        self.urgent = np.zeros(shape[:2], dtype=int)
+
+    @property
+    def start_date(self):
+        return self.dates[0].date()
+
+    @property
+    def end_date(self):
+        return self.dates[-1].date()
+
+    def fill(self, source, rows):
+        """Insère des tuples (jour, groupe sanguin, demande[, urgences]) pour une source"""
+        if not rows:
+            return
+        source_idx = SOURCES.index(source)
+        days = pd.to_datetime([row[0] for row in rows])
+        day_idx = self.dates.get_indexer(days)
+        type_idx = np.array([
+            self.blood_types.index(row[1]) if row[1] in self.blood_types else -1
+            for row in rows
+        ])
+        keep = (day_idx >= 0) & (type_idx >= 0)
+        demand = np.array([row[2] or 0 for row in rows], dtype=float)
+
+        self.values[day_idx[keep], type_idx[keep], source_idx] = np.maximum(0, demand[keep]).astype(int)
+        self.present[day_idx[keep], type_idx[keep], source_idx] = True
+
+        if len(rows[0]) > 3:
+            urgent = np.array([row[3] or 0 for row in rows], dtype=int)
+            self.urgent[day_idx[keep], type_idx[keep]] = urgent[keep]
+
+    def has_data(self, blood_type):
+        if blood_type not in self.blood_types:
+            return False
+        return bool(self.present[:, self.blood_types.index(blood_type)].any())
+
+    def source_frame(self, blood_type):
+        """DataFrame (date × source) des demandes brutes d'un groupe sanguin"""
+        idx = self.blood_types.index(blood_type)
+        return pd.DataFrame(self.values[:, idx, :], index=self.dates, columns=SOURCES)
+
+    def daily_demand(self, blood_type, weights=None):
+        """
+        Demande consolidée d'un groupe sanguin : moyenne pondérée des sources
+        présentes chaque jour (0 pour les jours sans aucune donnée).
+        Colonnes : demand, urgent_requests, data_sources.
+        """
+        weights = weights or SOURCE_WEIGHTS
+        idx = self.blood_types.index(blood_type)
+        values = self.values[:, idx, :]
+        present = self.present[:, idx, :]
+
+        source_weights = np.array([weights.get(source, 0.1) for source in SOURCES])
+        day_weights = present * source_weights
+        total_weight = day_weights.sum(axis=1)
+        weighted = (values * day_weights).sum(axis=1)
+        demand = np.where(total_weight > 0, weighted / np.maximum(total_weight, 0.1), 0)
+
+        df = pd.DataFrame({
+            'demand': np.maximum(0, demand.astype(int)),
+            'urgent_requests': self.urgent[:, idx],
+            'data_sources': present.sum(axis=1)
+        }, index=self.dates)
+        df.index.name = 'date'
+        return df
+
+    def to_frame(self):
+        """DataFrame long : colonnes MultiIndex (groupe sanguin, source)"""
+        columns = pd.MultiIndex.from_product([self.blood_types, SOURCES], names=['blood_type', 'source'])
+        flat = self.values.reshape(len(self.dates), -1)
+        return pd.DataFrame(flat, index=self.dates, columns=columns)
+
+
+def _consumed_units(volume):
+    """Volume consommé (ml) -> nombre d'unités"""
+    volume = volume or 0
+    return max(1, int(volume / UNIT_VOLUME_ML)) if volume > 100 else volume
+
+
+def load_panel_from_daily_stats(panel):
+    """Remplit le panel depuis DailyDemandStat : une seule requête de O(jours) lignes"""
+    from ..models import DailyDemandStat
+
+    rows = DailyDemandStat.objects.filter(
+        date__range=[panel.start_date, panel.end_date],
+        blood_type__in=panel.blood_types
+    ).values_list(
+        'date', 'blood_type', 'consumed_units', 'consumed_volume',
+        'approved_units', 'urgent_approved_requests', 'used_units'
+    )
+
+    consumption, requests, units = [], [], []
+    for day, blood_type, consumed, volume, approved, urgent, used in rows:
+        if consumed:
+            consumption.append((day, blood_type, _consumed_units(volume)))
+        if approved:
+            requests.append((day, blood_type, approved, urgent))
+        if used:
+            units.append((day, blood_type, used))
+
+    panel.fill('consumption', consumption)
+    panel.fill('requests', requests)
+    panel.fill('units', units)
+    return panel
+
+
+def load_demand_panel(start_date, end_date, blood_types=None):
+    """
+    Construit le panel depuis les agrégats journaliers s'ils sont initialisés,
+    sinon avec une requête groupée par source sur les tables brutes.
+    Chaque source en échec est journalisée et laissée vide.
+    """
+    from ..daily_stats import daily_stats_ready
+    from ..models import BloodConsumption, BloodRequest, BloodUnit
+
+    blood_types = list(blood_types or _default_blood_types())
+    panel = DemandPanel(pd.date_range(start_date, end_date, freq='D'), blood_types)
+
+    if daily_stats_ready():
+        try:
+            return load_panel_from_daily_stats(panel)
+        except Exception as e:
+            logger.warning(f"⚠️ DailyDemandStat query failed, fallback to raw tables: {e}")
+
+    # Source 1: BloodConsumption (consommation réelle, volumes convertis en unités)
+    try:
+        rows = BloodConsumption.objects.filter(
+            blood_type__in=blood_types,
+            date__range=[start_date, end_date]
+        ).extra(
+            select={'day': 'DATE(date)'}
+        ).values('day', 'blood_type').annotate(
+            total_demand=Sum('volume')
+        ).values_list('day', 'blood_type', 'total_demand')
+
+        panel.fill('consumption', [
+            (day, blood_type, _consumed_units(volume)) for day, blood_type, volume in rows
+        ])
+    except Exception as e:
+        logger.warning(f"⚠️ BloodConsumption query failed: {e}")
+
+    # Source 2: BloodRequest (demandes approuvées)
+    try:
+        rows = BloodRequest.objects.filter(
+            blood_type__in=blood_types,
+            request_date__range=[start_date, end_date],
+            status__in=['Fulfilled', 'Approved', 'Delivered']
+        ).extra(
+            select={'day': 'DATE(request_date)'}
+        ).values('day', 'blood_type').annotate(
+            total_demand=Sum('quantity'),
+            urgent_count=Count('request_id', filter=Q(priority='Urgent'))
+        ).values_list('day', 'blood_type', 'total_demand', 'urgent_count')
+
+        panel.fill('requests', list(rows))
+    except Exception as e:
+        logger.warning(f"⚠️ BloodRequest query failed: {e}")
+
+    # Source 3: BloodUnit status changes (sorties de stock)
+    try:
+        rows = BloodUnit.objects.filter(
+            blood_type__in=blood_types,
+            status='Used',
+            collection_date__range=[start_date, end_date]
+        ).extra(
+            select={'day': 'DATE(collection_date)'}
+        ).values('day', 'blood_type').annotate(
+            total_units=Count('unit_id')
+        ).values_list('day', 'blood_type', 'total_units')
+
+        panel.fill('units', list(rows))
+    except Exception as e:
+        logger.warning(f"⚠️ BloodUnit query failed: {e}")
+
+    return panel
+
+
+def get_demand_panel(days_back=365, end_date=None, use_cache=True):
+    """
+    Panel des ``days_back`` derniers jours pour tous les groupes sanguins.
+    Mis en cache quelques minutes : une boucle sur les 8 groupes sanguins
+    ne déclenche qu'une extraction.
+    """
+    end_date = end_date or datetime.now().date()
+    start_date = end_date - timedelta(days=days_back)
+    cache_key = f'demand_panel_{start_date}_{end_date}'
+
+    if use_cache:
+        try:
+            panel = cache.get(cache_key)
+            if panel is not None:
+                return panel
+        except Exception as e:
+            logger.warning(f"⚠️ Cache panel indisponible: {e}")
+
+    panel = load_demand_panel(start_date, end_date)
+    logger.info(f"📊 Panel de demande extrait: {len(panel.dates)} jours × {len(panel.blood_types)} groupes")
+
+    if use_cache:
+        try:
+            cache.set(cache_key, panel, _forecasting_config().get('HISTORY_PANEL_TIMEOUT', 300))
+        except Exception as e:
+            logger.warning(f"⚠️ Cache panel indisponible: {e}")
+    return panel
@@ -0,0 +1,280 @@
+# app/forecasting/model_registry.py
+"""
+Registre persistant des modèles de prévision.
+
+Les modèles entraînés sont sérialisés sur disque (joblib) avec leurs
+métadonnées, versionnés par groupe sanguin et par méthode :
+
+    <racine>/<groupe>/index.json                  -> meilleure méthode + versions actives
+    <racine>/<groupe>/<méthode>/v<N>/model.joblib -> modèle + scaler
+    <racine>/<groupe>/<méthode>/v<N>/metadata.json
+
+Les artefacts sont chargés paresseusement puis gardés en mémoire pour tout le
+processus, ce qui permet de servir les prévisions sans ré-entraîner à chaque
+requête ni à chaque redémarrage de worker. L'entraînement se fait hors requête
+(commande ``train_forecast_models``).
+"""
+
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+from datetime import datetime
+from pathlib import Path
+
+import joblib
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+REGISTRY_FORMAT_VERSION = 2
+
+# Cache mémoire partagé par tout le processus : chemin -> (mtime, contenu)
+_loaded_artifacts = {}
+_loaded_lock = threading.Lock()
+
+
+def _registry_config():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {}).get('MODEL_REGISTRY', {})
+
+
+def _blood_type_slug(blood_type):
+    """'AB+' -> 'AB_pos', 'O-' -> 'O_neg' (noms de dossiers portables)"""
+    return blood_type.replace('+', '_pos').replace('-', '_neg')
+
+
+def _write_json_atomic(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as handle:
+            json.dump(payload, handle, indent=2, default=str)
+        os.replace(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class ModelRegistry:
+    """Stockage versionné des modèles entraînés sur disque"""
+
+    def __init__(self, root=None, keep_versions=None):
+        config = _registry_config()
+        default_root = Path(settings.BASE_DIR) / 'ml_models'
+        self.root = Path(root or config.get('ROOT', default_root))
+        self.keep_versions = keep_versions or config.get('KEEP_VERSIONS', 3)
+
+    # ==================== CHEMINS ====================
+
+    def _blood_type_dir(self, blood_type):
+        return self.root / _blood_type_slug(blood_type)
+
+    def _method_dir(self, blood_type, method):
+        return self._blood_type_dir(blood_type) / method
+
+    def _index_path(self, blood_type):
+        return self._blood_type_dir(blood_type) / 'index.json'
+
+    def _existing_versions(self, blood_type, method):
+        method_dir = self._method_dir(blood_type, method)
+        if not method_dir.exists():
+            return []
+        versions = []
+        for entry in method_dir.iterdir():
+            if entry.is_dir() and entry.name.startswith('v') and entry.name[1:].isdigit():
+                versions.append(int(entry.name[1:]))
+        return sorted(versions)
+
+    # ==================== ÉCRITURE ====================
+
+    def save_model(self, blood_type, method, model, scaler, features, performance,
+                   training_window=None):
+        """
+        Sérialise un modèle entraîné dans une nouvelle version.
+        Retourne le numéro de version créé.
+        """
+        method_dir = self._method_dir(blood_type, method)
+        method_dir.mkdir(parents=True, exist_ok=True)
+
+        existing = self._existing_versions(blood_type, method)
+        version = (existing[-1] + 1) if existing else 1
+
+        metadata = {
+            'format_version': REGISTRY_FORMAT_VERSION,
+            'blood_type': blood_type,
+            'method': method,
+            'version': version,
+            'features': list(features),
+            'training_window': training_window or {},
+            'training_samples': performance.get('final_training_samples',
+                                                performance.get('training_samples')),
+            'mape': performance.get('mape'),
+            'performance': performance,
+            'trained_at': datetime.now().isoformat()
+        }
+
+        # Écriture dans un dossier temporaire puis renommage atomique
+        tmp_dir = Path(tempfile.mkdtemp(dir=method_dir, prefix='.tmp_'))
+        try:
+            joblib.dump({'model': model, 'scaler': scaler}, tmp_dir / 'model.joblib')
+            with open(tmp_dir / 'metadata.json', 'w') as handle:
+                json.dump(metadata, handle, indent=2, default=str)
+            os.replace(tmp_dir, method_dir / f'v{version}')
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        self._prune(blood_type, method)
+        logger.info(f"💾 Modèle {method} v{version} enregistré pour {blood_type}")
+        return version
+
+    def publish(self, blood_type, best_method, versions, performance):
+        """
+        Publie l'ensemble des versions actives d'un groupe sanguin.
+        Les lecteurs ne voient les nouveaux modèles qu'après cette écriture.
+        """
+        self._blood_type_dir(blood_type).mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(self._index_path(blood_type), {
+            'format_version': REGISTRY_FORMAT_VERSION,
+            'blood_type': blood_type,
+            'best_method': best_method,
+            'versions': versions,
+            'performance': performance,
+            'published_at': datetime.now().isoformat()
+        })
+
+    def save_state(self, blood_type, name, payload):
+        """
+        Enregistre un petit état JSON par groupe sanguin (<groupe>/<nom>.json),
+        par exemple l'ordre et les paramètres ARIMA retenus.
+        """
+        self._blood_type_dir(blood_type).mkdir(parents=True, exist_ok=True)
+        _write_json_atomic(self._blood_type_dir(blood_type) / f'{name}.json', {
+            'format_version': REGISTRY_FORMAT_VERSION,
+            **payload
+        })
+
+    def _prune(self, blood_type, method):
+        """Supprime les versions les plus anciennes au-delà de keep_versions"""
+        versions = self._existing_versions(blood_type, method)
+        for old_version in versions[:-self.keep_versions]:
+            shutil.rmtree(self._method_dir(blood_type, method) / f'v{old_version}', ignore_errors=True)
+
+    # ==================== LECTURE ====================
+
+    def _read_cached(self, path, loader):
+        """Charge un fichier une seule fois par processus tant qu'il n'a pas changé"""
+        mtime = path.stat().st_mtime
+        key = str(path)
+        with _loaded_lock:
+            cached = _loaded_artifacts.get(key)
+            if cached and cached[0] == mtime:
+                return cached[1]
+
+        content = loader(path)
+        with _loaded_lock:
+            _loaded_artifacts[key] = (mtime, content)
+        return content
+
+    def get_index(self, blood_type):
+        """Index publié du groupe sanguin, ou None si aucun modèle n'est enregistré"""
+        index_path = self._index_path(blood_type)
+        if not index_path.exists():
+            return None
+        try:
+            index = self._read_cached(index_path, lambda p: json.loads(p.read_text()))
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ Index du registre illisible pour {blood_type}: {e}")
+            return None
+        if index.get('format_version') != REGISTRY_FORMAT_VERSION:
+            return None
+        return index
+
+    def load_state(self, blood_type, name):
+        """État JSON enregistré par ``save_state``, ou None"""
+        state_path = self._blood_type_dir(blood_type) / f'{name}.json'
+        if not state_path.exists():
+            return None
+        try:
+            state = self._read_cached(state_path, lambda p: json.loads(p.read_text()))
+        except (OSError, ValueError) as e:
+            logger.warning(f"⚠️ État {name} illisible pour {blood_type}: {e}")
+            return None
+        if state.get('format_version') != REGISTRY_FORMAT_VERSION:
+            return None
+        return state
+
+    def load_model(self, blood_type, method, version):
+        """
+        Charge un artefact au format de ``trained_models`` :
+        {'model', 'scaler', 'features', 'trained_date', 'training_samples', 'metadata'}
+        """
+        version_dir = self._method_dir(blood_type, method) / f'v{version}'
+        metadata = self._read_cached(version_dir / 'metadata.json', lambda p: json.loads(p.read_text()))
+        artifact = self._read_cached(version_dir / 'model.joblib', joblib.load)
+
+        return {
+            'model': artifact['model'],
+            'scaler': artifact.get('scaler'),
+            'features': metadata['features'],
+            'trained_date': datetime.fromisoformat(metadata['trained_at']),
+            'training_samples': metadata.get('training_samples'),
+            'metadata': metadata
+        }
+
+    def load_blood_type(self, blood_type):
+        """
+        Charge tous les modèles publiés d'un groupe sanguin.
+        Retourne (performance, best_method, trained_models) ou None.
+        """
+        index = self.get_index(blood_type)
+        if not index:
+            return None
+
+        trained_models = {}
+        for method, version in index.get('versions', {}).items():
+            try:
+                trained_models[f'{method}_{blood_type}'] = self.load_model(blood_type, method, version)
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"⚠️ Artefact {method} v{version} indisponible pour {blood_type}: {e}")
+
+        if not trained_models:
+            return None
+
+        performance = {
+            method: metrics for method, metrics in index.get('performance', {}).items()
+            if f'{method}_{blood_type}' in trained_models
+        }
+        best_method = index.get('best_method')
+        if best_method not in performance:
+            best_method = min(performance.items(), key=lambda x: x[1].get('mape', float('inf')))[0]
+
+        return performance, best_method, trained_models
+
+    def describe(self):
+        """Résumé du registre (pour le health check et la commande d'entraînement)"""
+        summary = {}
+        if not self.root.exists():
+            return summary
+        for blood_type_dir in sorted(self.root.iterdir()):
+            index_path = blood_type_dir / 'index.json'
+            if not index_path.exists():
+                continue
+            try:
+                index = json.loads(index_path.read_text())
+            except (OSError, ValueError):
+                continue
+            summary[index.get('blood_type', blood_type_dir.name)] = {
+                'best_method': index.get('best_method'),
+                'versions': index.get('versions', {}),
+                'published_at': index.get('published_at')
+            }
+        return summary
+
+
+def clear_loaded_models():
+    """Vide le cache mémoire des artefacts (les fichiers restent sur disque)"""
+    with _loaded_lock:
+        _loaded_artifacts.clear()
@@ -0,0 +1,203 @@
+# app/forecasting/precompute.py
+"""
+Précalcul des prévisions pour tous les groupes sanguins.
+
+Un job planifié (commande ``precompute_forecasts`` ou tâche Celery beat)
+génère une prévision par groupe sanguin sur l'horizon le plus long, puis
+l'écrit :
+
+- dans le cache, une entrée par (groupe, horizon) ; la prévision récursive
+  d'un jour ne dépend pas de l'horizon demandé, les horizons courts sont
+  donc des préfixes de l'horizon long ;
+- dans la table Prevision, source durable quand le cache est vide ou local
+  au processus (LocMemCache).
+
+Les vues ne font plus que des lectures (``get_precomputed_forecast``) et ne
+déclenchent jamais d'entraînement.
+"""
+
+import json
+import logging
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils import timezone
+
+from ..utils.cache_utils import cache_key_builder, safe_cache_get, safe_cache_set
+
+logger = logging.getLogger(__name__)
+
+
+def _precompute_config():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {}).get('PRECOMPUTE', {})
+
+
+def _blood_types():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {}).get(
+        'BLOOD_TYPES', ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
+    )
+
+
+def precomputed_cache_key(blood_type, days):
+    return cache_key_builder('forecast_precomputed', blood_type, days)
+
+
+def prevision_id(blood_type, prevision_date):
+    """Même schéma que generate_production_data : une ligne par (groupe, jour)"""
+    return f"ML_{blood_type}_{prevision_date.strftime('%Y%m%d')}"
+
+
+def _to_native(value):
+    """Types NumPy -> types Python (réponse JSON et taille du cache)"""
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, (date, Decimal)):
+        return str(value)
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def slice_forecast(forecast, days):
+    """Prévision sur les ``days`` premiers jours d'une prévision plus longue"""
+    sliced = dict(forecast)
+    sliced['predictions'] = forecast.get('predictions', [])[:days]
+
+    intervals = forecast.get('confidence_intervals')
+    if isinstance(intervals, dict):
+        sliced['confidence_intervals'] = {
+            key: value[:days] if isinstance(value, list) else value
+            for key, value in intervals.items()
+        }
+    sliced['forecast_period_days'] = days
+    return sliced
+
+
+# ==================== ÉCRITURE ====================
+
+def save_previsions(blood_type, predictions):
+    """Enregistre les prévisions journalières dans la table Prevision (un upsert groupé)"""
+    from ..models import Prevision
+
+    rows = []
+    for prediction in predictions:
+        prevision_date = date.fromisoformat(str(prediction['date'])[:10])
+        confidence = min(max(float(prediction.get('confidence', 0.5)), 0.0), 1.0)
+        rows.append(Prevision(
+            prevision_id=prevision_id(blood_type, prevision_date),
+            blood_type=blood_type,
+            prevision_date=prevision_date,
+            previsional_volume=max(0, int(prediction.get('predicted_demand', 0))),
+            fiability=Decimal(f'{confidence:.2f}')
+        ))
+
+    Prevision.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=['prevision_id'],
+        update_fields=['blood_type', 'prevision_date', 'previsional_volume', 'fiability']
+    )
+    return len(rows)
+
+
+def precompute_blood_type(blood_type, horizons=None):
+    """
+    Génère, met en cache et enregistre la prévision d'un groupe sanguin.
+    Les modèles viennent du registre (entraînés seulement s'ils n'existent pas encore).
+    """
+    from ..blood_demand_forecasting import generate_enhanced_forecast_api
+
+    config = _precompute_config()
+    horizons = sorted(horizons or config.get('HORIZONS', [7, 14, 30]))
+    timeout = config.get('CACHE_TIMEOUT', 3 * 3600)
+
+    forecast = generate_enhanced_forecast_api(blood_type, days_ahead=horizons[-1])
+    if not forecast or forecast.get('error') or not forecast.get('predictions'):
+        raise ValueError(forecast.get('error') if forecast else 'Aucune prévision générée')
+
+    forecast = json.loads(json.dumps(forecast, default=_to_native))
+    forecast['precomputed_at'] = timezone.now().isoformat()
+
+    for days in horizons:
+        safe_cache_set(precomputed_cache_key(blood_type, days), slice_forecast(forecast, days), timeout)
+
+    saved = save_previsions(blood_type, forecast['predictions'])
+    return {'method_used': forecast.get('method_used'), 'previsions': saved}
+
+
+def precompute_forecasts(blood_types=None, horizons=None):
+    """Précalcule tous les groupes sanguins ; retourne un résumé par groupe"""
+    summary = {}
+    for blood_type in blood_types or _blood_types():
+        start = time.time()
+        try:
+            result = precompute_blood_type(blood_type, horizons)
+            result['duration'] = round(time.time() - start, 2)
+            summary[blood_type] = result
+            logger.info(f"✅ Prévision précalculée pour {blood_type}: {result['method_used']} "
+                        f"({result['previsions']} jours, {result['duration']}s)")
+        except Exception as e:
+            summary[blood_type] = {'error': str(e)}
+            logger.error(f"❌ Précalcul échoué pour {blood_type}: {e}")
+    return summary
+
+
+# ==================== LECTURE ====================
+
+def forecast_from_previsions(blood_type, days):
+    """Reconstitue une prévision depuis la table Prevision (None si incomplète)"""
+    from ..models import Prevision
+
+    start_date = timezone.now().date() + timedelta(days=1)
+    rows = list(Prevision.objects.filter(
+        blood_type=blood_type,
+        prevision_date__range=[start_date, start_date + timedelta(days=days - 1)]
+    ).order_by('prevision_date').values_list('prevision_date', 'previsional_volume', 'fiability'))
+
+    if len(rows) < days:
+        return None
+
+    return {
+        'blood_type': blood_type,
+        'predictions': [
+            {
+                'date': prevision_date.isoformat(),
+                'predicted_demand': volume,
+                'confidence': float(fiability)
+            }
+            for prevision_date, volume, fiability in rows
+        ],
+        'method_used': 'precomputed',
+        'forecast_period_days': days,
+        'data_source': 'prevision_table'
+    }
+
+
+def get_precomputed_forecast(blood_type, days):
+    """Lecture seule : cache, puis table Prevision. Retourne None si rien n'est précalculé."""
+    forecast = safe_cache_get(precomputed_cache_key(blood_type, days))
+    if forecast:
+        return forecast
+
+    # Horizon non précalculé : préfixe d'un horizon plus long
+    for horizon in sorted(_precompute_config().get('HORIZONS', [7, 14, 30])):
+        if horizon > days:
+            forecast = safe_cache_get(precomputed_cache_key(blood_type, horizon))
+            if forecast:
+                return slice_forecast(forecast, days)
+
+    try:
+        return forecast_from_previsions(blood_type, days)
+    except Exception as e:
+        logger.warning(f"⚠️ Lecture Prevision échouée pour {blood_type}: {e}")
+        return None
+
+
+def not_precomputed_forecast(blood_type):
+    """Réponse servie quand aucune prévision n'est précalculée (jamais d'entraînement à la lecture)"""
+    return {
+        'blood_type': blood_type,
+        'predictions': [],
+        'method_used': 'not_precomputed',
+        'error': 'Prévision pas encore précalculée'
+    }
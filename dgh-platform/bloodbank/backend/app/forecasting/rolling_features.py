@@ -0,0 +1,135 @@
+# app/forecasting/rolling_features.py
+"""
+Statistiques glissantes vectorisées pour la construction des features.
+
+Remplace ``rolling(...).apply(np.polyfit)`` (un appel Python par ligne et par
+fenêtre) par des calculs NumPy sur une vue glissante (sliding_window_view) :
+la pente OLS d'une fenêtre complète est un simple produit matriciel avec des
+poids précalculés, les quantiles sont calculés en un appel pour toutes les
+fenêtres et les EMA par un filtre récursif (scipy.signal.lfilter).
+
+Sémantique identique à pandas (min_periods, NaN, fenêtres partielles en début
+de série) : voir ``python manage.py benchmark_forecast_features``.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+
+from .batch_forecast import _slope_weights
+
+
+def _as_array(values):
+    return np.asarray(values, dtype=float)
+
+
+def _windows(values, window):
+    """Vue (n × window) des fenêtres se terminant à chaque position, complétée de NaN en tête"""
+    padded = np.concatenate([np.full(window - 1, np.nan), values])
+    return sliding_window_view(padded, window)
+
+
+def rolling_mean_std(values, window, min_periods):
+    """Équivalent de rolling(window, min_periods).mean() et .std() (ddof=1)"""
+    values = _as_array(values)
+    view = _windows(values, window)
+    valid = ~np.isnan(view)
+    count = valid.sum(axis=1)
+    filled = np.where(valid, view, 0.0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = filled.sum(axis=1) / count
+        deviations = np.where(valid, view - mean[:, None], 0.0)
+        std = np.sqrt((deviations ** 2).sum(axis=1) / (count - 1))
+
+    mean[count < max(min_periods, 1)] = np.nan
+    std[(count < max(min_periods, 1)) | (count < 2)] = np.nan
+    return mean, std
+
+
+def rolling_slope(values, window, min_periods):
+    """
+    Équivalent de rolling(window, min_periods).apply(np.polyfit(...)[0]) :
+    pente OLS des valeurs de chaque fenêtre, NaN si la fenêtre contient un NaN
+    ou moins de ``min_periods`` valeurs.
+    """
+    values = _as_array(values)
+    n = len(values)
+    slopes = np.full(n, np.nan)
+    if n == 0:
+        return slopes
+
+    # Fenêtres complètes : un produit matriciel (les NaN se propagent)
+    if n >= window:
+        slopes[window - 1:] = sliding_window_view(values, window) @ _slope_weights(window)
+
+    # Fenêtres partielles en début de série (au plus window - 1 lignes)
+    for end in range(min(window - 1, n)):
+        length = end + 1
+        if length >= min_periods and length > 2:
+            slopes[end] = values[:length] @ _slope_weights(length)
+        elif length >= min_periods:
+            slopes[end] = 0.0
+    return slopes
+
+
+def rolling_quantiles(values, window, quantiles):
+    """
+    Équivalent de rolling(window).quantile(q) pour plusieurs q en un seul
+    passage (interpolation linéaire ; NaN tant que la fenêtre n'est pas complète).
+    Retourne un tableau (len(quantiles) × n).
+    """
+    values = _as_array(values)
+    result = np.full((len(quantiles), len(values)), np.nan)
+    if len(values) < window:
+        return result
+    result[:, window - 1:] = np.quantile(sliding_window_view(values, window), quantiles, axis=1)
+    return result
+
+
+def ewm_mean(values, alpha):
+    """
+    Équivalent de ewm(alpha=alpha).mean() (adjust=True, ignore_na=False) :
+    moyenne des valeurs passées pondérée par (1 - alpha)^âge.
+    """
+    values = _as_array(values)
+    valid = ~np.isnan(values)
+    decay = [1.0, -(1.0 - alpha)]
+
+    weighted = lfilter([1.0], decay, np.where(valid, values, 0.0))
+    weights = lfilter([1.0], decay, valid.astype(float))
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = weighted / weights
+    mean[np.cumsum(valid) == 0] = np.nan
+    return mean
+
+
+def shift(values, periods):
+    """Équivalent de Series.shift(periods) pour periods >= 0"""
+    values = _as_array(values)
+    shifted = np.full(len(values), np.nan)
+    if periods < len(values):
+        shifted[periods:] = values[:len(values) - periods]
+    return shifted
+
+
+def diff(values, periods=1):
+    """Équivalent de Series.diff(periods)"""
+    values = _as_array(values)
+    return values - shift(values, periods)
+
+
+def pct_change(values):
+    """Équivalent de Series.pct_change() (valeurs manquantes propagées vers l'avant)"""
+    values = _as_array(values)
+    filled = values.copy()
+    missing = np.isnan(filled)
+    if missing.any():
+        index = np.where(~missing, np.arange(len(filled)), 0)
+        np.maximum.accumulate(index, out=index)
+        filled = filled[index]
+        filled[np.cumsum(~missing) == 0] = np.nan
+    previous = shift(filled, 1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return filled / previous - 1
@@ -0,0 +1,112 @@
+# app/forecasting/training_jobs.py
+"""
+Unités de travail de l'entraînement (un fold de validation croisée ou un
+entraînement final), exécutables dans un processus séparé.
+
+Ce module n'importe pas Django : les workers du pool le chargent sans
+initialiser l'application.
+"""
+
+import numpy as np
+from sklearn.base import clone
+from sklearn.metrics import mean_absolute_error, mean_squared_error, mean_absolute_percentage_error
+from sklearn.preprocessing import StandardScaler
+
+# Modèles entraînés sur des features normalisées
+SCALED_MODELS = ('linear_regression', 'lasso_regression')
+
+# Plafond de MAPE retenu pour la sélection des modèles
+MAPE_CAP = 45.0
+
+
+def _fresh_copy(estimator, n_jobs=None):
+    """Copie non entraînée, avec un parallélisme interne éventuellement imposé"""
+    model = clone(estimator)
+    if n_jobs is not None and 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=n_jobs)
+    return model
+
+
+def evaluate_fold(model_name, estimator, X_train, y_train, X_val, y_val, n_jobs=None):
+    """Entraîne sur un fold et retourne ses métriques de validation"""
+    model = _fresh_copy(estimator, n_jobs)
+
+    if model_name in SCALED_MODELS:
+        scaler = StandardScaler()
+        X_train = scaler.fit_transform(X_train)
+        X_val = scaler.transform(X_val)
+
+    model.fit(X_train, y_train)
+
+    y_pred = np.maximum(0, model.predict(X_val))  # Pas de demandes négatives
+
+    return {
+        'mae': mean_absolute_error(y_val, y_pred),
+        'rmse': np.sqrt(mean_squared_error(y_val, y_pred)),
+        'mape': mean_absolute_percentage_error(y_val, y_pred) * 100
+    }
+
+
+def fit_final(model_name, estimator, X, y, n_jobs=None):
+    """Entraîne le modèle final sur toutes les données ; retourne (modèle, scaler)"""
+    model = _fresh_copy(estimator, n_jobs)
+
+    scaler = None
+    if model_name in SCALED_MODELS:
+        scaler = StandardScaler()
+        X = scaler.fit_transform(X)
+
+    model.fit(X, y)
+    return model, scaler
+
+
+def summarize_cv_scores(cv_scores):
+    """Agrège les métriques des folds dans le format de model_performance"""
+    avg_mae = np.mean([s['mae'] for s in cv_scores])
+    avg_rmse = np.mean([s['rmse'] for s in cv_scores])
+    avg_mape = np.mean([s['mape'] for s in cv_scores])
+    std_mape = np.std([s['mape'] for s in cv_scores])
+
+    return {
+        'mae': float(avg_mae),
+        'rmse': float(avg_rmse),
+        'mape': float(min(avg_mape, MAPE_CAP)),
+        'mape_std': float(std_mape),
+        'cv_folds': len(cv_scores),
+        'stability_score': float(1.0 - (std_mape / max(avg_mape, 1.0)))
+    }
+
+
+def run_job(job):
+    """
+    Point d'entrée des workers.
+    job = (clé, type, nom du modèle, estimateur, données)
+    """
+    key, kind, model_name, estimator, data = job
+    # Un job = un cœur : le parallélisme vient du pool, pas de l'estimateur
+    if kind == 'fold':
+        return key, evaluate_fold(model_name, estimator, *data, n_jobs=1)
+
+    model, scaler = fit_final(model_name, estimator, *data, n_jobs=1)
+    # Le modèle servi en production retrouve le parallélisme d'origine
+    if 'n_jobs' in estimator.get_params():
+        model.set_params(n_jobs=estimator.get_params()['n_jobs'])
+    return key, (model, scaler)
+
+
+def init_worker(memory_mb=None):
+    """Initialisation d'un worker : un thread BLAS et plafond mémoire optionnel"""
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+    if memory_mb:
+        try:
+            import resource
+            limit = int(memory_mb) * 1024 * 1024
+            resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+        except (ImportError, ValueError, OSError):
+            # Plateforme sans RLIMIT_AS (Windows) : pas de plafond
+            pass
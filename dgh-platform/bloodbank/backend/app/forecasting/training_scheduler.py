@@ -0,0 +1,243 @@
+# app/forecasting/training_scheduler.py
+"""
+Planificateur d'entraînement parallèle des modèles de prévision.
+
+L'entraînement séquentiel enchaîne groupe sanguin → méthode → fold. Ici,
+chaque fit (un fold de validation croisée, ou l'entraînement final d'une
+méthode) devient un job indépendant exécuté par un pool de processus :
+
+- les données sont préparées une seule fois par groupe sanguin (panel partagé) ;
+- chaque worker est limité à un thread BLAS et, si configuré, à un plafond
+  mémoire (RLIMIT_AS) ;
+- les estimateurs ont un random_state fixe et les résultats sont réassemblés
+  dans l'ordre (groupe, méthode, fold) : le résultat est identique à celui
+  de ``train_enhanced_models`` quel que soit l'ordre de fin des jobs ;
+- le budget global réutilise ``check_timeout`` du forecaster : à expiration,
+  les jobs restants sont annulés, les workers encore actifs arrêtés, et seuls
+  les groupes complets sont publiés.
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
+
+from django.conf import settings
+from django.db import connections
+
+from ..blood_demand_forecasting import EnhancedBloodDemandForecaster, TimeoutException
+from .training_jobs import init_worker, run_job, summarize_cv_scores
+
+logger = logging.getLogger(__name__)
+
+
+def _training_config():
+    return getattr(settings, 'AI_FORECASTING_CONFIG', {}).get('TRAINING', {})
+
+
+def _terminate_workers(executor, grace=5):
+    """
+    Arrête le pool et ses workers, jobs en cours compris : shutdown() seul
+    annule les jobs en attente mais laisse les fits déjà lancés se terminer.
+    """
+    if hasattr(executor, 'terminate_workers'):  # Python >= 3.14
+        executor.terminate_workers()
+        return
+
+    processes = list((getattr(executor, '_processes', None) or {}).values())
+    executor.shutdown(wait=False, cancel_futures=True)
+    for process in processes:
+        if process.is_alive():
+            process.terminate()
+    for process in processes:
+        process.join(grace)
+        if process.is_alive():
+            process.kill()
+            process.join()
+    if processes:
+        logger.warning(f"⏱️ {len(processes)} worker(s) d'entraînement arrêté(s) à l'expiration du budget")
+
+
+class TrainingScheduler:
+    """
+    Entraîne plusieurs groupes sanguins en parallèle et publie les modèles
+    dans le registre via le forecaster.
+    """
+
+    def __init__(self, forecaster=None, max_workers=None, worker_memory_mb=None, time_budget=None):
+        config = _training_config()
+
+        self.forecaster = forecaster or EnhancedBloodDemandForecaster()
+
+        max_workers = config.get('MAX_WORKERS', 0) if max_workers is None else max_workers
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.worker_memory_mb = (
+            config.get('WORKER_MEMORY_MB', 0) if worker_memory_mb is None else worker_memory_mb
+        )
+        self.time_budget = config.get('TIME_BUDGET', 1800) if time_budget is None else time_budget
+
+    # ==================== PRÉPARATION ====================
+
+    def _prepare(self, blood_types):
+        """Données d'entraînement de chaque groupe sanguin (séquentiel, lié à la base)"""
+        prepared = {}
+        for blood_type in blood_types:
+            try:
+                prepared[blood_type] = self.forecaster.prepare_training_data(blood_type)
+            except Exception as e:
+                logger.error(f"❌ Préparation des données échouée pour {blood_type}: {e}")
+                prepared[blood_type] = None
+        return prepared
+
+    def _build_jobs(self, prepared, method):
+        """Un job par (groupe, méthode, fold) et par entraînement final (groupe, méthode)"""
+        jobs = []
+        plan = {}
+        for blood_type, data in prepared.items():
+            if data is None:
+                continue
+            _, X, y, _ = data
+            splits = self.forecaster.cv_splits(X)
+            candidates = self.forecaster.models_to_test(method)
+            plan[blood_type] = (list(candidates), len(splits))
+
+            for model_name, estimator in candidates.items():
+                for fold, (train_idx, val_idx) in enumerate(splits):
+                    jobs.append((
+                        (blood_type, model_name, fold), 'fold', model_name, estimator,
+                        (X.iloc[train_idx], y.iloc[train_idx], X.iloc[val_idx], y.iloc[val_idx])
+                    ))
+                jobs.append(((blood_type, model_name, 'final'), 'final', model_name, estimator, (X, y)))
+        return jobs, plan
+
+    # ==================== EXÉCUTION ====================
+
+    def _run_in_process(self, jobs, outcomes, failures):
+        for job in jobs:
+            self.forecaster.check_timeout()
+            try:
+                key, value = run_job(job)
+                outcomes[key] = value
+            except Exception as e:
+                failures[job[0]] = str(e)
+
+    def _run_in_pool(self, jobs, outcomes, failures):
+        # Les connexions ouvertes ne doivent pas être partagées avec les workers
+        connections.close_all()
+
+        workers = min(self.max_workers, len(jobs))
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=init_worker,
+            initargs=(self.worker_memory_mb,)
+        )
+        futures = {executor.submit(run_job, job): job[0] for job in jobs}
+        completed = False
+        try:
+            remaining = self.time_budget - (time.time() - self.forecaster.start_time)
+            for future in as_completed(futures, timeout=max(remaining, 0)):
+                key = futures[future]
+                try:
+                    outcomes[key] = future.result()[1]
+                except Exception as e:
+                    # MemoryError sous plafond, worker tué... : seul ce job échoue
+                    failures[key] = str(e)
+                self.forecaster.check_timeout()
+            completed = True
+        except FuturesTimeoutError:
+            raise TimeoutException("Training time budget exceeded")
+        finally:
+            if completed:
+                executor.shutdown(wait=True)
+            else:
+                # Budget dépassé : les fits en cours ne doivent pas continuer en arrière-plan
+                _terminate_workers(executor)
+
+    # ==================== ASSEMBLAGE ====================
+
+    def _complete(self, blood_type, data, model_names, n_folds, outcomes, failures):
+        historical_data, X, y, feature_cols = data
+
+        cv_results = {}
+        fitted = {}
+        for model_name in model_names:
+            folds = [(blood_type, model_name, fold) for fold in range(n_folds)]
+            if any(key not in outcomes for key in folds):
+                errors = [failures[key] for key in folds if key in failures]
+                logger.warning(f"⚠️ Erreur validation {model_name} ({blood_type}): {errors[:1]}")
+                continue
+            cv_results[model_name] = summarize_cv_scores([outcomes[key] for key in folds])
+
+            final_key = (blood_type, model_name, 'final')
+            if final_key in outcomes:
+                fitted[model_name] = outcomes[final_key]
+
+        if not cv_results:
+            return self.forecaster._create_enhanced_fallback_model(blood_type), 'fallback'
+
+        return self.forecaster.complete_training(
+            blood_type, historical_data, X, y, feature_cols, cv_results, fitted
+        ), 'trained'
+
+    def run(self, blood_types, method='auto'):
+        """
+        Entraîne ``blood_types`` et retourne {groupe: {'status', 'performance',
+        'best_method', 'error'}}. status vaut trained, fallback, timeout ou failed.
+        """
+        self.forecaster.start_time = time.time()
+        self.forecaster.max_execution_time = self.time_budget
+
+        prepared = self._prepare(blood_types)
+        jobs, plan = self._build_jobs(prepared, method)
+        outcomes, failures = {}, {}
+
+        workers = min(self.max_workers, len(jobs))
+        logger.info(f"🔬 {len(jobs)} jobs d'entraînement pour {len(plan)} groupe(s) sur {max(workers, 1)} worker(s)")
+
+        timed_out = False
+        try:
+            if workers > 1:
+                self._run_in_pool(jobs, outcomes, failures)
+            else:
+                self._run_in_process(jobs, outcomes, failures)
+        except TimeoutException:
+            timed_out = True
+            logger.warning(f"⏰ Budget d'entraînement de {self.time_budget}s dépassé")
+
+        # La publication n'est plus soumise au budget ; en cas de dépassement,
+        # seuls les groupes dont tous les jobs ont abouti sont publiés
+        self.forecaster.start_time = None
+
+        results = {}
+        for blood_type in blood_types:
+            data = prepared.get(blood_type)
+            if data is None:
+                performance, best_method = self.forecaster._create_enhanced_fallback_model(blood_type)
+                results[blood_type] = {
+                    'status': 'fallback', 'performance': performance, 'best_method': best_method
+                }
+                continue
+
+            model_names, n_folds = plan[blood_type]
+            expected = [
+                (blood_type, name, fold) for name in model_names for fold in list(range(n_folds)) + ['final']
+            ]
+            if timed_out and any(key not in outcomes and key not in failures for key in expected):
+                results[blood_type] = {'status': 'timeout', 'error': 'Budget de temps dépassé'}
+                continue
+
+            try:
+                (performance, best_method), status = self._complete(
+                    blood_type, data, model_names, n_folds, outcomes, failures
+                )
+                results[blood_type] = {
+                    'status': status, 'performance': performance, 'best_method': best_method
+                }
+            except Exception as e:
+                logger.error(f"❌ Erreur entraînement {blood_type}: {e}")
+                results[blood_type] = {'status': 'failed', 'error': str(e)}
+
+        return results
+
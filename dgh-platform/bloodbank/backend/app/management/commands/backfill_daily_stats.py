@@ -0,0 +1,42 @@
+# app/management/commands/backfill_daily_stats.py
+"""
+Reconstruit la table DailyDemandStat à partir des tables brutes.
+À lancer après une migration, un import ou une génération de données en masse.
+
+Usage:
+    python manage.py backfill_daily_stats
+    python manage.py backfill_daily_stats --days 30
+"""
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from app.daily_stats import rebuild_daily_stats
+
+
+class Command(BaseCommand):
+    help = 'Reconstruit les agrégats journaliers de demande (DailyDemandStat)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help="Nombre de jours à reconstruire (tout l'historique par défaut)"
+        )
+
+    def handle(self, *args, **options):
+        start_date = None
+        if options['days']:
+            start_date = timezone.now().date() - timedelta(days=options['days'])
+
+        start = time.time()
+        rows = rebuild_daily_stats(start_date=start_date)
+
+        scope = f"depuis {start_date}" if start_date else "sur tout l'historique"
+        self.stdout.write(self.style.SUCCESS(
+            f'✅ {rows} lignes DailyDemandStat reconstruites {scope} en {time.time() - start:.1f}s'
+        ))
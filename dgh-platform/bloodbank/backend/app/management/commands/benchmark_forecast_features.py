@@ -0,0 +1,147 @@
+# app/management/commands/benchmark_forecast_features.py
+"""
+Compare les features glissantes vectorisées (app.forecasting.rolling_features)
+à l'implémentation pandas d'origine : égalité des valeurs et gain de temps.
+
+Usage:
+    python manage.py benchmark_forecast_features
+    python manage.py benchmark_forecast_features --days 1000 --repeat 10
+    python manage.py benchmark_forecast_features --blood-type O+   # historique réel
+"""
+
+import time
+
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand, CommandError
+
+from app.blood_demand_forecasting import EnhancedBloodDemandForecaster
+from app.forecasting import rolling_features as rolling
+
+
+def legacy_features(demand):
+    """Implémentation pandas d'origine (rolling().apply(np.polyfit), etc.)"""
+    past_demand = demand.shift(1)
+    features = {}
+
+    for window in [3, 7, 14, 30]:
+        features[f'demand_ma_{window}'] = past_demand.rolling(window=window, min_periods=max(1, window // 2)).mean()
+        features[f'demand_std_{window}'] = past_demand.rolling(window=window, min_periods=max(1, window // 2)).std()
+    for alpha in [0.1, 0.3, 0.5]:
+        features[f'demand_ema_{int(alpha * 10)}'] = past_demand.ewm(alpha=alpha).mean()
+    for lag in [1, 2, 3, 7, 14]:
+        features[f'demand_lag_{lag}'] = demand.shift(lag)
+
+    features['demand_diff_1'] = past_demand.diff()
+    features['demand_diff_7'] = past_demand.diff(7)
+    features['demand_pct_change'] = past_demand.pct_change()
+
+    for window in [7, 14, 30]:
+        features[f'demand_trend_{window}'] = past_demand.rolling(
+            window=window, min_periods=max(3, window // 3)
+        ).apply(lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 2 else 0, raw=False)
+    for window in [7, 14]:
+        features[f'demand_volatility_{window}'] = past_demand.rolling(
+            window=window, min_periods=max(2, window // 3)
+        ).std()
+    for window in [14, 30]:
+        features[f'demand_q25_{window}'] = past_demand.rolling(window=window).quantile(0.25)
+        features[f'demand_q75_{window}'] = past_demand.rolling(window=window).quantile(0.75)
+        features[f'demand_median_{window}'] = past_demand.rolling(window=window).median()
+
+    return {name: np.asarray(values, dtype=float) for name, values in features.items()}
+
+
+def vectorized_features(demand):
+    """Mêmes features via rolling_features (cf. create_advanced_features)"""
+    values = demand.values.astype(float)
+    past_demand = rolling.shift(values, 1)
+    features = {}
+
+    for window in [3, 7, 14, 30]:
+        features[f'demand_ma_{window}'], features[f'demand_std_{window}'] = rolling.rolling_mean_std(
+            past_demand, window, min_periods=max(1, window // 2)
+        )
+    for alpha in [0.1, 0.3, 0.5]:
+        features[f'demand_ema_{int(alpha * 10)}'] = rolling.ewm_mean(past_demand, alpha)
+    for lag in [1, 2, 3, 7, 14]:
+        features[f'demand_lag_{lag}'] = rolling.shift(values, lag)
+
+    features['demand_diff_1'] = rolling.diff(past_demand)
+    features['demand_diff_7'] = rolling.diff(past_demand, 7)
+    features['demand_pct_change'] = rolling.pct_change(past_demand)
+
+    for window in [7, 14, 30]:
+        features[f'demand_trend_{window}'] = rolling.rolling_slope(
+            past_demand, window, min_periods=max(3, window // 3)
+        )
+    for window in [7, 14]:
+        _, features[f'demand_volatility_{window}'] = rolling.rolling_mean_std(
+            past_demand, window, min_periods=max(2, window // 3)
+        )
+    for window in [14, 30]:
+        q25, median, q75 = rolling.rolling_quantiles(past_demand, window, [0.25, 0.5, 0.75])
+        features[f'demand_q25_{window}'] = q25
+        features[f'demand_q75_{window}'] = q75
+        features[f'demand_median_{window}'] = median
+
+    return features
+
+
+def best_time(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+class Command(BaseCommand):
+    help = 'Mesure la parité et le gain des features glissantes vectorisées'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=500, help="Longueur de l'historique synthétique")
+        parser.add_argument('--repeat', type=int, default=5, help='Nombre de mesures (meilleur temps retenu)')
+        parser.add_argument('--seed', type=int, default=42, help='Graine des données synthétiques')
+        parser.add_argument('--blood-type', default=None, help="Utiliser l'historique réel de ce groupe sanguin")
+
+    def handle(self, *args, **options):
+        forecaster = EnhancedBloodDemandForecaster()
+
+        if options['blood_type']:
+            history = forecaster.get_enhanced_historical_data(options['blood_type'], days_back=options['days'])
+            source = f"historique {options['blood_type']}"
+        else:
+            np.random.seed(options['seed'])
+            history = forecaster.generate_enhanced_synthetic_data('O+', options['days'])
+            source = 'données synthétiques'
+        if history is None or len(history) < 30:
+            raise CommandError('Historique insuffisant pour le benchmark (30 jours minimum)')
+
+        demand = pd.Series(history['demand'].values.astype(float), index=history.index)
+        self.stdout.write(f'📊 {len(demand)} jours ({source}), meilleur temps sur {options["repeat"]} essais')
+
+        legacy_time, expected = best_time(lambda: legacy_features(demand), options['repeat'])
+        fast_time, actual = best_time(lambda: vectorized_features(demand), options['repeat'])
+
+        mismatches = []
+        for name, values in expected.items():
+            if not np.allclose(values, actual[name], rtol=1e-9, atol=1e-9, equal_nan=True):
+                diff = np.nanmax(np.abs(values - actual[name]))
+                mismatches.append(f'{name} (écart max {diff:.3g})')
+
+        if mismatches:
+            self.stdout.write(self.style.ERROR(f"❌ Écarts: {', '.join(mismatches)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'✅ Parité: {len(expected)} features identiques'))
+
+        self.stdout.write(f'   pandas (rolling.apply) : {legacy_time * 1000:8.2f} ms')
+        self.stdout.write(f'   vectorisé              : {fast_time * 1000:8.2f} ms')
+        self.stdout.write(self.style.SUCCESS(f'🚀 Accélération: x{legacy_time / max(fast_time, 1e-9):.1f}'))
+
+        total_time, _ = best_time(lambda: forecaster.create_advanced_features(history), options['repeat'])
+        self.stdout.write(f'   create_advanced_features complet : {total_time * 1000:.2f} ms')
+
+        if mismatches:
+            raise CommandError('Les features vectorisées ne correspondent pas à pandas')
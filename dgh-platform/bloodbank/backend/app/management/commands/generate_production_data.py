@@ -14,6 +14,8 @@ from app.models import (
     Donor, Site, Department, Patient, BloodRecord,
     BloodUnit, BloodRequest, BloodConsumption, Prevision
 )
+from app.daily_stats import rebuild_daily_stats
+from app.transfusions import record_transfusions
 
 
 class Command(BaseCommand):
@@ -551,6 +553,10 @@ class Command(BaseCommand):
             gc.collect()
             self.log_memory_usage(f"Chunk {chunk_start}-{chunk_end}")
 
+        # bulk_create ne déclenche pas les signaux : reconstruire les agrégats journaliers
+        stats_rows = rebuild_daily_stats(start_date=start_date)
+        self.stdout.write(f'  📈 {stats_rows} agrégats journaliers reconstruits')
+
         self.stdout.write('  ✅ Patterns historiques générés')
 
     def generate_collections_chunk(self, collection_sites, start_date, days_count):
@@ -629,6 +635,7 @@ class Command(BaseCommand):
                     unit = BloodUnit(
                         unit_id=unit_id,
                         donor=donor,
+                        blood_type=donor.blood_type,
                         record=record,
                         collection_date=current_date,
                         volume_ml=volume_ml,
@@ -665,6 +672,7 @@ class Command(BaseCommand):
 
         requests_batch = []
         consumptions_batch = []
+        assigned_units = set()  # unités déjà attribuées dans ce chunk (encore 'Available' en base)
         blood_types = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
 
         for day_offset in range(days_count):
@@ -716,7 +724,7 @@ class Command(BaseCommand):
                     # Générer consommations pour demandes satisfaites
                     if status == 'Fulfilled' and random.random() < 0.8:
                         self.create_consumption_for_request_chunk(
-                            request, current_date, consumptions_batch
+                            request, current_date, consumptions_batch, assigned_units
                         )
 
         # Insertion des demandes
@@ -737,7 +745,9 @@ class Command(BaseCommand):
                         if consumption.request.request_id in created_requests:
                             consumption.request = created_requests[consumption.request.request_id]
 
-                    BloodConsumption.objects.bulk_create(consumptions_batch, batch_size=self.batch_size)
+                    # Chemin rapide : unités 'Used' et demandes satisfaites en UPDATE ensemblistes,
+                    # agrégats reconstruits en fin de génération
+                    record_transfusions(consumptions_batch, refresh=False)
                     self.stdout.write(f'    💉 {len(consumptions_batch):,} transfusions créées')
 
             except Exception as e:
@@ -902,21 +912,22 @@ class Command(BaseCommand):
             else:
                 return random.choices(['Fulfilled', 'Pending', 'Approved'], weights=[0.3, 0.5, 0.2])[0]
 
-    def create_consumption_for_request_chunk(self, request, request_date, consumptions_batch):
+    def create_consumption_for_request_chunk(self, request, request_date, consumptions_batch, assigned_units):
         """Créer consommations pour une demande (version chunk)"""
 
         # Rechercher unités compatibles disponibles
         compatible_units = BloodUnit.objects.filter(
-            donor__blood_type=request.blood_type,
+            blood_type=request.blood_type,
             status='Available',
             collection_date__lte=request_date,
             date_expiration__gt=request_date
-        )[:request.quantity]
+        ).exclude(unit_id__in=assigned_units)[:request.quantity]
 
         if not compatible_units:
             return  # Pas d'unités disponibles
 
         for unit in compatible_units:
+            assigned_units.add(unit.unit_id)
             patient = random.choice(self.patients)
 
             # Volume transfusé (généralement complet)
@@ -933,6 +944,7 @@ class Command(BaseCommand):
             consumption = BloodConsumption(
                 request=request,
                 unit=unit,
+                blood_type=unit.blood_type,
                 patient=patient,
                 date=consumption_date,
                 volume=volume_transfused
@@ -993,7 +1005,7 @@ class Command(BaseCommand):
         weekday_patterns = {}
         for weekday in range(7):
             avg_consumption = BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type,
+                blood_type=blood_type,
                 date__week_day=weekday + 1
             ).count() / max(1, self.history_days // 7)
             weekday_patterns[weekday] = avg_consumption
@@ -1002,19 +1014,19 @@ class Command(BaseCommand):
         monthly_patterns = {}
         for month in range(1, 13):
             month_consumption = BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type,
+                blood_type=blood_type,
                 date__month=month
             ).count()
             monthly_patterns[month] = month_consumption / max(1, self.history_days // 30)
 
         # Tendance récente
         recent_consumption = BloodConsumption.objects.filter(
-            unit__donor__blood_type=blood_type,
+            blood_type=blood_type,
             date__gte=date.today() - timedelta(days=min(30, self.history_days))
         ).count()
 
         older_consumption = BloodConsumption.objects.filter(
-            unit__donor__blood_type=blood_type,
+            blood_type=blood_type,
             date__gte=date.today() - timedelta(days=min(60, self.history_days)),
             date__lt=date.today() - timedelta(days=min(30, self.history_days))
         ).count()
@@ -1026,7 +1038,7 @@ class Command(BaseCommand):
         for i in range(min(self.history_days, 30)):
             day_date = date.today() - timedelta(days=i + 1)
             day_consumption = BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type,
+                blood_type=blood_type,
                 date=day_date
             ).count()
             daily_consumptions.append(day_consumption)
@@ -1045,7 +1057,7 @@ class Command(BaseCommand):
             'trend': trend,
             'volatility': volatility,
             'total_historical_data': BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type
+                blood_type=blood_type
             ).count()
         }
 
@@ -1161,7 +1173,7 @@ class Command(BaseCommand):
         blood_types = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
         for bt in blood_types:
             donor_count = Donor.objects.filter(blood_type=bt).count()
-            consumption_count = BloodConsumption.objects.filter(unit__donor__blood_type=bt).count()
+            consumption_count = BloodConsumption.objects.filter(blood_type=bt).count()
             percentage = (donor_count / max(stats['Donneurs'], 1)) * 100
             self.stdout.write(
                 f'  {bt:>3}: {donor_count:,} donneurs ({percentage:.1f}%) → {consumption_count:,} transfusions')
@@ -1258,8 +1270,8 @@ class Command(BaseCommand):
 
             # Groupe sanguin le plus demandé
             blood_demand = {}
-            for consumption in BloodConsumption.objects.select_related('unit__donor'):
-                bt = consumption.unit.donor.blood_type
+            for consumption in BloodConsumption.objects.only('blood_type'):
+                bt = consumption.blood_type
                 blood_demand[bt] = blood_demand.get(bt, 0) + 1
 
             if blood_demand:
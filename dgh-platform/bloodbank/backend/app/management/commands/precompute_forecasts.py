@@ -0,0 +1,53 @@
+# app/management/commands/precompute_forecasts.py
+"""
+Précalcule les prévisions de tous les groupes sanguins et les écrit dans le
+cache et la table Prevision. Les vues de prévision ne font ensuite que lire.
+Planifié en production par Celery beat (tâche app.tasks.precompute_forecasts).
+
+Usage:
+    python manage.py precompute_forecasts
+    python manage.py precompute_forecasts --blood-type O+ --horizon 7 --horizon 30
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from app.forecasting.precompute import precompute_forecasts
+
+
+class Command(BaseCommand):
+    help = 'Précalcule les prévisions (cache + table Prevision) pour tous les groupes sanguins'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blood-type',
+            action='append',
+            dest='blood_types',
+            help='Groupe sanguin à précalculer (répétable, tous par défaut)'
+        )
+        parser.add_argument(
+            '--horizon',
+            action='append',
+            type=int,
+            dest='horizons',
+            help="Horizon en jours (répétable, PRECOMPUTE['HORIZONS'] par défaut)"
+        )
+
+    def handle(self, *args, **options):
+        start = time.time()
+        summary = precompute_forecasts(blood_types=options['blood_types'], horizons=options['horizons'])
+
+        failures = 0
+        for blood_type, result in summary.items():
+            if 'error' in result:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"❌ {blood_type}: {result['error']}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {blood_type}: {result['method_used']}, {result['previsions']} jours en {result['duration']}s"
+                ))
+
+        self.stdout.write(f'⏱️ Précalcul terminé en {time.time() - start:.1f}s')
+        if failures:
+            self.stdout.write(self.style.WARNING(f'⚠️ {failures} groupe(s) en échec'))
@@ -0,0 +1,57 @@
+# app/management/commands/select_arima_orders.py
+"""
+Recherche l'ordre ARIMA (p, d, q) de chaque groupe sanguin en évaluant les
+candidats en parallèle, puis enregistre ordre et paramètres dans le registre
+de modèles. Les prévisions ARIMA réutilisent ensuite cet état sans refaire
+la recherche. Planifié en production par Celery beat
+(tâche app.tasks.select_arima_orders).
+
+Usage:
+    python manage.py select_arima_orders
+    python manage.py select_arima_orders --blood-type O+ --workers 4
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app.forecasting.arima_engine import STATSMODELS_AVAILABLE, select_arima_orders
+
+
+class Command(BaseCommand):
+    help = "Sélectionne et enregistre l'ordre ARIMA de chaque groupe sanguin"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blood-type',
+            action='append',
+            dest='blood_types',
+            help='Groupe sanguin à traiter (répétable, tous par défaut)'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help="Processus d'évaluation (ARIMA_ENGINE['SELECTION_WORKERS'] par défaut, 1 = séquentiel)"
+        )
+
+    def handle(self, *args, **options):
+        if not STATSMODELS_AVAILABLE:
+            raise CommandError('statsmodels est requis pour la sélection ARIMA')
+
+        start = time.time()
+        summary = select_arima_orders(blood_types=options['blood_types'], max_workers=options['workers'])
+
+        failures = 0
+        for blood_type, result in summary.items():
+            if 'error' in result:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"❌ {blood_type}: {result['error']}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {blood_type}: ARIMA{tuple(result['order'])} (AIC {result['aic']})"
+                ))
+
+        self.stdout.write(f'⏱️ Sélection terminée en {time.time() - start:.1f}s')
+        if failures:
+            self.stdout.write(self.style.WARNING(f'⚠️ {failures} groupe(s) en échec'))
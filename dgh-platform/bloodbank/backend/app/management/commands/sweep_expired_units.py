@@ -0,0 +1,35 @@
+# app/management/commands/sweep_expired_units.py
+"""
+Bascule en 'Expired' les unités disponibles dont la date d'expiration est
+dépassée (un UPDATE), puis met à jour agrégats, alertes et cache.
+Planifié par CELERY_BEAT_SCHEDULE ('sweep-expired-units').
+
+Usage:
+    python manage.py sweep_expired_units
+    python manage.py sweep_expired_units --dry-run
+"""
+
+from django.core.management.base import BaseCommand
+
+from app.expiry import sweep_expired_units
+
+
+class Command(BaseCommand):
+    help = 'Bascule les unités périmées au statut Expired'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Compter les unités concernées sans les modifier'
+        )
+
+    def handle(self, *args, **options):
+        summary = sweep_expired_units(dry_run=options['dry_run'])
+
+        details = ', '.join(f'{blood_type}: {count}' for blood_type, count in sorted(summary['by_blood_type'].items()))
+        action = 'à expirer' if summary['dry_run'] else 'expirées'
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {summary['expired']} unité(s) {action} en {summary['duration_seconds']}s"
+            + (f' ({details})' if details else '')
+        ))
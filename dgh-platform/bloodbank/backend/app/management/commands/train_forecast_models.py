@@ -0,0 +1,89 @@
+# app/management/commands/train_forecast_models.py
+"""
+Entraînement hors requête des modèles de prévision.
+Les modèles sont publiés dans le registre et réutilisés par l'API sans ré-entraînement.
+
+Usage:
+    python manage.py train_forecast_models
+    python manage.py train_forecast_models --blood-type O+ --blood-type A-
+    python manage.py train_forecast_models --workers 4 --max-time 900
+"""
+
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from app.forecasting.model_registry import ModelRegistry
+from app.forecasting.training_scheduler import TrainingScheduler
+
+
+class Command(BaseCommand):
+    help = 'Entraîne les modèles de prévision et les publie dans le registre'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--blood-type',
+            action='append',
+            dest='blood_types',
+            help='Groupe sanguin à entraîner (répétable, tous par défaut)'
+        )
+        parser.add_argument(
+            '--method',
+            default='auto',
+            help='Méthode à entraîner (auto = toutes les méthodes ML disponibles)'
+        )
+        parser.add_argument(
+            '--max-time',
+            type=int,
+            default=None,
+            help="Budget global d'entraînement en secondes (TRAINING['TIME_BUDGET'] par défaut)"
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Nombre de processus (TRAINING[\'MAX_WORKERS\'] par défaut, 1 = séquentiel)'
+        )
+        parser.add_argument(
+            '--worker-memory',
+            type=int,
+            default=None,
+            help='Plafond mémoire par worker en Mo (0 = aucun)'
+        )
+
+    def handle(self, *args, **options):
+        blood_types = options['blood_types'] or settings.AI_FORECASTING_CONFIG['BLOOD_TYPES']
+        scheduler = TrainingScheduler(
+            max_workers=options['workers'],
+            worker_memory_mb=options['worker_memory'],
+            time_budget=options['max_time']
+        )
+
+        self.stdout.write(
+            f'🔬 Entraînement de {len(blood_types)} groupe(s) sanguin(s) '
+            f'({scheduler.max_workers} worker(s), budget {scheduler.time_budget}s)'
+        )
+
+        start = time.time()
+        results = scheduler.run(blood_types, options['method'])
+
+        failures = 0
+        for blood_type, result in results.items():
+            if result['status'] == 'trained':
+                best_method = result['best_method']
+                mape = result['performance'].get(best_method, {}).get('mape', 'N/A')
+                self.stdout.write(self.style.SUCCESS(f'✅ {blood_type}: {best_method} (MAPE: {mape})'))
+            elif result['status'] == 'fallback':
+                self.stdout.write(self.style.WARNING(f'⚠️ {blood_type}: données insuffisantes, modèle de secours'))
+            else:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"❌ {blood_type}: {result.get('error')}"))
+
+        self.stdout.write(f'⏱️ Entraînement terminé en {time.time() - start:.1f}s')
+
+        for blood_type, entry in ModelRegistry().describe().items():
+            self.stdout.write(f"   📦 {blood_type}: {entry['best_method']} {entry['versions']}")
+
+        if failures:
+            self.stdout.write(self.style.WARNING(f'⚠️ {failures} groupe(s) en échec'))
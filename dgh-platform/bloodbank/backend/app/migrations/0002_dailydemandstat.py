@@ -0,0 +1,38 @@
+# Generated by Django 5.2.4
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyDemandStat',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('blood_type', models.CharField(choices=[('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'), ('AB+', 'AB+'), ('AB-', 'AB-'), ('O+', 'O+'), ('O-', 'O-')], max_length=3)),
+                ('consumed_units', models.IntegerField(default=0)),
+                ('consumed_volume', models.FloatField(default=0)),
+                ('requests_count', models.IntegerField(default=0)),
+                ('requested_units', models.IntegerField(default=0)),
+                ('urgent_requests', models.IntegerField(default=0)),
+                ('approved_units', models.IntegerField(default=0, help_text='Quantité des demandes approuvées ou satisfaites')),
+                ('collected_units', models.IntegerField(default=0)),
+                ('used_units', models.IntegerField(default=0)),
+                ('expired_units', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Statistique journalière',
+                'verbose_name_plural': 'Statistiques journalières',
+                'db_table': 'daily_demand_stat',
+                'ordering': ['-date', 'blood_type'],
+                'constraints': [models.UniqueConstraint(fields=('date', 'blood_type'), name='unique_daily_stat_per_blood_type')],
+            },
+        ),
+    ]
@@ -0,0 +1,60 @@
+# Generated by Django 5.2.4
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+BLOOD_TYPE_CHOICES = [
+    ('A+', 'A+'), ('A-', 'A-'), ('B+', 'B+'), ('B-', 'B-'),
+    ('AB+', 'AB+'), ('AB-', 'AB-'), ('O+', 'O+'), ('O-', 'O-'),
+]
+
+
+def backfill_blood_type(apps, schema_editor):
+    """Copie donor.blood_type sur les unités puis unit.blood_type sur les transfusions (deux UPDATE)"""
+    Donor = apps.get_model('app', 'Donor')
+    BloodUnit = apps.get_model('app', 'BloodUnit')
+    BloodConsumption = apps.get_model('app', 'BloodConsumption')
+
+    BloodUnit.objects.update(blood_type=Subquery(
+        Donor.objects.filter(donor_id=OuterRef('donor_id')).values('blood_type')[:1]
+    ))
+    BloodConsumption.objects.update(blood_type=Subquery(
+        BloodUnit.objects.filter(unit_id=OuterRef('unit_id')).values('blood_type')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0002_dailydemandstat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bloodunit',
+            name='blood_type',
+            field=models.CharField(choices=BLOOD_TYPE_CHOICES, default='', editable=False, max_length=3),
+        ),
+        migrations.AddField(
+            model_name='bloodconsumption',
+            name='blood_type',
+            field=models.CharField(choices=BLOOD_TYPE_CHOICES, default='', editable=False, max_length=3),
+        ),
+        migrations.RunPython(backfill_blood_type, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='bloodunit',
+            index=models.Index(fields=['blood_type', 'status'], name='unit_blood_type_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloodunit',
+            index=models.Index(fields=['status', 'date_expiration'], name='unit_status_expiration_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloodunit',
+            index=models.Index(fields=['collection_date', 'date_expiration'], name='unit_collection_expiry_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bloodconsumption',
+            index=models.Index(fields=['blood_type', 'date'], name='consumption_bt_date_idx'),
+        ),
+    ]
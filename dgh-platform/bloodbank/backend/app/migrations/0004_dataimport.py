@@ -0,0 +1,44 @@
+# Generated by Django 5.2.4
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0003_denormalized_blood_type'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DataImport',
+            fields=[
+                ('import_id', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('file_name', models.CharField(max_length=255)),
+                ('file_hash', models.CharField(db_index=True, help_text='SHA-256 du fichier (contrôle de reprise)', max_length=64)),
+                ('file_size', models.BigIntegerField(default=0)),
+                ('status', models.CharField(choices=[('Running', 'En cours'), ('Completed', 'Terminé'), ('Failed', 'Échoué')], default='Running', max_length=20)),
+                ('rows_processed', models.IntegerField(default=0)),
+                ('imported_records', models.IntegerField(default=0)),
+                ('skipped_records', models.IntegerField(default=0)),
+                ('donors_created', models.IntegerField(default=0)),
+                ('blood_units_created', models.IntegerField(default=0)),
+                ('sites_created', models.IntegerField(default=0)),
+                ('records_updated', models.IntegerField(default=0)),
+                ('first_collection_date', models.DateField(blank=True, null=True)),
+                ('last_collection_date', models.DateField(blank=True, null=True)),
+                ('total_errors', models.IntegerField(default=0)),
+                ('error_samples', models.JSONField(blank=True, default=list)),
+                ('processing_time', models.FloatField(default=0)),
+                ('started_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Import de données',
+                'verbose_name_plural': 'Imports de données',
+                'db_table': 'data_import',
+                'ordering': ['-started_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.4
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0004_dataimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dataimport',
+            name='file_path',
+            field=models.CharField(blank=True, default='', max_length=255),
+        ),
+        migrations.AddField(
+            model_name='dataimport',
+            name='bytes_processed',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AlterField(
+            model_name='dataimport',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'En attente'), ('Running', 'En cours'), ('Completed', 'Terminé'), ('Failed', 'Échoué')], default='Pending', max_length=20),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.4
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0005_dataimport_async'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='dailydemandstat',
+            name='urgent_approved_requests',
+            field=models.IntegerField(default=0, help_text='Demandes urgentes approuvées ou satisfaites'),
+        ),
+        migrations.CreateModel(
+            name='DailyStatsState',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('backfilled_at', models.DateTimeField()),
+            ],
+            options={
+                'verbose_name': 'État des statistiques journalières',
+                'db_table': 'daily_stats_state',
+            },
+        ),
+    ]
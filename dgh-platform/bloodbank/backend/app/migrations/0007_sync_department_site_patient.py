@@ -0,0 +1,229 @@
+# Generated by Django 5.2.4
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def assign_department_site(apps, schema_editor):
+    """Départements antérieurs au rattachement à un site : premier site existant (créé au besoin)"""
+    Department = apps.get_model('app', 'Department')
+    Site = apps.get_model('app', 'Site')
+    orphans = Department.objects.filter(site__isnull=True)
+    if not orphans.exists():
+        return
+    site = Site.objects.order_by('site_id').first()
+    if site is None:
+        site = Site.objects.create(site_id='SITE_DEFAULT', nom='Site principal', ville='Douala')
+    orphans.update(site=site)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0006_dailystatsstate'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='department',
+            options={'ordering': ['site__nom', 'name'], 'verbose_name': 'Département', 'verbose_name_plural': 'Départements'},
+        ),
+        migrations.AlterModelOptions(
+            name='site',
+            options={'ordering': ['nom'], 'verbose_name': 'Site', 'verbose_name_plural': 'Sites'},
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='bed_capacity',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Nombre de lits'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='blood_type_priority',
+            field=models.JSONField(blank=True, default=list, verbose_name='Groupes sanguins prioritaires'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='current_occupancy',
+            field=models.IntegerField(default=0, verbose_name='Occupation actuelle'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='department_type',
+            field=models.CharField(choices=[('emergency', 'Urgences'), ('surgery', 'Chirurgie'), ('cardiology', 'Cardiologie'), ('oncology', 'Oncologie'), ('pediatrics', 'Pédiatrie'), ('gynecology', 'Gynécologie'), ('orthopedics', 'Orthopédie'), ('neurology', 'Neurologie'), ('internal_medicine', 'Médecine Interne'), ('intensive_care', 'Soins Intensifs'), ('maternity', 'Maternité'), ('general', 'Médecine Générale'), ('laboratory', 'Laboratoire'), ('radiology', 'Radiologie'), ('blood_bank', 'Banque de Sang'), ('other', 'Autre')], default='general', max_length=50, verbose_name='Type de département'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='floor',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='Étage'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='head_of_department',
+            field=models.CharField(blank=True, max_length=200, null=True, verbose_name='Chef de service'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='is_active',
+            field=models.BooleanField(default=True, verbose_name='Actif'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='is_emergency_department',
+            field=models.BooleanField(default=False, verbose_name="Service d'urgence"),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='monthly_blood_usage',
+            field=models.IntegerField(default=0, verbose_name='Consommation mensuelle (unités)'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='phone_extension',
+            field=models.CharField(blank=True, max_length=10, null=True, verbose_name='Extension téléphonique'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='requires_blood_products',
+            field=models.BooleanField(default=True, verbose_name='Nécessite des produits sanguins'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='site',
+            field=models.ForeignKey(db_column='site_id', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='departments', to='app.site', verbose_name='Site'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='staff_count',
+            field=models.IntegerField(default=0, verbose_name='Nombre de personnel'),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='department',
+            name='wing',
+            field=models.CharField(blank=True, max_length=50, null=True, verbose_name='Aile/Secteur'),
+        ),
+        migrations.AddField(
+            model_name='patient',
+            name='gender',
+            field=models.CharField(choices=[('M', 'Masculin'), ('F', 'Féminin')], default='', max_length=2),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='address',
+            field=models.TextField(blank=True, null=True, verbose_name='Adresse'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='blood_bank',
+            field=models.BooleanField(default=False, verbose_name="Dispose d'une banque de sang"),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='capacity',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Capacité totale'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='created_at',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='current_patients',
+            field=models.IntegerField(default=0, verbose_name='Patients actuels'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='email',
+            field=models.EmailField(blank=True, max_length=254, null=True),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='last_request',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Dernière demande'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='manager',
+            field=models.CharField(blank=True, max_length=200, null=True, verbose_name='Responsable'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='phone',
+            field=models.CharField(blank=True, max_length=20, null=True, verbose_name='Téléphone'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='region',
+            field=models.CharField(blank=True, max_length=100, null=True, verbose_name='Région'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='status',
+            field=models.CharField(choices=[('active', 'Actif'), ('maintenance', 'Maintenance'), ('inactive', 'Inactif')], default='active', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='total_requests',
+            field=models.IntegerField(default=0, verbose_name='Total des demandes'),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='type',
+            field=models.CharField(choices=[('hospital', 'Hôpital'), ('clinic', 'Clinique'), ('collection_center', 'Centre de Collecte')], default='hospital', max_length=50),
+        ),
+        migrations.AddField(
+            model_name='site',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='description',
+            field=models.TextField(blank=True, max_length=500, verbose_name='Description'),
+        ),
+        migrations.AlterField(
+            model_name='department',
+            name='name',
+            field=models.CharField(max_length=150, verbose_name='Nom du département'),
+        ),
+        migrations.AlterField(
+            model_name='site',
+            name='nom',
+            field=models.CharField(max_length=200, verbose_name='Nom du site'),
+        ),
+        migrations.AlterField(
+            model_name='site',
+            name='ville',
+            field=models.CharField(max_length=100),
+        ),
+        migrations.RunPython(assign_department_site, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='department',
+            name='site',
+            field=models.ForeignKey(db_column='site_id', on_delete=django.db.models.deletion.CASCADE, related_name='departments', to='app.site', verbose_name='Site'),
+        ),
+        migrations.AddConstraint(
+            model_name='department',
+            constraint=models.UniqueConstraint(fields=('site', 'name'), name='unique_department_per_site'),
+        ),
+    ]
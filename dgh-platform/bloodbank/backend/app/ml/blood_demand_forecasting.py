@@ -68,6 +68,9 @@ except ImportError:
         MODELS_AVAILABLE = False
         logger.warning("⚠️ Django models not available - using synthetic data fallback")
 
+from ..forecasting.history_panel import get_demand_panel
+from ..forecasting.rolling_features import rolling_slope
+
 logger = logging.getLogger(__name__)
 
 
@@ -223,90 +226,15 @@ class EnhancedBloodDemandForecaster:
 
             logger.info(f"📊 Récupération données améliorées pour {blood_type} ({start_date} à {end_date})")
 
-            # Stratégie multi-sources pour maximiser les données
-            all_data = []
-
-            # Source 1: BloodConsumption (consommation réelle)
-            try:
-                consumption_data = BloodConsumption.objects.filter(
-                    unit__donor__blood_type=blood_type,
-                    date__range=[start_date, end_date]
-                ).extra(
-                    select={'day': 'DATE(date)'}
-                ).values('day').annotate(
-                    total_demand=Sum('volume'),
-                    count_units=Count('unit_id')
-                ).order_by('day')
-
-                for record in consumption_data:
-                    demand = record.get('total_demand', 0) or 0
-                    if demand > 100:  # Convertir ml en unités
-                        demand = max(1, int(demand / 450))
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(demand)),
-                        'source': 'consumption'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodConsumption query failed: {e}")
-
-            # Source 2: BloodRequest (demandes approuvées)
-            try:
-                request_data = BloodRequest.objects.filter(
-                    blood_type=blood_type,
-                    request_date__range=[start_date, end_date],
-                    status__in=['Fulfilled', 'Approved', 'Delivered']
-                ).extra(
-                    select={'day': 'DATE(request_date)'}
-                ).values('day').annotate(
-                    total_demand=Sum('quantity'),
-                    urgent_count=Count('request_id', filter=Q(priority='Urgent'))
-                ).order_by('day')
-
-                for record in request_data:
-                    demand = record.get('total_demand', 0) or 0
-                    urgent = record.get('urgent_count', 0) or 0
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(demand)),
-                        'urgent_requests': urgent,
-                        'source': 'requests'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodRequest query failed: {e}")
-
-            # Source 3: BloodUnit status changes (sorties de stock)
-            try:
-                unit_data = BloodUnit.objects.filter(
-                    donor__blood_type=blood_type,
-                    status='Used',
-                    collection_date__range=[start_date, end_date]
-                ).extra(
-                    select={'day': 'DATE(collection_date)'}
-                ).values('day').annotate(
-                    total_units=Count('unit_id'),
-                    total_volume=Sum('volume_ml')
-                ).order_by('day')
-
-                for record in unit_data:
-                    units = record.get('total_units', 0) or 0
-                    all_data.append({
-                        'date': record['day'],
-                        'demand': max(0, int(units)),
-                        'source': 'units'
-                    })
-
-            except Exception as e:
-                logger.warning(f"⚠️ BloodUnit query failed: {e}")
+            # Panel multi-sources partagé par tous les groupes sanguins
+            panel = get_demand_panel(days_back, end_date)
 
-            if not all_data:
+            if not panel.has_data(blood_type):
                 logger.warning(f"❌ Aucune donnée réelle pour {blood_type}")
                 return self.generate_enhanced_synthetic_data(blood_type, days_back)
 
             # Consolider et nettoyer les données
-            df = self._consolidate_multi_source_data(all_data, start_date, end_date, blood_type)
+            df = self._consolidate_multi_source_data(panel, blood_type)
 
             if df is None or len(df) < 30:
                 logger.warning(f"⚠️ Données insuffisantes: {len(df) if df is not None else 0} jours")
@@ -319,60 +247,13 @@ class EnhancedBloodDemandForecaster:
             logger.error(f"❌ Erreur récupération données: {e}")
             return self.generate_enhanced_synthetic_data(blood_type, days_back)
 
-    def _consolidate_multi_source_data(self, all_data, start_date, end_date, blood_type):
+    def _consolidate_multi_source_data(self, panel, blood_type):
         """
         🔄 CONSOLIDATION DES DONNÉES MULTI-SOURCES
         """
         try:
-            if not all_data:
-                return None
-
-            # Créer DataFrame avec toutes les sources
-            df = pd.DataFrame(all_data)
-            df['date'] = pd.to_datetime(df['date'])
-
-            # Grouper par date et prendre la moyenne pondérée
-            daily_data = []
-
-            for date in pd.date_range(start_date, end_date, freq='D'):
-                day_records = df[df['date'].dt.date == date.date()]
-
-                if len(day_records) > 0:
-                    # Moyenne pondérée selon la source
-                    weights = {'consumption': 0.5, 'requests': 0.3, 'units': 0.2}
-                    total_demand = 0
-                    total_weight = 0
-                    urgent_count = 0
-
-                    for _, record in day_records.iterrows():
-                        source = record.get('source', 'unknown')
-                        weight = weights.get(source, 0.1)
-                        demand = record.get('demand', 0)
-
-                        total_demand += demand * weight
-                        total_weight += weight
-                        urgent_count += record.get('urgent_requests', 0)
-
-                    final_demand = int(total_demand / max(total_weight, 0.1)) if total_weight > 0 else 0
-
-                    daily_data.append({
-                        'date': date,
-                        'demand': max(0, final_demand),
-                        'urgent_requests': urgent_count,
-                        'data_sources': len(day_records)
-                    })
-                else:
-                    # Pas de données pour ce jour - interpolation intelligente
-                    daily_data.append({
-                        'date': date,
-                        'demand': 0,  # Sera interpolé plus tard
-                        'urgent_requests': 0,
-                        'data_sources': 0
-                    })
-
-            # Créer le DataFrame final
-            result_df = pd.DataFrame(daily_data)
-            result_df = result_df.set_index('date')
+            # Moyenne pondérée des sources présentes chaque jour (0 si aucune)
+            result_df = panel.daily_demand(blood_type)
 
             # Interpolation intelligente des valeurs manquantes
             result_df = self._smart_interpolation(result_df, blood_type)
@@ -658,11 +539,8 @@ class EnhancedBloodDemandForecaster:
             # Tendances à différentes échelles
             for window in [7, 14, 30]:
                 if len(df) >= window:
-                    df[f'demand_trend_{window}'] = df['demand'].rolling(
-                        window=window, min_periods=max(3, window // 3)
-                    ).apply(
-                        lambda x: np.polyfit(range(len(x)), x, 1)[0] if len(x) > 2 else 0,
-                        raw=False
+                    df[f'demand_trend_{window}'] = rolling_slope(
+                        df['demand'].values, window, min_periods=max(3, window // 3)
                     )
                 else:
                     df[f'demand_trend_{window}'] = 0
@@ -741,7 +619,7 @@ class EnhancedBloodDemandForecaster:
         try:
             # Stock actuel détaillé
             current_stock = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available'
             ).aggregate(
                 total_units=Count('unit_id'),
@@ -766,7 +644,7 @@ class EnhancedBloodDemandForecaster:
             # Consommation récente détaillée
             try:
                 recent_consumption = BloodConsumption.objects.filter(
-                    unit__donor__blood_type=blood_type,
+                    blood_type=blood_type,
                     date__gte=datetime.now() - timedelta(days=30)
                 ).aggregate(
                     total_consumed=Count('unit_id'),
@@ -786,7 +664,7 @@ class EnhancedBloodDemandForecaster:
 
             # Stock des types compatibles
             compatible_stock = BloodUnit.objects.filter(
-                donor__blood_type__in=compatible_types,
+                blood_type__in=compatible_types,
                 status='Available'
             ).aggregate(
                 total_compatible=Count('unit_id')
@@ -3209,7 +3087,7 @@ def get_enhanced_system_stats():
                         if model_name == 'blood_units' and count > 0:
                             blood_type_distribution = {}
                             for bt in forecaster.blood_type_config.keys():
-                                bt_count = BloodUnit.objects.filter(donor__blood_type=bt).count()
+                                bt_count = BloodUnit.objects.filter(blood_type=bt).count()
                                 if bt_count > 0:
                                     blood_type_distribution[bt] = bt_count
                             db_stats['blood_type_distribution'] = blood_type_distribution
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator, MaxValueValidator
 from decimal import Decimal
 
@@ -359,14 +359,21 @@ class BloodUnit(models.Model):
     )
     date_expiration = models.DateField()
     status = models.CharField(max_length=50, choices=STATUS_CHOICES, default='Available')
+    # Copie de donor.blood_type (évite la jointure Donor sur les requêtes de stock)
+    blood_type = models.CharField(max_length=3, choices=Donor.BLOOD_TYPE_CHOICES, editable=False, default='')
 
     class Meta:
         db_table = 'blood_unit'
         verbose_name = 'Unité de sang'
         verbose_name_plural = 'Unités de sang'
+        indexes = [
+            models.Index(fields=['blood_type', 'status'], name='unit_blood_type_status_idx'),
+            models.Index(fields=['status', 'date_expiration'], name='unit_status_expiration_idx'),
+            models.Index(fields=['collection_date', 'date_expiration'], name='unit_collection_expiry_idx'),
+        ]
 
     def __str__(self):
-        return f"Unité {self.unit_id} - {self.donor.blood_type}"
+        return f"Unité {self.unit_id} - {self.blood_type}"
 
     @property
     def is_expired(self):
@@ -374,11 +381,6 @@ class BloodUnit(models.Model):
         from datetime import date
         return date.today() > self.date_expiration
 
-    @property
-    def blood_type(self):
-        """Récupérer le groupe sanguin via le donneur"""
-        return self.donor.blood_type
-
     @property
     def days_until_expiry(self):
         """Nombre de jours avant expiration"""
@@ -387,9 +389,14 @@ class BloodUnit(models.Model):
         return delta.days
 
     def save(self, *args, **kwargs):
-        """Override save pour gérer automatiquement le statut d'expiration"""
+        """Override save pour gérer automatiquement le statut d'expiration et le groupe sanguin"""
         if self.is_expired and self.status == 'Available':
             self.status = 'Expired'
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'donor', 'donor_id'} & set(update_fields):
+            self.blood_type = self.donor.blood_type
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'blood_type'}
         super().save(*args, **kwargs)
 
 
@@ -444,6 +451,8 @@ class BloodConsumption(models.Model):
     patient = models.ForeignKey(Patient, on_delete=models.CASCADE, db_column='patient_id')
     date = models.DateField()
     volume = models.FloatField(validators=[MinValueValidator(0.0)])
+    # Copie de unit.blood_type (évite les jointures BloodUnit → Donor)
+    blood_type = models.CharField(max_length=3, choices=Donor.BLOOD_TYPE_CHOICES, editable=False, default='')
 
     class Meta:
         db_table = 'blood_consumption'
@@ -453,23 +462,25 @@ class BloodConsumption(models.Model):
         constraints = [
             models.UniqueConstraint(fields=['unit'], name='unique_unit_consumption')
         ]
+        indexes = [
+            models.Index(fields=['blood_type', 'date'], name='consumption_bt_date_idx'),
+        ]
 
     def __str__(self):
-        return f"Transfusion {self.unit.unit_id} → {self.patient}"
+        return f"Transfusion {self.unit_id} → {self.patient_id}"
 
     def save(self, *args, **kwargs):
         """Override save pour marquer l'unité comme utilisée"""
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or {'unit', 'unit_id'} & set(update_fields):
+            self.blood_type = self.unit.blood_type
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | {'blood_type'}
         super().save(*args, **kwargs)
-        # Marquer l'unité comme utilisée
-        self.unit.status = 'Used'
-        self.unit.save()
-
-        # Marquer la demande comme satisfaite si toutes les unités sont attribuées
-        request = self.request
-        consumed_quantity = BloodConsumption.objects.filter(request=request).count()
-        if consumed_quantity >= request.quantity:
-            request.status = 'Fulfilled'
-            request.save()
+        # Marquer l'unité comme utilisée (la demande est mise à jour par update_request_status)
+        if self.unit.status != 'Used':
+            self.unit.status = 'Used'
+            self.unit.save(update_fields=['status'])
 
 
 class Prevision(models.Model):
@@ -510,17 +521,185 @@ class Prevision(models.Model):
         return float(self.fiability * 100)
 
 
+class DailyDemandStat(models.Model):
+    """
+    Agrégats journaliers par groupe sanguin, maintenus à l'écriture
+    (signaux) et reconstruits par la commande backfill_daily_stats.
+    Les compteurs d'unités sont rattachés à la date de collecte.
+    """
+    BLOOD_TYPE_CHOICES = [
+        ('A+', 'A+'),
+        ('A-', 'A-'),
+        ('B+', 'B+'),
+        ('B-', 'B-'),
+        ('AB+', 'AB+'),
+        ('AB-', 'AB-'),
+        ('O+', 'O+'),
+        ('O-', 'O-'),
+    ]
+
+    date = models.DateField()
+    blood_type = models.CharField(max_length=3, choices=BLOOD_TYPE_CHOICES)
+
+    # Transfusions du jour
+    consumed_units = models.IntegerField(default=0)
+    consumed_volume = models.FloatField(default=0)
+
+    # Demandes émises ce jour-là
+    requests_count = models.IntegerField(default=0)
+    requested_units = models.IntegerField(default=0)
+    urgent_requests = models.IntegerField(default=0)
+    urgent_approved_requests = models.IntegerField(default=0, help_text="Demandes urgentes approuvées ou satisfaites")
+    approved_units = models.IntegerField(default=0, help_text="Quantité des demandes approuvées ou satisfaites")
+
+    # Unités collectées ce jour-là et leur devenir
+    collected_units = models.IntegerField(default=0)
+    used_units = models.IntegerField(default=0)
+    expired_units = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        db_table = 'daily_demand_stat'
+        verbose_name = 'Statistique journalière'
+        verbose_name_plural = 'Statistiques journalières'
+        ordering = ['-date', 'blood_type']
+        constraints = [
+            models.UniqueConstraint(fields=['date', 'blood_type'], name='unique_daily_stat_per_blood_type')
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.blood_type}: {self.consumed_units} transfusions"
+
+
+class DailyStatsState(models.Model):
+    """
+    Marqueur d'initialisation de DailyDemandStat : ligne unique créée par une
+    reconstruction complète (backfill_daily_stats). Tant qu'il est absent, les
+    agrégats ne sont ni lus ni maintenus.
+    """
+    backfilled_at = models.DateTimeField()
+
+    class Meta:
+        db_table = 'daily_stats_state'
+        verbose_name = 'État des statistiques journalières'
+
+    def __str__(self):
+        return f"DailyDemandStat initialisée le {self.backfilled_at}"
+
+
+class DataImport(models.Model):
+    """Suivi d'un import CSV : point de reprise, compteurs et échantillon d'erreurs"""
+    STATUS_CHOICES = [
+        ('Pending', 'En attente'),
+        ('Running', 'En cours'),
+        ('Completed', 'Terminé'),
+        ('Failed', 'Échoué'),
+    ]
+
+    import_id = models.CharField(max_length=50, primary_key=True)
+    file_name = models.CharField(max_length=255)
+    file_hash = models.CharField(max_length=64, db_index=True, help_text="SHA-256 du fichier (contrôle de reprise)")
+    file_size = models.BigIntegerField(default=0)
+    # Copie du fichier lue par le worker (supprimée une fois l'import terminé)
+    file_path = models.CharField(max_length=255, blank=True, default='')
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='Pending')
+
+    # Lignes de données déjà validées en base : la reprise repart de là
+    rows_processed = models.IntegerField(default=0)
+    bytes_processed = models.BigIntegerField(default=0)
+    imported_records = models.IntegerField(default=0)
+    skipped_records = models.IntegerField(default=0)
+    donors_created = models.IntegerField(default=0)
+    blood_units_created = models.IntegerField(default=0)
+    sites_created = models.IntegerField(default=0)
+    records_updated = models.IntegerField(default=0)
+
+    # Période de collecte couverte (agrégats journaliers à reconstruire)
+    first_collection_date = models.DateField(blank=True, null=True)
+    last_collection_date = models.DateField(blank=True, null=True)
+
+    total_errors = models.IntegerField(default=0)
+    error_samples = models.JSONField(default=list, blank=True)
+    processing_time = models.FloatField(default=0)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        db_table = 'data_import'
+        verbose_name = 'Import de données'
+        verbose_name_plural = 'Imports de données'
+        ordering = ['-started_at']
+
+    def __str__(self):
+        return f"Import {self.import_id} - {self.file_name} ({self.status})"
+
+
 # Signaux pour gérer automatiquement les statuts
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 from django.dispatch import receiver
 
+from . import alerts, daily_stats
+
+
+@receiver(pre_save, sender=BloodUnit)
+@receiver(pre_save, sender=BloodRequest)
+@receiver(pre_save, sender=BloodConsumption)
+def remember_daily_stat_state(sender, instance, update_fields=None, **kwargs):
+    """Mémorise l'état déjà compté dans DailyDemandStat avant la mise à jour"""
+    daily_stats.remember_state(instance, update_fields)
+
 
 @receiver(post_save, sender=BloodUnit)
-def update_expired_units(sender, instance, **kwargs):
-    """Signal pour marquer automatiquement les unités expirées"""
-    if instance.is_expired and instance.status == 'Available':
-        instance.status = 'Expired'
-        instance.save(update_fields=['status'])
+@receiver(post_save, sender=BloodRequest)
+@receiver(post_save, sender=BloodConsumption)
+def update_daily_stats(sender, instance, update_fields=None, **kwargs):
+    """Répercute la modification sur les agrégats journaliers"""
+    daily_stats.apply_change(instance, update_fields)
+
+
+@receiver(post_delete, sender=BloodUnit)
+@receiver(post_delete, sender=BloodRequest)
+@receiver(post_delete, sender=BloodConsumption)
+def remove_daily_stats(sender, instance, **kwargs):
+    """Retire la contribution d'un enregistrement supprimé"""
+    daily_stats.apply_change(instance, deleted=True)
+
+
+@receiver(post_save, sender=BloodUnit)
+@receiver(post_save, sender=BloodRequest)
+def push_alerts_on_save(sender, instance, update_fields=None, **kwargs):
+    """Réévalue les alertes concernées par la modification (après commit)"""
+    alerts.schedule_refresh(instance, update_fields)
+
+
+@receiver(post_delete, sender=BloodUnit)
+@receiver(post_delete, sender=BloodRequest)
+def push_alerts_on_delete(sender, instance, **kwargs):
+    """Réévalue les alertes concernées par la suppression (après commit)"""
+    alerts.schedule_refresh(instance)
+
+
+@receiver(post_save, sender=Donor)
+def sync_denormalized_blood_type(sender, instance, created, **kwargs):
+    """Répercute un changement de groupe sanguin du donneur sur ses unités et transfusions"""
+    if created:
+        return
+    units = BloodUnit.objects.filter(donor=instance).exclude(blood_type=instance.blood_type)
+    first_collection = units.aggregate(first=models.Min('collection_date'))['first']
+    if first_collection is None:
+        return
+    units.update(blood_type=instance.blood_type)
+    BloodConsumption.objects.filter(unit__donor=instance).exclude(
+        blood_type=instance.blood_type
+    ).update(blood_type=instance.blood_type)
+
+    # Les UPDATE ne déclenchent pas de signaux : agrégats et alertes à recalculer
+    if daily_stats.daily_stats_maintained():
+        transaction.on_commit(lambda: daily_stats.rebuild_daily_stats(first_collection))
+    alerts.schedule_refresh(BloodUnit(), ['blood_type'])
 
 
 @receiver(post_save, sender=BloodConsumption)
@@ -0,0 +1,133 @@
+# app/pagination.py
+"""
+Pagination des listes CRUD.
+
+Par défaut, pagination par numéro de page (réponse inchangée : count, next,
+previous, results). Avec ``?pagination=cursor`` ou un ``?cursor=``, pagination
+par curseur (keyset) : la page suivante est filtrée par les valeurs de tri de
+la dernière ligne (``WHERE (tri) < (dernière ligne)``) au lieu d'un OFFSET,
+et sans COUNT(*) sur l'ensemble filtré — le coût d'une page ne dépend ni de
+la taille de la table ni de la profondeur de la page.
+
+Le tri est celui du queryset (``order_by``, sinon ``Meta.ordering``),
+complété par la clé primaire pour être total. Les champs de tri doivent
+être des colonnes non nulles du modèle, présentes dans les lignes quand le
+queryset est un ``.values()``.
+"""
+
+import base64
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_page_size(request)
+        self.ordering = _ordering(queryset)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(_after(queryset.model, self.ordering, _decode_cursor(cursor)))
+
+        rows = list(queryset.order_by(*self.ordering)[:self.limit + 1])
+        self.next_cursor = None
+        if len(rows) > self.limit:
+            rows = rows[:self.limit]
+            self.next_cursor = _encode_cursor([_value(rows[-1], name) for name, _ in self.ordering_fields])
+        return rows
+
+    @property
+    def ordering_fields(self):
+        return [(name.lstrip('-'), name.startswith('-')) for name in self.ordering]
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        return Response({
+            'next': self.get_next_cursor_link(),
+            'next_cursor': self.next_cursor,
+            'page_size': self.limit,
+            'results': data
+        })
+
+    def get_next_cursor_link(self):
+        if not self.next_cursor:
+            return None
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+
+def _ordering(queryset):
+    """Tri du queryset complété par la clé primaire (tri total)"""
+    meta = queryset.model._meta
+    ordering = [
+        name for name in (queryset.query.order_by or meta.ordering)
+        if isinstance(name, str)
+    ]
+    pk_name = meta.pk.name
+    ordering = [name.replace('pk', pk_name) if name.lstrip('-') == 'pk' else name for name in ordering]
+    if pk_name not in [name.lstrip('-') for name in ordering]:
+        descending = ordering[-1].startswith('-') if ordering else False
+        ordering.append(f"-{pk_name}" if descending else pk_name)
+    return ordering
+
+
+def _value(row, name):
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def _after(model, ordering, values):
+    """Lignes strictement après ``values`` dans l'ordre ``ordering``"""
+    if len(values) != len(ordering):
+        raise ValidationError({'cursor': 'Curseur invalide'})
+
+    condition = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field_name = name.lstrip('-')
+        try:
+            value = model._meta.get_field(field_name).to_python(value)
+        except Exception:
+            raise ValidationError({'cursor': 'Curseur invalide'})
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        condition |= equal & Q(**{f'{field_name}__{lookup}': value})
+        equal &= Q(**{field_name: value})
+    return condition
+
+
+def _encode_cursor(position):
+    return base64.urlsafe_b64encode(json.dumps(position, cls=DjangoJSONEncoder).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        raise ValidationError({'cursor': 'Curseur invalide'})
+    if not isinstance(position, list):
+        raise ValidationError({'cursor': 'Curseur invalide'})
+    return position
@@ -1,12 +1,135 @@
 # app/serializers.py
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 from .models import (
     Donor, Site, Department, Patient, BloodRecord,
     BloodUnit, BloodRequest, BloodConsumption, Prevision
 )
+from .transfusions import TransfusionError, record_transfusions
+
+
+# ==================== PRÉCHARGEMENT PAR LOT ====================
+# Les objets liés d'une page ou d'un lot sont chargés en une requête par
+# modèle, avant la sérialisation ou la validation de la première ligne :
+# - lecture : Meta.read_related, passé à prefetch_related_objects ;
+# - écriture : context['prefetched'] = {modèle: {clé: objet}} pour les clés
+#   étrangères, context['existing_keys'] = {modèle: {clé}} pour l'unicité.
+# Hors lot (un seul objet), champs et validateurs interrogent la base comme avant.
+
+def prefetched_objects(context, model):
+    """Objets préchargés du modèle ({clé: objet}) ou None hors lot"""
+    return context.get('prefetched', {}).get(model)
+
+
+class PrefetchedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """Clé étrangère résolue dans les objets préchargés du lot"""
+
+    def to_internal_value(self, data):
+        objects = prefetched_objects(self.context, self.get_queryset().model)
+        if objects is None or isinstance(data, bool):
+            return super().to_internal_value(data)
+        obj = objects.get(str(data))
+        if obj is None:
+            self.fail('does_not_exist', pk_value=data)
+        return obj
+
+
+class PrefetchedUniqueValidator(UniqueValidator):
+    """Unicité vérifiée contre les clés existantes préchargées pour le lot"""
+
+    def __call__(self, value, serializer_field):
+        existing = serializer_field.context.get('existing_keys', {}).get(self.queryset.model)
+        if existing is None:
+            return super().__call__(value, serializer_field)
+        if str(value) in existing:
+            raise serializers.ValidationError(self.message, code='unique')
+
+
+class PrefetchListSerializer(serializers.ListSerializer):
+    """
+    Liste avec préchargement : objets liés de la page (lecture), clés
+    étrangères et clés existantes du lot (écriture), bulk_create si
+    Meta.bulk_create (modèles sans signal à déclencher).
+    """
+
+    def to_representation(self, data):
+        instances = list(data.all() if hasattr(data, 'all') else data)
+        read_related = getattr(self.child.Meta, 'read_related', ())
+        if instances and read_related:
+            prefetch_related_objects(instances, *read_related)
+        return super().to_representation(instances)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            self._context.update(self.prefetch_payload([item for item in data if isinstance(item, dict)]))
+        return super().to_internal_value(data)
+
+    def prefetch_payload(self, items):
+        """Une requête par modèle lié et une pour les clés déjà existantes"""
+        prefetched, existing_keys = {}, {}
+        for name, field in self.child.fields.items():
+            if field.read_only:
+                continue
+            keys = {item[name] for item in items if isinstance(item.get(name), (str, int))}
+            if isinstance(field, PrefetchedPrimaryKeyRelatedField):
+                queryset = field.get_queryset()
+                objects = queryset.in_bulk(keys) if keys else {}
+                prefetched[queryset.model] = {str(pk): obj for pk, obj in objects.items()}
+            elif any(isinstance(validator, PrefetchedUniqueValidator) for validator in field.validators):
+                model = self.child.Meta.model
+                existing = {str(key) for key in model._default_manager.filter(
+                    **{f'{field.source}__in': keys}
+                ).values_list(field.source, flat=True)} if keys else set()
+                # Une clé répétée dans le lot est refusée comme une clé existante
+                values = [str(item[name]) for item in items if isinstance(item.get(name), (str, int))]
+                existing.update(key for key in set(values) if values.count(key) > 1)
+                existing_keys[model] = existing
+        return {'prefetched': prefetched, 'existing_keys': existing_keys}
+
+    def create(self, validated_data):
+        model = self.child.Meta.model
+        if not getattr(self.child.Meta, 'bulk_create', False):
+            with transaction.atomic():
+                return super().create(validated_data)
+        batch_size = getattr(settings, 'BLOOD_BANK_SETTINGS', {}).get('BULK_CREATE', {}).get('BATCH_SIZE', 500)
+        return model._default_manager.bulk_create(
+            [model(**attrs) for attrs in validated_data], batch_size=batch_size
+        )
+
+
+class TransfusionListSerializer(PrefetchListSerializer):
+    """Transfusions en lot : une transaction ensembliste sans save() par ligne"""
+
+    def create(self, validated_data):
+        try:
+            return record_transfusions(BloodConsumption(**attrs) for attrs in validated_data)
+        except TransfusionError as e:
+            raise serializers.ValidationError(
+                [{'unit': [e.errors[index]]} if index in e.errors else {} for index in range(len(validated_data))]
+            )
+
 
+class PrefetchModelSerializer(serializers.ModelSerializer):
+    """ModelSerializer dont les clés étrangères et l'unicité passent par le préchargement"""
+    serializer_related_field = PrefetchedPrimaryKeyRelatedField
 
-class DonorSerializer(serializers.ModelSerializer):
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if 'validators' in field_kwargs:
+            field_kwargs['validators'] = [
+                PrefetchedUniqueValidator(validator.queryset, validator.message, validator.lookup)
+                if type(validator) is UniqueValidator else validator
+                for validator in field_kwargs['validators']
+            ]
+        return field_class, field_kwargs
+
+
+class DonorSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les donneurs"""
     age = serializers.ReadOnlyField()
 
@@ -17,14 +140,18 @@ class DonorSerializer(serializers.ModelSerializer):
             'gender', 'blood_type', 'phone_number', 'age'
         ]
         read_only_fields = ['age']
+        list_serializer_class = PrefetchListSerializer
+        bulk_create = True
 
 
-class SiteSerializer(serializers.ModelSerializer):
+class SiteSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les sites"""
 
     class Meta:
         model = Site
         fields = ['site_id', 'nom', 'ville']
+        list_serializer_class = PrefetchListSerializer
+        bulk_create = True
 
 
 class DepartmentSerializer(serializers.ModelSerializer):
@@ -35,7 +162,7 @@ class DepartmentSerializer(serializers.ModelSerializer):
         fields = ['department_id', 'name', 'description']
 
 
-class PatientSerializer(serializers.ModelSerializer):
+class PatientSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les patients"""
     age = serializers.ReadOnlyField()
 
@@ -46,9 +173,11 @@ class PatientSerializer(serializers.ModelSerializer):
             'blood_type', 'patient_history', 'age'
         ]
         read_only_fields = ['age']
+        list_serializer_class = PrefetchListSerializer
+        bulk_create = True
 
 
-class BloodRecordSerializer(serializers.ModelSerializer):
+class BloodRecordSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les enregistrements de don"""
     site_name = serializers.CharField(source='site.nom', read_only=True)
 
@@ -58,12 +187,14 @@ class BloodRecordSerializer(serializers.ModelSerializer):
             'record_id', 'site', 'site_name', 'screening_results',
             'record_date', 'quantity'
         ]
+        list_serializer_class = PrefetchListSerializer
+        read_related = ('site',)
 
 
-class BloodUnitSerializer(serializers.ModelSerializer):
+class BloodUnitSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les unités de sang"""
     donor_name = serializers.CharField(source='donor.first_name', read_only=True)
-    donor_blood_type = serializers.CharField(source='donor.blood_type', read_only=True)
+    donor_blood_type = serializers.CharField(source='blood_type', read_only=True)
     site_name = serializers.CharField(source='record.site.nom', read_only=True)
     is_expired = serializers.ReadOnlyField()
     days_until_expiry = serializers.ReadOnlyField()
@@ -76,9 +207,11 @@ class BloodUnitSerializer(serializers.ModelSerializer):
             'collection_date', 'volume_ml', 'hemoglobin_g_dl', 'date_expiration',
             'status', 'site_name', 'is_expired', 'days_until_expiry', 'blood_type'
         ]
+        list_serializer_class = PrefetchListSerializer
+        read_related = ('donor', 'record__site')
 
 
-class BloodRequestSerializer(serializers.ModelSerializer):
+class BloodRequestSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les demandes de sang"""
     department_name = serializers.CharField(source='department.name', read_only=True)
     site_name = serializers.CharField(source='site.nom', read_only=True)
@@ -89,14 +222,16 @@ class BloodRequestSerializer(serializers.ModelSerializer):
             'request_id', 'department', 'department_name', 'site', 'site_name',
             'blood_type', 'quantity', 'priority', 'status', 'request_date'
         ]
+        list_serializer_class = PrefetchListSerializer
+        read_related = ('department', 'site')
 
 
-class BloodConsumptionSerializer(serializers.ModelSerializer):
+class BloodConsumptionSerializer(PrefetchModelSerializer):
     """Sérialiseur pour les consommations de sang"""
-    unit_id = serializers.CharField(source='unit.unit_id', read_only=True)
-    unit_blood_type = serializers.CharField(source='unit.donor.blood_type', read_only=True)
+    unit_id = serializers.CharField(read_only=True)
+    unit_blood_type = serializers.CharField(source='blood_type', read_only=True)
     patient_name = serializers.SerializerMethodField()
-    request_id = serializers.CharField(source='request.request_id', read_only=True)
+    request_id = serializers.CharField(read_only=True)
     department_name = serializers.CharField(source='request.department.name', read_only=True)
 
     class Meta:
@@ -106,6 +241,8 @@ class BloodConsumptionSerializer(serializers.ModelSerializer):
             'unit_id', 'unit_blood_type', 'patient_name',
             'request_id', 'department_name'
         ]
+        list_serializer_class = TransfusionListSerializer
+        read_related = ('patient', 'request__department')
 
     def get_patient_name(self, obj):
         """Retourne le nom complet du patient"""
@@ -124,6 +261,92 @@ class PrevisionSerializer(serializers.ModelSerializer):
         ]
 
 
+# ==================== SERIALIZERS DE LISTE (LECTURE) ====================
+# Mêmes clés que les sérialiseurs ci-dessus, calculées depuis des lignes
+# .values() : une seule requête, sans instance de modèle ni champ DRF par colonne.
+
+def _age(birth_date, today):
+    return today.year - birth_date.year - ((today.month, today.day) < (birth_date.month, birth_date.day))
+
+
+class ValuesListSerializer(serializers.BaseSerializer):
+    """
+    Sérialiseur en lecture seule de lignes ``.values()``.
+    ``columns`` : clé de sortie -> colonne lue ; ``extra_values`` : colonnes
+    lues mais non exposées (tri de la pagination par curseur).
+    """
+    columns = {}
+    extra_values = ()
+
+    @classmethod
+    def values(cls, queryset):
+        """Queryset limité aux colonnes nécessaires"""
+        return queryset.values(*dict.fromkeys([*cls.columns.values(), *cls.extra_values]))
+
+    def to_representation(self, row):
+        data = {key: row[column] for key, column in self.columns.items()}
+        self.add_computed(row, data)
+        return data
+
+    def add_computed(self, row, data):
+        """Champs calculés à partir de la ligne"""
+
+
+class DonorListSerializer(ValuesListSerializer):
+    columns = {
+        'donor_id': 'donor_id', 'first_name': 'first_name', 'last_name': 'last_name',
+        'date_of_birth': 'date_of_birth', 'gender': 'gender', 'blood_type': 'blood_type',
+        'phone_number': 'phone_number',
+    }
+
+    def add_computed(self, row, data):
+        data['age'] = _age(row['date_of_birth'], date.today())
+
+
+class PatientListSerializer(ValuesListSerializer):
+    columns = {
+        'patient_id': 'patient_id', 'first_name': 'first_name', 'last_name': 'last_name',
+        'date_of_birth': 'date_of_birth', 'blood_type': 'blood_type', 'patient_history': 'patient_history',
+    }
+
+    def add_computed(self, row, data):
+        data['age'] = _age(row['date_of_birth'], date.today())
+
+
+class BloodUnitListSerializer(ValuesListSerializer):
+    columns = {
+        'unit_id': 'unit_id', 'donor': 'donor_id', 'donor_name': 'donor__first_name',
+        'donor_blood_type': 'blood_type', 'record': 'record_id', 'collection_date': 'collection_date',
+        'volume_ml': 'volume_ml', 'hemoglobin_g_dl': 'hemoglobin_g_dl', 'date_expiration': 'date_expiration',
+        'status': 'status', 'site_name': 'record__site__nom', 'blood_type': 'blood_type',
+    }
+
+    def add_computed(self, row, data):
+        days_until_expiry = (row['date_expiration'] - date.today()).days
+        data['is_expired'] = days_until_expiry < 0
+        data['days_until_expiry'] = days_until_expiry
+
+
+class BloodRequestListSerializer(ValuesListSerializer):
+    columns = {
+        'request_id': 'request_id', 'department': 'department_id', 'department_name': 'department__name',
+        'site': 'site_id', 'site_name': 'site__nom', 'blood_type': 'blood_type', 'quantity': 'quantity',
+        'priority': 'priority', 'status': 'status', 'request_date': 'request_date',
+    }
+
+
+class BloodConsumptionListSerializer(ValuesListSerializer):
+    columns = {
+        'request': 'request_id', 'unit': 'unit_id', 'patient': 'patient_id', 'date': 'date',
+        'volume': 'volume', 'unit_id': 'unit_id', 'unit_blood_type': 'blood_type',
+        'request_id': 'request_id', 'department_name': 'request__department__name',
+    }
+    extra_values = ('id', 'patient__first_name', 'patient__last_name')
+
+    def add_computed(self, row, data):
+        data['patient_name'] = f"{row['patient__first_name']} {row['patient__last_name']}"
+
+
 # ==================== SERIALIZERS AVANCÉS ====================
 
 class BloodUnitDetailSerializer(BloodUnitSerializer):
@@ -305,22 +528,24 @@ class BulkBloodUnitUpdateSerializer(serializers.Serializer):
 
 class BulkRequestFulfillmentSerializer(serializers.Serializer):
     """Sérialiseur pour la satisfaction en lot des demandes"""
-    request_id = serializers.CharField()
+    request_id = PrefetchedPrimaryKeyRelatedField(
+        queryset=BloodRequest.objects.all(),
+        error_messages={'does_not_exist': 'Demande introuvable'}
+    )
     unit_assignments = serializers.ListField(
         child=serializers.DictField(child=serializers.CharField())
     )
 
-    def validate_request_id(self, value):
+    class Meta:
+        list_serializer_class = PrefetchListSerializer
+
+    def validate_request_id(self, request):
         """Valide que la demande existe et est en attente"""
-        try:
-            request = BloodRequest.objects.get(request_id=value)
-            if request.status != 'Pending':
-                raise serializers.ValidationError(
-                    "Cette demande n'est pas en attente"
-                )
-        except BloodRequest.DoesNotExist:
-            raise serializers.ValidationError("Demande introuvable")
-        return value
+        if request.status != 'Pending':
+            raise serializers.ValidationError(
+                "Cette demande n'est pas en attente"
+            )
+        return request.request_id
 # Serializers pour les détails manquants
 class BloodRequestDetailAPIView(serializers.ModelSerializer):
     """Détail d'une demande de sang"""
@@ -0,0 +1,85 @@
+# app/tasks.py
+"""
+Tâches Celery du service bloodbank (planifiées via CELERY_BEAT_SCHEDULE).
+"""
+
+import logging
+
+from celery import shared_task
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(bind=True, max_retries=2)
+def precompute_forecasts(self, blood_types=None, horizons=None):
+    """
+    Précalcule les prévisions de tous les groupes sanguins (cache + table Prevision)
+    """
+    from .forecasting.precompute import precompute_forecasts as run_precompute
+
+    try:
+        summary = run_precompute(blood_types=blood_types, horizons=horizons)
+    except Exception as exc:
+        logger.error(f"❌ Précalcul des prévisions échoué: {exc}")
+        raise self.retry(exc=exc, countdown=300)
+
+    failed = [blood_type for blood_type, result in summary.items() if 'error' in result]
+    logger.info(f"🔮 Prévisions précalculées: {len(summary) - len(failed)}/{len(summary)}")
+    return {'blood_types': len(summary), 'failed': failed}
+
+
+@shared_task(bind=True, max_retries=2)
+def select_arima_orders(self, blood_types=None):
+    """
+    Recherche planifiée de l'ordre ARIMA de chaque groupe sanguin (pool de processus)
+    """
+    from .forecasting.arima_engine import select_arima_orders as run_selection
+
+    try:
+        summary = run_selection(blood_types=blood_types)
+    except Exception as exc:
+        logger.error(f"❌ Sélection des ordres ARIMA échouée: {exc}")
+        raise self.retry(exc=exc, countdown=600)
+
+    failed = [blood_type for blood_type, result in summary.items() if 'error' in result]
+    logger.info(f"📈 Ordres ARIMA sélectionnés: {len(summary) - len(failed)}/{len(summary)}")
+    return {'blood_types': len(summary), 'failed': failed}
+
+
+@shared_task(bind=True, max_retries=2)
+def run_data_import(self, import_id):
+    """
+    Import CSV en arrière-plan ; un nouvel essai reprend au dernier bloc validé.
+    L'import ne passe en 'Failed' (et sa copie n'est supprimée) qu'au dernier essai.
+    """
+    from .data_import import ImportUnavailable, run_stored_import
+
+    try:
+        data_import = run_stored_import(import_id, final=self.request.retries >= self.max_retries)
+    except ImportUnavailable as exc:
+        # Import introuvable, déjà terminé ou traité par un autre worker
+        logger.warning(f"⚠️ Import {import_id} ignoré: {exc}")
+        return {'import_id': import_id, 'error': str(exc)}
+    except Exception as exc:
+        logger.error(f"❌ Import {import_id} échoué: {exc}")
+        raise self.retry(exc=exc, countdown=60)
+
+    logger.info(f"📥 Import {import_id} terminé: {data_import.imported_records} enregistrements")
+    return {'import_id': import_id, 'status': data_import.status, 'rows_processed': data_import.rows_processed}
+
+
+@shared_task(bind=True, max_retries=2)
+def sweep_expired_units(self):
+    """
+    Bascule planifiée des unités périmées en 'Expired' (un UPDATE)
+    """
+    from .expiry import sweep_expired_units as run_sweep
+
+    try:
+        summary = run_sweep()
+    except Exception as exc:
+        logger.error(f"❌ Balayage des unités expirées échoué: {exc}")
+        raise self.retry(exc=exc, countdown=300)
+
+    logger.info(f"⏰ Unités expirées: {summary['expired']}")
+    return summary
@@ -1,3 +1,592 @@
-from django.test import TestCase
+import json
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .daily_stats import APPROVED_STATUSES, daily_stats_ready, mark_daily_stats_ready, rebuild_daily_stats
+from .data_import import run_stored_import, start_import, store_upload
+from .expiry import INVENTORY_CACHE, sweep_expired_units
+from .exports import report_rows
+from .stock_levels import stock_levels
+from .forecasting.history_panel import load_demand_panel
+from .models import (
+    BloodConsumption, BloodRecord, BloodRequest, BloodUnit, DailyDemandStat, DataImport, Department, Donor, Patient,
+    Site
+)
+from . import views
+from .transfusions import TransfusionError, record_transfusions
+from .utils.cache_utils import namespace_version
+from .views import InventoryAnalyticsAPIView
+
+BLOOD_TYPES = ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']
+
+
+def create_inventory(blood_types, units_per_type=3):
+    """Unités, demandes et transfusions récentes pour chaque groupe sanguin"""
+    today = timezone.now().date()
+    site, _ = Site.objects.get_or_create(site_id='S1', defaults={'nom': 'Site test', 'ville': 'Douala'})
+    department, _ = Department.objects.get_or_create(
+        department_id='D1', defaults={'site': site, 'name': 'Urgences', 'department_type': 'emergency'}
+    )
+    record, _ = BloodRecord.objects.get_or_create(
+        record_id='R1',
+        defaults={'site': site, 'screening_results': 'Valid', 'record_date': today, 'quantity': 1}
+    )
+    patient, _ = Patient.objects.get_or_create(
+        patient_id='P1',
+        defaults={'first_name': 'Test', 'last_name': 'Patient', 'date_of_birth': date(1980, 1, 1),
+                  'gender': 'M', 'blood_type': 'O+'}
+    )
+
+    for blood_type in blood_types:
+        donor = Donor.objects.create(
+            donor_id=f'DON_{blood_type}', first_name='Test', last_name=blood_type,
+            date_of_birth=date(1990, 1, 1), gender='F', blood_type=blood_type, phone_number='600000000'
+        )
+        request = BloodRequest.objects.create(
+            request_id=f'REQ_{blood_type}', department=department, site=site, blood_type=blood_type,
+            quantity=1, priority='Urgent', status='Pending', request_date=today - timedelta(days=2)
+        )
+        for index in range(units_per_type):
+            unit = BloodUnit.objects.create(
+                unit_id=f'U_{blood_type}_{index}', donor=donor, record=record,
+                collection_date=today - timedelta(days=5), volume_ml=450,
+                date_expiration=today + timedelta(days=30 + index)
+            )
+            if index == 0:
+                BloodConsumption.objects.create(
+                    request=request, unit=unit, patient=patient, date=today - timedelta(days=1), volume=450
+                )
+
+
+class InventoryAnalyticsQueryCountTests(TestCase):
+    """
+    Les analytics doivent rester en requêtes groupées par groupe sanguin :
+    le nombre de requêtes ne dépend ni du nombre de groupes ni du volume.
+    """
+
+    RAW_QUERIES = 5
+    DAILY_STATS_QUERIES = 6
+
+    def analytics(self, use_daily_stats):
+        view = InventoryAnalyticsAPIView()
+        view.use_daily_stats = use_daily_stats
+        start_date = timezone.now().date() - timedelta(days=30)
+        return lambda: (view.get_utilization_rates(start_date), view.get_performance_metrics(start_date))
+
+    def test_query_count_independent_of_blood_types(self):
+        create_inventory(BLOOD_TYPES[:1])
+        for use_daily_stats, expected in ((False, self.RAW_QUERIES), (True, self.DAILY_STATS_QUERIES)):
+            with self.assertNumQueries(expected):
+                self.analytics(use_daily_stats)()
+
+        create_inventory(BLOOD_TYPES[1:], units_per_type=5)
+        for use_daily_stats, expected in ((False, self.RAW_QUERIES), (True, self.DAILY_STATS_QUERIES)):
+            with self.assertNumQueries(expected):
+                self.analytics(use_daily_stats)()
+
+    def test_grouped_results(self):
+        create_inventory(BLOOD_TYPES)
+        rates, metrics = self.analytics(use_daily_stats=False)()
+        daily_rates, daily_metrics = self.analytics(use_daily_stats=True)()
+
+        self.assertEqual(rates, daily_rates)
+        self.assertEqual(metrics, daily_metrics)
+        for rate in rates:
+            self.assertEqual((rate['collected'], rate['used'], rate['expired']), (3, 1, 0))
+        for stock in metrics['safety_stock_status']:
+            self.assertEqual(stock['current_stock'], 2)
+        self.assertEqual(metrics['total_requests'], len(BLOOD_TYPES))
+        self.assertEqual(metrics['fulfilled_requests'], len(BLOOD_TYPES))
+
+
+class DailyStatsRollupTests(TestCase):
+    """Agrégats DailyDemandStat : état mémorisé, mêmes chiffres que les tables brutes"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_ready_flag_is_cached(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(daily_stats_ready())
+        with self.assertNumQueries(0):
+            self.assertFalse(daily_stats_ready())
+
+        create_inventory(['A+'])
+        rebuild_daily_stats()
+        with self.assertNumQueries(0):
+            self.assertTrue(daily_stats_ready())
+
+    def test_maintained_only_after_full_rebuild(self):
+        today = timezone.now().date()
+        create_inventory(['A+'])
+        # Écritures avant tout backfill : aucune ligne partielle
+        self.assertFalse(DailyDemandStat.objects.exists())
+
+        rebuild_daily_stats(start_date=today - timedelta(days=3))
+        cache.clear()
+        self.assertFalse(daily_stats_ready())
+
+        rebuild_daily_stats()
+        cache.clear()
+        self.assertTrue(daily_stats_ready())
+
+        BloodRequest.objects.create(
+            request_id='REQ_NEW', department_id='D1', site_id='S1', blood_type='A+',
+            quantity=2, priority='Routine', status='Approved', request_date=today
+        )
+        stat = DailyDemandStat.objects.get(date=today, blood_type='A+')
+        self.assertEqual((stat.requests_count, stat.approved_units), (1, 2))
+
+    def test_rollup_matches_raw_tables(self):
+        create_inventory(BLOOD_TYPES[:3])
+        BloodRequest.objects.filter(blood_type__in=BLOOD_TYPES[:2]).update(status='Fulfilled')
+        # Demande urgente non approuvée le même jour qu'une demande satisfaite
+        BloodRequest.objects.create(
+            request_id='REQ_PENDING', department_id='D1', site_id='S1', blood_type='A+', quantity=2,
+            priority='Urgent', status='Pending', request_date=timezone.now().date() - timedelta(days=2)
+        )
+        rebuild_daily_stats()
+        today = timezone.now().date()
+
+        mark_daily_stats_ready(False)
+        raw = load_demand_panel(today - timedelta(days=10), today, BLOOD_TYPES)
+        mark_daily_stats_ready(True)
+        rollup = load_demand_panel(today - timedelta(days=10), today, BLOOD_TYPES)
+
+        self.assertTrue(raw.present.any())
+        self.assertTrue((raw.values == rollup.values).all())
+        self.assertTrue((raw.present == rollup.present).all())
+        self.assertTrue((raw.urgent == rollup.urgent).all())
+        # La demande urgente en attente n'est comptée par aucun des deux chemins
+        approved_urgent = BloodRequest.objects.filter(priority='Urgent', status__in=APPROVED_STATUSES).count()
+        self.assertEqual(rollup.urgent.sum(), approved_urgent)
+
+
+class StockLevelsTests(TestCase):
+    """Somme cumulée des événements : mêmes stocks qu'un COUNT par jour et par groupe"""
+
+    def count_per_day(self, start_date, days, statuses=None):
+        """Calcul d'origine : un COUNT par jour et par groupe sanguin"""
+        series = []
+        for offset in range(days):
+            check_date = start_date + timedelta(days=offset)
+            units = BloodUnit.objects.filter(collection_date__lte=check_date, date_expiration__gt=check_date)
+            if statuses:
+                units = units.filter(status__in=statuses)
+            stocks = {blood_type: units.filter(blood_type=blood_type).count() for blood_type in BLOOD_TYPES}
+            series.append({'date': check_date.isoformat(), 'stocks': stocks, 'total': sum(stocks.values())})
+        return series
+
+    def test_matches_count_per_day(self):
+        create_inventory(['A+', 'O-'])
+        today = timezone.now().date()
+        donor, record = Donor.objects.get(donor_id='DON_A+'), BloodRecord.objects.get(record_id='R1')
+        # Collectées avant la période, expirées pendant, le jour même ou après
+        for index, (collected, expires, unit_status) in enumerate([
+            (-40, -25, 'Expired'), (-30, -10, 'Available'), (-12, -12, 'Available'),
+            (-8, 2, 'Available'), (0, 35, 'Available'), (-20, -1, 'Expired'),
+        ]):
+            BloodUnit.objects.create(
+                unit_id=f'S_{index}', donor=donor, record=record, volume_ml=450,
+                collection_date=today + timedelta(days=collected),
+                date_expiration=today + timedelta(days=expires), status=unit_status
+            )
+
+        start_date = today - timedelta(days=29)
+        self.assertEqual(stock_levels(start_date, today), self.count_per_day(start_date, 30))
+        self.assertEqual(
+            stock_levels(start_date, today, statuses=['Available', 'Used']),
+            self.count_per_day(start_date, 30, statuses=['Available', 'Used'])
+        )
+        self.assertEqual(
+            stock_levels(start_date, today, step=3),
+            self.count_per_day(start_date, 30)[::3]
+        )
+        with self.assertNumQueries(1):
+            stock_levels(today - timedelta(days=364), today)
+
+
+def data_import_settings(**overrides):
+    blood_bank = dict(settings.BLOOD_BANK_SETTINGS)
+    blood_bank['DATA_IMPORT'] = {**blood_bank['DATA_IMPORT'], **overrides}
+    return override_settings(BLOOD_BANK_SETTINGS=blood_bank)
+
+
+class DataValidationTests(TestCase):
+    """Validation avant import : taille maximale configurée, en-têtes et échantillon seulement"""
+
+    HEADER = 'record_id,donor_id,blood_type,donation_date,collection_volume_ml\n'
+
+    def upload(self, rows):
+        content = self.HEADER + ''.join(
+            f'BB{index:06d},D{index:06d},O+,2024-01-15,450\n' for index in range(rows)
+        )
+        csv_file = SimpleUploadedFile('units.csv', content.encode(), content_type='text/csv')
+        return self.client.post(reverse('data_validation'), {'csv_file': csv_file}).json()
+
+    def test_reads_only_a_sample(self):
+        create_inventory(['A+'])
+        BloodUnit.objects.filter(unit_id='U_A+_1').update(unit_id='BB000001')
+
+        with data_import_settings(VALIDATION_SAMPLE_ROWS=3):
+            result = self.upload(10)
+        self.assertTrue(result['valid'])
+        self.assertEqual((result['total_rows'], result['valid_rows'], result['sampled']), (3, 3, True))
+        self.assertEqual(len([w for w in result['warnings'] if 'BB000001' in w]), 1)
+
+        with data_import_settings(VALIDATION_SAMPLE_ROWS=3):
+            self.assertFalse(self.upload(3)['sampled'])
+
+    def test_size_limit_follows_settings(self):
+        with data_import_settings(MAX_FILE_SIZE=100):
+            result = self.upload(10)
+        self.assertFalse(result['valid'])
+        self.assertIn('Fichier trop volumineux', result['errors'][0])
+
+        self.assertGreater(settings.BLOOD_BANK_SETTINGS['DATA_IMPORT']['MAX_FILE_SIZE'], 10 * 1024 * 1024)
+        self.assertTrue(self.upload(10)['valid'])
+
+
+class BackgroundImportTests(TestCase):
+    """Imports Celery : 'Failed' seulement au dernier essai, copie stockée supprimée alors"""
+
+    def stored_import(self):
+        csv_file = SimpleUploadedFile('units.csv', DataValidationTests.HEADER.encode() + b'BB1,D1,O+,2024-01-15,450\n')
+        data_import = start_import(csv_file)
+        name = store_upload(data_import, csv_file)
+        self.addCleanup(default_storage.delete, name)
+        return data_import
+
+    @mock.patch('app.data_import.import_chunk', side_effect=RuntimeError('database gone'))
+    def test_failed_only_after_last_retry(self, import_chunk):
+        data_import = self.stored_import()
+
+        with self.assertRaises(RuntimeError):
+            run_stored_import(data_import.pk, final=False)
+        data_import.refresh_from_db()
+        self.assertEqual(data_import.status, 'Pending')
+        self.assertTrue(default_storage.exists(data_import.file_path))
+
+        with self.assertRaises(RuntimeError):
+            run_stored_import(data_import.pk, final=True)
+        stored_path = DataImport.objects.filter(pk=data_import.pk).values_list('file_path', flat=True).get()
+        data_import.refresh_from_db()
+        self.assertEqual((data_import.status, stored_path), ('Failed', ''))
+        self.assertFalse(default_storage.exists(f'imports/{data_import.pk}.csv'))
+
+    @mock.patch('app.views.run_data_import')
+    def test_inline_unless_async_enabled(self, run_data_import):
+        self.assertFalse(settings.BLOOD_BANK_SETTINGS['DATA_IMPORT']['ASYNC'])
+        csv_file = SimpleUploadedFile('units.csv', DataValidationTests.HEADER.encode() + b'BB1,D1,O+,2024-01-15,450\n')
+        response = self.client.post(reverse('data_import'), {'csv_file': csv_file})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['status'], 'Completed')
+        run_data_import.delay.assert_not_called()
+
+    def test_history_rejects_invalid_dates(self):
+        self.assertEqual(self.client.get(reverse('import_history'), {'date_from': '2024-13-01'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('import_history'), {'date_to': 'hier'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('import_history'), {'date_from': '2024-01-01'}).status_code, 200)
+
+
+class SmartForecastTests(TestCase):
+    """Méthode auto : lecture des prévisions précalculées, jamais d'entraînement pendant la requête"""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_miss_is_not_computed(self):
+        generate = mock.Mock()
+        with mock.patch.dict(views.FORECASTING_SYSTEM, {'available': True, 'generate_forecast_api': generate}):
+            response = self.client.get(reverse('forecast_main'), {'blood_type': 'A+', 'days': 7})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['method_used'], 'not_precomputed')
+        generate.assert_not_called()
+
+
+class DonorReportTests(TestCase):
+    """Rapport des donneurs filtré par dates : dons comptés une fois, dans la période"""
+
+    def test_donations_counted_within_range(self):
+        create_inventory(['A+', 'B+'])
+        today = timezone.now().date()
+        donor, record = Donor.objects.get(donor_id='DON_A+'), BloodRecord.objects.get(record_id='R1')
+        for index, days_ago in enumerate([20, 12, 9, 1]):
+            BloodUnit.objects.create(
+                unit_id=f'DR_{index}', donor=donor, record=record, volume_ml=450,
+                collection_date=today - timedelta(days=days_ago),
+                date_expiration=today + timedelta(days=30)
+            )
+
+        date_from, date_to = today - timedelta(days=15), today - timedelta(days=3)
+        rows = [row for chunk in report_rows('donors', date_from, date_to) for row in chunk]
+        # DON_A+ : dons à J-12, J-9 et J-5 (create_inventory, 3 unités) ; DON_B+ : J-5 (3 unités)
+        self.assertEqual(
+            [(row[0], row[6], row[7]) for row in rows],
+            [('DON_A+', 5, today - timedelta(days=5)), ('DON_B+', 3, today - timedelta(days=5))]
+        )
+
+        rows = [row for chunk in report_rows('donors', date_from=today - timedelta(days=15)) for row in chunk]
+        self.assertEqual([(row[0], row[6], row[7]) for row in rows][0], ('DON_A+', 6, today - timedelta(days=1)))
+
+
+class EndpointQueryCountTests(TestCase):
+    """
+    Listes et créations en lot : le nombre de requêtes ne dépend pas du nombre
+    de lignes de la page ou du lot (objets liés et clés préchargés par lot).
+    """
+
+    LIST_ENDPOINTS = [
+        'blood_units_list', 'blood_requests_list_create', 'blood_consumptions_list_create',
+        'donors_list_create', 'patients_list_create', 'sites_list_create',
+    ]
+
+    # Requêtes par ligne propres à l'écriture (save() et signaux des modèles),
+    # hors lectures du sérialiseur ; 0 pour les modèles créés par bulk_create
+    WRITE_QUERIES_PER_ROW = {
+        'donors_list_create': 0,
+        'patients_list_create': 0,
+        'sites_list_create': 0,
+        # INSERT + agrégat journalier (SELECT, UPDATE)
+        'blood_requests_list_create': 3,
+        # record_transfusions : UPDATE ensemblistes
+        'blood_consumptions_list_create': 0,
+    }
+
+    def setUp(self):
+        cache.clear()
+
+    def count_queries(self, method, url_name, data=None, expected_status=200):
+        url = reverse(url_name)
+        with CaptureQueriesContext(connection) as context:
+            if method == 'get':
+                response = self.client.get(url, data, HTTP_ACCEPT='application/json')
+            else:
+                response = self.client.post(url, json.dumps(data), content_type='application/json',
+                                            HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, expected_status, response.content[:500])
+        return len(context), response.json()
+
+    def list_query_counts(self):
+        counts = {}
+        for url_name in self.LIST_ENDPOINTS:
+            for params in ({'page_size': 100}, {'page_size': 100, 'pagination': 'cursor'}):
+                counts[url_name, params.get('pagination', 'page')], _ = self.count_queries('get', url_name, params)
+        return counts
+
+    def test_list_endpoints_query_count_independent_of_rows(self):
+        create_inventory(BLOOD_TYPES[:1], units_per_type=1)
+        small = self.list_query_counts()
+
+        create_inventory(BLOOD_TYPES[1:], units_per_type=6)
+        large = self.list_query_counts()
+
+        self.assertEqual(small, large)
+        for (url_name, mode), count in large.items():
+            # count + page en pagination par page, une requête en pagination par curseur
+            self.assertLessEqual(count, 2 if mode == 'page' else 1, (url_name, mode))
+
+    def bulk_payloads(self, url_name, size, offset):
+        today = timezone.now().date().isoformat()
+        if url_name == 'donors_list_create':
+            return [{'donor_id': f'BD{offset + n}', 'first_name': 'Bulk', 'last_name': str(n),
+                     'date_of_birth': '1990-01-01', 'gender': 'M', 'blood_type': 'A+',
+                     'phone_number': '600000000'} for n in range(size)]
+        if url_name == 'patients_list_create':
+            return [{'patient_id': f'BP{offset + n}', 'first_name': 'Bulk', 'last_name': str(n),
+                     'date_of_birth': '1980-01-01', 'blood_type': 'O+'} for n in range(size)]
+        if url_name == 'sites_list_create':
+            return [{'site_id': f'BS{offset + n}', 'nom': f'Site {offset + n}', 'ville': 'Douala'}
+                    for n in range(size)]
+        if url_name == 'blood_requests_list_create':
+            return [{'request_id': f'BR{offset + n}', 'department': 'D1', 'site': 'S1', 'blood_type': 'A+',
+                     'quantity': 1, 'priority': 'Routine', 'request_date': today} for n in range(size)]
+        units = list(
+            BloodUnit.objects.filter(status='Available').values_list('unit_id', flat=True)
+            .order_by('unit_id')[offset:offset + size]
+        )
+        return [{'request': 'REQ_A+', 'unit': unit_id, 'patient': 'P1', 'date': today, 'volume': 450}
+                for unit_id in units]
+
+    def test_bulk_create_query_count_independent_of_rows(self):
+        create_inventory(BLOOD_TYPES[:1], units_per_type=20)
+        for url_name, per_row in self.WRITE_QUERIES_PER_ROW.items():
+            # Premier lot hors mesure : crée les agrégats journaliers du jour
+            self.count_queries('post', url_name, self.bulk_payloads(url_name, 1, 0), 201)
+            one, created = self.count_queries('post', url_name, self.bulk_payloads(url_name, 1, 1), 201)
+            self.assertEqual(len(created), 1)
+            six, created = self.count_queries('post', url_name, self.bulk_payloads(url_name, 6, 2), 201)
+            self.assertEqual(len(created), 6)
+            self.assertEqual(six - one, 5 * per_row, url_name)
+
+    def test_bulk_create_rejects_existing_and_repeated_keys(self):
+        create_inventory(BLOOD_TYPES[:1])
+        payload = self.bulk_payloads('donors_list_create', 2, 0)
+        payload += [dict(payload[0]), {**payload[1], 'donor_id': 'DON_A+'}]
+        payload.append({**self.bulk_payloads('donors_list_create', 1, 10)[0], 'blood_type': 'XX'})
+
+        _, errors = self.count_queries('post', 'donors_list_create', payload, 400)
+
+        self.assertIn('donor_id', errors[0])
+        self.assertEqual(errors[1], {})
+        self.assertIn('donor_id', errors[2])
+        self.assertIn('donor_id', errors[3])
+        self.assertIn('blood_type', errors[4])
+        self.assertFalse(Donor.objects.filter(donor_id__startswith='BD').exists())
+
+    def test_bulk_create_reports_missing_related_objects(self):
+        create_inventory(BLOOD_TYPES[:1])
+        payload = self.bulk_payloads('blood_requests_list_create', 2, 0)
+        payload[1]['department'] = 'UNKNOWN'
+
+        _, errors = self.count_queries('post', 'blood_requests_list_create', payload, 400)
+
+        self.assertEqual(errors[0], {})
+        self.assertIn('department', errors[1])
+        self.assertFalse(BloodRequest.objects.filter(request_id__startswith='BR').exists())
+
+
+class RecordTransfusionsTests(TestCase):
+    """Transfusions en lot : mêmes effets que save() par ligne, en requêtes ensemblistes"""
+
+    def setUp(self):
+        create_inventory(['A+'], units_per_type=5)
+        self.request = BloodRequest.objects.get(request_id='REQ_A+')
+        self.request.quantity = 3
+        self.request.save()
+        rebuild_daily_stats()
+        self.today = timezone.now().date()
+
+    def transfusions(self, unit_ids):
+        return [
+            BloodConsumption(request_id='REQ_A+', unit_id=unit_id, patient_id='P1', date=self.today, volume=450)
+            for unit_id in unit_ids
+        ]
+
+    def test_updates_units_requests_and_daily_stats(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            created = record_transfusions(self.transfusions(['U_A+_1', 'U_A+_2']))
+
+        self.assertEqual(len(created), 2)
+        self.assertEqual({consumption.blood_type for consumption in created}, {'A+'})
+        self.assertEqual(BloodUnit.objects.filter(status='Used').count(), 3)
+        self.assertEqual(BloodRequest.objects.get(request_id='REQ_A+').status, 'Fulfilled')
+
+        stats = {
+            (stat.date, stat.blood_type): (stat.used_units, stat.consumed_units)
+            for stat in DailyDemandStat.objects.all()
+        }
+        rebuild_daily_stats()
+        rebuilt = {
+            (stat.date, stat.blood_type): (stat.used_units, stat.consumed_units)
+            for stat in DailyDemandStat.objects.all()
+        }
+        self.assertEqual(stats, rebuilt)
+        self.assertEqual(stats[self.today, 'A+'], (0, 2))
+
+    def test_rejects_unavailable_and_repeated_units_without_writing(self):
+        with self.assertRaises(TransfusionError) as context:
+            record_transfusions(self.transfusions(['U_A+_0', 'U_A+_1', 'U_A+_1', 'UNKNOWN']))
+
+        self.assertEqual(sorted(context.exception.errors), [0, 2, 3])
+        self.assertEqual(BloodConsumption.objects.count(), 1)
+        self.assertEqual(BloodUnit.objects.filter(status='Used').count(), 1)
+
+
+class ExpirySweepTests(TestCase):
+    """Balayage des unités périmées : un UPDATE, agrégats et cache mis à jour"""
+
+    def test_sweep_expires_stale_units(self):
+        create_inventory(['A+', 'B+'])
+        today = timezone.now().date()
+        # Unités créées en masse (sans save()) et restées 'Available' après expiration
+        BloodUnit.objects.filter(unit_id__in=['U_A+_1', 'U_A+_2', 'U_B+_1']).update(
+            date_expiration=today - timedelta(days=1)
+        )
+        rebuild_daily_stats()
+        version = namespace_version(INVENTORY_CACHE)
+
+        self.assertEqual(sweep_expired_units(dry_run=True)['expired'], 3)
+        self.assertEqual(BloodUnit.objects.filter(status='Expired').count(), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            # SAVEPOINT, lecture groupée, UPDATE, RELEASE
+            with self.assertNumQueries(4):
+                summary = sweep_expired_units()
+
+        self.assertEqual(summary['expired'], 3)
+        self.assertEqual(summary['by_blood_type'], {'A+': 2, 'B+': 1})
+        self.assertEqual(BloodUnit.objects.filter(status='Expired').count(), 3)
+        self.assertEqual(BloodUnit.objects.get(unit_id='U_A+_0').status, 'Used')
+        self.assertEqual(DailyDemandStat.objects.get(date=today - timedelta(days=5), blood_type='A+').expired_units, 2)
+        self.assertGreater(namespace_version(INVENTORY_CACHE), version)
+        self.assertEqual(sweep_expired_units()['expired'], 0)
+
+
+class MigrationTests(TransactionTestCase):
+    """Migrations de données appliquées sur des lignes existantes"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([('app', target)])
+        return executor.loader.project_state([('app', target)]).apps
+
+    def tearDown(self):
+        # Schéma complet pour les tests suivants
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes('app'))
+
+    def test_blood_type_backfill(self):
+        apps = self.migrate('0002_dailydemandstat')
+        Site = apps.get_model('app', 'Site')
+        site = Site.objects.create(site_id='S1', nom='Site', ville='Douala')
+        department = apps.get_model('app', 'Department').objects.create(department_id='D1', name='Urgences')
+        donor = apps.get_model('app', 'Donor').objects.create(
+            donor_id='DON1', first_name='A', last_name='B', date_of_birth=date(1990, 1, 1),
+            gender='F', blood_type='AB-', phone_number='600000000'
+        )
+        record = apps.get_model('app', 'BloodRecord').objects.create(
+            record_id='R1', site=site, screening_results='Valid', record_date=date(2024, 1, 1), quantity=1
+        )
+        unit = apps.get_model('app', 'BloodUnit').objects.create(
+            unit_id='U1', donor=donor, record=record, collection_date=date(2024, 1, 1),
+            volume_ml=450, date_expiration=date(2024, 2, 1)
+        )
+        request = apps.get_model('app', 'BloodRequest').objects.create(
+            request_id='REQ1', department=department, site=site, blood_type='AB-',
+            quantity=1, request_date=date(2024, 1, 2)
+        )
+        patient = apps.get_model('app', 'Patient').objects.create(
+            patient_id='P1', first_name='C', last_name='D', date_of_birth=date(1980, 1, 1), blood_type='AB-'
+        )
+        apps.get_model('app', 'BloodConsumption').objects.create(
+            request=request, unit=unit, patient=patient, date=date(2024, 1, 3), volume=450
+        )
+
+        apps = self.migrate('0003_denormalized_blood_type')
+
+        self.assertEqual(apps.get_model('app', 'BloodUnit').objects.get().blood_type, 'AB-')
+        self.assertEqual(apps.get_model('app', 'BloodConsumption').objects.get().blood_type, 'AB-')
+
+    def test_existing_departments_get_a_site(self):
+        apps = self.migrate('0006_dailystatsstate')
+        apps.get_model('app', 'Department').objects.create(department_id='D1', name='Urgences')
+
+        apps = self.migrate('0007_sync_department_site_patient')
+
+        department = apps.get_model('app', 'Department').objects.get()
+        self.assertEqual(department.site_id, 'SITE_DEFAULT')
@@ -0,0 +1,111 @@
+# app/transfusions.py
+"""
+Enregistrement de transfusions en lot.
+
+Par transfusion, BloodConsumption.save() marque l'unité 'Used' puis le
+signal update_request_status recompte les transfusions de la demande :
+plusieurs requêtes (et leurs agrégats) par ligne. Ici un lot entier tient
+en quelques requêtes ensemblistes, dans une transaction :
+
+- unités verrouillées et vérifiées en une requête (disponibles, non transfusées) ;
+- bulk_create des transfusions, groupe sanguin recopié de l'unité ;
+- un UPDATE des unités -> 'Used' ;
+- un UPDATE des demandes dont le nombre de transfusions atteint la quantité -> 'Fulfilled'.
+
+bulk_create et update() ne déclenchent pas de signaux : les agrégats
+journaliers de la période touchée et les alertes sont recalculés après
+commit, sauf ``refresh=False`` (générateur, qui reconstruit tout à la fin).
+"""
+
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count
+
+from . import alerts, daily_stats
+from .models import BloodConsumption, BloodRequest, BloodUnit
+
+logger = logging.getLogger(__name__)
+
+
+class TransfusionError(ValueError):
+    """Lot refusé : ``errors`` = {index dans le lot: message}"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__(f"{len(errors)} transfusion(s) refusée(s)")
+
+
+def record_transfusions(consumptions, refresh=True):
+    """
+    Enregistre des BloodConsumption non sauvegardées (request, unit, patient,
+    date, volume) et retourne la liste créée. Lève TransfusionError, sans
+    rien écrire, si une unité est introuvable, indisponible, déjà transfusée
+    ou répétée dans le lot.
+    """
+    consumptions = list(consumptions)
+    if not consumptions:
+        return []
+    batch_size = getattr(settings, 'BLOOD_BANK_SETTINGS', {}).get('BULK_CREATE', {}).get('BATCH_SIZE', 500)
+    unit_ids = [consumption.unit_id for consumption in consumptions]
+
+    with transaction.atomic():
+        units = {
+            unit_id: (blood_type, collection_date)
+            for unit_id, blood_type, collection_date in BloodUnit.objects.select_for_update().filter(
+                unit_id__in=unit_ids, status='Available'
+            ).values_list('unit_id', 'blood_type', 'collection_date')
+        }
+        transfused = set(
+            BloodConsumption.objects.filter(unit_id__in=unit_ids).values_list('unit_id', flat=True)
+        )
+
+        errors, seen = {}, set()
+        for index, consumption in enumerate(consumptions):
+            if consumption.unit_id in seen:
+                errors[index] = f"Unité {consumption.unit_id} répétée dans le lot"
+            elif consumption.unit_id not in units or consumption.unit_id in transfused:
+                errors[index] = f"Unité {consumption.unit_id} non disponible"
+            else:
+                consumption.blood_type = units[consumption.unit_id][0]
+            seen.add(consumption.unit_id)
+        if errors:
+            raise TransfusionError(errors)
+
+        created = BloodConsumption.objects.bulk_create(consumptions, batch_size=batch_size)
+        BloodUnit.objects.filter(unit_id__in=unit_ids).update(status='Used')
+
+        requests = BloodRequest.objects.filter(
+            request_id__in={consumption.request_id for consumption in consumptions}
+        ).annotate(consumed=Count('bloodconsumption')).values_list(
+            'request_id', 'request_date', 'quantity', 'status', 'consumed'
+        )
+        fulfilled, request_dates = [], []
+        for request_id, request_date, quantity, status, consumed in requests:
+            request_dates.append(request_date)
+            if consumed >= quantity and status != 'Fulfilled':
+                fulfilled.append(request_id)
+        if fulfilled:
+            BloodRequest.objects.filter(request_id__in=fulfilled).update(status='Fulfilled')
+
+        if refresh:
+            # Agrégats touchés : unités (date de collecte), demandes et transfusions
+            dates = [collection_date for _, collection_date in units.values()]
+            dates += request_dates + [consumption.date for consumption in consumptions]
+            start, end = min(dates), max(dates)
+            transaction.on_commit(lambda: _refresh_derived_data(start, end))
+
+    logger.info(f"Transfusions recorded: {len(created)} (requests fulfilled: {len(fulfilled)})")
+    return created
+
+
+def _refresh_derived_data(start_date, end_date):
+    """Agrégats journaliers de la période et alertes, après commit"""
+    try:
+        # Table non initialisée : le backfill complet reste à faire (backfill_daily_stats)
+        if daily_stats.daily_stats_maintained():
+            daily_stats.rebuild_daily_stats(start_date, end_date)
+    except Exception as e:
+        logger.warning(f"Daily stats rebuild failed after transfusions: {e}")
+    alerts.refresh_alerts()
@@ -46,6 +46,8 @@ urlpatterns = [
     path('requests/', views.BloodRequestListCreateAPIView.as_view(), name='blood_requests_list_create'),
     path('requests/<str:request_id>/', views.BloodRequestDetailAPIView.as_view(), name='blood_request_detail'),
 
+    path('consumptions/', views.BloodConsumptionListCreateAPIView.as_view(), name='blood_consumptions_list_create'),
+
     # ==================== REPORTS ====================
     path('reports/export/', views.ReportExportAPIView.as_view(), name='report_export'),
 
@@ -58,6 +60,7 @@ urlpatterns = [
     path('data/validate/', DataValidationAPIView.as_view(), name='data_validation'),
     path('data/template/', views.download_csv_template, name='csv_template'),
     path('data/imports/history/', ImportHistoryAPIView.as_view(), name='import_history'),
+    path('data/imports/history/<str:import_id>/', ImportHistoryAPIView.as_view(), name='import_detail'),
 ]
 
 # Dans urls.py - Ajouter ces routes de debug
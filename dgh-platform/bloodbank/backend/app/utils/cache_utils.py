@@ -1,7 +1,10 @@
 # Ajoutez ce fichier : app/utils/cache_utils.py
 
 import logging
+import math
+import random
 import time
+import uuid
 from django.core.cache import cache
 from django.conf import settings
 from functools import wraps
@@ -48,6 +51,216 @@ def cache_key_builder(*parts):
     return f"bloodbank:{''.join(str(p) for p in parts)}"
 
 
+# ==================== INVALIDATION PAR ESPACE DE NOMS ====================
+# Les entrées paramétrées (période, date de début...) ne se suppriment pas
+# une à une sans parcourir les clés : leur clé inclut la version de leur
+# espace de noms, et invalidate_namespace() incrémente cette version. Les
+# anciennes entrées ne sont plus lues et expirent d'elles-mêmes.
+
+def _namespace_version_key(namespace):
+    return cache_key_builder('ns_version:', namespace)
+
+
+def namespace_version(namespace):
+    """Version courante de l'espace de noms (1 si jamais invalidé)"""
+    try:
+        return cache.get(_namespace_version_key(namespace)) or 1
+    except Exception as e:
+        logger.warning(f"Cache namespace version unavailable for {namespace}: {e}")
+        return 1
+
+
+def versioned_key_builder(namespace, *parts):
+    """Clé de cache invalidée en bloc par invalidate_namespace(namespace)"""
+    return cache_key_builder(namespace, ':v', namespace_version(namespace), ':', *parts)
+
+
+@safe_cache_operation
+def invalidate_namespace(namespace):
+    """Invalide toutes les entrées de l'espace de noms ; retourne la nouvelle version"""
+    key = _namespace_version_key(namespace)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        # Version absente (1 implicite) : passage à 2
+        if cache.add(key, 2, None):
+            return 2
+        return cache.incr(key)
+
+
+# ==================== PROTECTION CONTRE LES RECALCULS SIMULTANÉS ====================
+# Chaque entrée est stockée avec une échéance "souple" (timeout) et une durée de
+# vie réelle plus longue (timeout × STALE_FACTOR). Après l'échéance souple, un
+# seul worker (verrou SETNX via cache.add) recalcule pendant que les autres
+# servent la valeur périmée. L'expiration anticipée probabiliste (XFetch)
+# déclenche le recalcul un peu avant l'échéance, d'autant plus tôt que le
+# calcul est long.
+
+_ENVELOPE_MARKER = '_swr_envelope'
+_STATS_PREFIX = 'cache_stats'
+_STATS_EVENTS = ('hit', 'stale', 'miss', 'refresh', 'wait')
+_known_stat_names = set()
+
+
+def _refresh_config():
+    return getattr(settings, 'CACHE_REFRESH_CONFIG', {})
+
+
+def record_cache_event(name, event):
+    """Incrémente le compteur hit/stale/miss/refresh/wait d'une entrée de cache"""
+    if not _refresh_config().get('STATS_ENABLED', True):
+        return
+    try:
+        key = cache_key_builder(_STATS_PREFIX, ':', name, ':', event)
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Compteur absent : création (sans expiration)
+            if not cache.add(key, 1, None):
+                cache.incr(key)
+
+        if name not in _known_stat_names:
+            _known_stat_names.add(name)
+            names_key = cache_key_builder(_STATS_PREFIX, ':names')
+            names = set(cache.get(names_key) or [])
+            if name not in names:
+                cache.set(names_key, sorted(names | {name}), None)
+    except Exception as e:
+        logger.debug(f"Cache stats update failed: {e}")
+
+
+def get_cache_stats(names=None):
+    """Compteurs par entrée : {nom: {hit, stale, miss, refresh, wait, hit_ratio}}"""
+    try:
+        names = names or cache.get(cache_key_builder(_STATS_PREFIX, ':names')) or []
+        keys = {
+            (name, event): cache_key_builder(_STATS_PREFIX, ':', name, ':', event)
+            for name in names for event in _STATS_EVENTS
+        }
+        values = cache.get_many(list(keys.values()))
+    except Exception as e:
+        logger.warning(f"Cache stats unavailable: {e}")
+        return {}
+
+    stats = {}
+    for (name, event), key in keys.items():
+        stats.setdefault(name, {})[event] = values.get(key, 0)
+    for counters in stats.values():
+        served = counters['hit'] + counters['stale'] + counters['wait']
+        total = served + counters['miss'] + counters['refresh']
+        counters['hit_ratio'] = round(served / total, 3) if total else None
+    return stats
+
+
+def _acquire_lock(key, timeout):
+    """Verrou par clé (SET NX) ; retourne un jeton ou None si déjà pris"""
+    token = uuid.uuid4().hex
+    try:
+        if cache.add(f'{key}:lock', token, timeout):
+            return token
+        return None
+    except Exception as e:
+        # Cache indisponible : pas de coordination possible, on calcule
+        logger.warning(f"Cache lock failed for {key}: {e}")
+        return token
+
+
+def _release_lock(key, token):
+    try:
+        if cache.get(f'{key}:lock') == token:
+            cache.delete(f'{key}:lock')
+    except Exception as e:
+        logger.warning(f"Cache lock release failed for {key}: {e}")
+
+
+def _is_envelope(entry):
+    return isinstance(entry, dict) and entry.get(_ENVELOPE_MARKER)
+
+
+def _needs_refresh(entry, beta):
+    """Échéance souple atteinte, ou expiration anticipée probabiliste (XFetch)"""
+    early = entry['compute_time'] * beta * -math.log(max(random.random(), 1e-12))
+    return time.time() + early >= entry['soft_expires_at']
+
+
+def _compute_and_store(key, compute, timeout, should_cache):
+    start = time.time()
+    value = compute()
+    compute_time = time.time() - start
+
+    if should_cache is None or should_cache(value):
+        stale_factor = max(1, _refresh_config().get('STALE_FACTOR', 3))
+        safe_cache_set(key, {
+            _ENVELOPE_MARKER: True,
+            'value': value,
+            'soft_expires_at': time.time() + timeout,
+            'compute_time': compute_time,
+        }, timeout=int(timeout * stale_factor))
+    return value
+
+
+def get_or_compute(key, compute, timeout, stats_name=None, should_cache=None):
+    """
+    Lecture du cache avec protection contre les recalculs simultanés.
+
+    - entrée fraîche : servie directement (hit) ;
+    - échéance souple dépassée : le worker qui obtient le verrou recalcule
+      (refresh), les autres servent la valeur périmée (stale) ;
+    - entrée absente : un seul worker calcule (miss), les autres attendent
+      brièvement sa valeur (wait) avant de calculer eux-mêmes.
+
+    ``should_cache(valeur)`` permet d'exclure les résultats dégradés du cache.
+    """
+    config = _refresh_config()
+    stats_name = stats_name or key
+    lock_timeout = config.get('LOCK_TIMEOUT', 30)
+
+    entry = safe_cache_get(key)
+    if _is_envelope(entry):
+        if not _needs_refresh(entry, config.get('EARLY_EXPIRATION_BETA', 1.0)):
+            record_cache_event(stats_name, 'hit')
+            return entry['value']
+
+        token = _acquire_lock(key, lock_timeout)
+        if token is None:
+            record_cache_event(stats_name, 'stale')
+            return entry['value']
+        try:
+            record_cache_event(stats_name, 'refresh')
+            return _compute_and_store(key, compute, timeout, should_cache)
+        except Exception as e:
+            logger.warning(f"Cache refresh failed for {key}, serving stale value: {e}")
+            return entry['value']
+        finally:
+            _release_lock(key, token)
+
+    token = _acquire_lock(key, lock_timeout)
+    if token is None:
+        # Un autre worker calcule déjà : attendre sa valeur
+        deadline = time.time() + config.get('LOCK_WAIT', 5)
+        while time.time() < deadline:
+            time.sleep(0.05)
+            entry = safe_cache_get(key)
+            if _is_envelope(entry):
+                record_cache_event(stats_name, 'wait')
+                return entry['value']
+
+    record_cache_event(stats_name, 'miss')
+    try:
+        return _compute_and_store(key, compute, timeout, should_cache)
+    finally:
+        if token:
+            _release_lock(key, token)
+
+
+def refresh_cached(key, compute, timeout, should_cache=None):
+    """
+    Recalcule et remplace une entrée lue par get_or_compute (mise à jour
+    poussée après une écriture, sans attendre l'expiration).
+    """
+    return _compute_and_store(key, compute, timeout, should_cache)
+
+
 def cached_view(timeout=1800, key_func=None):
     """Décorateur pour mettre en cache le résultat d'une vue"""
 
@@ -64,23 +277,14 @@ def cached_view(timeout=1800, key_func=None):
                     str(hash(str(request.GET.urlencode())))
                 )
 
-            # Tenter de récupérer depuis le cache
-            cached_result = safe_cache_get(cache_key)
-            if cached_result is not None:
-                logger.info(f"Cache hit for {cache_key}")
-                return cached_result
-
-            # Exécuter la vue et mettre en cache
-            start_time = time.time()
-            result = func(self, request, *args, **kwargs)
-            execution_time = time.time() - start_time
-
-            # Mettre en cache seulement si succès
-            if hasattr(result, 'status_code') and result.status_code == 200:
-                safe_cache_set(cache_key, result, timeout)
-                logger.info(f"Cached {cache_key} (exec: {execution_time:.2f}s)")
-
-            return result
+            # Mise en cache seulement si succès, un seul recalcul à la fois
+            return get_or_compute(
+                cache_key,
+                lambda: func(self, request, *args, **kwargs),
+                timeout,
+                stats_name=func.__qualname__,
+                should_cache=lambda result: getattr(result, 'status_code', None) == 200
+            )
 
         return wrapper
 
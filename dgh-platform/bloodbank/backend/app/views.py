@@ -19,19 +19,22 @@ from rest_framework.pagination import PageNumberPagination
 import json
 import csv
 import io
+import itertools
 import logging
 import time
 import time
 import sys
 from django.core.cache import cache
 from django.db import connection
-from django.db.models import Count, Sum, Q, Avg
+from django.db.models import Count, Sum, Q, Avg, F
 from django.db.models.functions import Extract
 from django.db.models.functions import TruncMonth, TruncWeek, TruncDay
 from django.utils import timezone
 from datetime import datetime, timedelta, date
 from .decorators import global_allow_any
-from app.utils.cache_utils import safe_cache_get, safe_cache_set, cache_key_builder, cached_view
+from app.utils.cache_utils import (
+    cache_key_builder, cached_view, get_or_compute, get_cache_stats, versioned_key_builder
+)
 # Imports conditionnels pour les bibliothèques ML
 try:
     import pandas as pd
@@ -97,12 +100,25 @@ except ImportError:
 
 from .models import (
     Donor, Site, Department, Patient, BloodRecord,
-    BloodUnit, BloodRequest, BloodConsumption, Prevision
+    BloodUnit, BloodRequest, BloodConsumption, Prevision, DailyDemandStat, DataImport
+)
+from .alerts import alert_details, get_alerts
+from .daily_stats import daily_stats_ready
+from .exports import parse_export_date, stream_report
+from .data_import import (
+    discard_upload, import_summary, open_csv, run_import, size_error, start_import, store_upload, validate_upload
 )
+from .tasks import run_data_import
+from .stock_levels import stock_levels
+from .expiry import INVENTORY_CACHE, last_sweep
+from .pagination import KeysetPagination
+from .forecasting.precompute import get_precomputed_forecast, not_precomputed_forecast
 from .serializers import (
     DonorSerializer, SiteSerializer, DepartmentSerializer,
     PatientSerializer, BloodRecordSerializer, BloodUnitSerializer,
-    BloodRequestSerializer, BloodConsumptionSerializer, PrevisionSerializer
+    BloodRequestSerializer, BloodConsumptionSerializer, PrevisionSerializer,
+    DonorListSerializer, PatientListSerializer, BloodUnitListSerializer,
+    BloodRequestListSerializer, BloodConsumptionListSerializer
 )
 
 # Import sécurisé du système IA
@@ -189,113 +205,14 @@ class DashboardOverviewAPIView(BaseAPIView):
     """Vue principale du dashboard avec métriques temps réel - VERSION OPTIMISÉE avec Redis"""
 
     def get(self, request):
-        # Générer la clé de cache
-        cache_key = cache_key_builder('dashboard_overview')
-
-        # Tenter de récupérer depuis le cache
-        cached_result = safe_cache_get(cache_key)
-        if cached_result:
-            logger.info("Dashboard overview served from Redis cache")
-            return Response(cached_result)
-
+        # Un seul worker recalcule à l'expiration, les autres servent la version en cache
         try:
-            # Votre logique existante pour générer les données
-            start_time = time.time()
-
-            # ==================== OPTIMISATION 1: Requêtes groupées ====================
-            # Une seule requête pour toutes les statistiques d'unités
-            unit_stats = BloodUnit.objects.aggregate(
-                total=Count('unit_id'),
-                available=Count('unit_id', filter=Q(status='Available')),
-                expired=Count('unit_id', filter=Q(status='Expired')),
-                used=Count('unit_id', filter=Q(status='Used')),
-                expiring_soon=Count(
-                    'unit_id',
-                    filter=Q(
-                        status='Available',
-                        date_expiration__lte=timezone.now().date() + timedelta(days=7)
-                    )
-                )
+            data = get_or_compute(
+                versioned_key_builder(INVENTORY_CACHE, 'dashboard_overview'),
+                self.build_overview,
+                timeout=600,
+                stats_name='dashboard_overview'
             )
-
-            # ==================== OPTIMISATION 2: Stock par groupe sanguin optimisé ====================
-            stock_by_blood_type = list(
-                BloodUnit.objects.filter(status='Available')
-                .select_related('donor')  # Éviter les requêtes N+1
-                .values('donor__blood_type')
-                .annotate(
-                    count=Count('unit_id'),
-                    total_volume=Sum('volume_ml')
-                )
-                .order_by('donor__blood_type')
-            )
-
-            # ==================== OPTIMISATION 3: Requêtes de demandes groupées ====================
-            request_stats = BloodRequest.objects.aggregate(
-                pending=Count('request_id', filter=Q(status='Pending')),
-                urgent=Count('request_id', filter=Q(status='Pending', priority='Urgent'))
-            )
-
-            # ==================== OPTIMISATION 4: Transfusions aujourd'hui ====================
-            today_transfusions = BloodConsumption.objects.filter(
-                date=timezone.now().date()
-            ).count()
-
-            # ==================== OPTIMISATION 5: Évolution simplifiée (échantillonnage) ====================
-            # Au lieu de 30 jours, faire seulement 10 points pour réduire la charge
-            stock_evolution = []
-            today = timezone.now().date()
-
-            # Échantillonnage intelligent : 10 points sur 30 jours
-            for i in range(0, 30, 3):  # Tous les 3 jours
-                check_date = today - timedelta(days=29 - i)
-                # Requête optimisée avec un seul filtre
-                daily_stock = BloodUnit.objects.filter(
-                    collection_date__lte=check_date,
-                    date_expiration__gt=check_date,
-                    status__in=['Available', 'Used']  # Exclure les expirés
-                ).count()
-
-                stock_evolution.append({
-                    'date': check_date.isoformat(),
-                    'stock': daily_stock
-                })
-
-            # ==================== CALCUL DU TAUX D'UTILISATION ====================
-            utilization_rate = 0
-            if unit_stats['total'] > 0:
-                utilization_rate = round((unit_stats['used'] / unit_stats['total'] * 100), 2)
-
-            # ==================== STRUCTURE DE RÉPONSE ====================
-            data = {
-                'overview': {
-                    'total_units': unit_stats['total'],
-                    'available_units': unit_stats['available'],
-                    'expired_units': unit_stats['expired'],
-                    'used_units': unit_stats['used'],
-                    'utilization_rate': utilization_rate,
-                    'expiring_soon': unit_stats['expiring_soon'],
-                    'pending_requests': request_stats['pending'],
-                    'urgent_requests': request_stats['urgent'],
-                    'today_transfusions': today_transfusions
-                },
-                'stock_by_blood_type': stock_by_blood_type,
-                'stock_evolution': stock_evolution,
-                'last_updated': timezone.now().isoformat(),
-                'cache_info': {
-                    'cached_at': timezone.now().isoformat(),
-                    'cache_duration': '10 minutes',
-                    'cache_backend': 'Redis Cloud'
-                }
-            }
-
-            execution_time = time.time() - start_time
-            logger.info(f"Dashboard overview generated in {execution_time:.2f}s")
-
-            # ==================== CACHE REDIS ====================
-            # Cache avec Redis Cloud pour 10 minutes
-            safe_cache_set(cache_key, data, timeout=600)
-
             return Response(data)
 
         except Exception as e:
@@ -323,105 +240,136 @@ class DashboardOverviewAPIView(BaseAPIView):
 
             return Response(fallback_data, status=status.HTTP_206_PARTIAL_CONTENT)
 
-@global_allow_any
-class AlertsAPIView(BaseAPIView):
-    """Alertes critiques pour le dashboard avec cache court"""
+    def build_overview(self):
+        """Calcul des métriques du dashboard (appelé seulement à l'expiration du cache)"""
+        start_time = time.time()
 
-    def get(self, request):
-        # Cache court pour les alertes (5 minutes max)
-        cache_key = cache_key_builder('dashboard_alerts')
-        cached_result = safe_cache_get(cache_key)
+        # ==================== OPTIMISATION 1: Requêtes groupées ====================
+        # Une seule requête pour toutes les statistiques d'unités
+        unit_stats = BloodUnit.objects.aggregate(
+            total=Count('unit_id'),
+            available=Count('unit_id', filter=Q(status='Available')),
+            expired=Count('unit_id', filter=Q(status='Expired')),
+            used=Count('unit_id', filter=Q(status='Used')),
+            expiring_soon=Count(
+                'unit_id',
+                filter=Q(
+                    status='Available',
+                    date_expiration__lte=timezone.now().date() + timedelta(days=7)
+                )
+            )
+        )
 
-        if cached_result:
-            logger.info("Alerts served from Redis cache")
-            return Response(cached_result)
+        # ==================== OPTIMISATION 2: Stock par groupe sanguin optimisé ====================
+        # Le frontend attend la clé donor__blood_type
+        stock_by_blood_type = [
+            {'donor__blood_type': item.pop('blood_type'), **item}
+            for item in BloodUnit.objects.filter(status='Available')
+            .values('blood_type')
+            .annotate(
+                count=Count('unit_id'),
+                total_volume=Sum('volume_ml')
+            )
+            .order_by('blood_type')
+        ]
 
-        alerts = []
+        # ==================== OPTIMISATION 3: Requêtes de demandes groupées ====================
+        request_stats = BloodRequest.objects.aggregate(
+            pending=Count('request_id', filter=Q(status='Pending')),
+            urgent=Count('request_id', filter=Q(status='Pending', priority='Urgent'))
+        )
 
-        try:
-            start_time = time.time()
+        # ==================== OPTIMISATION 4: Transfusions aujourd'hui ====================
+        if daily_stats_ready():
+            today_transfusions = DailyDemandStat.objects.filter(
+                date=timezone.now().date()
+            ).aggregate(total=Sum('consumed_units'))['total'] or 0
+        else:
+            today_transfusions = BloodConsumption.objects.filter(
+                date=timezone.now().date()
+            ).count()
 
-            # Alertes stock faible
-            for blood_type in ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']:
-                stock_count = BloodUnit.objects.filter(
-                    donor__blood_type=blood_type,
-                    status='Available'
-                ).count()
-
-                if stock_count < 5:  # Seuil critique
-                    alerts.append({
-                        'id': f'low_stock_{blood_type}',
-                        'type': 'low_stock',
-                        'severity': 'critical' if stock_count < 2 else 'warning',
-                        'message': f'Stock critique pour {blood_type}: {stock_count} unités',
-                        'blood_type': blood_type,
-                        'count': stock_count
-                    })
+        # ==================== OPTIMISATION 5: Évolution simplifiée (échantillonnage) ====================
+        # Au lieu de 30 jours, faire seulement 10 points pour réduire la charge
+        today = timezone.now().date()
+        stock_evolution = [
+            {'date': point['date'], 'stock': point['total']}
+            for point in stock_levels(
+                today - timedelta(days=29), today,
+                statuses=['Available', 'Used'],  # Exclure les expirés
+                step=3  # 10 points sur 30 jours
+            )
+        ]
 
-            # Alertes expiration
-            expiring_units = BloodUnit.objects.filter(
-                status='Available',
-                date_expiration__lte=timezone.now().date() + timedelta(days=3)
-            ).select_related('donor')
-
-            for unit in expiring_units:
-                days_left = (unit.date_expiration - timezone.now().date()).days
-                alerts.append({
-                    'id': f'expiring_{unit.unit_id}',
-                    'type': 'expiring',
-                    'severity': 'critical' if days_left <= 1 else 'warning',
-                    'message': f'Unité {unit.unit_id} expire dans {days_left} jour(s)',
-                    'unit_id': unit.unit_id,
-                    'blood_type': unit.donor.blood_type,
-                    'days_left': days_left
-                })
+        # ==================== CALCUL DU TAUX D'UTILISATION ====================
+        utilization_rate = 0
+        if unit_stats['total'] > 0:
+            utilization_rate = round((unit_stats['used'] / unit_stats['total'] * 100), 2)
+
+        # ==================== STRUCTURE DE RÉPONSE ====================
+        data = {
+            'overview': {
+                'total_units': unit_stats['total'],
+                'available_units': unit_stats['available'],
+                'expired_units': unit_stats['expired'],
+                'used_units': unit_stats['used'],
+                'utilization_rate': utilization_rate,
+                'expiring_soon': unit_stats['expiring_soon'],
+                'pending_requests': request_stats['pending'],
+                'urgent_requests': request_stats['urgent'],
+                'today_transfusions': today_transfusions
+            },
+            'stock_by_blood_type': stock_by_blood_type,
+            'stock_evolution': stock_evolution,
+            'last_updated': timezone.now().isoformat(),
+            'cache_info': {
+                'cached_at': timezone.now().isoformat(),
+                'cache_duration': '10 minutes',
+                'cache_backend': 'Redis Cloud'
+            }
+        }
 
-            # Alertes demandes urgentes non satisfaites
-            urgent_requests = BloodRequest.objects.filter(
-                status='Pending',
-                priority='Urgent'
-            ).select_related('department')
+        execution_time = time.time() - start_time
+        logger.info(f"Dashboard overview generated in {execution_time:.2f}s")
 
-            for req in urgent_requests:
-                alerts.append({
-                    'id': f'urgent_{req.request_id}',
-                    'type': 'urgent_request',
-                    'severity': 'critical',
-                    'message': f'Demande urgente {req.request_id} non satisfaite',
-                    'request_id': req.request_id,
-                    'blood_type': req.blood_type,
-                    'department': req.department.name,
-                    'quantity': req.quantity
-                })
+        return data
 
-            execution_time = time.time() - start_time
 
-            result = {
-                'alerts': alerts,
-                'count': len(alerts),
-                'last_updated': timezone.now().isoformat(),
-                'execution_time_seconds': round(execution_time, 2),
-                'cache_backend': 'Redis Cloud'
-            }
+@global_allow_any
+class AlertsAPIView(BaseAPIView):
+    """Alertes critiques pour le dashboard (instantanés mis à jour à chaque écriture)"""
 
-            # Cache court pour les alertes (5 minutes)
-            safe_cache_set(cache_key, result, timeout=300)
-            logger.info(f"Alerts generated and cached in {execution_time:.2f}s")
+    def get(self, request):
+        # Détail paginé d'une classe d'alerte (?type=expiring|urgent_request&cursor=...)
+        alert_type = request.GET.get('type')
+        if alert_type:
+            try:
+                return Response(alert_details(
+                    alert_type,
+                    cursor=request.GET.get('cursor'),
+                    limit=request.GET.get('limit'),
+                    blood_type=request.GET.get('blood_type')
+                ))
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Synthèse : instantanés poussés à chaque écriture, aucun recalcul par requête
+        try:
+            start_time = time.time()
+            result = get_alerts()
+            result['execution_time_seconds'] = round(time.time() - start_time, 2)
             return Response(result)
 
         except Exception as e:
             logger.error(f"Alerts error: {str(e)}")
-            alerts.append({
-                'id': 'system_error',
-                'type': 'system_error',
-                'severity': 'critical',
-                'message': 'Erreur système lors du chargement des alertes'
-            })
-
             return Response({
-                'alerts': alerts,
-                'count': len(alerts),
+                'alerts': [{
+                    'id': 'system_error',
+                    'type': 'system_error',
+                    'severity': 'critical',
+                    'message': 'Erreur système lors du chargement des alertes'
+                }],
+                'count': 1,
                 'last_updated': timezone.now().isoformat()
             })
 
@@ -460,11 +408,10 @@ class AlertsAPIView(BaseAPIView):
 @global_allow_any
 # ==================== FORECASTING AI VIEWS ====================
 class DemandForecastAPIView(APIView):
-    """Vue optimisée pour les prévisions de demande avec Redis"""
-
-    def __init__(self):
-        super().__init__()
-        self.lightweight_forecaster = ProductionLightweightForecaster()
+    """
+    Prévisions de demande servies depuis les prévisions précalculées
+    (commande precompute_forecasts / Celery beat) : lecture seule, aucun entraînement.
+    """
 
     def post(self, request):
         """
@@ -483,14 +430,6 @@ class DemandForecastAPIView(APIView):
             # Limiter la durée
             days = min(days, 30)
 
-            # Cache par paramètres
-            cache_key = cache_key_builder('demand_forecast_post', blood_type, days, method)
-            cached_result = safe_cache_get(cache_key)
-
-            if cached_result:
-                logger.info(f"POST Forecast for {blood_type} served from Redis cache")
-                return Response(cached_result)
-
             start_time = time.time()
 
             # Générer les prédictions
@@ -546,15 +485,13 @@ class DemandForecastAPIView(APIView):
 
                 # Métadonnées
                 'metadata': {
-                    'cache_duration': '1 hour',
-                    'cache_backend': 'Redis Cloud',
+                    'source': 'precomputed',
+                    'precomputed_at': main_forecast.get('precomputed_at'),
                     'execution_time_seconds': round(execution_time, 2)
                 }
             }
 
-            # Cache long
-            safe_cache_set(cache_key, result, timeout=3600)
-            logger.info(f"POST Forecast generated and cached in {execution_time:.2f}s")
+            logger.info(f"POST Forecast served from precomputed data in {execution_time:.2f}s")
 
             return Response(result, status=status.HTTP_200_OK)
 
@@ -577,14 +514,6 @@ class DemandForecastAPIView(APIView):
         # Limiter la durée pour éviter les timeouts
         days = min(days, 30)
 
-        # Cache par paramètres avec Redis
-        cache_key = cache_key_builder('demand_forecast', blood_type, days)
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            logger.info(f"Forecast for {blood_type} served from Redis cache")
-            return Response(cached_result)
-
         try:
             start_time = time.time()
 
@@ -603,17 +532,13 @@ class DemandForecastAPIView(APIView):
                     'generated_at': timezone.now().isoformat()
                 },
                 'metadata': {
-                    'method': 'lightweight_optimized',
+                    'method': 'precomputed',
                     'confidence_level': 0.75,
-                    'cache_duration': '1 hour',
-                    'cache_backend': 'Redis Cloud',
                     'execution_time_seconds': round(execution_time, 2)
                 }
             }
 
-            # Cache long pour les prévisions avec Redis
-            safe_cache_set(cache_key, result, timeout=3600)  # 1 heure
-            logger.info(f"Forecast generated and cached in {execution_time:.2f}s")
+            logger.info(f"Forecast served from precomputed data in {execution_time:.2f}s")
 
             return Response(result)
 
@@ -626,57 +551,18 @@ class DemandForecastAPIView(APIView):
             }, status=status.HTTP_503_SERVICE_UNAVAILABLE)
 
     def get_all_forecasts_optimized(self, days):
-        """Prévisions pour tous les groupes sanguins - Version rapide avec cache individuel"""
+        """Prévisions précalculées pour tous les groupes sanguins"""
         blood_types = ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-']
-        forecasts = []
-
-        for bt in blood_types:
-            try:
-                # Cache individuel par groupe sanguin
-                individual_cache_key = cache_key_builder('forecast_individual', bt, days)
-                cached_forecast = safe_cache_get(individual_cache_key)
-
-                if cached_forecast:
-                    forecasts.append(cached_forecast)
-                else:
-                    forecast = self.lightweight_forecaster.quick_predict_cached(bt, days)
-                    safe_cache_set(individual_cache_key, forecast, timeout=1800)  # 30 minutes
-                    forecasts.append(forecast)
-
-            except Exception as e:
-                logger.warning(f"Forecast failed for {bt}: {e}")
-                # Ajouter prévision minimale
-                forecasts.append({
-                    'blood_type': bt,
-                    'predictions': [],
-                    'method_used': 'error_fallback',
-                    'error': str(e)
-                })
-
-        return forecasts
+        return [self.get_single_forecast_optimized(bt, days) for bt in blood_types]
 
     def get_single_forecast_optimized(self, blood_type, days):
-        """Prévision pour un seul groupe sanguin avec cache"""
-        try:
-            # Cache spécifique au groupe sanguin
-            individual_cache_key = cache_key_builder('forecast_single', blood_type, days)
-            cached_forecast = safe_cache_get(individual_cache_key)
-
-            if cached_forecast:
-                return cached_forecast
-
-            forecast = self.lightweight_forecaster.quick_predict_cached(blood_type, days)
-            safe_cache_set(individual_cache_key, forecast, timeout=1800)  # 30 minutes
+        """Prévision précalculée d'un groupe sanguin (cache puis table Prevision)"""
+        forecast = get_precomputed_forecast(blood_type, days)
+        if forecast:
             return forecast
 
-        except Exception as e:
-            logger.error(f"Single forecast failed for {blood_type}: {e}")
-            return {
-                'blood_type': blood_type,
-                'predictions': [],
-                'method_used': 'error_fallback',
-                'error': str(e)
-            }
+        logger.warning(f"No precomputed forecast for {blood_type} ({days} days)")
+        return not_precomputed_forecast(blood_type)
 
 @global_allow_any
 class SmartForecastView(APIView):
@@ -757,6 +643,25 @@ class SmartForecastView(APIView):
                 logger.error(f"❌ AI forecasting system not available: {FORECASTING_SYSTEM.get('error')}")
                 return self.handle_ai_import_error(blood_type, days, method)
 
+            # Prévision précalculée : simple lecture, aucun entraînement pendant la requête
+            # (calcul à la demande uniquement pour une méthode explicite ou force_retrain)
+            if method == 'auto' and not force_retrain:
+                precomputed = get_precomputed_forecast(blood_type, days)
+                if not precomputed:
+                    logger.warning(f"No precomputed forecast for {blood_type} ({days} days)")
+                    return Response(not_precomputed_forecast(blood_type), status=status.HTTP_200_OK)
+
+                adapted_result = self.adapt_ai_result_for_frontend(precomputed, days)
+                adapted_result.update({
+                    'system_used': 'ai_precomputed',
+                    'classic_fallback': False,
+                    'timestamp': timezone.now().isoformat(),
+                    'request_method': method,
+                    'precomputed_at': precomputed.get('precomputed_at'),
+                    'ai_system_status': 'operational'
+                })
+                return Response(adapted_result, status=status.HTTP_200_OK)
+
             logger.info(f"🤖 Using AI system for {blood_type} forecast (method: {method})")
 
             # Utiliser la fonction importée de manière sécurisée
@@ -1312,53 +1217,44 @@ class AIMethodsView(APIView):
 @global_allow_any
 # ==================== OPTIMIZATION VIEWS ====================
 class OptimizationRecommendationsAPIView(APIView):
-    """Vue optimisée pour les recommandations avec Redis Cache"""
-
-    def __init__(self):
-        super().__init__()
-        self.forecaster = RenderOptimizedForecaster(max_execution_time=120)  # 2 minutes max
-        self.lightweight_forecaster = ProductionLightweightForecaster()
+    """
+    Vue optimisée pour les recommandations avec Redis Cache.
+    Les prévisions proviennent du précalcul (aucun entraînement pendant la requête).
+    """
 
     def get(self, request):
         """Recommandations optimisées avec cache Redis intelligent"""
-        start_time = time.time()
-
-        # ==================== CACHE REDIS PRINCIPAL ====================
-        cache_key = cache_key_builder('optimization_recommendations_v2')
-        cached_data = safe_cache_get(cache_key)
-
-        if cached_data:
-            logger.info("Using cached recommendations from Redis")
-            return Response(cached_data)
-
         try:
-            # ==================== STRATÉGIE PROGRESSIVE AVEC CACHE ====================
-            recommendations = self.generate_progressive_recommendations_cached()
+            # ==================== CACHE REDIS PRINCIPAL ====================
+            # Servi périmé pendant qu'un seul worker régénère
+            return Response(get_or_compute(
+                versioned_key_builder(INVENTORY_CACHE, 'optimization_recommendations_v2'),
+                self.build_recommendations,
+                timeout=1800,
+                stats_name='optimization_recommendations'
+            ))
 
-            execution_time = time.time() - start_time
+        except Exception as e:
+            logger.error(f"Recommendations generation failed: {str(e)}", exc_info=True)
+            return self.get_emergency_fallback()
 
-            data = {
-                'recommendations': recommendations,
-                'generated_at': timezone.now().isoformat(),
-                'execution_time_seconds': round(execution_time, 2),
-                'cache_duration': '30 minutes',
-                'cache_backend': 'Redis Cloud',
-                'status': 'success'
-            }
+    def build_recommendations(self):
+        start_time = time.time()
 
-            # ==================== CACHE ADAPTATIF REDIS ====================
-            # Cache plus long si génération rapide (données stables)
-            # Cache plus court si génération lente (données dynamiques)
-            cache_duration = 1800 if execution_time < 30 else 900  # 30min ou 15min
-            safe_cache_set(cache_key, data, timeout=cache_duration)
+        # ==================== STRATÉGIE PROGRESSIVE AVEC CACHE ====================
+        recommendations = self.generate_progressive_recommendations_cached()
 
-            logger.info(f"Recommendations generated and cached in {execution_time:.2f}s")
+        execution_time = time.time() - start_time
+        logger.info(f"Recommendations generated in {execution_time:.2f}s")
 
-            return Response(data)
-
-        except Exception as e:
-            logger.error(f"Recommendations generation failed: {str(e)}", exc_info=True)
-            return self.get_emergency_fallback()
+        return {
+            'recommendations': recommendations,
+            'generated_at': timezone.now().isoformat(),
+            'execution_time_seconds': round(execution_time, 2),
+            'cache_duration': '30 minutes',
+            'cache_backend': 'Redis Cloud',
+            'status': 'success'
+        }
 
     def generate_progressive_recommendations_cached(self):
         """Génération progressive avec cache par étapes"""
@@ -1376,33 +1272,19 @@ class OptimizationRecommendationsAPIView(APIView):
             # ==================== CACHE PAR GROUPE SANGUIN ====================
             for blood_type in blood_types:
                 try:
-                    # Cache individuel pour chaque analyse
-                    blood_type_cache_key = cache_key_builder('recommendation_blood_type', blood_type)
-                    cached_recommendation = safe_cache_get(blood_type_cache_key)
-
-                    if cached_recommendation:
-                        recommendations['blood_type_specific'].append(cached_recommendation)
-                        successful_forecasts += 1
-                        continue
-
-                    # Timeout individuel par groupe sanguin (15 secondes max)
-                    recommendation = self.analyze_blood_type_optimized(blood_type, timeout=15)
+                    # Cache individuel pour chaque analyse (15 minutes)
+                    recommendation = get_or_compute(
+                        versioned_key_builder(INVENTORY_CACHE, 'recommendation_blood_type', blood_type),
+                        lambda: self.analyze_blood_type_optimized(blood_type),
+                        timeout=900,
+                        stats_name='recommendation_blood_type',
+                        should_cache=bool
+                    )
 
                     if recommendation:
-                        # Cache la recommandation individuelle pour 15 minutes
-                        safe_cache_set(blood_type_cache_key, recommendation, timeout=900)
                         recommendations['blood_type_specific'].append(recommendation)
                         successful_forecasts += 1
 
-                    # Si trop lent, basculer sur méthode ultra-rapide
-                    if successful_forecasts < len(blood_types) // 2 and len(recommendations['blood_type_specific']) > 0:
-                        # Compléter avec méthode rapide
-                        remaining_types = blood_types[len(recommendations['blood_type_specific']):]
-                        for bt in remaining_types:
-                            quick_rec = self.quick_analyze_blood_type(bt)
-                            recommendations['blood_type_specific'].append(quick_rec)
-                        break
-
                 except Exception as e:
                     logger.warning(f"Failed to analyze {blood_type}: {e}")
                     # Ajouter recommandation de base
@@ -1411,15 +1293,12 @@ class OptimizationRecommendationsAPIView(APIView):
                     )
 
             # ==================== CACHE RECOMMANDATIONS GÉNÉRALES ====================
-            general_cache_key = cache_key_builder('recommendations_general')
-            cached_general = safe_cache_get(general_cache_key)
-
-            if cached_general:
-                recommendations['general'] = cached_general
-            else:
-                general_recs = self.generate_general_recommendations_fast()
-                safe_cache_set(general_cache_key, general_recs, timeout=600)  # 10 minutes
-                recommendations['general'] = general_recs
+            recommendations['general'] = get_or_compute(
+                versioned_key_builder(INVENTORY_CACHE, 'recommendations_general'),
+                self.generate_general_recommendations_fast,
+                timeout=600,  # 10 minutes
+                stats_name='recommendations_general'
+            )
 
             # ==================== RÉSUMÉ ====================
             recommendations['summary'] = self.generate_summary_optimized(
@@ -1433,51 +1312,34 @@ class OptimizationRecommendationsAPIView(APIView):
             return self.get_static_recommendations()
 
 
-    def analyze_blood_type_optimized(self, blood_type, timeout=15):
-        """Analyse optimisée d'un groupe sanguin avec timeout"""
-        start_time = time.time()
-
+    def analyze_blood_type_optimized(self, blood_type):
+        """Analyse d'un groupe sanguin à partir de la prévision précalculée"""
         try:
+            # ==================== PRÉVISION PRÉCALCULÉE ====================
+            prediction_result = get_precomputed_forecast(blood_type, 7)
+            if not prediction_result:
+                # Pas encore de précalcul : estimation statique
+                return self.quick_analyze_blood_type(blood_type)
+
+            predicted_weekly_demand = sum(p['predicted_demand'] for p in prediction_result['predictions'])
+            method_used = 'precomputed'
+
             # ==================== DONNÉES ACTUELLES RAPIDES ====================
             current_stock = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available'
             ).count()
 
             # ==================== CONSOMMATION RÉCENTE ====================
             seven_days_ago = timezone.now().date() - timedelta(days=7)
             recent_consumption = BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type,
+                blood_type=blood_type,
                 date__gte=seven_days_ago
             ).count()
 
-            # ==================== PRÉDICTION RAPIDE ====================
-            if time.time() - start_time > timeout * 0.7:  # 70% du timeout écoulé
-                # Utiliser prédiction ultra-rapide
-                prediction_result = self.lightweight_forecaster.quick_predict_cached(blood_type, 7)
-                predicted_weekly_demand = sum(p['predicted_demand'] for p in prediction_result['predictions'])
-                method_used = 'lightweight'
-            else:
-                # Essayer prédiction avancée
-                try:
-                    historical_data = self.get_historical_data_fast(blood_type, days=30)
-                    if len(historical_data) > 10:
-                        # Entraînement rapide
-                        self.forecaster.train_comprehensive_optimized(historical_data, blood_type)
-                        prediction_result = self.forecaster.predict_hybrid_optimized(blood_type, 7)
-                        predicted_weekly_demand = sum(p['predicted_demand'] for p in prediction_result['predictions'])
-                        method_used = 'optimized'
-                    else:
-                        raise ValueError("Insufficient historical data")
-                except:
-                    # Fallback vers méthode légère
-                    prediction_result = self.lightweight_forecaster.quick_predict_cached(blood_type, 7)
-                    predicted_weekly_demand = sum(p['predicted_demand'] for p in prediction_result['predictions'])
-                    method_used = 'lightweight_fallback'
-
             # ==================== UNITÉS EXPIRANT ====================
             expiring_soon = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available',
                 date_expiration__lte=timezone.now().date() + timedelta(days=7)
             ).count()
@@ -1499,7 +1361,7 @@ class OptimizationRecommendationsAPIView(APIView):
         try:
             # Données minimales
             current_stock = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available'
             ).count()
 
@@ -1511,7 +1373,7 @@ class OptimizationRecommendationsAPIView(APIView):
             predicted_weekly_demand = base_demands.get(blood_type, 10) * 7
 
             expiring_soon = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
+                blood_type=blood_type,
                 status='Available',
                 date_expiration__lte=timezone.now().date() + timedelta(days=7)
             ).count()
@@ -1525,49 +1387,6 @@ class OptimizationRecommendationsAPIView(APIView):
             logger.error(f"Quick analysis failed for {blood_type}: {e}")
             return self.get_basic_recommendation(blood_type)
 
-    def get_historical_data_fast(self, blood_type, days=30):
-        """Récupération rapide des données historiques"""
-        try:
-            end_date = timezone.now().date()
-            start_date = end_date - timedelta(days=days)
-
-            # Agrégation par jour
-            daily_consumption = BloodConsumption.objects.filter(
-                unit__donor__blood_type=blood_type,
-                date__gte=start_date,
-                date__lte=end_date
-            ).extra(
-                select={'day': 'date'}
-            ).values('day').annotate(
-                demand=Count('id')
-            ).order_by('day')
-
-            if not daily_consumption:
-                # Données simulées si pas d'historique
-                dates = pd.date_range(start=start_date, end=end_date, freq='D')
-                base_demand = {'O+': 2, 'A+': 1.5, 'B+': 1, 'AB+': 0.5,
-                               'O-': 1, 'A-': 0.8, 'B-': 0.6, 'AB-': 0.3}.get(blood_type, 1)
-
-                data = pd.DataFrame({
-                    'demand': [max(0, int(base_demand + np.random.normal(0, 0.5))) for _ in dates]
-                }, index=dates)
-                return data
-
-            # Convertir en DataFrame
-            df = pd.DataFrame(list(daily_consumption))
-            df['day'] = pd.to_datetime(df['day'])
-            df.set_index('day', inplace=True)
-
-            # Remplir les jours manquants avec 0
-            full_range = pd.date_range(start=start_date, end=end_date, freq='D')
-            df = df.reindex(full_range, fill_value=0)
-
-            return df
-
-        except Exception as e:
-            logger.error(f"Historical data retrieval failed for {blood_type}: {e}")
-            return pd.DataFrame()
-
     def generate_blood_type_recommendation_optimized(self, blood_type, current_stock,
                                                      predicted_demand, expiring_soon,
                                                      daily_avg, method_used):
@@ -1814,11 +1633,14 @@ class OptimizationRecommendationsAPIView(APIView):
 # ==================== DATA IMPORT VIEWS ====================
 @method_decorator(csrf_exempt, name='dispatch')
 class DataImportAPIView(BaseAPIView):
-    """Import des données CSV avec validation et traitement intelligent"""
+    """
+    Import des données CSV en flux, par blocs validés un à un (voir app/data_import.py).
+    Le traitement est confié à un worker Celery : la réponse (202) donne l'import_id
+    à suivre via ImportHistoryAPIView. Un import interrompu se reprend en renvoyant
+    le même fichier avec resume_from=<import_id>.
+    """
 
     def post(self, request):
-        start_time = time.time()
-
         try:
             csv_file = request.FILES.get('csv_file')
             if not csv_file:
@@ -1827,7 +1649,7 @@ class DataImportAPIView(BaseAPIView):
                     status=status.HTTP_400_BAD_REQUEST
                 )
 
-            # Validation du fichier
+            # Validation du fichier (en-têtes seulement)
             validation_result = self.validate_file(csv_file)
             if not validation_result['valid']:
                 return Response({
@@ -1836,289 +1658,58 @@ class DataImportAPIView(BaseAPIView):
                     'errors': validation_result['errors']
                 }, status=status.HTTP_400_BAD_REQUEST)
 
-            # Lire et traiter le fichier CSV
-            file_data = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(file_data))
-
-            # Statistiques d'import
-            stats = {
-                'imported_records': 0,
-                'donors_created': 0,
-                'blood_units_created': 0,
-                'sites_created': 0,
-                'records_updated': 0,
-                'skipped_records': 0
-            }
-
-            errors = []
-            warnings = []
-
-            with transaction.atomic():
-                for row_num, row in enumerate(csv_reader, start=2):
-                    try:
-                        result = self.process_csv_row(row, row_num)
-
-                        # Mettre à jour les statistiques
-                        if result['imported']:
-                            stats['imported_records'] += 1
-                            if result.get('donor_created'): stats['donors_created'] += 1
-                            if result.get('unit_created'): stats['blood_units_created'] += 1
-                            if result.get('site_created'): stats['sites_created'] += 1
-                            if result.get('record_updated'): stats['records_updated'] += 1
-                        else:
-                            stats['skipped_records'] += 1
-
-                        if result.get('warnings'):
-                            warnings.extend(result['warnings'])
-
-                    except Exception as e:
-                        error_msg = f"Ligne {row_num}: {str(e)}"
-                        errors.append(error_msg)
-                        logger.warning(error_msg)
-
-                        # Limiter les erreurs affichées
-                        if len(errors) > 50:
-                            errors.append("... (erreurs supplémentaires tronquées)")
-                            break
+            try:
+                data_import = start_import(csv_file, resume_from=request.data.get('resume_from'))
+            except ValueError as e:
+                return Response({'success': False, 'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
-            processing_time = round(time.time() - start_time, 2)
+            if self.enqueue(data_import, csv_file):
+                return Response({
+                    **import_summary(data_import),
+                    'success': True,
+                    'message': "Import en file d'attente, suivi via l'historique des imports"
+                }, status=status.HTTP_202_ACCEPTED)
 
+        except Exception as e:
+            logger.error(f"CSV Import error: {str(e)}")
             return Response({
-                'success': True,
-                'imported_records': stats['imported_records'],
-                'skipped_records': stats['skipped_records'],
-                'errors': warnings + errors,  # Combiner warnings et erreurs
-                'total_errors': len(warnings + errors),
-                'processing_time': processing_time,
-                'summary': {
-                    'donors_created': stats['donors_created'],
-                    'blood_units_created': stats['blood_units_created'],
-                    'sites_created': stats['sites_created'],
-                    'records_updated': stats['records_updated']
-                }
-            })
+                'success': False,
+                'error': f'Erreur lors de l\'import: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+        # Traitement dans la requête (mode synchrone ou broker indisponible)
+        try:
+            data_import = run_import(data_import, csv_file)
         except UnicodeDecodeError:
             return Response({
-                'success': False,
+                **import_summary(data_import),
                 'error': 'Erreur d\'encodage. Assurez-vous que le fichier est en UTF-8.'
             }, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
-            logger.error(f"CSV Import error: {str(e)}")
+            # Les blocs déjà validés restent acquis : import_id permet la reprise
             return Response({
-                'success': False,
+                **import_summary(data_import),
                 'error': f'Erreur lors de l\'import: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-    def validate_file(self, csv_file):
-        """Validation du fichier CSV"""
-        errors = []
-
-        # Vérifier la taille (10MB max)
-        if csv_file.size > 10 * 1024 * 1024:
-            errors.append("Fichier trop volumineux (max 10MB)")
-
-        # Vérifier le type
-        if not csv_file.name.endswith('.csv'):
-            errors.append("Le fichier doit être au format CSV")
+        return Response(import_summary(data_import))
 
+    def enqueue(self, data_import, csv_file):
+        """Confie l'import à un worker Celery ; False si l'import doit être traité ici"""
+        if not settings.BLOOD_BANK_SETTINGS.get('DATA_IMPORT', {}).get('ASYNC', False):
+            return False
         try:
-            # Tester la lecture
-            content = csv_file.read().decode('utf-8')
-            csv_file.seek(0)  # Reset file pointer
-
-            # Vérifier les colonnes requises
-            csv_reader = csv.DictReader(io.StringIO(content))
-            headers = csv_reader.fieldnames or []
-
-            required_columns = ['record_id', 'donor_id', 'blood_type', 'donation_date']
-            missing_columns = [col for col in required_columns if col not in headers]
-
-            if missing_columns:
-                errors.append(f"Colonnes manquantes: {', '.join(missing_columns)}")
-
-        except UnicodeDecodeError:
-            errors.append("Erreur d'encodage. Utilisez l'encodage UTF-8.")
+            store_upload(data_import, csv_file)
+            run_data_import.delay(data_import.import_id)
+            return True
         except Exception as e:
-            errors.append(f"Erreur lors de la lecture du fichier: {str(e)}")
-
-        return {
-            'valid': len(errors) == 0,
-            'errors': errors
-        }
-
-    def process_csv_row(self, row, row_num):
-        """Traite une ligne du CSV avec gestion des erreurs détaillée"""
-        warnings = []
-        result = {
-            'imported': False,
-            'donor_created': False,
-            'unit_created': False,
-            'site_created': False,
-            'record_updated': False,
-            'warnings': []
-        }
-
-        # Nettoyer et valider les données
-        record_id = row.get('record_id', '').strip()
-        donor_id = row.get('donor_id', '').strip()
-
-        # Générer des IDs si manquants
-        if not record_id:
-            record_id = f"BB{str(row_num).zfill(6)}"
-            warnings.append(f"Ligne {row_num}: ID d'enregistrement généré automatiquement")
-
-        if not donor_id:
-            donor_id = f"D{str(row_num).zfill(6)}"
-            warnings.append(f"Ligne {row_num}: ID de donneur généré automatiquement")
-
-        # Vérifier si l'enregistrement existe déjà
-        if BloodUnit.objects.filter(unit_id=record_id).exists():
-            warnings.append(f"Ligne {row_num}: Enregistrement {record_id} déjà existant, ignoré")
-            result['warnings'] = warnings
-            return result
-
-        # Créer ou récupérer le site
-        collection_site = row.get('collection_site', 'Site Inconnu').strip() or 'Site Inconnu'
-        site, site_created = Site.objects.get_or_create(
-            site_id=f"SITE_{collection_site.replace(' ', '_').upper()}",
-            defaults={
-                'nom': collection_site,
-                'ville': 'Douala'  # Valeur par défaut
-            }
-        )
-
-        if site_created:
-            result['site_created'] = True
-
-        # Créer ou récupérer le donneur
-        donor_age = self.safe_int(row.get('donor_age'), 30)
-        donor_gender = row.get('donor_gender', 'M').strip()
-        blood_type = row.get('blood_type', 'O+').strip()
+            logger.warning(f"Import {data_import.pk} not queued, processing inline: {e}")
+            discard_upload(data_import)
+            return False
 
-        # Valider le groupe sanguin
-        valid_blood_types = [choice[0] for choice in Donor.BLOOD_TYPE_CHOICES]
-        if blood_type not in valid_blood_types:
-            warnings.append(f"Ligne {row_num}: Groupe sanguin '{blood_type}' invalide, remplacé par O+")
-            blood_type = 'O+'
-
-        # Calculer date de naissance approximative
-        try:
-            birth_year = date.today().year - donor_age
-            birth_date = date(birth_year, 1, 1)
-        except:
-            birth_date = date(1980, 1, 1)
-            warnings.append(f"Ligne {row_num}: Date de naissance calculée par défaut")
-
-        donor, donor_created = Donor.objects.get_or_create(
-            donor_id=donor_id,
-            defaults={
-                'first_name': f'Donneur_{donor_id}',
-                'last_name': 'Anonyme',
-                'date_of_birth': birth_date,
-                'gender': donor_gender if donor_gender in ['M', 'F'] else 'M',
-                'blood_type': blood_type,
-                'phone_number': '000000000'
-            }
-        )
-
-        if donor_created:
-            result['donor_created'] = True
-
-        # Traiter les dates
-        donation_date = self.parse_date(row.get('donation_date'))
-        if not donation_date:
-            donation_date = date.today()
-            warnings.append(f"Ligne {row_num}: Date de don manquante, utilisée date actuelle")
-
-        # Créer l'enregistrement de don
-        blood_record, record_created = BloodRecord.objects.get_or_create(
-            record_id=record_id,
-            defaults={
-                'site': site,
-                'screening_results': 'Valid',
-                'record_date': donation_date,
-                'quantity': 1
-            }
-        )
-
-        # Créer l'unité de sang
-        expiry_date = self.parse_date(row.get('expiry_date'))
-        if not expiry_date:
-            expiry_date = donation_date + timedelta(days=120)  # 120 jours par défaut
-
-        volume_ml = self.safe_int(row.get('collection_volume_ml'), 450)
-        hemoglobin = self.safe_float(row.get('hemoglobin_g_dl'))
-
-        # Déterminer le statut
-        unit_status = 'Available'
-        if expiry_date < date.today():
-            unit_status = 'Expired'
-            warnings.append(f"Ligne {row_num}: Unité expirée créée avec statut 'Expired'")
-
-        blood_unit, unit_created = BloodUnit.objects.get_or_create(
-            unit_id=record_id,
-            defaults={
-                'donor': donor,
-                'record': blood_record,
-                'collection_date': donation_date,
-                'volume_ml': volume_ml,
-                'hemoglobin_g_dl': hemoglobin,
-                'date_expiration': expiry_date,
-                'status': unit_status
-            }
-        )
-
-        if unit_created:
-            result['unit_created'] = True
-            result['imported'] = True
-        else:
-            result['record_updated'] = True
-            warnings.append(f"Ligne {row_num}: Enregistrement existant mis à jour")
-
-        result['warnings'] = warnings
-        return result
-
-    def safe_int(self, value, default=0):
-        """Conversion sécurisée en entier"""
-        try:
-            if not value or str(value).strip() == '':
-                return default
-            return int(float(str(value).strip()))
-        except (ValueError, TypeError):
-            return default
-
-    def safe_float(self, value, default=None):
-        """Conversion sécurisée en float"""
-        try:
-            if not value or str(value).strip() == '':
-                return default
-            return float(str(value).strip())
-        except (ValueError, TypeError):
-            return default
-
-    def parse_date(self, date_string):
-        """Parse une date avec plusieurs formats possibles"""
-        if not date_string or not str(date_string).strip():
-            return None
-
-        date_str = str(date_string).strip()
-
-        # Formats supportés
-        formats = [
-            '%Y-%m-%d',  # 2024-01-15
-            '%d/%m/%Y',  # 15/01/2024
-            '%d-%m-%Y',  # 15-01-2024
-            '%Y/%m/%d',  # 2024/01/15
-        ]
-
-        for fmt in formats:
-            try:
-                return datetime.strptime(date_str, fmt).date()
-            except ValueError:
-                continue
-
-        return None
+    def validate_file(self, csv_file):
+        """Validation du fichier CSV"""
+        return validate_upload(csv_file)
 
 @method_decorator(csrf_exempt, name='dispatch')
 class DataValidationAPIView(BaseAPIView):
@@ -2138,11 +1729,9 @@ class DataValidationAPIView(BaseAPIView):
             if not file_validation['valid']:
                 return Response(file_validation)
 
-            # Lire le contenu pour validation détaillée
-            file_data = csv_file.read().decode('utf-8')
-            csv_reader = csv.DictReader(io.StringIO(file_data))
-
-            validation_result = self.validate_csv_content(csv_reader)
+            # Validation détaillée sur un échantillon, lu en flux
+            with open_csv(csv_file) as csv_reader:
+                validation_result = self.validate_csv_content(csv_reader)
 
             return Response(validation_result)
 
@@ -2167,13 +1756,14 @@ class DataValidationAPIView(BaseAPIView):
             })
 
     def validate_file_structure(self, csv_file):
-        """Validation de la structure du fichier"""
+        """Validation de la structure du fichier (taille, extension, en-têtes : seule la première ligne est lue)"""
         errors = []
         warnings = []
 
         # Vérifier la taille
-        if csv_file.size > 10 * 1024 * 1024:
-            errors.append("Fichier trop volumineux (maximum 10MB)")
+        too_large = size_error(csv_file)
+        if too_large:
+            errors.append(too_large)
 
         if csv_file.size == 0:
             errors.append("Le fichier est vide")
@@ -2183,17 +1773,13 @@ class DataValidationAPIView(BaseAPIView):
             errors.append("Le fichier doit avoir l'extension .csv")
 
         try:
-            content = csv_file.read().decode('utf-8')
-            csv_file.seek(0)  # Reset pour usage ultérieur
+            with open_csv(csv_file) as csv_reader:
+                headers = csv_reader.fieldnames or []
 
-            if not content.strip():
+            if not headers:
                 errors.append("Le fichier CSV est vide")
                 return {'valid': False, 'errors': errors, 'warnings': warnings}
 
-            # Vérifier les en-têtes
-            csv_reader = csv.DictReader(io.StringIO(content))
-            headers = csv_reader.fieldnames or []
-
             required_columns = ['record_id', 'donor_id', 'blood_type', 'donation_date']
             optional_columns = ['collection_site', 'donor_age', 'donor_gender',
                                 'collection_volume_ml', 'hemoglobin_g_dl', 'expiry_date']
@@ -2218,7 +1804,11 @@ class DataValidationAPIView(BaseAPIView):
         }
 
     def validate_csv_content(self, csv_reader):
-        """Validation du contenu du CSV"""
+        """
+        Validation du contenu du CSV sur les VALIDATION_SAMPLE_ROWS premières
+        lignes ; ``sampled`` indique que le fichier en contient davantage
+        (elles seront validées bloc par bloc pendant l'import).
+        """
         errors = []
         warnings = []
         preview_data = []
@@ -2228,7 +1818,16 @@ class DataValidationAPIView(BaseAPIView):
         # Groupes sanguins valides
         valid_blood_types = [choice[0] for choice in Donor.BLOOD_TYPE_CHOICES]
 
-        for row_num, row in enumerate(csv_reader, start=2):
+        sample_size = settings.BLOOD_BANK_SETTINGS.get('DATA_IMPORT', {}).get('VALIDATION_SAMPLE_ROWS', 1000)
+        sample = list(itertools.islice(csv_reader, sample_size))
+        sampled = next(csv_reader, None) is not None
+
+        # Doublons : une seule requête pour tout l'échantillon
+        existing_ids = set(BloodUnit.objects.filter(
+            unit_id__in=[(row.get('record_id') or '').strip() for row in sample]
+        ).values_list('unit_id', flat=True))
+
+        for row_num, row in enumerate(sample, start=2):
             total_rows += 1
             row_errors = []
             row_warnings = []
@@ -2280,7 +1879,7 @@ class DataValidationAPIView(BaseAPIView):
                     row_errors.append(f"Ligne {row_num}: Taux d'hémoglobine invalide '{hemoglobin}'")
 
             # Vérifier les doublons
-            if record_id and BloodUnit.objects.filter(unit_id=record_id).exists():
+            if record_id and record_id in existing_ids:
                 row_warnings.append(f"Ligne {row_num}: Enregistrement {record_id} existe déjà (sera ignoré)")
 
             # Collecter les erreurs et warnings
@@ -2309,7 +1908,8 @@ class DataValidationAPIView(BaseAPIView):
             'warnings': warnings,
             'preview': preview_data,
             'total_rows': total_rows,
-            'valid_rows': valid_rows
+            'valid_rows': valid_rows,
+            'sampled': sampled
         }
 
     def parse_date(self, date_string):
@@ -2370,28 +1970,83 @@ def download_csv_template(request):
 
     return response
 
-# Vue pour l'historique des imports (optionnelle)
+# Historique et suivi des imports
 class ImportHistoryAPIView(BaseAPIView):
-    """Historique des imports de données"""
+    """Historique des imports de données : statut, progression, débit, échantillon d'erreurs"""
 
-    def get(self, request):
-        # Cette vue pourrait être implémentée pour traquer les imports
-        # Pour l'instant, retourner des données factices
+    def get(self, request, import_id=None):
+        if import_id:
+            return Response(import_summary(get_object_or_404(DataImport, pk=import_id)))
+
+        queryset = DataImport.objects.all()
+
+        import_status = request.query_params.get('status')
+        try:
+            date_from = parse_export_date(request.query_params.get('date_from'))
+            date_to = parse_export_date(request.query_params.get('date_to'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        if import_status:
+            queryset = queryset.filter(status=import_status)
+        if date_from:
+            queryset = queryset.filter(started_at__date__gte=date_from)
+        if date_to:
+            queryset = queryset.filter(started_at__date__lte=date_to)
+
+        try:
+            page = max(int(request.query_params.get('page', 1)), 1)
+            page_size = min(max(int(request.query_params.get('page_size', 20)), 1), 100)
+        except ValueError:
+            return Response({'error': 'Paramètres de pagination invalides'}, status=status.HTTP_400_BAD_REQUEST)
+
+        imports = queryset[(page - 1) * page_size:page * page_size]
         return Response({
-            'results': [],
-            'count': 0,
-            'message': 'Historique des imports non encore implémenté'
+            'results': [import_summary(data_import) for data_import in imports],
+            'count': queryset.count(),
+            'page': page,
+            'page_size': page_size
         })
 
-@global_allow_any
 # ==================== CRUD VIEWS ====================
-class BloodUnitListAPIView(generics.ListAPIView):
+class ValuesListMixin:
+    """
+    Listes (GET) lues en .values() et sérialisées par ``list_serializer_class`` ;
+    pagination par page ou par curseur (?pagination=cursor). Création inchangée.
+    """
+    list_serializer_class = None
+    pagination_class = KeysetPagination
+
+    def get_serializer_class(self):
+        if self.request.method == 'GET':
+            return self.list_serializer_class
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.request.method == 'GET':
+            queryset = self.list_serializer_class.values(queryset)
+        return queryset
+
+class BulkCreateMixin:
+    """
+    POST d'une liste d'objets : création en lot, validée avec les objets liés
+    et les clés existantes préchargés pour tout le lot (PrefetchListSerializer).
+    """
+
+    def get_serializer(self, *args, **kwargs):
+        if isinstance(kwargs.get('data'), list):
+            kwargs['many'] = True
+            kwargs['max_length'] = settings.BLOOD_BANK_SETTINGS.get('BULK_CREATE', {}).get('MAX_ITEMS', 1000)
+        return super().get_serializer(*args, **kwargs)
+
+@global_allow_any
+class BloodUnitListAPIView(ValuesListMixin, generics.ListAPIView):
     """Liste des unités de sang avec filtrage"""
     serializer_class = BloodUnitSerializer
-    pagination_class = StandardResultsSetPagination
+    list_serializer_class = BloodUnitListSerializer
 
     def get_queryset(self):
-        queryset = BloodUnit.objects.select_related('donor', 'record__site').all()
+        queryset = BloodUnit.objects.all()
 
         # Filtres
         blood_type = self.request.query_params.get('blood_type')
@@ -2399,7 +2054,7 @@ class BloodUnitListAPIView(generics.ListAPIView):
         expiring_days = self.request.query_params.get('expiring_days')
 
         if blood_type:
-            queryset = queryset.filter(donor__blood_type=blood_type)
+            queryset = queryset.filter(blood_type=blood_type)
 
         if status:
             queryset = queryset.filter(status=status)
@@ -2418,13 +2073,13 @@ class BloodUnitListAPIView(generics.ListAPIView):
         return queryset.order_by('-collection_date')
 
 @global_allow_any
-class BloodRequestListCreateAPIView(generics.ListCreateAPIView):
+class BloodRequestListCreateAPIView(BulkCreateMixin, ValuesListMixin, generics.ListCreateAPIView):
     """Liste et création des demandes de sang"""
     serializer_class = BloodRequestSerializer
-    pagination_class = StandardResultsSetPagination
+    list_serializer_class = BloodRequestListSerializer
 
     def get_queryset(self):
-        queryset = BloodRequest.objects.select_related('department', 'site').all()
+        queryset = BloodRequest.objects.all()
 
         # Filtres
         status = self.request.query_params.get('status')
@@ -2462,15 +2117,13 @@ class BloodRequestDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
             raise Http404("Demande de sang non trouvée")
 
 @global_allow_any
-class BloodConsumptionListCreateAPIView(generics.ListCreateAPIView):
+class BloodConsumptionListCreateAPIView(BulkCreateMixin, ValuesListMixin, generics.ListCreateAPIView):
     """Liste et création des consommations de sang"""
     serializer_class = BloodConsumptionSerializer
-    pagination_class = StandardResultsSetPagination
+    list_serializer_class = BloodConsumptionListSerializer
 
     def get_queryset(self):
-        queryset = BloodConsumption.objects.select_related(
-            'request', 'unit__donor', 'patient'
-        ).all()
+        queryset = BloodConsumption.objects.all()
 
         # Filtres
         date_from = self.request.query_params.get('date_from')
@@ -2490,7 +2143,7 @@ class BloodConsumptionListCreateAPIView(generics.ListCreateAPIView):
                 pass
 
         if blood_type:
-            queryset = queryset.filter(unit__donor__blood_type=blood_type)
+            queryset = queryset.filter(blood_type=blood_type)
 
         return queryset.order_by('-date')
 
@@ -2505,167 +2158,151 @@ class InventoryAnalyticsAPIView(BaseAPIView):
         try:
             days = int(period)
 
-            # Cache spécifique à la période
-            cache_key = cache_key_builder('inventory_analytics', period)
-            cached_result = safe_cache_get(cache_key)
-
-            if cached_result:
-                logger.info(f"Analytics for {period} days served from Redis cache")
-                return Response(cached_result)
+            # Cache spécifique à la période, recalculé par un seul worker
+            result = get_or_compute(
+                versioned_key_builder(INVENTORY_CACHE, 'inventory_analytics', period),
+                lambda: self.build_analytics(days),
+                timeout=3600,  # 1 heure
+                stats_name='inventory_analytics'
+            )
+            return Response(result)
 
-            start_time = time.time()
-            start_date = timezone.now().date() - timedelta(days=days)
+        except Exception as e:
+            logger.error(f"Analytics error: {str(e)}")
+            return Response(
+                {'error': 'Erreur lors de la génération des analytics'},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
 
-            # Évolution des stocks par groupe sanguin
-            stock_evolution = self.get_stock_evolution_cached(start_date, days)
+    def build_analytics(self, days):
+        """Calcul de toutes les sections analytics pour la période"""
+        start_time = time.time()
+        start_date = timezone.now().date() - timedelta(days=days)
 
-            # Taux d'utilisation
-            utilization_rates = self.get_utilization_rates_cached(start_date)
+        # Agrégats journaliers (DailyDemandStat) si initialisés, sinon tables brutes
+        self.use_daily_stats = daily_stats_ready()
 
-            # Analyse des pertes - Version PostgreSQL
-            waste_analysis = self.get_waste_analysis_cached(start_date)
+        # Évolution des stocks par groupe sanguin
+        stock_evolution = self.get_stock_evolution_cached(start_date, days)
 
-            # Tendances de demande - Version PostgreSQL
-            demand_trends = self.get_demand_trends_cached(start_date)
+        # Taux d'utilisation
+        utilization_rates = self.get_utilization_rates_cached(start_date)
 
-            # Métriques de performance
-            performance_metrics = self.get_performance_metrics_cached(start_date)
+        # Analyse des pertes - Version PostgreSQL
+        waste_analysis = self.get_waste_analysis_cached(start_date)
 
-            execution_time = time.time() - start_time
+        # Tendances de demande - Version PostgreSQL
+        demand_trends = self.get_demand_trends_cached(start_date)
 
-            result = {
-                'period_days': days,
-                'stock_evolution': stock_evolution,
-                'utilization_rates': utilization_rates,
-                'waste_analysis': waste_analysis,
-                'demand_trends': demand_trends,
-                'performance_metrics': performance_metrics,
-                'generated_at': timezone.now().isoformat(),
-                'execution_time_seconds': round(execution_time, 2),
-                'cache_backend': 'Redis Cloud'
-            }
+        # Métriques de performance
+        performance_metrics = self.get_performance_metrics_cached(start_date)
 
-            # Cache pour 1 heure
-            safe_cache_set(cache_key, result, timeout=3600)
-            logger.info(f"Analytics generated and cached in {execution_time:.2f}s")
+        execution_time = time.time() - start_time
 
-            return Response(result)
+        result = {
+            'period_days': days,
+            'stock_evolution': stock_evolution,
+            'utilization_rates': utilization_rates,
+            'waste_analysis': waste_analysis,
+            'demand_trends': demand_trends,
+            'performance_metrics': performance_metrics,
+            'generated_at': timezone.now().isoformat(),
+            'execution_time_seconds': round(execution_time, 2),
+            'cache_backend': 'Redis Cloud'
+        }
 
-        except Exception as e:
-            logger.error(f"Analytics error: {str(e)}")
-            return Response(
-                {'error': 'Erreur lors de la génération des analytics'},
-                status=status.HTTP_500_INTERNAL_SERVER_ERROR
-            )
+        logger.info(f"Analytics generated in {execution_time:.2f}s")
+        return result
 
     def get_stock_evolution_cached(self, start_date, days):
         """Évolution des stocks avec cache par tranches"""
-        cache_key = cache_key_builder('stock_evolution', start_date.isoformat(), days)
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            return cached_result
-
-        evolution = self.get_stock_evolution(start_date, days)
-        safe_cache_set(cache_key, evolution, timeout=1800)  # 30 minutes
-        return evolution
+        return get_or_compute(
+            versioned_key_builder(INVENTORY_CACHE, 'stock_evolution', start_date.isoformat(), days),
+            lambda: self.get_stock_evolution(start_date, days),
+            timeout=1800,  # 30 minutes
+            stats_name='analytics_stock_evolution'
+        )
 
     def get_utilization_rates_cached(self, start_date):
         """Taux d'utilisation avec cache"""
-        cache_key = cache_key_builder('utilization_rates', start_date.isoformat())
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            return cached_result
-
-        rates = self.get_utilization_rates(start_date)
-        safe_cache_set(cache_key, rates, timeout=1800)  # 30 minutes
-        return rates
+        return get_or_compute(
+            versioned_key_builder(INVENTORY_CACHE, 'utilization_rates', start_date.isoformat()),
+            lambda: self.get_utilization_rates(start_date),
+            timeout=1800,  # 30 minutes
+            stats_name='analytics_utilization_rates'
+        )
 
     def get_waste_analysis_cached(self, start_date):
         """Analyse des pertes avec cache"""
-        cache_key = cache_key_builder('waste_analysis', start_date.isoformat())
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            return cached_result
-
-        analysis = self.get_waste_analysis_postgresql(start_date)
-        safe_cache_set(cache_key, analysis, timeout=1800)  # 30 minutes
-        return analysis
+        return get_or_compute(
+            versioned_key_builder(INVENTORY_CACHE, 'waste_analysis', start_date.isoformat()),
+            lambda: self.get_waste_analysis_postgresql(start_date),
+            timeout=1800,  # 30 minutes
+            stats_name='analytics_waste_analysis'
+        )
 
     def get_demand_trends_cached(self, start_date):
         """Tendances de demande avec cache"""
-        cache_key = cache_key_builder('demand_trends', start_date.isoformat())
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            return cached_result
-
-        trends = self.get_demand_trends_postgresql(start_date)
-        safe_cache_set(cache_key, trends, timeout=1800)  # 30 minutes
-        return trends
+        return get_or_compute(
+            cache_key_builder('demand_trends', start_date.isoformat()),
+            lambda: self.get_demand_trends_postgresql(start_date),
+            timeout=1800,  # 30 minutes
+            stats_name='analytics_demand_trends'
+        )
 
     def get_performance_metrics_cached(self, start_date):
         """Métriques de performance avec cache"""
-        cache_key = cache_key_builder('performance_metrics', start_date.isoformat())
-        cached_result = safe_cache_get(cache_key)
-
-        if cached_result:
-            return cached_result
-
-        metrics = self.get_performance_metrics(start_date)
-        safe_cache_set(cache_key, metrics, timeout=1800)  # 30 minutes
-        return metrics
+        return get_or_compute(
+            versioned_key_builder(INVENTORY_CACHE, 'performance_metrics', start_date.isoformat()),
+            lambda: self.get_performance_metrics(start_date),
+            timeout=1800,  # 30 minutes
+            stats_name='analytics_performance_metrics'
+        )
 
     def get_stock_evolution(self, start_date, days):
-        """Évolution des stocks sur la période"""
-        evolution = []
-
-        for i in range(days):
-            check_date = start_date + timedelta(days=i)
-
-            daily_stocks = {}
-            for blood_type in ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']:
-                stock_count = BloodUnit.objects.filter(
-                    donor__blood_type=blood_type,
-                    collection_date__lte=check_date,
-                    date_expiration__gt=check_date
-                ).count()
-                daily_stocks[blood_type] = stock_count
-
-            evolution.append({
-                'date': check_date.isoformat(),
-                'stocks': daily_stocks,
-                'total': sum(daily_stocks.values())
-            })
-
-        return evolution
+        """Évolution des stocks sur la période (requêtes en nombre constant)"""
+        return stock_levels(start_date, start_date + timedelta(days=days - 1))
 
     def get_utilization_rates(self, start_date):
-        """Taux d'utilisation par groupe sanguin"""
-        rates = []
+        """Taux d'utilisation par groupe sanguin (une requête groupée)"""
+        if getattr(self, 'use_daily_stats', False):
+            return self.get_utilization_rates_from_daily_stats(start_date)
+
+        totals = {
+            item['blood_type']: item
+            for item in BloodUnit.objects.filter(collection_date__gte=start_date)
+            .values('blood_type')
+            .annotate(
+                collected=Count('unit_id'),
+                used=Count('unit_id', filter=Q(status='Used')),
+                expired=Count('unit_id', filter=Q(status='Expired'))
+            )
+            .order_by()
+        }
+        return self.format_utilization_rates(totals)
+
+    def get_utilization_rates_from_daily_stats(self, start_date):
+        """Taux d'utilisation depuis les agrégats journaliers (une requête)"""
+        totals = {
+            item['blood_type']: item
+            for item in DailyDemandStat.objects.filter(date__gte=start_date)
+            .values('blood_type')
+            .annotate(
+                collected=Sum('collected_units'),
+                used=Sum('used_units'),
+                expired=Sum('expired_units')
+            )
+        }
+        return self.format_utilization_rates(totals)
 
+    def format_utilization_rates(self, totals):
+        """{groupe: {collected, used, expired}} -> taux par groupe sanguin"""
+        rates = []
         for blood_type in ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']:
-            # Unités collectées
-            collected = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
-                collection_date__gte=start_date
-            ).count()
-
-            # Unités utilisées
-            used = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
-                collection_date__gte=start_date,
-                status='Used'
-            ).count()
-
-            # Unités expirées
-            expired = BloodUnit.objects.filter(
-                donor__blood_type=blood_type,
-                collection_date__gte=start_date,
-                status='Expired'
-            ).count()
+            item = totals.get(blood_type, {})
+            collected = item.get('collected') or 0
+            used = item.get('used') or 0
+            expired = item.get('expired') or 0
 
             utilization_rate = (used / collected * 100) if collected > 0 else 0
             waste_rate = (expired / collected * 100) if collected > 0 else 0
@@ -2691,7 +2328,7 @@ class InventoryAnalyticsAPIView(BaseAPIView):
                 date_expiration__gte=start_date
             ).annotate(
                 month=TruncMonth('date_expiration')
-            ).values('month', 'donor__blood_type').annotate(
+            ).values('month', 'blood_type').annotate(
                 count=Count('unit_id'),
                 total_volume=Sum('volume_ml')
             ).order_by('month')
@@ -2702,7 +2339,7 @@ class InventoryAnalyticsAPIView(BaseAPIView):
                 month_str = item['month'].strftime('%Y-%m') if item['month'] else 'Unknown'
                 monthly_waste.append({
                     'month': month_str,
-                    'blood_type': item['donor__blood_type'],
+                    'blood_type': item['blood_type'],
                     'count': item['count'],
                     'total_volume': item['total_volume'] or 0
                 })
@@ -2734,15 +2371,26 @@ class InventoryAnalyticsAPIView(BaseAPIView):
         """Tendances de demande - Version corrigée"""
         try:
             # Utiliser TruncWeek correctement importé
-            weekly_demands = BloodRequest.objects.filter(
-                request_date__gte=start_date
-            ).annotate(
-                week=TruncWeek('request_date'),
-                year=Extract('request_date', 'year'),
-                week_number=Extract('request_date', 'week')
-            ).values('week', 'year', 'week_number', 'blood_type').annotate(
-                total_quantity=Sum('quantity')
-            ).order_by('week')
+            if getattr(self, 'use_daily_stats', False):
+                weekly_demands = DailyDemandStat.objects.filter(
+                    date__gte=start_date
+                ).annotate(
+                    week=TruncWeek('date'),
+                    year=Extract('date', 'year'),
+                    week_number=Extract('date', 'week')
+                ).values('week', 'year', 'week_number', 'blood_type').annotate(
+                    total_quantity=Sum('requested_units')
+                ).filter(requests_count__gt=0).order_by('week')
+            else:
+                weekly_demands = BloodRequest.objects.filter(
+                    request_date__gte=start_date
+                ).annotate(
+                    week=TruncWeek('request_date'),
+                    year=Extract('request_date', 'year'),
+                    week_number=Extract('request_date', 'week')
+                ).values('week', 'year', 'week_number', 'blood_type').annotate(
+                    total_quantity=Sum('quantity')
+                ).order_by('week')
 
             # Conversion en format lisible
             weekly_trends = []
@@ -2779,11 +2427,18 @@ class InventoryAnalyticsAPIView(BaseAPIView):
     def get_peak_demand_days(self, start_date):
         """Jours de pic de demande"""
         try:
-            daily_demands = BloodRequest.objects.filter(
-                request_date__gte=start_date
-            ).values('request_date').annotate(
-                total_quantity=Sum('quantity')
-            ).order_by('-total_quantity')[:10]
+            if getattr(self, 'use_daily_stats', False):
+                daily_demands = DailyDemandStat.objects.filter(
+                    date__gte=start_date, requests_count__gt=0
+                ).values(request_date=F('date')).annotate(
+                    total_quantity=Sum('requested_units')
+                ).order_by('-total_quantity')[:10]
+            else:
+                daily_demands = BloodRequest.objects.filter(
+                    request_date__gte=start_date
+                ).values('request_date').annotate(
+                    total_quantity=Sum('quantity')
+                ).order_by('-total_quantity')[:10]
 
             return [
                 {
@@ -2797,27 +2452,40 @@ class InventoryAnalyticsAPIView(BaseAPIView):
             return []
 
     def get_performance_metrics(self, start_date):
-        """Métriques de performance globales"""
+        """Métriques de performance globales (une requête groupée par table)"""
         try:
-            # Temps moyen de satisfaction des demandes
-            fulfilled_requests = BloodRequest.objects.filter(
-                request_date__gte=start_date,
-                status='Fulfilled'
+            week_start = timezone.now().date() - timedelta(days=7)
+            use_daily_stats = getattr(self, 'use_daily_stats', False)
+
+            # Stock disponible, tous groupes en une requête
+            current_stocks = dict(
+                BloodUnit.objects.filter(status='Available')
+                .values_list('blood_type')
+                .annotate(count=Count('unit_id'))
+                .order_by()
             )
 
+            # Consommation des 7 derniers jours, tous groupes en une requête
+            if use_daily_stats:
+                week_consumptions = dict(
+                    DailyDemandStat.objects.filter(date__gte=week_start)
+                    .values_list('blood_type')
+                    .annotate(total=Sum('consumed_units'))
+                    .order_by()
+                )
+            else:
+                week_consumptions = dict(
+                    BloodConsumption.objects.filter(date__gte=week_start)
+                    .values_list('blood_type')
+                    .annotate(total=Count('id'))
+                    .order_by()
+                )
+
             # Stock de sécurité par groupe sanguin
             safety_stock_status = []
             for blood_type in ['A+', 'A-', 'B+', 'B-', 'AB+', 'AB-', 'O+', 'O-']:
-                current_stock = BloodUnit.objects.filter(
-                    donor__blood_type=blood_type,
-                    status='Available'
-                ).count()
-
-                # Consommation moyenne des 7 derniers jours
-                week_consumption = BloodConsumption.objects.filter(
-                    unit__donor__blood_type=blood_type,
-                    date__gte=timezone.now().date() - timedelta(days=7)
-                ).count()
+                current_stock = current_stocks.get(blood_type, 0)
+                week_consumption = week_consumptions.get(blood_type) or 0
 
                 avg_daily_consumption = week_consumption / 7
                 days_of_supply = current_stock / avg_daily_consumption if avg_daily_consumption > 0 else float('inf')
@@ -2829,12 +2497,23 @@ class InventoryAnalyticsAPIView(BaseAPIView):
                     'status': 'safe' if days_of_supply >= 7 else 'critical' if days_of_supply < 3 else 'warning'
                 })
 
-            total_requests = BloodRequest.objects.filter(request_date__gte=start_date).count()
-            fulfillment_rate = round(fulfilled_requests.count() / total_requests * 100, 2) if total_requests > 0 else 0
+            # Demandes de la période et demandes satisfaites en une requête
+            request_totals = BloodRequest.objects.filter(request_date__gte=start_date).aggregate(
+                total=Count('request_id'),
+                fulfilled=Count('request_id', filter=Q(status='Fulfilled'))
+            )
+            fulfilled_requests = request_totals['fulfilled']
+            if use_daily_stats:
+                total_requests = DailyDemandStat.objects.filter(
+                    date__gte=start_date
+                ).aggregate(total=Sum('requests_count'))['total'] or 0
+            else:
+                total_requests = request_totals['total']
+            fulfillment_rate = round(fulfilled_requests / total_requests * 100, 2) if total_requests > 0 else 0
 
             return {
                 'total_requests': total_requests,
-                'fulfilled_requests': fulfilled_requests.count(),
+                'fulfilled_requests': fulfilled_requests,
                 'fulfillment_rate': fulfillment_rate,
                 'safety_stock_status': safety_stock_status,
                 'average_stock_turnover': self.calculate_stock_turnover(start_date)
@@ -2852,14 +2531,18 @@ class InventoryAnalyticsAPIView(BaseAPIView):
     def calculate_stock_turnover(self, start_date):
         """Calcule la rotation moyenne des stocks"""
         try:
-            total_used = BloodUnit.objects.filter(
-                collection_date__gte=start_date,
-                status='Used'
-            ).count()
-
-            avg_stock = BloodUnit.objects.filter(
-                collection_date__gte=start_date
-            ).count() / 2  # Approximation du stock moyen
+            if getattr(self, 'use_daily_stats', False):
+                totals = DailyDemandStat.objects.filter(date__gte=start_date).aggregate(
+                    used=Sum('used_units'),
+                    collected=Sum('collected_units')
+                )
+            else:
+                totals = BloodUnit.objects.filter(collection_date__gte=start_date).aggregate(
+                    used=Count('unit_id', filter=Q(status='Used')),
+                    collected=Count('unit_id')
+                )
+            total_used = totals['used'] or 0
+            avg_stock = (totals['collected'] or 0) / 2  # Approximation du stock moyen
 
             return round(total_used / avg_stock, 2) if avg_stock > 0 else 0
         except:
@@ -2869,26 +2552,31 @@ class InventoryAnalyticsAPIView(BaseAPIView):
 @global_allow_any
 # ==================== REPORTING VIEWS ====================
 class ReportExportAPIView(BaseAPIView):
-    """Export de rapports en CSV"""
+    """
+    Export de rapports en flux (csv, ndjson, parquet, arrow).
+    Paramètres : type, format, date_from / date_to (YYYY-MM-DD), gzip=1
+    """
+
+    def perform_content_negotiation(self, request, force=False):
+        # ?format= désigne le format du fichier, pas un renderer DRF
+        return super().perform_content_negotiation(request, force=True)
 
     def get(self, request):
         report_type = request.GET.get('type', 'inventory')
         format_type = request.GET.get('format', 'csv')
+        compress = request.GET.get('gzip', '').lower() in ('1', 'true', 'yes')
 
         try:
-            if report_type == 'inventory':
-                return self.export_inventory_report(format_type)
-            elif report_type == 'consumption':
-                return self.export_consumption_report(format_type)
-            elif report_type == 'waste':
-                return self.export_waste_report(format_type)
-            elif report_type == 'donors':
-                return self.export_donors_report(format_type)
-            else:
-                return Response(
-                    {'error': 'Type de rapport non supporté'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+            return stream_report(
+                report_type,
+                format_type=format_type,
+                date_from=parse_export_date(request.GET.get('date_from')),
+                date_to=parse_export_date(request.GET.get('date_to')),
+                compress=compress
+            )
+
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
         except Exception as e:
             logger.error(f"Report export error: {str(e)}")
@@ -2897,125 +2585,6 @@ class ReportExportAPIView(BaseAPIView):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
-    def export_inventory_report(self, format_type):
-        """Export du rapport d'inventaire"""
-        response = HttpResponse(content_type='text/csv')
-        response[
-            'Content-Disposition'] = f'attachment; filename="inventory_report_{timezone.now().strftime("%Y%m%d")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Unit ID', 'Blood Type', 'Status', 'Collection Date',
-            'Expiry Date', 'Volume (ml)', 'Hemoglobin (g/dl)',
-            'Site', 'Days to Expiry'
-        ])
-
-        units = BloodUnit.objects.select_related('donor', 'record__site').all()
-
-        for unit in units:
-            writer.writerow([
-                unit.unit_id,
-                unit.donor.blood_type,
-                unit.status,
-                unit.collection_date,
-                unit.date_expiration,
-                unit.volume_ml,
-                unit.hemoglobin_g_dl or '',
-                unit.record.site.nom,
-                unit.days_until_expiry
-            ])
-
-        return response
-
-    def export_consumption_report(self, format_type):
-        """Export du rapport de consommation"""
-        response = HttpResponse(content_type='text/csv')
-        response[
-            'Content-Disposition'] = f'attachment; filename="consumption_report_{timezone.now().strftime("%Y%m%d")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Date', 'Unit ID', 'Blood Type', 'Patient',
-            'Department', 'Volume', 'Request ID'
-        ])
-
-        consumptions = BloodConsumption.objects.select_related(
-            'unit__donor', 'patient', 'request__department'
-        ).all()
-
-        for consumption in consumptions:
-            writer.writerow([
-                consumption.date,
-                consumption.unit.unit_id,
-                consumption.unit.donor.blood_type,
-                f"{consumption.patient.first_name} {consumption.patient.last_name}",
-                consumption.request.department.name,
-                consumption.volume,
-                consumption.request.request_id
-            ])
-
-        return response
-
-    def export_waste_report(self, format_type):
-        """Export du rapport de gaspillage"""
-        response = HttpResponse(content_type='text/csv')
-        response[
-            'Content-Disposition'] = f'attachment; filename="waste_report_{timezone.now().strftime("%Y%m%d")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Unit ID', 'Blood Type', 'Collection Date',
-            'Expiry Date', 'Volume (ml)', 'Site', 'Days Expired'
-        ])
-
-        expired_units = BloodUnit.objects.filter(status='Expired').select_related('donor', 'record__site')
-
-        for unit in expired_units:
-            days_expired = (timezone.now().date() - unit.date_expiration).days
-            writer.writerow([
-                unit.unit_id,
-                unit.donor.blood_type,
-                unit.collection_date,
-                unit.date_expiration,
-                unit.volume_ml,
-                unit.record.site.nom,
-                days_expired
-            ])
-
-        return response
-
-    def export_donors_report(self, format_type):
-        """Export du rapport des donneurs"""
-        response = HttpResponse(content_type='text/csv')
-        response[
-            'Content-Disposition'] = f'attachment; filename="donors_report_{timezone.now().strftime("%Y%m%d")}.csv"'
-
-        writer = csv.writer(response)
-        writer.writerow([
-            'Donor ID', 'Name', 'Age', 'Gender', 'Blood Type',
-            'Phone', 'Total Donations', 'Last Donation'
-        ])
-
-        donors = Donor.objects.all()
-
-        for donor in donors:
-            total_donations = BloodUnit.objects.filter(donor=donor).count()
-            last_donation = BloodUnit.objects.filter(donor=donor).order_by('-collection_date').first()
-            last_donation_date = last_donation.collection_date if last_donation else ''
-
-            writer.writerow([
-                donor.donor_id,
-                f"{donor.first_name} {donor.last_name}",
-                donor.age,
-                donor.get_gender_display(),
-                donor.blood_type,
-                donor.phone_number,
-                total_donations,
-                last_donation_date
-            ])
-
-        return response
-
 @global_allow_any
 # ==================== CONFIGURATION VIEWS ====================
 class SystemConfigAPIView(BaseAPIView):
@@ -3087,10 +2656,10 @@ def blood_compatibility(request):
 # Dans views.py, ajouter ces vues après les vues existantes
 @global_allow_any
 # ==================== DONORS CRUD VIEWS ====================
-class DonorListCreateAPIView(generics.ListCreateAPIView):
+class DonorListCreateAPIView(BulkCreateMixin, ValuesListMixin, generics.ListCreateAPIView):
     """Liste et création des donneurs"""
     serializer_class = DonorSerializer
-    pagination_class = StandardResultsSetPagination
+    list_serializer_class = DonorListSerializer
 
     def get_queryset(self):
         queryset = Donor.objects.all()
@@ -3119,10 +2688,10 @@ class DonorDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
 
 @global_allow_any
 # ==================== PATIENTS CRUD VIEWS ====================
-class PatientListCreateAPIView(generics.ListCreateAPIView):
+class PatientListCreateAPIView(BulkCreateMixin, ValuesListMixin, generics.ListCreateAPIView):
     """Liste et création des patients"""
     serializer_class = PatientSerializer
-    pagination_class = StandardResultsSetPagination
+    list_serializer_class = PatientListSerializer
 
     def get_queryset(self):
         queryset = Patient.objects.all()
@@ -3150,10 +2719,10 @@ class PatientDetailAPIView(generics.RetrieveUpdateDestroyAPIView):
 
 @global_allow_any
 # ==================== SITES CRUD VIEWS ====================
-class SiteListCreateAPIView(generics.ListCreateAPIView):
+class SiteListCreateAPIView(BulkCreateMixin, generics.ListCreateAPIView):
     """Liste et création des sites"""
     serializer_class = SiteSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = KeysetPagination
 
     def get_queryset(self):
         queryset = Site.objects.all()
@@ -3591,6 +3160,9 @@ def health_check(request):
                 'ai_system': {
                     'status': ai_status,
                     'modules': ai_modules
+                },
+                'expiry_sweep': {
+                    'last_run': last_sweep()
                 }
             },
             'system_info': {
@@ -3722,6 +3294,7 @@ def system_metrics(request):
             "memory_usage": psutil.virtual_memory().percent,
             "disk_usage": psutil.disk_usage('/').percent,
             "process_count": len(psutil.pids()),
+            "cache": get_cache_stats(),
             "timestamp": timezone.now().isoformat()
         }
 
@@ -3733,6 +3306,7 @@ def system_metrics(request):
             "memory_usage": "N/A",
             "disk_usage": "N/A",
             "process_count": "N/A",
+            "cache": get_cache_stats(),
             "timestamp": timezone.now().isoformat(),
             "note": "psutil not available"
         })
@@ -0,0 +1,6 @@
+"""
+Initialisation du projet avec Celery
+"""
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -0,0 +1,18 @@
+"""
+Configuration Celery pour le service bloodbank
+"""
+import os
+
+from celery import Celery
+
+# Définit le module de settings Django par défaut pour Celery
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'bloodbank.settings')
+
+# Crée l'instance Celery
+app = Celery('bloodbank')
+
+# Configure Celery avec les settings Django (préfixe CELERY_)
+app.config_from_object('django.conf:settings', namespace='CELERY')
+
+# Auto-découverte des tâches (app/tasks.py)
+app.autodiscover_tasks()
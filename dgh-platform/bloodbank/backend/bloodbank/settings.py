@@ -451,6 +451,15 @@ if REDIS_URL and not DEBUG:
     except Exception as e:
         print(f"Redis configuration failed, using local memory cache: {e}")
 
+# Stale-while-revalidate et verrous de recalcul (app.utils.cache_utils.get_or_compute)
+CACHE_REFRESH_CONFIG = {
+    'STALE_FACTOR': int(os.getenv('CACHE_STALE_FACTOR', 3)),  # durée de vie = timeout × facteur
+    'LOCK_TIMEOUT': 60,  # secondes, au-delà le verrou d'un worker mort expire
+    'LOCK_WAIT': 5,  # attente max de la valeur calculée par un autre worker
+    'EARLY_EXPIRATION_BETA': 1.0,  # 0 désactive l'expiration anticipée probabiliste
+    'STATS_ENABLED': True,
+}
+
 # ==================== SECURITY ENHANCEMENTS ====================
 # Enhanced security settings
 
@@ -488,6 +497,38 @@ AI_FORECASTING_CONFIG = {
             'max_q': 3,
         }
     },
+    'MODEL_REGISTRY': {
+        # Modèles entraînés hors requête (python manage.py train_forecast_models)
+        'ROOT': config('MODEL_REGISTRY_ROOT', default=str(BASE_DIR / 'ml_models')),
+        'KEEP_VERSIONS': config('MODEL_REGISTRY_KEEP_VERSIONS', default=3, cast=int),
+    },
+    'TRAINING': {
+        # Entraînement parallèle (groupe sanguin × méthode × fold) ; 0 = nombre de cœurs
+        'MAX_WORKERS': config('FORECAST_TRAINING_WORKERS', default=0, cast=int),
+        # Plafond d'espace d'adressage (RLIMIT_AS) par worker (Mo) ; 0 = pas de plafond.
+        # Il compte la mémoire virtuelle (threads BLAS, allocateur), bien au-delà de
+        # la mémoire réellement utilisée : à dimensionner largement si activé
+        'WORKER_MEMORY_MB': config('FORECAST_TRAINING_WORKER_MEMORY_MB', default=0, cast=int),
+        # Budget global d'une session d'entraînement (secondes)
+        'TIME_BUDGET': config('FORECAST_TRAINING_TIME_BUDGET', default=1800, cast=int),
+    },
+    'PRECOMPUTE': {
+        # Prévisions précalculées hors requête (python manage.py precompute_forecasts)
+        'HORIZONS': [7, 14, 30],
+        'INTERVAL': config('FORECAST_PRECOMPUTE_INTERVAL', default=3600, cast=int),
+        # Plus long que l'intervalle : le cache ne se vide pas entre deux passages
+        'CACHE_TIMEOUT': config('FORECAST_PRECOMPUTE_CACHE_TIMEOUT', default=3 * 3600, cast=int),
+    },
+    'ARIMA_ENGINE': {
+        # Ordre ARIMA choisi hors requête (python manage.py select_arima_orders)
+        'HISTORY_DAYS': 180,
+        'SELECTION_INTERVAL': config('ARIMA_SELECTION_INTERVAL', default=24 * 3600, cast=int),
+        'SELECTION_WORKERS': config('ARIMA_SELECTION_WORKERS', default=0, cast=int),  # 0 = nombre de cœurs
+        # Entre deux réajustements, les nouveaux jours sont filtrés avec les paramètres enregistrés
+        'REFIT_INTERVAL_DAYS': 7,
+    },
+    # Durée de cache du panel historique partagé par tous les groupes sanguins
+    'HISTORY_PANEL_TIMEOUT': 300,
     'BLOOD_TYPES': ['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-'],
     'CONFIDENCE_THRESHOLDS': {
         'high': 0.8,
@@ -507,6 +548,49 @@ BLOOD_BANK_SETTINGS = {
     'AUTO_BACKUP_FREQUENCY': config('AUTO_BACKUP_FREQUENCY', default='daily'),
     'DATA_RETENTION_MONTHS': config('DATA_RETENTION_MONTHS', default=24, cast=int),
 
+    # Moteur d'alertes du dashboard (app/alerts.py)
+    'ALERTS': {
+        'LOW_STOCK_UNITS': 5,  # unités disponibles par groupe sanguin
+        'CRITICAL_STOCK_UNITS': 2,
+        'EXPIRING_DAYS': 3,
+        'EXPIRING_CRITICAL_DAYS': 1,
+        'DETAIL_LIMIT': 20,  # demandes urgentes détaillées dans la synthèse, le reste est résumé
+        'PAGE_SIZE': 50,  # détail paginé (?type=expiring|urgent_request&cursor=...)
+        'MAX_PAGE_SIZE': 500,
+        'SNAPSHOT_TIMEOUT': 900,  # filet de sécurité pour les écritures sans signaux
+        'PUSH_ON_WRITE': config('ALERTS_PUSH_ON_WRITE', default=True, cast=bool),
+    },
+
+    # Import CSV en flux (app/data_import.py)
+    'DATA_IMPORT': {
+        'CHUNK_ROWS': config('IMPORT_CHUNK_ROWS', default=5000, cast=int),  # lignes par transaction
+        'BATCH_SIZE': 1000,  # bulk_create
+        # octets (500 Mo par défaut) ; 0 = pas de limite, déconseillé : l'endpoint d'import est ouvert
+        'MAX_FILE_SIZE': config('IMPORT_MAX_FILE_SIZE', default=500 * 1024 * 1024, cast=int),
+        'VALIDATION_SAMPLE_ROWS': 1000,  # lignes examinées par la validation avant import
+        'MAX_ERROR_SAMPLES': 100,  # messages conservés, le total reste compté
+        'STALE_AFTER_SECONDS': 300,  # import 'Running' sans progression : reprise autorisée
+        # Tâche Celery run_data_import : à activer seulement si un worker tourne
+        # (deploy_render.sh n'en démarre pas), sinon l'import resterait 'Pending'
+        'ASYNC': config('IMPORT_ASYNC', default=False, cast=bool),
+    },
+
+    # Balayage des unités périmées (app/expiry.py, tâche sweep_expired_units)
+    'EXPIRY_SWEEP': {
+        'INTERVAL': config('EXPIRY_SWEEP_INTERVAL', default=3600, cast=int),  # secondes
+    },
+
+    # Création en lot (POST d'une liste sur les endpoints CRUD)
+    'BULK_CREATE': {
+        'MAX_ITEMS': 1000,  # objets par requête
+        'BATCH_SIZE': 500,  # bulk_create (donneurs, patients, sites)
+    },
+
+    # Exports de rapports en flux (app/exports.py)
+    'EXPORTS': {
+        'CHUNK_SIZE': config('EXPORT_CHUNK_SIZE', default=2000, cast=int),  # lignes lues et écrites par bloc
+    },
+
     # Notification settings
     'NOTIFICATION_SETTINGS': {
         'LOW_STOCK_ALERTS': config('NOTIFY_LOW_STOCK', default=True, cast=bool),
@@ -541,6 +625,32 @@ BLOOD_BANK_SETTINGS = {
     }
 }
 
+# ==================== CELERY ====================
+# Tâches planifiées (celery -A bloodbank worker --beat). Le worker n'est pas
+# démarré par deploy_render.sh : sans lui, prévisions et balayage des unités
+# périmées ne sont calculés qu'au déploiement, et IMPORT_ASYNC doit rester à False.
+
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_TIMEZONE = TIME_ZONE
+CELERY_ENABLE_UTC = True
+
+CELERY_BEAT_SCHEDULE = {
+    'precompute-forecasts': {
+        'task': 'app.tasks.precompute_forecasts',
+        'schedule': float(AI_FORECASTING_CONFIG['PRECOMPUTE']['INTERVAL']),
+    },
+    'select-arima-orders': {
+        'task': 'app.tasks.select_arima_orders',
+        'schedule': float(AI_FORECASTING_CONFIG['ARIMA_ENGINE']['SELECTION_INTERVAL']),
+    },
+    'sweep-expired-units': {
+        'task': 'app.tasks.sweep_expired_units',
+        'schedule': float(BLOOD_BANK_SETTINGS['EXPIRY_SWEEP']['INTERVAL']),
+    },
+}
+
 # ==================== EMAIL CONFIGURATION ====================
 # Enhanced email settings
 
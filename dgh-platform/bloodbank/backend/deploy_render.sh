@@ -54,9 +54,8 @@ echo "✅ Mémoire optimisée"
 # ==================== DJANGO SETUP ====================
 echo "⚙️ Configuration Django..."
 
-# Migrations automatiques
+# Migrations versionnées (app/migrations couvre tout le schéma)
 echo "🔄 Migrations Django..."
-python manage.py makemigrations --noinput 2>/dev/null || true
 python manage.py migrate --noinput || echo "⚠️ Migrations avec avertissements"
 
 # Fichiers statiques
@@ -544,6 +543,16 @@ EOF
 
 echo "✅ Données de production générées"
 
+# Unités périmées (ensuite balayées par Celery beat, si un worker tourne)
+python manage.py sweep_expired_units || echo "⚠️ Unités périmées non balayées"
+
+# Agrégats journaliers (DailyDemandStat) à partir des tables brutes, après la
+# génération (bulk_create, sans signaux)
+python manage.py backfill_daily_stats || echo "⚠️ Agrégats journaliers non reconstruits"
+
+# Prévisions précalculées (ensuite rafraîchies par Celery beat, si un worker tourne)
+python manage.py precompute_forecasts || echo "⚠️ Prévisions non précalculées"
+
 # ==================== VÉRIFICATIONS FINALES ====================
 echo "🔍 Vérifications finales..."
 
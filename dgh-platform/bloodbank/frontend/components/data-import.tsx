@@ -23,7 +23,7 @@ import {
   Clock,
   BarChart3,
 } from "lucide-react"
-import { useImportCSV, useValidateCSV, useDownloadTemplate, useFileValidation } from "@/lib/hooks/useApi"
+import { useImportCSV, useValidateCSV, useDownloadTemplate, useFileValidation, MAX_IMPORT_FILE_SIZE_MB } from "@/lib/hooks/useApi"
 import { toast } from "sonner"
 
 export function DataImport() {
@@ -133,7 +133,10 @@ export function DataImport() {
   const getValidationStatusText = () => {
     if (validating) return "Validation en cours..."
     if (!validationResult) return "En attente de validation"
-    if (validationResult.valid) return `Fichier valide (${validationResult.valid_rows}/${validationResult.total_rows} lignes)`
+    if (validationResult.valid) {
+      const scope = validationResult.sampled ? ' vérifiées sur un échantillon' : ''
+      return `Fichier valide (${validationResult.valid_rows}/${validationResult.total_rows} lignes${scope})`
+    }
     return `Erreurs détectées (${validationResult.errors?.length || 0})`
   }
 
@@ -207,7 +210,7 @@ export function DataImport() {
             <div>
               <h4 className="font-semibold mb-3">Points Importants:</h4>
               <ul className="text-sm space-y-2 text-muted-foreground">
-                <li>• Taille maximum: 10MB</li>
+                <li>• Gros fichiers acceptés jusqu'à {MAX_IMPORT_FILE_SIZE_MB}MB (import par lots, reprise possible)</li>
                 <li>• Encodage: UTF-8 recommandé</li>
                 <li>• Les doublons seront ignorés</li>
                 <li>• Validation automatique avant import</li>
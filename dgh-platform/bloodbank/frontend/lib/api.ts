@@ -268,6 +268,11 @@ export interface ImportResult {
   warnings?: string[]
   skipped_records?: number
   processing_time?: number
+  import_id?: string
+  status?: 'Pending' | 'Running' | 'Completed' | 'Failed'
+  progress?: number
+  rows_processed?: number
+  rows_per_second?: number | null
   summary?: {
     donors_created: number
     blood_units_created: number
@@ -283,7 +288,19 @@ export interface ValidationResult {
   preview: any[]
   total_rows: number
   valid_rows: number
+  sampled?: boolean  // seules les premières lignes ont été vérifiées
 }
+
+// Début du fichier envoyé pour la validation avant import
+const VALIDATION_SAMPLE_BYTES = 1024 * 1024
+
+// Premières lignes complètes du fichier (coupé à la dernière fin de ligne)
+const csvSample = async (file: File): Promise<File> => {
+  const text = await file.slice(0, VALIDATION_SAMPLE_BYTES).text()
+  const end = text.lastIndexOf('\n')
+  return new File([end >= 0 ? text.slice(0, end + 1) : text], file.name, { type: 'text/csv' })
+}
+
 // ======================
 // API SERVICE
 // ======================
@@ -617,7 +634,7 @@ export const apiService = {
         headers: {
           'Content-Type': 'multipart/form-data',
         },
-        timeout: 120000, // 2 minutes pour les gros fichiers
+        timeout: 30 * 60 * 1000, // 30 minutes : téléversement des gros fichiers
         onUploadProgress: (progressEvent) => {
           const percentCompleted = Math.round(
             (progressEvent.loaded * 100) / (progressEvent.total || 1)
@@ -626,6 +643,12 @@ export const apiService = {
         },
       })
 
+      // Import confié à un worker : suivre l'avancement jusqu'à la fin
+      if (response.status === 202 && response.data.import_id) {
+        console.log('⏳ Import queued:', response.data.import_id)
+        return await apiService.waitForImport(response.data.import_id)
+      }
+
       console.log('✅ Import successful:', response.data)
       return response.data
     } catch (error: any) {
@@ -633,7 +656,7 @@ export const apiService = {
 
       // Gestion spécifique des erreurs d'import
       if (error.response?.status === 413) {
-        throw new Error('Fichier trop volumineux (max 10MB)')
+        throw new Error('Fichier trop volumineux pour le serveur')
       }
 
       if (error.response?.status === 415) {
@@ -648,9 +671,45 @@ export const apiService = {
     }
   },
 
+  // 'Failed' est final : un import qui sera réessayé par le worker repasse en 'Pending'
+  async waitForImport(
+    importId: string,
+    intervalMs = 2000,
+    stallTimeoutMs = 10 * 60 * 1000, // sans progression (aucun worker disponible ?)
+    timeoutMs = 2 * 60 * 60 * 1000
+  ): Promise<ImportResult> {
+    const deadline = Date.now() + timeoutMs
+    let lastState = ''
+    let lastChange = Date.now()
+
+    while (Date.now() < deadline) {
+      const response = await api.get(`/data/imports/history/${importId}/`)
+      const result: ImportResult = response.data
+
+      if (result.status === 'Completed' || result.status === 'Failed') {
+        console.log(`✅ Import ${importId} ${result.status}:`, result)
+        return result
+      }
+
+      const state = `${result.status}:${result.rows_processed ?? 0}`
+      if (state !== lastState) {
+        lastState = state
+        lastChange = Date.now()
+      } else if (Date.now() - lastChange > stallTimeoutMs) {
+        throw new Error(`Import ${importId} sans progression : suivez-le dans l'historique des imports`)
+      }
+
+      console.log(`📊 Import progress: ${result.progress ?? 0}% (${result.rows_processed ?? 0} lignes)`)
+      await new Promise((resolve) => setTimeout(resolve, intervalMs))
+    }
+    throw new Error(`Import ${importId} toujours en cours : suivez-le dans l'historique des imports`)
+  },
+
   async validateCSVData(file: File): Promise<ValidationResult> {
+    // Le serveur ne vérifie que l'en-tête et les premières lignes : inutile d'envoyer tout le fichier
+    const sampled = file.size > VALIDATION_SAMPLE_BYTES
     const formData = new FormData()
-    formData.append('csv_file', file)
+    formData.append('csv_file', sampled ? await csvSample(file) : file)
 
     try {
       const response = await api.post('/data/validate/', formData, {
@@ -660,7 +719,7 @@ export const apiService = {
         timeout: 60000, // 1 minute pour la validation
       })
 
-      return response.data
+      return { ...response.data, sampled: sampled || response.data.sampled }
     } catch (error: any) {
       console.error('❌ Validation failed:', error)
       throw new Error(handleApiError(error))
@@ -896,36 +896,43 @@ export const useClearCache = () => {
 }
 
 
+// Taille maximale d'un import (Mo), alignée sur DATA_IMPORT.MAX_FILE_SIZE du backend
+export const MAX_IMPORT_FILE_SIZE_MB = Number(process.env.NEXT_PUBLIC_IMPORT_MAX_FILE_SIZE_MB) || 500
+
 export const useFileValidation = () => {
-  return {
-    validateFileSize: (file: File, maxSizeMB: number = 10) => {
-      const maxSizeBytes = maxSizeMB * 1024 * 1024
-      if (file.size > maxSizeBytes) {
-        throw new Error(`Fichier trop volumineux. Taille max: ${maxSizeMB}MB`)
-      }
-      return true
-    },
+  const validateFileSize = (file: File, maxSizeMB: number = MAX_IMPORT_FILE_SIZE_MB) => {
+    const maxSizeBytes = maxSizeMB * 1024 * 1024
+    if (file.size > maxSizeBytes) {
+      throw new Error(`Fichier trop volumineux. Taille max: ${maxSizeMB}MB`)
+    }
+    return true
+  }
 
-    validateFileType: (file: File, allowedTypes: string[] = ['text/csv']) => {
-      if (!allowedTypes.includes(file.type) && !file.name.endsWith('.csv')) {
-        throw new Error('Format de fichier non supporté. Utilisez uniquement des fichiers CSV.')
-      }
-      return true
-    },
+  const validateFileType = (file: File, allowedTypes: string[] = ['text/csv']) => {
+    if (!allowedTypes.includes(file.type) && !file.name.endsWith('.csv')) {
+      throw new Error('Format de fichier non supporté. Utilisez uniquement des fichiers CSV.')
+    }
+    return true
+  }
 
-    validateFileName: (file: File) => {
-      const nameRegex = /^[a-zA-Z0-9._-]+\.csv$/
-      if (!nameRegex.test(file.name)) {
-        throw new Error('Nom de fichier invalide. Utilisez uniquement des lettres, chiffres, points, tirets et underscores.')
-      }
-      return true
-    },
+  const validateFileName = (file: File) => {
+    const nameRegex = /^[a-zA-Z0-9._-]+\.csv$/
+    if (!nameRegex.test(file.name)) {
+      throw new Error('Nom de fichier invalide. Utilisez uniquement des lettres, chiffres, points, tirets et underscores.')
+    }
+    return true
+  }
+
+  return {
+    validateFileSize,
+    validateFileType,
+    validateFileName,
 
     validateFile: (file: File) => {
       try {
-        this.validateFileType(file)
-        this.validateFileSize(file)
-        this.validateFileName(file)
+        validateFileType(file)
+        validateFileSize(file)
+        validateFileName(file)
         return { valid: true, errors: [] }
       } catch (error) {
         return {